@@ -0,0 +1,101 @@
+from fastapi import APIRouter, HTTPException
+from app.schemas.equity import (
+    EquityRequest,
+    EquityResponse,
+    PlayerEquity,
+    RangeEquityRequest,
+    RangeEquityResponse,
+)
+from app.core.config import settings
+from functools import lru_cache
+import logging
+
+# Configure logging for this module
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+# The calculators pull in numpy and the rank tables, so they are built on the
+# first equity request instead of when the API starts
+@lru_cache(maxsize=None)
+def get_calculator():
+    from app.services.equity import EquityCalculator
+
+    return EquityCalculator(exhaustive_limit=settings.EQUITY_EXHAUSTIVE_LIMIT)
+
+
+@lru_cache(maxsize=None)
+def get_range_calculator():
+    from app.services.equity import RangeEquityCalculator
+
+    return RangeEquityCalculator(
+        exhaustive_limit=settings.EQUITY_EXHAUSTIVE_LIMIT,
+        cache_size=settings.RANGE_EQUITY_CACHE_SIZE
+    )
+
+
+@router.post("/", response_model=EquityResponse)
+def calculate_equity(request: EquityRequest):
+    """Win/tie percentages for each player's hole cards on a partial board"""
+    logger.info(f"Calculating equity for {len(request.hole_cards)} players on board '{request.board}'")
+    iterations = min(request.iterations or settings.EQUITY_DEFAULT_ITERATIONS, settings.EQUITY_MAX_ITERATIONS)
+    time_budget_ms = min(request.time_budget_ms or settings.EQUITY_TIME_BUDGET_MS, settings.EQUITY_TIME_BUDGET_MS)
+    try:
+        result = get_calculator().calculate(
+            hole_cards=request.hole_cards,
+            board=request.board,
+            iterations=iterations,
+            time_budget_ms=time_budget_ms,
+            seed=request.seed
+        )
+    except ValueError as e:
+        logger.warning(f"Invalid equity request: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+    logger.info(f"Equity computed by {result.method} over {result.samples} runouts in {result.elapsed_seconds:.3f}s")
+    return EquityResponse(
+        players=[
+            PlayerEquity(win=win, tie=tie, equity=equity)
+            for win, tie, equity in zip(result.win, result.tie, result.equity)
+        ],
+        method=result.method,
+        samples=result.samples,
+        elapsed_seconds=result.elapsed_seconds
+    )
+
+
+@router.post("/ranges", response_model=RangeEquityResponse)
+def calculate_range_equity(request: RangeEquityRequest):
+    """Equity of one hand range against another, within a latency budget"""
+    logger.info(f"Calculating range equity '{request.hero_range}' vs '{request.villain_range}' on board '{request.board}'")
+    iterations = min(request.iterations or settings.RANGE_EQUITY_DEFAULT_ITERATIONS, settings.EQUITY_MAX_ITERATIONS)
+    time_budget_ms = min(request.time_budget_ms or settings.EQUITY_TIME_BUDGET_MS, settings.EQUITY_TIME_BUDGET_MS)
+    try:
+        result = get_range_calculator().calculate(
+            hero_range=request.hero_range,
+            villain_range=request.villain_range,
+            board=request.board,
+            iterations=iterations,
+            time_budget_ms=time_budget_ms,
+            seed=request.seed
+        )
+    except ValueError as e:
+        logger.warning(f"Invalid range equity request: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+    logger.info(
+        f"Range equity computed by {result.method} over {result.samples} runouts "
+        f"in {result.elapsed_seconds:.3f}s (cached={result.cached})"
+    )
+    return RangeEquityResponse(
+        hero=PlayerEquity(win=result.win[0], tie=result.tie[0], equity=result.equity[0]),
+        villain=PlayerEquity(win=result.win[1], tie=result.tie[1], equity=result.equity[1]),
+        hero_combos=result.combos[0],
+        villain_combos=result.combos[1],
+        matchups=result.matchups,
+        method=result.method,
+        samples=result.samples,
+        elapsed_seconds=result.elapsed_seconds,
+        cached=result.cached
+    )
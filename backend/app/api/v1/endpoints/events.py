@@ -0,0 +1,97 @@
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect
+from typing import Dict, List, Set, Tuple
+from app.services.hand_events import HANDS_CHANNEL, Subscriber, hand_events, parse_channels
+from app.core.config import settings
+import anyio
+import json
+import logging
+
+# Configure logging for this module
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+async def _send_events(websocket: WebSocket, subscriber: Subscriber) -> None:
+    while True:
+        await websocket.send_text(await subscriber.next_message())
+
+
+def _parse_command(text: str, current: Set[str]) -> Tuple[List[str], List[str]]:
+    """Channels to add and remove from a {"subscribe": [...], "unsubscribe": [...]} message"""
+    command = json.loads(text)
+    if not isinstance(command, dict):
+        raise ValueError("Commands must be JSON objects")
+    subscribe = command.get("subscribe") or []
+    unsubscribe = command.get("unsubscribe") or []
+    if not isinstance(subscribe, list) or not isinstance(unsubscribe, list):
+        raise ValueError('"subscribe" and "unsubscribe" take lists of channels')
+    unsubscribe = [str(name) for name in unsubscribe]
+    added = parse_channels(",".join(map(str, subscribe)), settings.EVENTS_MAX_CHANNELS) if subscribe else []
+    if len((current | set(added)) - set(unsubscribe)) > settings.EVENTS_MAX_CHANNELS:
+        raise ValueError(f"At most {settings.EVENTS_MAX_CHANNELS} channels per connection")
+    return added, [name for name in unsubscribe if name in current]
+
+
+async def _receive_commands(websocket: WebSocket, subscriber: Subscriber) -> None:
+    while True:
+        text = await websocket.receive_text()
+        try:
+            added, removed = _parse_command(text, subscriber.channels)
+        except ValueError as e:
+            # Replies go through the queue: only the sender task writes to the socket
+            subscriber.deliver(json.dumps({"type": "error", "detail": str(e)}))
+            continue
+        hand_events.add_channels(subscriber, added)
+        hand_events.remove_channels(subscriber, removed)
+        subscriber.deliver(json.dumps({"type": "subscribed", "channels": sorted(subscriber.channels)}))
+
+
+@router.websocket("/ws")
+async def hand_events_socket(
+    websocket: WebSocket,
+    channels: str = Query(HANDS_CHANNEL, description='Comma-separated channels: "hands" and/or "table:<id>"')
+):
+    """Push newly saved hands ("hands") and live hand updates ("table:<id>").
+
+    Events are JSON text frames ``{"type", "channel", "data"}``. A client
+    that cannot keep up loses its oldest queued events and is sent a
+    ``{"type": "dropped", "count": n}`` frame instead; it should then re-fetch
+    over REST.
+    """
+    try:
+        names = parse_channels(channels, settings.EVENTS_MAX_CHANNELS)
+    except ValueError as e:
+        logger.warning(f"Rejected event subscription: {e}")
+        await websocket.close(code=1008, reason=str(e))
+        return
+
+    await websocket.accept()
+    subscriber = hand_events.subscribe(names)
+    logger.info(f"Event subscriber connected to {names}")
+    subscriber.deliver(json.dumps({"type": "subscribed", "channels": sorted(subscriber.channels)}))
+
+    async def run(handler) -> None:
+        # Whichever side finishes first (usually the client disconnecting) ends the connection
+        try:
+            await handler(websocket, subscriber)
+        except WebSocketDisconnect:
+            pass
+        except Exception as e:
+            logger.error(f"Event connection failed: {e}")
+        finally:
+            tasks.cancel_scope.cancel()
+
+    try:
+        async with anyio.create_task_group() as tasks:
+            tasks.start_soon(run, _send_events)
+            tasks.start_soon(run, _receive_commands)
+    finally:
+        hand_events.unsubscribe(subscriber)
+        logger.info("Event subscriber disconnected")
+
+
+@router.get("/stats")
+def get_event_stats() -> Dict[str, int]:
+    """Push subscribers, channels and published/dropped event counts for this process"""
+    return hand_events.stats()
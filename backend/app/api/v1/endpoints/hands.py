@@ -1,10 +1,35 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
-from app.schemas.hand import PokerHandCreate, PokerHandResponse, PokerHandUpdate
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+from app.schemas.hand import (
+    PokerHandCreate,
+    PokerHandResponse,
+    PokerHandUpdate,
+    PokerHandBatchResult,
+    PokerHandBatchResponse,
+    HandImportResponse,
+    LiveHandCreate,
+    LiveHandResponse,
+)
 from app.models.hand import PokerHand
 from app.repositories.hand_repository import HandRepository
-from app.services.poker_engine import PokerEngine
-from app.core.db import db_manager
+from app.repositories.async_hand_repository import AsyncHandRepository
+from app.services.hand_export import HandExporter, PhhExport
+from app.services.hand_history import FORMATS, HandHistoryError, aiter_records, aiter_stream_lines
+from app.services.hand_import import HandImporter
+from app.services.settlement_executor import SettlementUnavailableError, settlement_executor
+from app.services.hand_cache import CachedHandRepository, hand_cache
+from app.services.hand_writer import hand_writer
+from app.services.live_hands import LiveHand, LiveHandError, live_hands
+from app.services.hand_events import HANDS_CHANNEL, hand_events, table_channel
+from app.core.storage import create_async_hand_repository, create_hand_repository, ensure_database
+from app.core.config import settings
+from app.core.metrics import stage
+import json
+import time
 import logging
 
 # Configure logging for this module
@@ -14,15 +39,82 @@ router = APIRouter()
 
 
 def get_hand_repository() -> HandRepository:
-    return HandRepository(db_manager)
+    ensure_database()
+    return create_hand_repository()
 
 
-@router.post("/", response_model=PokerHandResponse)
-def create_hand(
-    hand_data: PokerHandCreate,
-    repository: HandRepository = Depends(get_hand_repository)
+def get_async_hand_repository() -> AsyncHandRepository:
+    # Sync on purpose: the first request creates the tables on a worker thread
+    ensure_database()
+    # Reads by ID go through the hand cache; saves invalidate it
+    return CachedHandRepository(create_async_hand_repository(), hand_cache)
+
+
+def _hand_json(hand: PokerHand) -> str:
+    return PokerHandResponse(
+        id=hand.id,
+        stacks=hand.stacks,
+        dealer_index=hand.dealer_index,
+        small_blind_index=hand.small_blind_index,
+        big_blind_index=hand.big_blind_index,
+        actions=hand.actions,
+        hole_cards=hand.hole_cards,
+        board=hand.board,
+        winnings=hand.winnings,
+        structure=hand.structure.to_dict() if hand.structure else None,
+        created_at=hand.created_at
+    ).model_dump_json()
+
+
+def _hand_response(hand: PokerHand) -> Response:
+    """Serialize a hand straight to JSON, timed as the serialization stage"""
+    with stage("serialization"):
+        body = _hand_json(hand)
+    return Response(content=body, media_type="application/json")
+
+
+def _publish_saved(hands: List[PokerHand]) -> None:
+    """Push newly saved hands to hand history subscribers"""
+    if not hands or not hand_events.has_subscribers(HANDS_CHANNEL):
+        return
+    with stage("serialization"):
+        data = "[" + ",".join(_hand_json(hand) for hand in hands) + "]"
+    hand_events.publish(HANDS_CHANNEL, "hands_saved", data)
+
+
+def _publish_live(snapshot: Dict[str, Any]) -> None:
+    """Push a live hand's new state to its table's subscribers"""
+    table_id = snapshot["table_id"]
+    if table_id is None or not hand_events.has_subscribers(table_channel(table_id)):
+        return
+    with stage("serialization"):
+        data = LiveHandResponse(**snapshot).model_dump_json()
+    hand_events.publish(table_channel(table_id), "live_hand", data)
+
+
+@router.post(
+    "/",
+    response_model=PokerHandResponse,
+    # The body is validated in the handler so validation time can be measured
+    openapi_extra={"requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": PokerHandCreate.model_json_schema()}}
+    }}
+)
+async def create_hand(
+    request: Request,
+    repository: AsyncHandRepository = Depends(get_async_hand_repository)
 ):
     """Create a new poker hand and calculate winnings"""
+    body = await request.body()
+    with stage("validation"):
+        try:
+            hand_data = PokerHandCreate.model_validate_json(body)
+        except ValidationError as e:
+            raise RequestValidationError(
+                [{**error, "loc": ("body", *error["loc"])} for error in e.errors()]
+            )
+
     logger.info(f"Creating new poker hand with {len(hand_data.stacks)} players")
     try:
         # Create hand from input data
@@ -33,61 +125,339 @@ def create_hand(
             big_blind_index=hand_data.big_blind_index,
             actions=hand_data.actions,
             hole_cards=hand_data.hole_cards,
-            board=hand_data.board
+            board=hand_data.board,
+            structure=hand_data.structure.to_structure()
         )
         logger.debug(f"PokerHand object created with ID: {hand.id}")
         
         # Calculate winnings using poker engine
         try:
-            logger.debug("Calculating winnings using poker engine")
-            final_stacks, winnings = PokerEngine.calculate_winnings(
-                hole_cards=hand.hole_cards,
-                board_cards=hand.board,
-                actions=hand.actions,
-                starting_stacks=hand.stacks
-            )
-            hand.winnings = winnings
-            logger.info(f"Winnings calculated successfully: {winnings}")
+            logger.debug("Calculating winnings using settlement workers")
+            with stage("settlement"):
+                # Also works out the per-seat stats kept in player_stats
+                await settlement_executor.settle_hands([hand])
+            logger.info(f"Winnings calculated successfully: {hand.winnings}")
+        except SettlementUnavailableError as e:
+            # Not the hand's fault: refuse it rather than store zeroed winnings
+            logger.error(f"Settlement unavailable, hand not saved: {e}")
+            raise HTTPException(status_code=503, detail=f"Settlement is unavailable: {str(e)}")
         except Exception as e:
             # If poker calculation fails, set winnings to zero
             logger.warning(f"Poker calculation failed: {e}")
             logger.exception("Poker calculation error details:")
             hand.winnings = [0] * len(hand.stacks)
         
-        # Save to database
+        # Save to database, through the write-behind queue when it is enabled
         logger.debug("Saving hand to database")
-        saved_hand = repository.save(hand)
+        saved_hand = await hand_writer.save(hand, repository)
         logger.info(f"Hand saved successfully with ID: {saved_hand.id}")
+        _publish_saved([saved_hand])
         
-        return PokerHandResponse(
-            id=saved_hand.id,
-            stacks=saved_hand.stacks,
-            dealer_index=saved_hand.dealer_index,
-            small_blind_index=saved_hand.small_blind_index,
-            big_blind_index=saved_hand.big_blind_index,
-            actions=saved_hand.actions,
-            hole_cards=saved_hand.hole_cards,
-            board=saved_hand.board,
-            winnings=saved_hand.winnings,
-            created_at=saved_hand.created_at
-        )
+        return _hand_response(saved_hand)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to create hand: {e}")
         logger.exception("Hand creation error details:")
         raise HTTPException(status_code=400, detail=f"Failed to create hand: {str(e)}")
 
 
+async def _ingest_chunk(
+    chunk: List[Tuple[int, Any]],
+    repository: AsyncHandRepository
+) -> List[PokerHandBatchResult]:
+    """Validate, settle and persist one chunk of a batch with a single multi-row insert"""
+    results: Dict[int, PokerHandBatchResult] = {}
+    pending: List[Tuple[int, PokerHand]] = []
+
+    for index, payload in chunk:
+        try:
+            with stage("validation"):
+                hand_data = PokerHandCreate.model_validate(payload)
+        except ValidationError as e:
+            logger.warning(f"Batch item {index} failed validation: {e}")
+            results[index] = PokerHandBatchResult(index=index, error=f"Invalid hand: {e}")
+            continue
+
+        hand = PokerHand(
+            stacks=hand_data.stacks,
+            dealer_index=hand_data.dealer_index,
+            small_blind_index=hand_data.small_blind_index,
+            big_blind_index=hand_data.big_blind_index,
+            actions=hand_data.actions,
+            hole_cards=hand_data.hole_cards,
+            board=hand_data.board,
+            structure=hand_data.structure.to_structure()
+        )
+        pending.append((index, hand))
+
+    if pending:
+        try:
+            with stage("settlement"):
+                await settlement_executor.settle_hands([hand for _, hand in pending])
+        except SettlementUnavailableError as e:
+            # Earlier chunks may already be committed, so these hands fail individually
+            logger.error(f"Settlement unavailable, batch chunk of {len(pending)} hands not saved: {e}")
+            for index, _ in pending:
+                results[index] = PokerHandBatchResult(index=index, error=f"Settlement is unavailable: {str(e)}")
+            return [results[index] for index, _ in chunk]
+        except Exception as e:
+            # Same fallback as the single-hand endpoint
+            logger.warning(f"Poker calculation failed for batch chunk: {e}")
+            for _, hand in pending:
+                hand.winnings = [0] * len(hand.stacks)
+
+        try:
+            await repository.save_many([hand for _, hand in pending])
+            for index, hand in pending:
+                results[index] = PokerHandBatchResult(
+                    index=index,
+                    id=hand.id,
+                    winnings=hand.winnings,
+                    structure=hand.structure.to_dict() if hand.structure else None,
+                    created_at=hand.created_at
+                )
+            _publish_saved([hand for _, hand in pending])
+        except Exception as e:
+            logger.error(f"Failed to persist batch chunk of {len(pending)} hands: {e}")
+            for index, _ in pending:
+                results[index] = PokerHandBatchResult(index=index, error=f"Failed to save hand: {str(e)}")
+
+    return [results[index] for index, _ in chunk]
+
+
+async def _iter_batch_payloads(request: Request):
+    """Yield (index, payload) pairs from a JSON array body or an NDJSON stream"""
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        index = 0
+        buffer = b""
+        async for data in request.stream():
+            buffer += data
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield index, _parse_ndjson_line(index, line)
+                    index += 1
+        if buffer.strip():
+            yield index, _parse_ndjson_line(index, buffer)
+        return
+
+    try:
+        payloads = json.loads(await request.body())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON body: {str(e)}")
+    if not isinstance(payloads, list):
+        raise HTTPException(status_code=400, detail="Batch body must be a JSON array of hands")
+    for index, payload in enumerate(payloads):
+        yield index, payload
+
+
+def _parse_ndjson_line(index: int, line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        # Reported as a per-hand validation error rather than failing the batch
+        logger.warning(f"Batch item {index} is not valid JSON: {e}")
+        return None
+
+
+@router.post("/batch", response_model=PokerHandBatchResponse)
+async def create_hands_batch(
+    request: Request,
+    repository: AsyncHandRepository = Depends(get_async_hand_repository)
+):
+    """Create many poker hands at once from a JSON array or an NDJSON stream"""
+    logger.info("Starting batch hand ingestion")
+    started = time.perf_counter()
+    results: List[PokerHandBatchResult] = []
+    chunk: List[Tuple[int, Any]] = []
+
+    async for index, payload in _iter_batch_payloads(request):
+        if index >= settings.BATCH_MAX_HANDS:
+            # Earlier chunks may already be committed, so the overflow is reported
+            # once, on the first hand past the limit, and the rest is not read
+            results.append(PokerHandBatchResult(
+                index=index,
+                error=f"Batch exceeds the maximum of {settings.BATCH_MAX_HANDS} hands; "
+                      f"this hand and the rest of the body were not read"
+            ))
+            break
+        chunk.append((index, payload))
+        if len(chunk) >= settings.BATCH_CHUNK_SIZE:
+            results.extend(await _ingest_chunk(chunk, repository))
+            chunk = []
+    if chunk:
+        results.extend(await _ingest_chunk(chunk, repository))
+    results.sort(key=lambda result: result.index)
+
+    elapsed = time.perf_counter() - started
+    saved = sum(1 for result in results if result.error is None)
+    failed = len(results) - saved
+    hands_per_second = saved / elapsed if elapsed > 0 else 0.0
+    logger.info(
+        f"Batch ingestion finished: {saved} saved, {failed} failed "
+        f"in {elapsed:.3f}s ({hands_per_second:.1f} hands/s)"
+    )
+    return PokerHandBatchResponse(
+        results=results,
+        saved=saved,
+        failed=failed,
+        elapsed_seconds=elapsed,
+        hands_per_second=hands_per_second
+    )
+
+
+@router.post("/import", response_model=HandImportResponse)
+async def import_hands(
+    request: Request,
+    format: str = Query("auto", pattern=f"^(auto|{'|'.join(FORMATS)})$", description="Hand history format of the body"),
+    repository: AsyncHandRepository = Depends(get_async_hand_repository)
+):
+    """Import a PokerStars or PHH hand history file streamed as the request body"""
+    logger.info(f"Starting hand history import ({format})")
+    records = aiter_records(aiter_stream_lines(request.stream()), None if format == "auto" else format)
+    importer = HandImporter(repository, on_saved=_publish_saved)
+    try:
+        totals = await importer.run(records)
+    except HandHistoryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    logger.info(
+        f"Hand history import finished: {totals['imported']} imported, {totals['failed']} failed "
+        f"in {totals['elapsed_seconds']:.3f}s ({totals['hands_per_second']:.1f} hands/s)"
+    )
+    return HandImportResponse(**totals)
+
+
+async def _save_if_finished(live: LiveHand, repository: AsyncHandRepository) -> None:
+    """Persist a live hand once it is over and stop tracking it"""
+    if not live.finished:
+        return
+    live.finish()
+    try:
+        saved_hand = await hand_writer.save(live.hand, repository)
+    except Exception as e:
+        # Kept open so the client can retry with an empty action list
+        logger.error(f"Failed to save finished live hand {live.hand.id}: {e}")
+        logger.exception("Live hand save error details:")
+        raise HTTPException(status_code=503, detail=f"Hand finished but could not be saved: {str(e)}")
+    live_hands.close(live.hand.id)
+    logger.info(f"Live hand {saved_hand.id} finished with winnings {saved_hand.winnings}")
+    _publish_saved([saved_hand])
+
+
+@router.post("/live", response_model=LiveHandResponse)
+async def open_live_hand(
+    hand_data: LiveHandCreate,
+    repository: AsyncHandRepository = Depends(get_async_hand_repository)
+):
+    """Deal a new hand whose state is kept server-side between actions"""
+    logger.info(f"Opening live hand with {len(hand_data.stacks)} players")
+    hand = PokerHand(
+        stacks=hand_data.stacks,
+        dealer_index=hand_data.dealer_index,
+        small_blind_index=hand_data.small_blind_index,
+        big_blind_index=hand_data.big_blind_index,
+        actions=hand_data.actions,
+        hole_cards=hand_data.hole_cards,
+        board="",
+        structure=hand_data.structure.to_structure()
+    )
+    with stage("live_action"):
+        try:
+            live = live_hands.open(hand, hand_data.table_id)
+        except LiveHandError as e:
+            logger.warning(f"Could not open live hand: {e}")
+            raise HTTPException(status_code=400, detail=str(e))
+    async with live.lock:
+        await _save_if_finished(live, repository)
+        snapshot = live.snapshot()
+        # Published under the lock so subscribers see updates in order
+        _publish_live(snapshot)
+        return snapshot
+
+
+@router.get("/live/stats")
+def get_live_hand_stats() -> Dict[str, int]:
+    """Open, finished and expired live hand counts for this process"""
+    return live_hands.stats()
+
+
+@router.get("/live/{hand_id}", response_model=LiveHandResponse)
+def get_live_hand(hand_id: str):
+    """Current state of a live hand"""
+    live = live_hands.get(hand_id)
+    if live is None:
+        raise HTTPException(status_code=404, detail="Live hand not found")
+    return live.snapshot()
+
+
+@router.post("/live/{hand_id}/actions", response_model=LiveHandResponse)
+async def apply_live_actions(
+    hand_id: str,
+    update: PokerHandUpdate,
+    repository: AsyncHandRepository = Depends(get_async_hand_repository)
+):
+    """Apply new actions to a live hand; the hand is saved when it finishes.
+
+    Only ``actions`` may be sent: hole cards are dealt when the hand opens
+    and board cards arrive as flop/turn/river actions.
+    """
+    if update.hole_cards is not None or update.board is not None:
+        raise HTTPException(status_code=400, detail="Live hands only accept actions; deal board cards as actions")
+    live = live_hands.get(hand_id)
+    if live is None:
+        raise HTTPException(status_code=404, detail="Live hand not found")
+
+    async with live.lock:
+        with stage("live_action"):
+            try:
+                live.apply(update.actions or [])
+            except LiveHandError as e:
+                logger.warning(f"Rejected actions for live hand {hand_id}: {e}")
+                raise HTTPException(status_code=400, detail=str(e))
+        await _save_if_finished(live, repository)
+        snapshot = live.snapshot()
+        _publish_live(snapshot)
+        return snapshot
+
+
 @router.get("/", response_model=List[PokerHandResponse])
-def get_hands(
-    repository: HandRepository = Depends(get_hand_repository)
+async def get_hands(
+    response: Response,
+    limit: int = Query(settings.HANDS_PAGE_DEFAULT_LIMIT, ge=1, le=settings.HANDS_PAGE_MAX_LIMIT),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    seat: Optional[int] = Query(None, ge=0, description="Only hands this seat took part in"),
+    created_after: Optional[datetime] = Query(None),
+    created_before: Optional[datetime] = Query(None),
+    min_winnings: Optional[int] = Query(None, description="Minimum winnings for the seat (or the biggest winner)"),
+    cards: Optional[str] = Query(None, pattern="^([2-9TJQKA][cdhs]){1,2}$", description="Hole cards one player held, e.g. AsKd or As"),
+    repository: AsyncHandRepository = Depends(get_async_hand_repository)
 ):
-    """Get all poker hands"""
-    logger.info("Retrieving all poker hands")
+    """Get a page of poker hands, newest first.
+
+    The cursor for the next page is returned in the X-Next-Cursor header.
+    """
+    logger.info(f"Retrieving page of poker hands (limit={limit}, cursor={cursor})")
     try:
-        logger.debug("Calling repository.get_all()")
-        hands = repository.get_all()
+        logger.debug("Calling repository.get_page()")
+        try:
+            hands, next_cursor = await repository.get_page(
+                limit=limit,
+                cursor=cursor,
+                seat=seat,
+                created_after=created_after,
+                created_before=created_before,
+                min_winnings=min_winnings,
+                cards=cards
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         logger.info(f"Successfully retrieved {len(hands)} hands from database")
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
         
         # Convert to response models
         response_hands = []
@@ -103,6 +473,7 @@ def get_hands(
                     hole_cards=hand.hole_cards,
                     board=hand.board,
                     winnings=hand.winnings,
+                    structure=hand.structure.to_dict() if hand.structure else None,
                     created_at=hand.created_at
                 )
                 response_hands.append(response_hand)
@@ -114,39 +485,102 @@ def get_hands(
         logger.info(f"Successfully converted {len(response_hands)} hands to response models")
         return response_hands
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to get hands: {e}")
         logger.exception("Get hands error details:")
         raise HTTPException(status_code=500, detail=f"Failed to get hands: {str(e)}")
 
 
+@router.get("/export")
+def export_hands(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    created_after: Optional[datetime] = Query(None),
+    created_before: Optional[datetime] = Query(None),
+    repository: HandRepository = Depends(get_hand_repository)
+):
+    """Stream the hand history as NDJSON or CSV with flat memory use"""
+    logger.info(f"Starting {format} export of hands")
+    batches = repository.iter_batches(
+        batch_size=settings.EXPORT_FETCH_SIZE,
+        created_after=created_after,
+        created_before=created_before
+    )
+    if format == "csv":
+        return StreamingResponse(
+            HandExporter.iter_csv(batches),
+            media_type="text/csv",
+            headers={"Content-Disposition": "attachment; filename=hands.csv"}
+        )
+    return StreamingResponse(
+        HandExporter.iter_ndjson(batches),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": "attachment; filename=hands.ndjson"}
+    )
+
+
+@router.get("/export/phh")
+async def export_hands_phh(
+    format: str = Query("tar", pattern="^(tar|ndjson)$"),
+    verify: bool = Query(False, description="Replay every exported hand and flag stored winnings that disagree"),
+    created_after: Optional[datetime] = Query(None),
+    created_before: Optional[datetime] = Query(None),
+    repository: AsyncHandRepository = Depends(get_async_hand_repository)
+):
+    """Stream the hand history as PHH documents in a tarball or as NDJSON"""
+    logger.info(f"Starting PHH {format} export of hands{' with verification' if verify else ''}")
+    export = PhhExport(
+        repository.iter_batches(
+            batch_size=settings.EXPORT_FETCH_SIZE,
+            created_after=created_after,
+            created_before=created_before
+        ),
+        verify=verify
+    )
+    if format == "ndjson":
+        return StreamingResponse(
+            HandExporter.aiter_phh_ndjson(export),
+            media_type="application/x-ndjson",
+            headers={"Content-Disposition": "attachment; filename=hands.phh.ndjson"}
+        )
+    return StreamingResponse(
+        HandExporter.aiter_phh_tar(export),
+        media_type="application/gzip",
+        headers={"Content-Disposition": "attachment; filename=hands.phh.tar.gz"}
+    )
+
+
+@router.get("/cache/stats")
+def get_hand_cache_stats() -> Dict[str, Any]:
+    """Hit ratio and occupancy of the hand cache"""
+    logger.debug("Hand cache stats endpoint called")
+    return hand_cache.stats()
+
+
+@router.get("/writer/stats")
+def get_hand_writer_stats() -> Dict[str, Any]:
+    """Queue depth and group commit sizes of the write-behind hand writer"""
+    return hand_writer.stats()
+
+
 @router.get("/{hand_id}", response_model=PokerHandResponse)
-def get_hand(
+async def get_hand(
     hand_id: str,
-    repository: HandRepository = Depends(get_hand_repository)
+    repository: AsyncHandRepository = Depends(get_async_hand_repository)
 ):
     """Get a specific poker hand"""
     logger.info(f"Retrieving poker hand with ID: {hand_id}")
     try:
         logger.debug(f"Calling repository.get_by_id({hand_id})")
-        hand = repository.get_by_id(hand_id)
+        # Hands acknowledged on enqueue can be read before their commit
+        hand = hand_writer.pending(hand_id) or await repository.get_by_id(hand_id)
         if not hand:
             logger.warning(f"Hand not found with ID: {hand_id}")
             raise HTTPException(status_code=404, detail="Hand not found")
         
         logger.info(f"Successfully retrieved hand with ID: {hand_id}")
-        return PokerHandResponse(
-            id=hand.id,
-            stacks=hand.stacks,
-            dealer_index=hand.dealer_index,
-            small_blind_index=hand.small_blind_index,
-            big_blind_index=hand.big_blind_index,
-            actions=hand.actions,
-            hole_cards=hand.hole_cards,
-            board=hand.board,
-            winnings=hand.winnings,
-            created_at=hand.created_at
-        )
+        return _hand_response(hand)
     except HTTPException:
         raise
     except Exception as e:
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends, HTTPException, Path
+from app.schemas.player import PlayerStatsResponse
+from app.repositories.async_hand_repository import AsyncHandRepository
+from app.services.player_stats import summarize
+from app.core.storage import create_async_hand_repository, ensure_database
+import logging
+
+# Configure logging for this module
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+def get_async_hand_repository() -> AsyncHandRepository:
+    ensure_database()
+    return create_async_hand_repository()
+
+
+@router.get("/{seat}/stats", response_model=PlayerStatsResponse)
+async def get_player_stats(
+    seat: int = Path(..., ge=0),
+    repository: AsyncHandRepository = Depends(get_async_hand_repository)
+):
+    """VPIP, PFR, 3-bet, aggression factor, showdown win rate and net winnings for a seat.
+
+    Percentages are null until the seat has hands (or spots) to base them on.
+    """
+    logger.info(f"Retrieving stats for seat {seat}")
+    try:
+        totals = await repository.get_player_stats(seat)
+    except Exception as e:
+        logger.error(f"Failed to get stats for seat {seat}: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to get player stats: {str(e)}")
+    return summarize(seat, totals)
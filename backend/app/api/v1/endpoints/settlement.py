@@ -0,0 +1,16 @@
+from fastapi import APIRouter
+from typing import Any, Dict
+from app.services.settlement_executor import settlement_executor
+import logging
+
+# Configure logging for this module
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.get("/stats")
+def get_settlement_stats() -> Dict[str, Any]:
+    """Worker count, queue depth and latency of the settlement pool"""
+    logger.debug("Settlement stats endpoint called")
+    return settlement_executor.stats()
@@ -1,5 +1,9 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import hands
+from app.api.v1.endpoints import equity, events, hands, players, settlement
 
 api_router = APIRouter()
-api_router.include_router(hands.router, prefix="/hands", tags=["hands"])
\ No newline at end of file
+api_router.include_router(hands.router, prefix="/hands", tags=["hands"])
+api_router.include_router(players.router, prefix="/players", tags=["players"])
+api_router.include_router(settlement.router, prefix="/settlement", tags=["settlement"])
+api_router.include_router(equity.router, prefix="/equity", tags=["equity"])
+api_router.include_router(events.router, prefix="/events", tags=["events"])
\ No newline at end of file
@@ -0,0 +1,207 @@
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import AsyncGenerator, Dict, Optional
+from app.core.config import settings
+from app.core.db import db_manager
+from app.core.metrics import STAGE_SECONDS
+import asyncio
+import asyncpg
+import time
+import logging
+
+# Configure logging for this module
+logger = logging.getLogger(__name__)
+
+
+class AsyncDatabaseManager:
+    """asyncpg connection pool for ``async def`` routes.
+
+    Connections are not pinged on checkout. Instead a background task
+    periodically checks the connections that are sitting idle in the pool
+    and replaces any that have gone away, so request paths never pay an
+    extra round trip.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: str,
+        password: str,
+        database: str,
+        min_size: int = 1,
+        max_size: int = 10,
+        max_inactive_seconds: float = 300.0,
+        health_check_interval: float = 30.0,
+        command_timeout: Optional[float] = None
+    ):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.database = database
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_inactive_seconds = max_inactive_seconds
+        self.health_check_interval = health_check_interval
+        self.command_timeout = command_timeout
+
+        self._pool: Optional[asyncpg.Pool] = None
+        self._pool_lock: Optional[asyncio.Lock] = None
+        self._health_task: Optional[asyncio.Task] = None
+        self.waiters = 0
+
+    async def connect(self) -> asyncpg.Pool:
+        """Create the pool (once) and start idle health checking"""
+        if self._pool is not None:
+            return self._pool
+        if self._pool_lock is None:
+            self._pool_lock = asyncio.Lock()
+        async with self._pool_lock:
+            if self._pool is None:
+                logger.info(f"Creating asyncpg pool (min={self.min_size}, max={self.max_size})")
+                try:
+                    self._pool = await asyncpg.create_pool(
+                        host=self.host,
+                        port=self.port,
+                        user=self.user,
+                        password=self.password,
+                        database=self.database,
+                        min_size=self.min_size,
+                        max_size=self.max_size,
+                        max_inactive_connection_lifetime=self.max_inactive_seconds,
+                        command_timeout=self.command_timeout
+                    )
+                except Exception as e:
+                    logger.error(f"Failed to create asyncpg pool: {e}")
+                    logger.exception("Async pool creation error details:")
+                    raise e
+                if self.health_check_interval > 0:
+                    self._health_task = asyncio.create_task(self._health_check_loop())
+                logger.info("asyncpg pool created successfully")
+        return self._pool
+
+    async def close(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+        if self._pool is not None:
+            try:
+                await self._pool.close()
+                logger.info("asyncpg pool closed successfully")
+            except Exception as e:
+                logger.error(f"Error closing asyncpg pool: {e}")
+                logger.exception("Async pool closure error details:")
+            self._pool = None
+        # The lock belongs to the event loop that is shutting down
+        self._pool_lock = None
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncGenerator[asyncpg.Connection, None]:
+        """Check a connection out of the pool for the duration of the block.
+
+        Time spent waiting for the connection is recorded as the ``pool_wait``
+        stage and time holding it as the ``query`` stage.
+        """
+        pool = await self.connect()
+        started = time.perf_counter()
+        self.waiters += 1
+        try:
+            conn = await pool.acquire()
+        finally:
+            self.waiters -= 1
+        acquired = time.perf_counter()
+        STAGE_SECONDS.labels("pool_wait").observe(acquired - started)
+        try:
+            yield conn
+        finally:
+            STAGE_SECONDS.labels("query").observe(time.perf_counter() - acquired)
+            await pool.release(conn)
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncGenerator[asyncpg.Connection, None]:
+        """Check out a connection and run the block in a transaction"""
+        async with self.acquire() as conn:
+            async with conn.transaction():
+                yield conn
+
+    @staticmethod
+    def to_db_timestamp(value: datetime) -> datetime:
+        """Parameter value for a TIMESTAMP column; aware values are converted to naive UTC.
+
+        asyncpg cannot encode an aware datetime for a column without a time
+        zone, where psycopg2 would let the server convert it.
+        """
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+    async def check_idle_connections(self) -> int:
+        """Ping the connections currently idle in the pool; returns how many were replaced.
+
+        A connection that fails the ping is terminated, and the pool opens a
+        fresh one the next time that slot is acquired.
+        """
+        pool = self._pool
+        if pool is None:
+            return 0
+        # Hold every checked connection until the end; a released connection
+        # goes back on top of the pool's queue and would be handed out again
+        checked = []
+        replaced = 0
+        try:
+            for _ in range(pool.get_idle_size()):
+                try:
+                    checked.append(await pool.acquire(timeout=0.1))
+                except asyncio.TimeoutError:
+                    # Requests took the remaining connections
+                    break
+            for conn in checked:
+                try:
+                    await conn.fetchval("SELECT 1", timeout=5)
+                except Exception as e:
+                    logger.warning(f"Idle connection failed health check, replacing it: {e}")
+                    conn.terminate()
+                    replaced += 1
+        finally:
+            for conn in checked:
+                await pool.release(conn)
+        return replaced
+
+    async def _health_check_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            try:
+                await self.check_idle_connections()
+            except Exception as e:
+                logger.error(f"Idle connection health check failed: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        size = self._pool.get_size() if self._pool is not None else 0
+        idle = self._pool.get_idle_size() if self._pool is not None else 0
+        return {
+            "size": size,
+            "idle": idle,
+            "in_use": size - idle,
+            "waiters": self.waiters,
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+        }
+
+
+# Talks to the same database as the psycopg2 manager
+async_db_manager = AsyncDatabaseManager(
+    host=db_manager.DB_HOST,
+    port=db_manager.DB_PORT,
+    user=db_manager.DB_USER,
+    password=db_manager.DB_PASSWORD,
+    database=db_manager.DB_NAME,
+    min_size=settings.DB_POOL_MIN_SIZE,
+    max_size=settings.DB_POOL_MAX_SIZE,
+    max_inactive_seconds=settings.DB_POOL_MAX_INACTIVE_SECONDS,
+    health_check_interval=settings.DB_POOL_HEALTH_CHECK_INTERVAL
+)
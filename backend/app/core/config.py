@@ -5,26 +5,94 @@ from pathlib import Path
 
 # Get the project root directory (parent of backend/)
 project_root = Path(__file__).parent.parent.parent
-print(f"Looking for .env file at: {project_root / '.env'}")
-print(f"File exists: {(project_root / '.env').exists()}")
 
-# Load .env file
+# Load .env file; variables already set in the environment take precedence
 dotenv.load_dotenv(project_root / ".env")
 
-# Debug: Print all relevant environment variables
-print("Environment variables after loading .env:")
-print(f"DB_HOST: {os.getenv('DB_HOST')}")
-print(f"DB_PORT: {os.getenv('DB_PORT')}")
-print(f"POSTGRES_USER: {os.getenv('POSTGRES_USER')}")
-print(f"POSTGRES_PASSWORD: {os.getenv('POSTGRES_PASSWORD')}")
-print(f"POSTGRES_DB: {os.getenv('POSTGRES_DB')}")
-
 class Settings:
     DB_HOST: str = os.getenv("DB_HOST")
-    DB_PORT: int = int(os.getenv("DB_PORT"))
+    DB_PORT: int = int(os.getenv("DB_PORT", "5432"))
     DB_USER: str = os.getenv("POSTGRES_USER")
     DB_PASSWORD: str = os.getenv("POSTGRES_PASSWORD")
     DB_NAME: str = os.getenv("POSTGRES_DB")
+
+    # Connection pools
+    DB_POOL_MIN_SIZE: int = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+    DB_POOL_MAX_SIZE: int = int(os.getenv("DB_POOL_MAX_SIZE", "20"))
+    DB_POOL_MAX_INACTIVE_SECONDS: float = float(os.getenv("DB_POOL_MAX_INACTIVE_SECONDS", "300"))
+    DB_POOL_HEALTH_CHECK_INTERVAL: float = float(os.getenv("DB_POOL_HEALTH_CHECK_INTERVAL", "30"))
+    # Create tables, open the pools and warm the settlement workers before serving;
+    # otherwise each happens on first use and a worker is ready without the database
+    EAGER_STARTUP: bool = os.getenv("EAGER_STARTUP", "false").lower() in ("1", "true", "yes")
+
+    # Storage backend: "postgres", "sqlite" (embedded, WAL mode) or "duckdb" (embedded, for analytics)
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "postgres")
+    SQLITE_PATH: str = os.getenv("SQLITE_PATH", "poker.sqlite3")
+    DUCKDB_PATH: str = os.getenv("DUCKDB_PATH", "poker.duckdb")
+
+    # Hand row storage: "binary" keeps only the encoded hand_data column,
+    # "both" also fills the legacy text/integer array columns
+    HAND_STORAGE: str = os.getenv("HAND_STORAGE", "binary")
+
+    # Hand writes: "direct" commits each hand in its request; "flush" and "enqueue"
+    # queue hands for group commits and acknowledge after the commit or on enqueue
+    HAND_WRITE_MODE: str = os.getenv("HAND_WRITE_MODE", "direct")
+    HAND_WRITE_MAX_BATCH: int = int(os.getenv("HAND_WRITE_MAX_BATCH", "500"))
+    HAND_WRITE_MAX_DELAY_MS: float = float(os.getenv("HAND_WRITE_MAX_DELAY_MS", "5"))
+    HAND_WRITE_QUEUE_SIZE: int = int(os.getenv("HAND_WRITE_QUEUE_SIZE", "10000"))
+
+    # Postgres rows per seat in player_stats; each connection adds to its own
+    # (pg_backend_pid() % shards) so concurrent saves do not queue on one row
+    PLAYER_STATS_SHARDS: int = int(os.getenv("PLAYER_STATS_SHARDS", "32"))
+
+    # Batch ingestion
+    BATCH_MAX_HANDS: int = int(os.getenv("BATCH_MAX_HANDS", "50000"))
+    BATCH_CHUNK_SIZE: int = int(os.getenv("BATCH_CHUNK_SIZE", "1000"))
+
+    # Hand history import (PokerStars text and PHH): hands settled and saved at a
+    # time, and how many per-record errors a response lists
+    IMPORT_BATCH_SIZE: int = int(os.getenv("IMPORT_BATCH_SIZE", "2000"))
+    IMPORT_MAX_ERRORS: int = int(os.getenv("IMPORT_MAX_ERRORS", "100"))
+
+    # Hand listing pagination
+    HANDS_PAGE_DEFAULT_LIMIT: int = int(os.getenv("HANDS_PAGE_DEFAULT_LIMIT", "100"))
+    HANDS_PAGE_MAX_LIMIT: int = int(os.getenv("HANDS_PAGE_MAX_LIMIT", "1000"))
+
+    # Hand settlement engine: "fast", "pokerkit" or "verify"
+    SETTLEMENT_ENGINE: str = os.getenv("SETTLEMENT_ENGINE", "fast")
+
+    # Settlement worker processes (0 settles on the thread pool instead)
+    SETTLEMENT_WORKERS: int = int(os.getenv("SETTLEMENT_WORKERS", str(os.cpu_count() or 1)))
+    SETTLEMENT_START_METHOD: str = os.getenv("SETTLEMENT_START_METHOD", "spawn")
+
+    # Rank table file mapped by every process (empty: app/data/rank_tables.bin)
+    RANK_TABLE_PATH: str = os.getenv("RANK_TABLE_PATH", "")
+
+    # Equity calculator: enumerate runouts up to the limit, otherwise sample within budget
+    EQUITY_EXHAUSTIVE_LIMIT: int = int(os.getenv("EQUITY_EXHAUSTIVE_LIMIT", "200000"))
+    EQUITY_DEFAULT_ITERATIONS: int = int(os.getenv("EQUITY_DEFAULT_ITERATIONS", "100000"))
+    EQUITY_MAX_ITERATIONS: int = int(os.getenv("EQUITY_MAX_ITERATIONS", "1000000"))
+    EQUITY_TIME_BUDGET_MS: int = int(os.getenv("EQUITY_TIME_BUDGET_MS", "250"))
+    # Range vs range: sampled runouts when the board is not far enough along to enumerate
+    RANGE_EQUITY_DEFAULT_ITERATIONS: int = int(os.getenv("RANGE_EQUITY_DEFAULT_ITERATIONS", "5000"))
+    RANGE_EQUITY_CACHE_SIZE: int = int(os.getenv("RANGE_EQUITY_CACHE_SIZE", "1024"))
+
+    # Hand cache for GET /hands/{id}: "memory", "redis" or "none"
+    HAND_CACHE_BACKEND: str = os.getenv("HAND_CACHE_BACKEND", "memory")
+    HAND_CACHE_MAX_SIZE: int = int(os.getenv("HAND_CACHE_MAX_SIZE", "10000"))
+    HAND_CACHE_TTL_SECONDS: float = float(os.getenv("HAND_CACHE_TTL_SECONDS", "3600"))
+    HAND_CACHE_REDIS_URL: str = os.getenv("HAND_CACHE_REDIS_URL", "redis://localhost:6379/0")
+
+    # Live hands kept in memory between actions
+    LIVE_HAND_MAX_OPEN: int = int(os.getenv("LIVE_HAND_MAX_OPEN", "10000"))
+    LIVE_HAND_TTL_SECONDS: float = float(os.getenv("LIVE_HAND_TTL_SECONDS", "3600"))
+
+    # WebSocket push events: per-connection queue before old events are dropped
+    EVENTS_QUEUE_SIZE: int = int(os.getenv("EVENTS_QUEUE_SIZE", "256"))
+    EVENTS_MAX_CHANNELS: int = int(os.getenv("EVENTS_MAX_CHANNELS", "16"))
+
+    # Streaming export
+    EXPORT_FETCH_SIZE: int = int(os.getenv("EXPORT_FETCH_SIZE", "5000"))
     
     @property
     def database_url(self) -> str:
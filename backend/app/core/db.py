@@ -1,8 +1,12 @@
 import psycopg2
 from psycopg2.extras import RealDictCursor
-from psycopg2.pool import SimpleConnectionPool
+from psycopg2.pool import ThreadedConnectionPool
 from contextlib import contextmanager
 from typing import Generator
+from app.core.config import settings
+from app.core.metrics import STAGE_SECONDS
+import threading
+import time
 import os
 import logging
 
@@ -19,9 +23,10 @@ class DatabaseManager:
         self.DB_PASSWORD = "4>pQxt6_,&HGGXQ(k9t.(A#hhK.fwSBS"
         self.DB_NAME = "pokerdb"
         
-        # Create a connection pool
+        # The pool is opened on first use, so importing this module never
+        # waits on the network
         self._pool = None
-        self._init_pool()
+        self._pool_lock = threading.Lock()
         
         logger.info("Database manager initialized")
         logger.info(f"DB_HOST: {self.DB_HOST}")
@@ -32,9 +37,10 @@ class DatabaseManager:
     def _init_pool(self):
         """Initialize the connection pool"""
         try:
-            self._pool = SimpleConnectionPool(
-                minconn=1,
-                maxconn=10,
+            # Routes run on a thread pool, so the pool itself must be thread-safe
+            self._pool = ThreadedConnectionPool(
+                minconn=settings.DB_POOL_MIN_SIZE,
+                maxconn=settings.DB_POOL_MAX_SIZE,
                 host=self.DB_HOST,
                 port=self.DB_PORT,
                 user=self.DB_USER,
@@ -51,28 +57,21 @@ class DatabaseManager:
     def get_connection(self):
         """Get a connection from the pool"""
         if self._pool is None:
-            logger.warning("Connection pool is None, attempting to reinitialize")
-            self._init_pool()
+            with self._pool_lock:
+                if self._pool is None:
+                    logger.info("Opening database connection pool")
+                    self._init_pool()
         
         try:
             conn = self._pool.getconn()
-            # Test if connection is still alive using a simple query instead of ping()
-            try:
-                with conn.cursor() as cursor:
-                    cursor.execute("SELECT 1")
-                    cursor.fetchone()
-                logger.debug("Successfully obtained connection from pool")
-                return conn
-            except Exception as ping_error:
-                logger.warning(f"Connection test failed, closing and getting new connection: {ping_error}")
-                try:
-                    conn.close()
-                except:
-                    pass
-                # Get a fresh connection
+            # Only replace connections already known to be closed; a query
+            # round trip on every checkout costs more than the rare failure
+            if conn.closed:
+                logger.warning("Pooled connection was closed, getting a new connection")
+                self._pool.putconn(conn, close=True)
                 conn = self._pool.getconn()
-                logger.debug("Successfully obtained fresh connection from pool")
-                return conn
+            logger.debug("Successfully obtained connection from pool")
+            return conn
         except Exception as e:
             logger.error(f"Error getting connection from pool: {e}")
             logger.exception("Connection error details:")
@@ -110,12 +109,16 @@ class DatabaseManager:
         conn = None
         try:
             logger.debug("Getting database cursor")
+            started = time.perf_counter()
             conn = self.get_connection()
+            acquired = time.perf_counter()
+            STAGE_SECONDS.labels("pool_wait").observe(acquired - started)
             with conn.cursor() as cursor:
                 logger.debug("Database cursor obtained successfully")
                 yield cursor
                 conn.commit()
                 logger.debug("Database transaction committed successfully")
+            STAGE_SECONDS.labels("query").observe(time.perf_counter() - acquired)
         except Exception as e:
             logger.error(f"Database cursor error: {e}")
             logger.exception("Database cursor error details:")
@@ -130,6 +133,41 @@ class DatabaseManager:
             if conn:
                 self.return_connection(conn)
     
+    @contextmanager
+    def get_server_cursor(self, name: str, itersize: int = 2000) -> Generator:
+        """Yield a named (server-side) cursor so large result sets are streamed, not buffered.
+
+        The connection is held for the lifetime of the cursor and the read
+        transaction is closed when the caller is done iterating.
+        """
+        conn = None
+        try:
+            logger.debug(f"Opening server-side cursor {name}")
+            conn = self.get_connection()
+            with conn.cursor(name=name) as cursor:
+                cursor.itersize = itersize
+                yield cursor
+            conn.commit()
+            logger.debug(f"Server-side cursor {name} closed")
+        except Exception as e:
+            logger.error(f"Server-side cursor error: {e}")
+            logger.exception("Server-side cursor error details:")
+            if conn:
+                try:
+                    conn.rollback()
+                    logger.info("Database transaction rolled back")
+                except Exception as rollback_e:
+                    logger.error(f"Error during rollback: {rollback_e}")
+            raise e
+        except GeneratorExit:
+            # Consumer stopped early (e.g. client disconnected mid-stream)
+            if conn:
+                conn.rollback()
+            raise
+        finally:
+            if conn:
+                self.return_connection(conn)
+    
     def init_db(self):
         """Initialize database tables"""
         logger.info("Initializing database tables")
@@ -149,17 +187,123 @@ class DatabaseManager:
                         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                     )
                 """)
+                # Compact encoding of the whole hand (see app.services.hand_codec)
+                cursor.execute("ALTER TABLE hands ADD COLUMN IF NOT EXISTS hand_data BYTEA")
+                # Keyset pagination walks (created_at, id) newest first
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_hands_created_at_id
+                    ON hands (created_at DESC, id DESC)
+                """)
+                # Normalized per-seat and per-action rows, written alongside hands
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS hand_players (
+                        hand_id VARCHAR(36) NOT NULL REFERENCES hands (id) ON DELETE CASCADE,
+                        seat INTEGER NOT NULL,
+                        hole_cards TEXT,
+                        cards TEXT[],
+                        starting_stack INTEGER,
+                        winnings INTEGER,
+                        PRIMARY KEY (hand_id, seat)
+                    )
+                """)
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_hand_players_seat_winnings
+                    ON hand_players (seat, winnings)
+                """)
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_hand_players_winnings
+                    ON hand_players (winnings)
+                """)
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_hand_players_cards
+                    ON hand_players USING GIN (cards)
+                """)
+                # Per-seat stat counters (see app.services.player_stats); NULL
+                # on rows written before they existed until the rebuild job runs
+                cursor.execute("""
+                    ALTER TABLE hand_players
+                    ADD COLUMN IF NOT EXISTS vpip SMALLINT,
+                    ADD COLUMN IF NOT EXISTS pfr SMALLINT,
+                    ADD COLUMN IF NOT EXISTS three_bet_chances SMALLINT,
+                    ADD COLUMN IF NOT EXISTS three_bets SMALLINT,
+                    ADD COLUMN IF NOT EXISTS aggressive_actions SMALLINT,
+                    ADD COLUMN IF NOT EXISTS calls SMALLINT,
+                    ADD COLUMN IF NOT EXISTS showdowns SMALLINT,
+                    ADD COLUMN IF NOT EXISTS showdowns_won SMALLINT
+                """)
+                # Running totals per seat, kept up to date as hands are saved. A
+                # seat's totals are split over PLAYER_STATS_SHARDS rows (summed
+                # on read) so concurrent saves do not wait on one another
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS player_stats (
+                        seat INTEGER NOT NULL,
+                        shard SMALLINT NOT NULL DEFAULT 0,
+                        hands BIGINT NOT NULL DEFAULT 0,
+                        vpip BIGINT NOT NULL DEFAULT 0,
+                        pfr BIGINT NOT NULL DEFAULT 0,
+                        three_bet_chances BIGINT NOT NULL DEFAULT 0,
+                        three_bets BIGINT NOT NULL DEFAULT 0,
+                        aggressive_actions BIGINT NOT NULL DEFAULT 0,
+                        calls BIGINT NOT NULL DEFAULT 0,
+                        showdowns BIGINT NOT NULL DEFAULT 0,
+                        showdowns_won BIGINT NOT NULL DEFAULT 0,
+                        net_winnings BIGINT NOT NULL DEFAULT 0,
+                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        PRIMARY KEY (seat, shard)
+                    )
+                """)
+                # Tables created with one row per seat keep it as shard 0
+                cursor.execute("ALTER TABLE player_stats ADD COLUMN IF NOT EXISTS shard SMALLINT NOT NULL DEFAULT 0")
+                cursor.execute("""
+                    SELECT conname FROM pg_constraint
+                    WHERE conrelid = 'player_stats'::regclass AND contype = 'p' AND array_length(conkey, 1) = 1
+                """)
+                row = cursor.fetchone()
+                if row:
+                    cursor.execute(
+                        f'ALTER TABLE player_stats DROP CONSTRAINT "{row["conname"]}", ADD PRIMARY KEY (seat, shard)'
+                    )
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS hand_actions (
+                        hand_id VARCHAR(36) NOT NULL REFERENCES hands (id) ON DELETE CASCADE,
+                        seq INTEGER NOT NULL,
+                        action TEXT NOT NULL,
+                        kind CHAR(1) NOT NULL,
+                        PRIMARY KEY (hand_id, seq)
+                    )
+                """)
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_hand_actions_kind
+                    ON hand_actions (kind, hand_id)
+                """)
+                # Resume points of long-running batch jobs (e.g. re-settlement)
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS job_checkpoints (
+                        name VARCHAR(64) PRIMARY KEY,
+                        last_id VARCHAR(36) NOT NULL,
+                        state JSONB,
+                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                """)
                 logger.info("Database tables initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize database tables: {e}")
             logger.exception("Database initialization error details:")
             raise e
     
+    def stats(self) -> dict:
+        """Connections checked out of and idle in the psycopg2 pool"""
+        if self._pool is None:
+            return {"in_use": 0, "idle": 0}
+        # ThreadedConnectionPool keeps no public counters
+        return {"in_use": len(self._pool._used), "idle": len(self._pool._pool)}
+
     def close_pool(self):
         """Close all connections in the pool"""
         if self._pool:
             try:
                 self._pool.closeall()
+                self._pool = None
                 logger.info("Database connection pool closed successfully")
             except Exception as e:
                 logger.error(f"Error closing connection pool: {e}")
@@ -0,0 +1,309 @@
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+from typing import Any, Generator, List, Optional
+from app.core.metrics import STAGE_SECONDS
+import sqlite3
+import threading
+import time
+import logging
+
+# Configure logging for this module
+logger = logging.getLogger(__name__)
+
+# Same tables as the Postgres schema in app.core.db, minus the legacy array
+# columns (an embedded database never held hands saved before hand_data)
+# and the foreign keys (hands are never deleted, and DuckDB has no cascades)
+EMBEDDED_TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS hands (
+        id VARCHAR(36) PRIMARY KEY,
+        dealer_index INTEGER,
+        small_blind_index INTEGER,
+        big_blind_index INTEGER,
+        hand_data BLOB NOT NULL,
+        created_at TIMESTAMP NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS hand_players (
+        hand_id VARCHAR(36) NOT NULL,
+        seat INTEGER NOT NULL,
+        hole_cards TEXT,
+        starting_stack INTEGER,
+        winnings INTEGER,
+        vpip SMALLINT,
+        pfr SMALLINT,
+        three_bet_chances SMALLINT,
+        three_bets SMALLINT,
+        aggressive_actions SMALLINT,
+        calls SMALLINT,
+        showdowns SMALLINT,
+        showdowns_won SMALLINT,
+        PRIMARY KEY (hand_id, seat)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS hand_actions (
+        hand_id VARCHAR(36) NOT NULL,
+        seq INTEGER NOT NULL,
+        action TEXT NOT NULL,
+        kind CHAR(1) NOT NULL,
+        PRIMARY KEY (hand_id, seq)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS player_stats (
+        seat INTEGER PRIMARY KEY,
+        hands BIGINT NOT NULL DEFAULT 0,
+        vpip BIGINT NOT NULL DEFAULT 0,
+        pfr BIGINT NOT NULL DEFAULT 0,
+        three_bet_chances BIGINT NOT NULL DEFAULT 0,
+        three_bets BIGINT NOT NULL DEFAULT 0,
+        aggressive_actions BIGINT NOT NULL DEFAULT 0,
+        calls BIGINT NOT NULL DEFAULT 0,
+        showdowns BIGINT NOT NULL DEFAULT 0,
+        showdowns_won BIGINT NOT NULL DEFAULT 0,
+        net_winnings BIGINT NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS job_checkpoints (
+        name VARCHAR(64) PRIMARY KEY,
+        last_id VARCHAR(36) NOT NULL,
+        state TEXT,
+        updated_at TIMESTAMP
+    )
+    """,
+]
+
+# SQLite looks rows up through B-tree indexes; DuckDB scans columns and
+# prunes with min/max zone maps, so it only gets the primary keys
+SQLITE_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_hands_created_at_id ON hands (created_at DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_hand_players_seat_winnings ON hand_players (seat, winnings)",
+    "CREATE INDEX IF NOT EXISTS idx_hand_players_winnings ON hand_players (winnings)",
+    "CREATE INDEX IF NOT EXISTS idx_hand_actions_kind ON hand_actions (kind, hand_id)",
+]
+
+
+def utc_now() -> datetime:
+    """Naive UTC timestamp, matching the TIMESTAMP columns of the Postgres schema"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class EmbeddedDatabaseManager:
+    """Shared transaction handling of the in-process database backends.
+
+    Each thread gets its own connection, opened on first use. Like
+    ``DatabaseManager.get_cursor`` every ``get_cursor`` block is one
+    transaction, committed on exit and rolled back on error, and rows come
+    back as dicts keyed by column name. Both engines take ``?`` parameters.
+    """
+
+    name = "embedded"
+    indexes: List[str] = []
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._connections: List[Any] = []
+        self._lock = threading.Lock()
+        # Held for the whole of each transaction by backends that need it
+        self._transaction_lock = nullcontext()
+        self.active = 0
+
+    def _connect(self):
+        raise NotImplementedError
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._connect()
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def to_db_timestamp(self, value: datetime):
+        """Parameter value for a TIMESTAMP column; aware values are converted to naive UTC"""
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+    def from_db_timestamp(self, value) -> Optional[datetime]:
+        return value
+
+    @contextmanager
+    def get_cursor(self) -> Generator:
+        connection = self._connection()
+        cursor = connection.cursor()
+        started = time.perf_counter()
+        with self._transaction_lock:
+            STAGE_SECONDS.labels("pool_wait").observe(time.perf_counter() - started)
+            with self._lock:
+                self.active += 1
+            try:
+                cursor.execute("BEGIN TRANSACTION")
+                yield cursor
+                cursor.execute("COMMIT")
+                logger.debug("Embedded database transaction committed successfully")
+                STAGE_SECONDS.labels("query").observe(time.perf_counter() - started)
+            except Exception as e:
+                logger.error(f"Embedded database cursor error: {e}")
+                logger.exception("Embedded database cursor error details:")
+                try:
+                    cursor.execute("ROLLBACK")
+                    logger.info("Embedded database transaction rolled back")
+                except Exception as rollback_e:
+                    logger.error(f"Error during rollback: {rollback_e}")
+                raise e
+            finally:
+                with self._lock:
+                    self.active -= 1
+
+    def init_db(self):
+        """Create the tables (and, for SQLite, the indexes) if they do not exist"""
+        logger.info(f"Initializing {self.name} database at {self.path}")
+        try:
+            with self.get_cursor() as cursor:
+                for statement in EMBEDDED_TABLES + self.indexes:
+                    cursor.execute(statement)
+            logger.info(f"{self.name} database tables initialized successfully")
+        except Exception as e:
+            logger.error(f"Failed to initialize {self.name} database tables: {e}")
+            logger.exception("Database initialization error details:")
+            raise e
+
+    def stats(self) -> dict:
+        """Open per-thread connections, split into those inside a transaction and the rest"""
+        with self._lock:
+            return {"in_use": self.active, "idle": len(self._connections) - self.active}
+
+    def close_pool(self):
+        """Close every per-thread connection"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            try:
+                connection.close()
+            except Exception as e:
+                logger.error(f"Error closing {self.name} connection: {e}")
+        # Threads that still hold a closed connection reopen on next use
+        self._local = threading.local()
+        logger.info(f"Closed {len(connections)} {self.name} connections")
+
+
+def _dict_row(cursor, row) -> dict:
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+class SQLiteDatabaseManager(EmbeddedDatabaseManager):
+    """Single-file SQLite database in WAL mode, for single-node and test deployments.
+
+    WAL lets readers run alongside the one writer; writers wait up to
+    ``busy_timeout`` seconds for each other. The path must be a file, since
+    every thread opens its own connection (":memory:" would give each one a
+    separate, empty database).
+    """
+
+    name = "sqlite"
+    indexes = SQLITE_INDEXES
+
+    def __init__(self, path: str, busy_timeout: float = 30.0):
+        super().__init__(path)
+        self.busy_timeout = busy_timeout
+
+    def _connect(self):
+        # isolation_level=None: get_cursor issues BEGIN/COMMIT itself
+        connection = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout,
+            isolation_level=None,
+            check_same_thread=False
+        )
+        connection.row_factory = _dict_row
+        connection.execute("PRAGMA journal_mode=WAL")
+        # With WAL, NORMAL only syncs at checkpoints: a power loss can drop
+        # the last commits but never corrupts the database
+        connection.execute("PRAGMA synchronous=NORMAL")
+        logger.debug(f"Opened SQLite connection to {self.path}")
+        return connection
+
+    def to_db_timestamp(self, value: datetime) -> str:
+        # Fixed width text, so string order is time order
+        return super().to_db_timestamp(value).strftime("%Y-%m-%d %H:%M:%S.%f")
+
+    def from_db_timestamp(self, value) -> Optional[datetime]:
+        return datetime.fromisoformat(value) if value else None
+
+
+class _DuckDBCursor:
+    """DuckDB cursor that returns rows as dicts, like RealDictCursor"""
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    def cursor(self) -> "_DuckDBCursor":
+        # The per-thread DuckDB cursor is already the connection's own cursor
+        return self
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def execute(self, query: str, params=None):
+        self._connection.execute(query, params)
+        return self
+
+    def executemany(self, query: str, params):
+        self._connection.executemany(query, params)
+        return self
+
+    def _rows(self, rows) -> List[dict]:
+        columns = [column[0] for column in self._connection.description]
+        return [dict(zip(columns, row)) for row in rows]
+
+    def fetchone(self) -> Optional[dict]:
+        row = self._connection.fetchone()
+        return self._rows([row])[0] if row is not None else None
+
+    def fetchall(self) -> List[dict]:
+        return self._rows(self._connection.fetchall())
+
+    def fetchmany(self, size: int) -> List[dict]:
+        return self._rows(self._connection.fetchmany(size))
+
+
+class DuckDBDatabaseManager(EmbeddedDatabaseManager):
+    """Single-file DuckDB database, for analytical scans of the hand archive.
+
+    The database is opened once per process and each thread works on its
+    own cursor of it. DuckDB resolves concurrent writes optimistically, so
+    two saves touching the same player_stats row would abort one another;
+    transactions are run one at a time instead (each scan is still
+    parallelized inside DuckDB). A DuckDB file can only be open read-write
+    in one process at a time. Needs the optional ``duckdb`` package.
+    """
+
+    name = "duckdb"
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._database = None
+        self._transaction_lock = threading.Lock()
+
+    def _connect(self):
+        with self._lock:
+            if self._database is None:
+                import duckdb
+
+                self._database = duckdb.connect(self.path)
+                logger.info(f"Opened DuckDB database at {self.path}")
+            return _DuckDBCursor(self._database.cursor())
+
+    def close_pool(self):
+        super().close_pool()
+        with self._lock:
+            database, self._database = self._database, None
+        if database is not None:
+            database.close()
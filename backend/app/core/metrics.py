@@ -0,0 +1,288 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Generator, Iterable, List, Optional, Sequence, Tuple
+import threading
+import time
+
+# Latency buckets in seconds, from 50µs up to 10s
+DEFAULT_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[LabelValues, object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str):
+        """Return the child for these label values, creating it on first use"""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+    type_name = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def values(self) -> Dict[LabelValues, float]:
+        return {key: child.value for key, child in list(self._children.items())}
+
+    def _samples(self) -> Iterable[str]:
+        for key, child in sorted(self._children.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+
+
+class Gauge(_Metric):
+    """Point-in-time value, read from a callback at scrape time.
+
+    The callback returns either a number (unlabelled gauge) or a mapping of
+    label-value tuples to numbers.
+    """
+    type_name = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        function: Optional[Callable[[], object]] = None
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._function = function
+
+    def set_function(self, function: Callable[[], object]) -> None:
+        self._function = function
+
+    def _samples(self) -> Iterable[str]:
+        if self._function is None:
+            return
+        try:
+            values = self._function()
+        except Exception:
+            # A broken source (e.g. a pool that is not open yet) reports nothing
+            return
+        if not isinstance(values, dict):
+            values = {(): values}
+        for key, value in sorted(values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class _HistogramChild:
+    __slots__ = ("upper_bounds", "counts", "sum", "_lock")
+
+    def __init__(self, upper_bounds: Sequence[float]):
+        self.upper_bounds = upper_bounds
+        self.counts = [0] * (len(upper_bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.upper_bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self) -> Generator[None, None, None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+
+class Histogram(_Metric):
+    """Bucketed distribution of observed values (cumulative buckets on export)"""
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def _samples(self) -> Iterable[str]:
+        for key, child in sorted(self._children.items()):
+            with child._lock:
+                counts = list(child.counts)
+                total = child.sum
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def counters(self) -> List[Counter]:
+        return [metric for metric in self._metrics if isinstance(metric, Counter)]
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+
+registry = MetricsRegistry()
+
+# Where request time goes; see the stage names used by the callers
+STAGE_SECONDS = registry.histogram(
+    "poker_stage_duration_seconds",
+    "Time spent in each request processing stage",
+    ("stage",)
+)
+
+ENGINE_FALLBACKS = registry.counter(
+    "poker_engine_fallbacks_total",
+    "Hands the fast engine handed over to pokerkit",
+    ("reason",)
+)
+ENGINE_ERRORS = registry.counter(
+    "poker_engine_errors_total",
+    "Replays that failed and were settled as zero winnings",
+    ("engine",)
+)
+ENGINE_MISMATCHES = registry.counter(
+    "poker_engine_verify_mismatches_total",
+    "Hands where the fast engine and pokerkit disagreed in verify mode"
+)
+
+DB_POOL_CONNECTIONS = registry.gauge(
+    "poker_db_pool_connections",
+    "Database pool connections by state",
+    ("pool", "state")
+)
+
+
+def stage(name: str):
+    """Context manager timing one request stage into poker_stage_duration_seconds"""
+    return STAGE_SECONDS.labels(name).time()
+
+
+def counter_snapshot() -> Dict[Tuple[str, LabelValues], float]:
+    """Current value of every counter, for shipping deltas out of worker processes"""
+    return {
+        (counter.name, key): value
+        for counter in registry.counters()
+        for key, value in counter.values().items()
+    }
+
+
+def counter_deltas(
+    before: Dict[Tuple[str, LabelValues], float]
+) -> Dict[Tuple[str, LabelValues], float]:
+    after = counter_snapshot()
+    return {
+        key: value - before.get(key, 0.0)
+        for key, value in after.items()
+        if value != before.get(key, 0.0)
+    }
+
+
+def apply_counter_deltas(deltas: Dict[Tuple[str, LabelValues], float]) -> None:
+    """Add counter increments recorded in another process to this process's counters"""
+    counters = {counter.name: counter for counter in registry.counters()}
+    for (name, key), amount in deltas.items():
+        counter = counters.get(name)
+        if counter is not None:
+            counter.labels(*key).inc(amount)
@@ -0,0 +1,92 @@
+from functools import lru_cache
+from app.core.config import settings
+import threading
+import logging
+
+# Configure logging for this module
+logger = logging.getLogger(__name__)
+
+STORAGE_BACKENDS = ("postgres", "sqlite", "duckdb")
+
+# Databases whose tables this process has created, by (backend, location)
+_initialized = set()
+_init_lock = threading.Lock()
+
+
+def storage_backend() -> str:
+    """The STORAGE_BACKEND setting, validated"""
+    backend = settings.STORAGE_BACKEND
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown STORAGE_BACKEND {backend!r} (expected one of {', '.join(STORAGE_BACKENDS)})")
+    return backend
+
+
+def is_embedded() -> bool:
+    return storage_backend() != "postgres"
+
+
+def _embedded_path(backend: str) -> str:
+    return settings.SQLITE_PATH if backend == "sqlite" else settings.DUCKDB_PATH
+
+
+@lru_cache(maxsize=None)
+def _embedded_db_manager(backend: str, path: str):
+    from app.core.embedded_db import DuckDBDatabaseManager, SQLiteDatabaseManager
+
+    logger.info(f"Using embedded {backend} storage at {path}")
+    if backend == "sqlite":
+        return SQLiteDatabaseManager(path)
+    return DuckDBDatabaseManager(path)
+
+
+def get_db_manager():
+    """The synchronous database manager of the configured backend.
+
+    The Postgres managers are only imported when Postgres is the backend,
+    so embedded deployments never open a connection to it.
+    """
+    backend = storage_backend()
+    if backend == "postgres":
+        from app.core.db import db_manager
+
+        return db_manager
+    return _embedded_db_manager(backend, _embedded_path(backend))
+
+
+def ensure_database() -> None:
+    """Create the configured database's tables, once per process.
+
+    Called on the first request that needs them rather than at startup, so a
+    worker can start serving without reaching the database.
+    """
+    backend = storage_backend()
+    key = (backend, _embedded_path(backend) if backend != "postgres" else "")
+    if key in _initialized:
+        return
+    with _init_lock:
+        if key not in _initialized:
+            get_db_manager().init_db()
+            _initialized.add(key)
+
+
+def create_hand_repository():
+    """HandRepository, or its embedded counterpart, for the configured backend"""
+    if is_embedded():
+        from app.repositories.embedded_hand_repository import EmbeddedHandRepository
+
+        return EmbeddedHandRepository(get_db_manager())
+    from app.repositories.hand_repository import HandRepository
+
+    return HandRepository(get_db_manager())
+
+
+def create_async_hand_repository():
+    """AsyncHandRepository, or a thread-backed embedded one, for the configured backend"""
+    if is_embedded():
+        from app.repositories.embedded_hand_repository import AsyncEmbeddedHandRepository
+
+        return AsyncEmbeddedHandRepository(create_hand_repository())
+    from app.core.async_db import async_db_manager
+    from app.repositories.async_hand_repository import AsyncHandRepository
+
+    return AsyncHandRepository(async_db_manager)
@@ -1,8 +1,15 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1.router import api_router
-from app.core.db import db_manager
 from app.core.config import settings
+from app.core.storage import create_async_hand_repository, ensure_database, get_db_manager, is_embedded
+from app.core.metrics import DB_POOL_CONNECTIONS, registry
+from app.services.settlement_executor import settlement_executor
+from app.services.hand_cache import CachedHandRepository, hand_cache
+from app.services.hand_writer import hand_writer
+import asyncio
 import os
 import logging
 
@@ -13,13 +20,80 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+async def _open_database() -> None:
+    """Create the tables and open the async pool now instead of on the first request"""
+    try:
+        logger.info(f"Initializing database ({settings.STORAGE_BACKEND})")
+        await asyncio.to_thread(ensure_database)
+        logger.info("Database initialized successfully")
+    except Exception as e:
+        logger.error(f"Failed to initialize database during startup: {e}")
+        logger.exception("Database startup error details:")
+        raise e
+
+    # Embedded backends run their queries on threads, without an async pool
+    if not is_embedded():
+        try:
+            logger.info("Opening async database pool")
+            from app.core.async_db import async_db_manager
+
+            await async_db_manager.connect()
+        except Exception as e:
+            logger.error(f"Failed to open async database pool during startup: {e}")
+            logger.exception("Async pool startup error details:")
+            raise e
+
+
+async def _start_settlement_pool() -> None:
+    try:
+        await asyncio.to_thread(settlement_executor.start)
+    except Exception as e:
+        # Requests start the pool again on demand
+        logger.warning(f"Settlement pool did not warm up: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop the app's resources.
+
+    By default nothing here reaches the database: the tables are created and
+    the pools opened by the first request that needs them, and the settlement
+    workers warm up in the background. With EAGER_STARTUP the database is
+    initialized and the workers warmed before the first request is accepted.
+    """
+    logger.info("Application startup")
+    if settings.EAGER_STARTUP:
+        await _open_database()
+        await _start_settlement_pool()
+        warm_up = None
+    else:
+        warm_up = asyncio.create_task(_start_settlement_pool())
+
+    # Group commits for new hands when HAND_WRITE_MODE is "flush" or "enqueue"
+    hand_writer.start(CachedHandRepository(create_async_hand_repository(), hand_cache))
+    yield
+
+    logger.info("Application shutdown")
+    # Write out queued hands while the database is still open
+    await hand_writer.stop()
+    if warm_up is not None:
+        await warm_up
+    settlement_executor.shutdown()
+    get_db_manager().close_pool()
+    if not is_embedded():
+        from app.core.async_db import async_db_manager
+
+        await async_db_manager.close()
+
+
 def create_app() -> FastAPI:
     logger.info("Creating FastAPI application")
     try:
         app = FastAPI(
             title="Poker Game API",
             description="API for Texas Hold'em Poker Game",
-            version="1.0.0"
+            version="1.0.0",
+            lifespan=lifespan
         )
         logger.info("FastAPI application created successfully")
         
@@ -32,6 +106,7 @@ def create_app() -> FastAPI:
             allow_credentials=True,
             allow_methods=["*"],
             allow_headers=["*"],
+            expose_headers=["X-Next-Cursor"],
         )
         logger.info("CORS middleware configured successfully")
         
@@ -40,19 +115,29 @@ def create_app() -> FastAPI:
         app.include_router(api_router, prefix="/api/v1")
         logger.info("API router included successfully")
         
-        # Initialize database on startup
-        @app.on_event("startup")
-        async def startup_event():
-            logger.info("Application startup event triggered")
-            try:
-                logger.info("Initializing database")
-                db_manager.init_db()
-                logger.info("Database initialized successfully")
-            except Exception as e:
-                logger.error(f"Failed to initialize database during startup: {e}")
-                logger.exception("Database startup error details:")
-                raise e
-        
+        def pool_connections():
+            # Embedded backends have no async pool; its series stay at zero
+            async_stats = {"in_use": 0, "idle": 0, "waiters": 0}
+            if not is_embedded():
+                from app.core.async_db import async_db_manager
+
+                async_stats = async_db_manager.stats()
+            sync_stats = get_db_manager().stats()
+            return {
+                ("async", "in_use"): async_stats["in_use"],
+                ("async", "idle"): async_stats["idle"],
+                ("async", "waiters"): async_stats["waiters"],
+                ("sync", "in_use"): sync_stats["in_use"],
+                ("sync", "idle"): sync_stats["idle"],
+            }
+
+        DB_POOL_CONNECTIONS.set_function(pool_connections)
+
+        @app.get("/metrics", response_class=PlainTextResponse)
+        async def metrics():
+            """Prometheus text-format metrics"""
+            return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
         @app.get("/")
         async def root():
             logger.debug("Root endpoint called")
@@ -63,7 +148,7 @@ def create_app() -> FastAPI:
             logger.debug("Health check endpoint called")
             try:
                 # Test database connection
-                with db_manager.get_cursor() as cursor:
+                with get_db_manager().get_cursor() as cursor:
                     cursor.execute("SELECT 1")
                     result = cursor.fetchone()
                     if result:
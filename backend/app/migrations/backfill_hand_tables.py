@@ -0,0 +1,30 @@
+"""Backfill hand_players and hand_actions for hands saved before those tables existed.
+
+Usage: python -m app.migrations.backfill_hand_tables [--batch-size N]
+
+Safe to interrupt and rerun: each batch commits on its own and only hands
+without normalized rows are picked up.
+"""
+from app.core.storage import create_hand_repository, get_db_manager
+import argparse
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=1000, help="Hands per transaction")
+    args = parser.parse_args()
+
+    get_db_manager().init_db()
+    total = create_hand_repository().backfill_normalized(batch_size=args.batch_size)
+    logger.info(f"Backfilled normalized rows for {total} hands")
+
+
+if __name__ == "__main__":
+    main()
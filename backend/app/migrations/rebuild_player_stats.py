@@ -0,0 +1,35 @@
+"""Recompute per-seat stats for every saved hand and rebuild the player_stats totals.
+
+Usage: python -m app.migrations.rebuild_player_stats [--batch-size N] [--missing-only]
+
+Run it once after upgrading, so hands saved before the stats existed are
+counted, and again whenever the stat definitions change. Hands saved while
+it runs are counted exactly once.
+"""
+from app.core.storage import create_hand_repository, get_db_manager
+import argparse
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=1000, help="Hands per transaction")
+    parser.add_argument("--missing-only", action="store_true", help="Only replay hands without stats")
+    args = parser.parse_args()
+
+    get_db_manager().init_db()
+    total = create_hand_repository().rebuild_player_stats(
+        batch_size=args.batch_size,
+        missing_only=args.missing_only
+    )
+    logger.info(f"Rebuilt player stats from {total} hands")
+
+
+if __name__ == "__main__":
+    main()
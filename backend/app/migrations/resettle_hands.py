@@ -0,0 +1,198 @@
+"""Recompute the winnings of every stored hand and write back the ones that changed.
+
+Usage: python -m app.migrations.resettle_hands [--batch-size N] [--workers N]
+       [--engine fast|pokerkit|verify] [--dry-run] [--restart] [--report FILE]
+
+Run it after the settlement rules change. Hands are read in id order and
+settled on a pool of worker processes while the next batch is read.
+Corrections and the checkpoint are committed together after every batch,
+so an interrupted run picks up where it stopped (--restart ignores the
+checkpoint). --report appends one JSON line per corrected hand with the
+stored and recomputed winnings.
+
+With HAND_CACHE_BACKEND=redis corrected hands are dropped from the API's
+hand cache as they are committed. The in-process cache (the default) cannot
+be reached from here: restart the API after a run, or GET /hands/{id} keeps
+returning the old winnings for up to HAND_CACHE_TTL_SECONDS.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from app.core.config import settings
+from app.core.storage import create_hand_repository, get_db_manager
+from app.models.hand import PokerHand
+from app.repositories.hand_repository import HandRepository
+from app.services.hand_evaluator import ensure_rank_table_file
+from app.services.poker_engine import SETTLEMENT_ENGINES
+import argparse
+import json
+import multiprocessing
+import time
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_NAME = "resettle_hands"
+
+
+def _init_worker(engine: str) -> None:
+    from app.services.hand_evaluator import get_rank_tables
+
+    settings.SETTLEMENT_ENGINE = engine
+    get_rank_tables()
+
+
+def _resettle(hands: Sequence[PokerHand]) -> List[Tuple[List[int], List[tuple]]]:
+    """Winnings and per-seat stats of each hand under the current rules"""
+    from app.services.player_stats import hand_player_stats
+    from app.services.poker_engine import PokerEngine
+
+    results = []
+    for hand in hands:
+        _, winnings = PokerEngine.settle(hand)
+        results.append((winnings, hand_player_stats(replace(hand, winnings=winnings))))
+    return results
+
+
+def _chunks(hands: List[PokerHand], count: int) -> List[List[PokerHand]]:
+    size = max(1, -(-len(hands) // count))
+    return [hands[i:i + size] for i in range(0, len(hands), size)]
+
+
+def _shared_cache_invalidator() -> Optional[Callable[[List[str]], None]]:
+    """Function dropping hands from the API's hand cache, or None if it is per-process"""
+    if settings.HAND_CACHE_BACKEND != "redis":
+        return None
+    # Optional dependency: only needed when the API caches in Redis
+    import redis
+    from app.services.hand_cache import REDIS_KEY_PREFIX
+
+    client = redis.Redis.from_url(settings.HAND_CACHE_REDIS_URL)
+
+    def invalidate(hand_ids: List[str]) -> None:
+        try:
+            client.delete(*(REDIS_KEY_PREFIX + hand_id for hand_id in hand_ids))
+        except redis.RedisError as e:
+            logger.warning(f"Could not drop {len(hand_ids)} corrected hands from the hand cache: {e}")
+
+    return invalidate
+
+
+def resettle(
+    repository: HandRepository,
+    batch_size: int,
+    workers: int,
+    engine: str,
+    dry_run: bool = False,
+    restart: bool = False,
+    report: Optional[str] = None,
+    invalidate: Optional[Callable[[List[str]], None]] = None
+) -> Dict[str, Any]:
+    """Run the job and return its totals (processed, corrected, elapsed_seconds).
+
+    ``invalidate`` is called with the ids of each committed batch of
+    corrected hands, to drop them from a shared hand cache.
+    """
+    totals = {"processed": 0, "corrected": 0, "elapsed_seconds": 0.0}
+    last_id = ""
+    checkpoint = None if restart or dry_run else repository.get_checkpoint(CHECKPOINT_NAME)
+    if checkpoint:
+        last_id = checkpoint["last_id"]
+        totals.update(checkpoint["state"] or {})
+        logger.info(f"Resuming after hand {last_id} ({totals['processed']} hands already processed)")
+
+    try:
+        ensure_rank_table_file()
+    except OSError as e:
+        logger.warning(f"Could not write rank table file, workers will build tables in memory: {e}")
+
+    report_file = open(report, "a") if report else None
+    started = time.perf_counter() - totals["elapsed_seconds"]
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context(settings.SETTLEMENT_START_METHOD),
+            initializer=_init_worker,
+            initargs=(engine,)
+        ) as pool:
+            batch = repository.get_batch_after(last_id, batch_size)
+            while batch:
+                # Several chunks per worker keep them busy when hands differ in cost
+                futures = [pool.submit(_resettle, chunk) for chunk in _chunks(batch, workers * 4)]
+                # Read the next batch while this one is being settled
+                next_batch = repository.get_batch_after(batch[-1].id, batch_size)
+                results = [result for future in futures for result in future.result()]
+
+                corrected = []
+                for hand, (winnings, stats) in zip(batch, results):
+                    if winnings == hand.winnings:
+                        continue
+                    if report_file:
+                        report_file.write(json.dumps({"id": hand.id, "stored": hand.winnings, "settled": winnings}) + "\n")
+                    hand.winnings = winnings
+                    hand.player_stats = stats
+                    corrected.append(hand)
+
+                totals["processed"] += len(batch)
+                totals["corrected"] += len(corrected)
+                totals["elapsed_seconds"] = time.perf_counter() - started
+                if not dry_run:
+                    repository.update_winnings(corrected, CHECKPOINT_NAME, batch[-1].id, totals)
+                    if invalidate and corrected:
+                        invalidate([hand.id for hand in corrected])
+                logger.info(
+                    f"{totals['processed']} hands processed, {totals['corrected']} corrected "
+                    f"({totals['processed'] / totals['elapsed_seconds']:.0f} hands/s)"
+                )
+                batch = next_batch
+    finally:
+        if report_file:
+            report_file.close()
+
+    if not dry_run:
+        # Finished: the next run starts from the beginning again
+        repository.delete_checkpoint(CHECKPOINT_NAME)
+    return totals
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=2000, help="Hands read and committed at a time")
+    parser.add_argument("--workers", type=int, default=max(1, settings.SETTLEMENT_WORKERS), help="Settlement processes")
+    parser.add_argument("--engine", choices=SETTLEMENT_ENGINES, default=settings.SETTLEMENT_ENGINE)
+    parser.add_argument("--dry-run", action="store_true", help="Report mismatches without writing anything")
+    parser.add_argument("--restart", action="store_true", help="Ignore the saved checkpoint")
+    parser.add_argument("--report", help="Append corrected hands to this NDJSON file")
+    args = parser.parse_args()
+
+    get_db_manager().init_db()
+    invalidate = _shared_cache_invalidator()
+    totals = resettle(
+        create_hand_repository(),
+        batch_size=args.batch_size,
+        workers=args.workers,
+        engine=args.engine,
+        dry_run=args.dry_run,
+        restart=args.restart,
+        report=args.report,
+        invalidate=invalidate
+    )
+    elapsed = totals["elapsed_seconds"]
+    logger.info(
+        f"Re-settlement {'dry run ' if args.dry_run else ''}finished: {totals['processed']} hands, "
+        f"{totals['corrected']} with different winnings, {elapsed:.1f}s "
+        f"({totals['processed'] / elapsed if elapsed else 0:.0f} hands/s)"
+    )
+    if totals["corrected"] and not args.dry_run and invalidate is None and settings.HAND_CACHE_BACKEND != "none":
+        logger.warning(
+            "The API's in-process hand cache still holds the old winnings: restart the API "
+            f"or wait {settings.HAND_CACHE_TTL_SECONDS:.0f}s (HAND_CACHE_TTL_SECONDS) for entries to expire"
+        )
+
+
+if __name__ == "__main__":
+    main()
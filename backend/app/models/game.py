@@ -0,0 +1,43 @@
+from dataclasses import asdict, dataclass
+from typing import Optional, Tuple
+
+
+@dataclass(frozen=True)
+class GameStructure:
+    """Forced bets and betting unit of a no-limit hold'em game.
+
+    Frozen so it can key the per-structure game definition caches: every
+    hand played at the same stakes shares one entry. ``min_bet`` of 0 means
+    the big blind.
+    """
+    small_blind: int = 20
+    big_blind: int = 40
+    ante: int = 0
+    straddles: Tuple[int, ...] = ()
+    min_bet: int = 0
+
+    def __post_init__(self):
+        # Lists arrive from JSON; keep the value hashable
+        object.__setattr__(self, "straddles", tuple(self.straddles))
+
+    @property
+    def blinds_or_straddles(self) -> Tuple[int, ...]:
+        """Forced bets in posting order: small blind, big blind, then each straddle"""
+        return (self.small_blind, self.big_blind, *self.straddles)
+
+    @property
+    def min_bet_amount(self) -> int:
+        return self.min_bet or self.big_blind
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["straddles"] = list(self.straddles)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Optional[dict]) -> Optional['GameStructure']:
+        return cls(**data) if data else None
+
+
+# The blinds every hand was settled with before structures were stored
+DEFAULT_STRUCTURE = GameStructure()
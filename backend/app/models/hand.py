@@ -1,6 +1,7 @@
 from dataclasses import dataclass, field
 from typing import List, Optional
 from datetime import datetime
+from app.models.game import GameStructure
 import uuid
 
 
@@ -16,6 +17,12 @@ class PokerHand:
     board: str = ""
     winnings: List[int] = field(default_factory=list)
     created_at: Optional[datetime] = None
+    # Blinds, antes and straddles. None for hands saved before structures
+    # were stored: those were settled at 20/40 with seat 0 posting the small
+    # blind, whatever the position indices say.
+    structure: Optional[GameStructure] = None
+    # Per-seat stat counters worked out during settlement (not stored on the hand)
+    player_stats: Optional[List[tuple]] = field(default=None, compare=False, repr=False)
     
     def to_dict(self) -> dict:
         return {
@@ -28,12 +35,14 @@ class PokerHand:
             "hole_cards": self.hole_cards,
             "board": self.board,
             "winnings": self.winnings,
+            "structure": self.structure.to_dict() if self.structure else None,
             "created_at": self.created_at.isoformat() if self.created_at else None
         }
     
     @classmethod
     def from_dict(cls, data: dict) -> 'PokerHand':
-        hand = cls(**{k: v for k, v in data.items() if k != 'created_at'})
+        hand = cls(**{k: v for k, v in data.items() if k not in ('created_at', 'structure')})
+        hand.structure = GameStructure.from_dict(data.get('structure'))
         if data.get('created_at'):
             hand.created_at = datetime.fromisoformat(data['created_at']) if isinstance(data['created_at'], str) else data['created_at']
         return hand
\ No newline at end of file
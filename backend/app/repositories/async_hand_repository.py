@@ -0,0 +1,305 @@
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from datetime import datetime
+from app.models.hand import PokerHand
+from app.core.async_db import AsyncDatabaseManager
+from app.repositories.hand_repository import (
+    HAND_COLUMNS,
+    PLAYER_COLUMNS,
+    PLAYER_STATS_COLUMNS,
+    PLAYER_STATS_TOTALS,
+    PLAYER_STATS_UPSERT_SET,
+    REMOVED_PLAYER_COLUMNS,
+    UPSERT_SET,
+    HandRepository,
+    action_rows,
+    decode_cursor,
+    encode_cursor,
+    hand_values,
+    player_rows,
+    player_stats_shard,
+    split_cards,
+)
+from app.services.player_stats import stat_deltas
+import logging
+
+# Configure logging for this module
+logger = logging.getLogger(__name__)
+
+# unnest() flattens nested arrays, so the array columns of a multi-row
+# insert travel as text array literals and are cast back here
+UPSERT_HANDS = f"""
+    INSERT INTO hands (
+        id, stacks, dealer_index, small_blind_index, big_blind_index,
+        actions, hole_cards, board, winnings, hand_data
+    )
+    SELECT id, stacks::int[], dealer_index, small_blind_index, big_blind_index,
+           actions::text[], hole_cards::text[], board, winnings::int[], hand_data
+    FROM unnest(
+        $1::varchar[], $2::text[], $3::int[], $4::int[], $5::int[],
+        $6::text[], $7::text[], $8::text[], $9::text[], $10::bytea[]
+    ) AS t(id, stacks, dealer_index, small_blind_index, big_blind_index,
+           actions, hole_cards, board, winnings, hand_data)
+    ON CONFLICT (id) DO UPDATE SET {UPSERT_SET}
+    RETURNING id, created_at
+"""
+
+class AsyncHandRepository:
+    """``async`` counterpart of HandRepository backed by the asyncpg pool"""
+
+    def __init__(self, db_manager: AsyncDatabaseManager):
+        self.db_manager = db_manager
+        logger.debug("AsyncHandRepository initialized")
+
+    async def save(self, hand: PokerHand) -> PokerHand:
+        """Save a poker hand to database"""
+        logger.info(f"Saving poker hand with ID: {hand.id}")
+        try:
+            async with self.db_manager.transaction() as conn:
+                row = await conn.fetchrow(f"""
+                    INSERT INTO hands (
+                        id, stacks, dealer_index, small_blind_index, big_blind_index,
+                        actions, hole_cards, board, winnings, hand_data
+                    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
+                    ON CONFLICT (id) DO UPDATE SET {UPSERT_SET}
+                    RETURNING created_at
+                """, *hand_values(hand))
+                await self._write_normalized(conn, [hand])
+            if row:
+                hand.created_at = row['created_at']
+                logger.info(f"Hand saved successfully with created_at: {hand.created_at}")
+            else:
+                logger.warning("No result returned from INSERT/UPDATE query")
+            return hand
+        except Exception as e:
+            logger.error(f"Failed to save hand {hand.id}: {e}")
+            logger.exception("Hand save error details:")
+            raise e
+
+    async def save_many(self, hands: List[PokerHand]) -> List[PokerHand]:
+        """Save several poker hands with a single INSERT ... SELECT FROM unnest(...) statement"""
+        if not hands:
+            return []
+        logger.info(f"Saving batch of {len(hands)} poker hands")
+        (ids, stacks, dealers, small_blinds, big_blinds,
+         actions, hole_cards, boards, winnings, hand_data) = zip(*(hand_values(hand) for hand in hands))
+        columns = (
+            list(ids),
+            [_array_literal(values) for values in stacks],
+            list(dealers),
+            list(small_blinds),
+            list(big_blinds),
+            [_array_literal(values) for values in actions],
+            [_array_literal(values) for values in hole_cards],
+            list(boards),
+            [_array_literal(values) for values in winnings],
+            list(hand_data),
+        )
+        try:
+            async with self.db_manager.transaction() as conn:
+                rows = await conn.fetch(UPSERT_HANDS, *columns)
+                await self._write_normalized(conn, hands)
+            created = {row['id']: row['created_at'] for row in rows}
+            for hand in hands:
+                hand.created_at = created.get(hand.id)
+            logger.info(f"Batch of {len(hands)} hands saved successfully")
+            return hands
+        except Exception as e:
+            logger.error(f"Failed to save batch of {len(hands)} hands: {e}")
+            logger.exception("Hand batch save error details:")
+            raise e
+
+    @staticmethod
+    async def _write_normalized(conn, hands: List[PokerHand]) -> None:
+        """Replace the hand_players and hand_actions rows of these hands; see HandRepository"""
+        hand_ids = [hand.id for hand in hands]
+        removed = await conn.fetch(
+            f"DELETE FROM hand_players WHERE hand_id = ANY($1::varchar[]) RETURNING {REMOVED_PLAYER_COLUMNS}",
+            hand_ids
+        )
+        await conn.execute("DELETE FROM hand_actions WHERE hand_id = ANY($1::varchar[])", hand_ids)
+
+        players = [row for hand in hands for row in player_rows(hand)]
+        if players:
+            placeholders = ", ".join(f"${i}" for i in range(1, len(players[0]) + 1))
+            await conn.executemany(f"""
+                INSERT INTO hand_players ({PLAYER_COLUMNS})
+                VALUES ({placeholders})
+            """, players)
+        actions = [row for hand in hands for row in action_rows(hand)]
+        if actions:
+            await conn.executemany("""
+                INSERT INTO hand_actions (hand_id, seq, action, kind)
+                VALUES ($1, $2, $3, $4)
+            """, actions)
+        deltas = stat_deltas([tuple(row) for row in removed], [(row[1], *row[5:]) for row in players])
+        if deltas:
+            placeholders = ", ".join(f"${i}" for i in range(1, len(PLAYER_STATS_COLUMNS) + 1))
+            await conn.executemany(f"""
+                INSERT INTO player_stats ({", ".join(PLAYER_STATS_COLUMNS)}, shard)
+                VALUES ({placeholders}, {player_stats_shard()})
+                ON CONFLICT (seat, shard) DO UPDATE SET {PLAYER_STATS_UPSERT_SET}
+            """, deltas)
+
+    async def get_page(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        seat: Optional[int] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        min_winnings: Optional[int] = None,
+        cards: Optional[str] = None
+    ) -> Tuple[List[PokerHand], Optional[str]]:
+        """Get one page of hands, newest first; see HandRepository.get_page"""
+        logger.info(f"Retrieving page of up to {limit} hands (cursor={cursor})")
+        conditions = []
+        params = []
+
+        def param(value) -> str:
+            params.append(value)
+            return f"${len(params)}"
+
+        timestamp = self.db_manager.to_db_timestamp
+        if cursor:
+            cursor_created_at, cursor_id = decode_cursor(cursor)
+            conditions.append(f"(created_at, id) < ({param(timestamp(cursor_created_at))}, {param(cursor_id)})")
+        if created_after is not None:
+            conditions.append(f"created_at >= {param(timestamp(created_after))}")
+        if created_before is not None:
+            conditions.append(f"created_at < {param(timestamp(created_before))}")
+        # Seat, winnings and card filters go through the indexed hand_players table
+        if seat is not None or min_winnings is not None:
+            player_conditions = []
+            if seat is not None:
+                player_conditions.append(f"p.seat = {param(seat)}")
+            if min_winnings is not None:
+                player_conditions.append(f"p.winnings >= {param(min_winnings)}")
+            conditions.append(f"""EXISTS (
+                SELECT 1 FROM hand_players p
+                WHERE p.hand_id = hands.id AND {' AND '.join(player_conditions)}
+            )""")
+        if cards:
+            conditions.append(f"""EXISTS (
+                SELECT 1 FROM hand_players p
+                WHERE p.hand_id = hands.id AND p.cards @> {param(split_cards(cards))}::text[]
+            )""")
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        try:
+            async with self.db_manager.acquire() as conn:
+                rows = await conn.fetch(f"""
+                    SELECT {HAND_COLUMNS}
+                    FROM hands
+                    {where}
+                    ORDER BY created_at DESC, id DESC
+                    LIMIT {param(limit + 1)}
+                """, *params)
+
+            hands = [HandRepository._row_to_hand(row) for row in rows[:limit]]
+            next_cursor = None
+            if len(rows) > limit and hands:
+                last = hands[-1]
+                next_cursor = encode_cursor(last.created_at, last.id)
+            logger.info(f"Retrieved page of {len(hands)} hands (has_more={next_cursor is not None})")
+            return hands, next_cursor
+        except Exception as e:
+            logger.error(f"Failed to get hands page: {e}")
+            logger.exception("Get hands page error details:")
+            raise e
+
+    async def iter_batches(
+        self,
+        batch_size: int,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None
+    ) -> AsyncIterator[List[PokerHand]]:
+        """Stream hands oldest first in batches through a server-side cursor"""
+        logger.info(f"Streaming hands in batches of {batch_size}")
+        conditions = []
+        params = []
+        if created_after is not None:
+            params.append(self.db_manager.to_db_timestamp(created_after))
+            conditions.append(f"created_at >= ${len(params)}")
+        if created_before is not None:
+            params.append(self.db_manager.to_db_timestamp(created_before))
+            conditions.append(f"created_at < ${len(params)}")
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        total = 0
+        async with self.db_manager.transaction() as conn:
+            cursor = await conn.cursor(f"""
+                SELECT {HAND_COLUMNS}
+                FROM hands
+                {where}
+                ORDER BY created_at, id
+            """, *params)
+            while True:
+                rows = await cursor.fetch(batch_size)
+                if not rows:
+                    break
+                total += len(rows)
+                yield [HandRepository._row_to_hand(row) for row in rows]
+        logger.info(f"Finished streaming {total} hands")
+
+    async def get_all(self) -> List[PokerHand]:
+        """Get all poker hands from database"""
+        logger.info("Retrieving all poker hands from database")
+        try:
+            async with self.db_manager.acquire() as conn:
+                rows = await conn.fetch(f"""
+                    SELECT {HAND_COLUMNS}
+                    FROM hands
+                    ORDER BY created_at DESC
+                """)
+            logger.info(f"Retrieved {len(rows)} rows from database")
+            return [HandRepository._row_to_hand(row) for row in rows]
+        except Exception as e:
+            logger.error(f"Failed to get all hands: {e}")
+            logger.exception("Get all hands error details:")
+            raise e
+
+    async def get_player_stats(self, seat: int) -> Optional[Dict[str, Any]]:
+        """Running stat totals for a seat, or None if it has no counted hands"""
+        logger.info(f"Retrieving player stats for seat {seat}")
+        try:
+            async with self.db_manager.acquire() as conn:
+                row = await conn.fetchrow(
+                    f"SELECT {PLAYER_STATS_TOTALS} FROM player_stats WHERE seat = $1 GROUP BY seat", seat
+                )
+            return dict(row) if row else None
+        except Exception as e:
+            logger.error(f"Failed to get player stats for seat {seat}: {e}")
+            logger.exception("Get player stats error details:")
+            raise e
+
+    async def get_by_id(self, hand_id: str) -> Optional[PokerHand]:
+        """Get a specific poker hand by ID"""
+        logger.info(f"Retrieving poker hand with ID: {hand_id}")
+        try:
+            async with self.db_manager.acquire() as conn:
+                row = await conn.fetchrow(f"""
+                    SELECT {HAND_COLUMNS}
+                    FROM hands
+                    WHERE id = $1
+                """, hand_id)
+            if not row:
+                logger.warning(f"No hand found with ID: {hand_id}")
+                return None
+            logger.info(f"Successfully retrieved hand with ID: {hand_id}")
+            return HandRepository._row_to_hand(row)
+        except Exception as e:
+            logger.error(f"Failed to get hand {hand_id}: {e}")
+            logger.exception("Get hand by ID error details:")
+            raise e
+
+
+def _array_literal(values: Optional[List]) -> Optional[str]:
+    """Render a flat list as a Postgres array literal, quoting every element"""
+    if values is None:
+        return None
+    items = []
+    for value in values:
+        text = str(value).replace('\\', '\\\\').replace('"', '\\"')
+        items.append(f'"{text}"')
+    return "{" + ",".join(items) + "}"
+
@@ -0,0 +1,467 @@
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+from datetime import datetime
+from app.models.hand import PokerHand
+from app.core.embedded_db import EmbeddedDatabaseManager, utc_now
+from app.repositories.hand_repository import (
+    PLAYER_STATS_COLUMNS,
+    REMOVED_PLAYER_COLUMNS,
+    action_rows,
+    decode_cursor,
+    encode_cursor,
+    player_rows,
+    split_cards,
+)
+from app.services.hand_codec import decode_hand, encode_hand
+from app.services.player_stats import STAT_COLUMNS, hand_player_stats, stat_deltas
+import asyncio
+import json
+import logging
+
+# Configure logging for this module
+logger = logging.getLogger(__name__)
+
+HAND_COLUMNS = "id, hand_data, created_at"
+
+UPSERT_HANDS = """
+    INSERT INTO hands (id, dealer_index, small_blind_index, big_blind_index, hand_data, created_at)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT (id) DO UPDATE SET
+        dealer_index = EXCLUDED.dealer_index,
+        small_blind_index = EXCLUDED.small_blind_index,
+        big_blind_index = EXCLUDED.big_blind_index,
+        hand_data = EXCLUDED.hand_data
+"""
+
+# hand_players has no cards array here; card filters search hole_cards instead
+PLAYER_COLUMNS = "hand_id, seat, hole_cards, starting_stack, winnings, " + ", ".join(STAT_COLUMNS)
+
+UPSERT_PLAYER_STATS = f"""
+    INSERT INTO player_stats ({", ".join(PLAYER_STATS_COLUMNS)}, updated_at)
+    VALUES ({", ".join("?" for _ in PLAYER_STATS_COLUMNS)}, ?)
+    ON CONFLICT (seat) DO UPDATE SET {", ".join(
+        f"{column} = player_stats.{column} + EXCLUDED.{column}" for column in PLAYER_STATS_COLUMNS[1:]
+    )}, updated_at = EXCLUDED.updated_at
+"""
+
+# Hand ids per IN (...) list, well under SQLite's bound parameter limit
+ID_CHUNK_SIZE = 500
+
+
+def _placeholders(count: int) -> str:
+    return ", ".join("?" for _ in range(count))
+
+
+def _id_chunks(hand_ids: Sequence[str]) -> Iterator[Sequence[str]]:
+    for start in range(0, len(hand_ids), ID_CHUNK_SIZE):
+        yield hand_ids[start:start + ID_CHUNK_SIZE]
+
+
+class EmbeddedHandRepository:
+    """HandRepository on an in-process SQLite or DuckDB database.
+
+    Same methods and results as HandRepository, in SQL both engines accept.
+    Hands are always stored as hand_data only (HAND_STORAGE does not apply),
+    and created_at is set here rather than by a column default so a batch
+    shares one timestamp on either engine.
+    """
+
+    def __init__(self, db_manager: EmbeddedDatabaseManager):
+        self.db_manager = db_manager
+        logger.debug(f"EmbeddedHandRepository initialized ({db_manager.name})")
+
+    def save(self, hand: PokerHand) -> PokerHand:
+        """Save a poker hand to database"""
+        logger.info(f"Saving poker hand with ID: {hand.id}")
+        return self.save_many([hand])[0]
+
+    def save_many(self, hands: List[PokerHand]) -> List[PokerHand]:
+        """Save several poker hands in one transaction"""
+        if not hands:
+            return []
+        logger.info(f"Saving batch of {len(hands)} poker hands")
+        created_at = self.db_manager.to_db_timestamp(utc_now())
+        try:
+            with self.db_manager.get_cursor() as cursor:
+                cursor.executemany(UPSERT_HANDS, [
+                    (hand.id, hand.dealer_index, hand.small_blind_index, hand.big_blind_index,
+                     encode_hand(hand), created_at)
+                    for hand in hands
+                ])
+                # Hands saved again keep the created_at of their first save
+                created = {}
+                hand_ids = [hand.id for hand in hands]
+                for chunk in _id_chunks(hand_ids):
+                    cursor.execute(
+                        f"SELECT id, created_at FROM hands WHERE id IN ({_placeholders(len(chunk))})",
+                        list(chunk)
+                    )
+                    created.update((row['id'], row['created_at']) for row in cursor.fetchall())
+                self._write_normalized(cursor, hands)
+            for hand in hands:
+                hand.created_at = self.db_manager.from_db_timestamp(created.get(hand.id))
+            logger.info(f"Batch of {len(hands)} hands saved successfully")
+            return hands
+        except Exception as e:
+            logger.error(f"Failed to save batch of {len(hands)} hands: {e}")
+            logger.exception("Hand batch save error details:")
+            raise e
+
+    def _write_normalized(self, cursor, hands: List[PokerHand]) -> None:
+        """Replace the hand_players and hand_actions rows of these hands; see HandRepository"""
+        hand_ids = [hand.id for hand in hands]
+        removed = []
+        for chunk in _id_chunks(hand_ids):
+            placeholders = _placeholders(len(chunk))
+            cursor.execute(
+                f"DELETE FROM hand_players WHERE hand_id IN ({placeholders}) RETURNING {REMOVED_PLAYER_COLUMNS}",
+                list(chunk)
+            )
+            removed.extend(tuple(row.values()) for row in cursor.fetchall())
+            cursor.execute(f"DELETE FROM hand_actions WHERE hand_id IN ({placeholders})", list(chunk))
+
+        # Drop the cards array column of the Postgres rows
+        players = [row[:3] + row[4:] for hand in hands for row in player_rows(hand)]
+        if players:
+            cursor.executemany(
+                f"INSERT INTO hand_players ({PLAYER_COLUMNS}) VALUES ({_placeholders(len(players[0]))})",
+                players
+            )
+        actions = [row for hand in hands for row in action_rows(hand)]
+        if actions:
+            cursor.executemany("INSERT INTO hand_actions (hand_id, seq, action, kind) VALUES (?, ?, ?, ?)", actions)
+        # One row per seat: both engines already run write transactions one at
+        # a time, so sharding the totals like Postgres would not let saves overlap
+        deltas = stat_deltas(removed, [(row[1], *row[4:]) for row in players])
+        if deltas:
+            updated_at = self.db_manager.to_db_timestamp(utc_now())
+            cursor.executemany(UPSERT_PLAYER_STATS, [(*delta, updated_at) for delta in deltas])
+
+    def _row_to_hand(self, row) -> PokerHand:
+        return decode_hand(bytes(row['hand_data']), row['id'], self.db_manager.from_db_timestamp(row['created_at']))
+
+    def backfill_normalized(self, batch_size: int = 1000) -> int:
+        """Populate hand_players/hand_actions for hands without them; see HandRepository"""
+        logger.info(f"Backfilling normalized hand tables in batches of {batch_size}")
+        total = 0
+        last_id = ""
+        while True:
+            with self.db_manager.get_cursor() as cursor:
+                cursor.execute(f"""
+                    SELECT {HAND_COLUMNS}
+                    FROM hands h
+                    WHERE h.id > ?
+                      AND NOT EXISTS (SELECT 1 FROM hand_players p WHERE p.hand_id = h.id)
+                    ORDER BY h.id
+                    LIMIT ?
+                """, (last_id, batch_size))
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+                hands = [self._row_to_hand(row) for row in rows]
+                self._write_normalized(cursor, hands)
+            last_id = hands[-1].id
+            total += len(hands)
+            logger.info(f"Backfilled {total} hands so far")
+        logger.info(f"Backfill finished: {total} hands")
+        return total
+
+    def get_batch_after(self, last_id: str, batch_size: int) -> List[PokerHand]:
+        """Next ``batch_size`` hands in id order after ``last_id`` (keyset paging for batch jobs)"""
+        with self.db_manager.get_cursor() as cursor:
+            cursor.execute(f"""
+                SELECT {HAND_COLUMNS}
+                FROM hands
+                WHERE id > ?
+                ORDER BY id
+                LIMIT ?
+            """, (last_id, batch_size))
+            return [self._row_to_hand(row) for row in cursor.fetchall()]
+
+    def get_checkpoint(self, name: str) -> Optional[Dict[str, Any]]:
+        """Saved progress of a batch job: {"last_id": ..., "state": {...}} or None"""
+        with self.db_manager.get_cursor() as cursor:
+            cursor.execute("SELECT last_id, state FROM job_checkpoints WHERE name = ?", (name,))
+            row = cursor.fetchone()
+        if not row:
+            return None
+        return {"last_id": row['last_id'], "state": json.loads(row['state']) if row['state'] else None}
+
+    def delete_checkpoint(self, name: str) -> None:
+        with self.db_manager.get_cursor() as cursor:
+            cursor.execute("DELETE FROM job_checkpoints WHERE name = ?", (name,))
+
+    def update_winnings(
+        self,
+        hands: List[PokerHand],
+        checkpoint: str,
+        last_id: str,
+        state: Dict[str, Any]
+    ) -> None:
+        """Write corrected winnings and advance a job checkpoint in one transaction; see HandRepository"""
+        with self.db_manager.get_cursor() as cursor:
+            if hands:
+                cursor.executemany(
+                    "UPDATE hands SET hand_data = ? WHERE id = ?",
+                    [(encode_hand(hand), hand.id) for hand in hands]
+                )
+                self._write_normalized(cursor, hands)
+            cursor.execute("""
+                INSERT INTO job_checkpoints (name, last_id, state, updated_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (name) DO UPDATE SET
+                    last_id = EXCLUDED.last_id,
+                    state = EXCLUDED.state,
+                    updated_at = EXCLUDED.updated_at
+            """, (checkpoint, last_id, json.dumps(state), self.db_manager.to_db_timestamp(utc_now())))
+
+    def rebuild_player_stats(self, batch_size: int = 1000, missing_only: bool = False) -> int:
+        """Recompute the per-seat stats of every hand, then player_stats from them; see HandRepository.
+
+        Embedded databases have a single writer at a time, so the aggregate
+        table is rebuilt without an explicit lock.
+        """
+        logger.info(f"Rebuilding player stats in batches of {batch_size}")
+        missing = "AND EXISTS (SELECT 1 FROM hand_players p WHERE p.hand_id = h.id AND p.vpip IS NULL)" \
+            if missing_only else ""
+        total = 0
+        last_id = ""
+        while True:
+            with self.db_manager.get_cursor() as cursor:
+                cursor.execute(f"""
+                    SELECT {HAND_COLUMNS}
+                    FROM hands h
+                    WHERE h.id > ? {missing}
+                    ORDER BY h.id
+                    LIMIT ?
+                """, (last_id, batch_size))
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+                hands = [self._row_to_hand(row) for row in rows]
+                cursor.executemany(f"""
+                    UPDATE hand_players
+                    SET {", ".join(f"{column} = ?" for column in STAT_COLUMNS)}
+                    WHERE hand_id = ? AND seat = ?
+                """, [
+                    (*stats, hand.id, seat)
+                    for hand in hands
+                    for seat, stats in enumerate(hand_player_stats(hand))
+                ])
+            last_id = hands[-1].id
+            total += len(hands)
+            logger.info(f"Replayed {total} hands so far")
+
+        with self.db_manager.get_cursor() as cursor:
+            cursor.execute("DELETE FROM player_stats")
+            cursor.execute(f"""
+                INSERT INTO player_stats ({", ".join(PLAYER_STATS_COLUMNS)}, updated_at)
+                SELECT seat, COUNT(*), {", ".join(f"SUM({column})" for column in STAT_COLUMNS)}, SUM(winnings), ?
+                FROM hand_players
+                WHERE vpip IS NOT NULL
+                GROUP BY seat
+            """, (self.db_manager.to_db_timestamp(utc_now()),))
+        logger.info(f"Player stats rebuilt from {total} replayed hands")
+        return total
+
+    def get_page(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        seat: Optional[int] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        min_winnings: Optional[int] = None,
+        cards: Optional[str] = None
+    ) -> Tuple[List[PokerHand], Optional[str]]:
+        """Get one page of hands, newest first; see HandRepository.get_page"""
+        logger.info(f"Retrieving page of up to {limit} hands (cursor={cursor})")
+        timestamp = self.db_manager.to_db_timestamp
+        conditions = []
+        params = []
+        if cursor:
+            cursor_created_at, cursor_id = decode_cursor(cursor)
+            conditions.append("(created_at < ? OR (created_at = ? AND id < ?))")
+            params.extend([timestamp(cursor_created_at), timestamp(cursor_created_at), cursor_id])
+        if created_after is not None:
+            conditions.append("created_at >= ?")
+            params.append(timestamp(created_after))
+        if created_before is not None:
+            conditions.append("created_at < ?")
+            params.append(timestamp(created_before))
+        if seat is not None or min_winnings is not None:
+            player_conditions = []
+            if seat is not None:
+                player_conditions.append("p.seat = ?")
+                params.append(seat)
+            if min_winnings is not None:
+                player_conditions.append("p.winnings >= ?")
+                params.append(min_winnings)
+            conditions.append(f"""EXISTS (
+                SELECT 1 FROM hand_players p
+                WHERE p.hand_id = hands.id AND {' AND '.join(player_conditions)}
+            )""")
+        if cards:
+            # Cards are two characters, rank then suit, so a match is always aligned
+            wanted = split_cards(cards)
+            conditions.append(f"""EXISTS (
+                SELECT 1 FROM hand_players p
+                WHERE p.hand_id = hands.id AND {' AND '.join("instr(p.hole_cards, ?) > 0" for _ in wanted)}
+            )""")
+            params.extend(wanted)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        try:
+            with self.db_manager.get_cursor() as db_cursor:
+                db_cursor.execute(f"""
+                    SELECT {HAND_COLUMNS}
+                    FROM hands
+                    {where}
+                    ORDER BY created_at DESC, id DESC
+                    LIMIT ?
+                """, (*params, limit + 1))
+                rows = db_cursor.fetchall()
+
+            hands = [self._row_to_hand(row) for row in rows[:limit]]
+            next_cursor = None
+            if len(rows) > limit and hands:
+                last = hands[-1]
+                next_cursor = encode_cursor(last.created_at, last.id)
+            logger.info(f"Retrieved page of {len(hands)} hands (has_more={next_cursor is not None})")
+            return hands, next_cursor
+        except Exception as e:
+            logger.error(f"Failed to get hands page: {e}")
+            logger.exception("Get hands page error details:")
+            raise e
+
+    def iter_batches(
+        self,
+        batch_size: int,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None
+    ) -> Iterator[List[PokerHand]]:
+        """Stream hands oldest first in batches.
+
+        Each batch is its own keyset query on (created_at, id) rather than
+        one long-lived cursor, because a streaming response may pull
+        successive batches on different threads and so different connections.
+        """
+        logger.info(f"Streaming hands in batches of {batch_size}")
+        timestamp = self.db_manager.to_db_timestamp
+        conditions = []
+        params = []
+        if created_after is not None:
+            conditions.append("created_at >= ?")
+            params.append(timestamp(created_after))
+        if created_before is not None:
+            conditions.append("created_at < ?")
+            params.append(timestamp(created_before))
+
+        total = 0
+        position = []
+        while True:
+            where = conditions + (["(created_at > ? OR (created_at = ? AND id > ?))"] if position else [])
+            with self.db_manager.get_cursor() as cursor:
+                cursor.execute(f"""
+                    SELECT {HAND_COLUMNS}
+                    FROM hands
+                    {f"WHERE {' AND '.join(where)}" if where else ""}
+                    ORDER BY created_at, id
+                    LIMIT ?
+                """, (*params, *position, batch_size))
+                rows = cursor.fetchall()
+            if not rows:
+                break
+            total += len(rows)
+            last = rows[-1]
+            position = [last['created_at'], last['created_at'], last['id']]
+            yield [self._row_to_hand(row) for row in rows]
+        logger.info(f"Finished streaming {total} hands")
+
+    def get_all(self) -> List[PokerHand]:
+        """Get all poker hands from database"""
+        logger.info("Retrieving all poker hands from database")
+        try:
+            with self.db_manager.get_cursor() as cursor:
+                cursor.execute(f"""
+                    SELECT {HAND_COLUMNS}
+                    FROM hands
+                    ORDER BY created_at DESC
+                """)
+                rows = cursor.fetchall()
+            logger.info(f"Retrieved {len(rows)} rows from database")
+            return [self._row_to_hand(row) for row in rows]
+        except Exception as e:
+            logger.error(f"Failed to get all hands: {e}")
+            logger.exception("Get all hands error details:")
+            raise e
+
+    def get_player_stats(self, seat: int) -> Optional[Dict[str, Any]]:
+        """Running stat totals for a seat, or None if it has no counted hands"""
+        logger.info(f"Retrieving player stats for seat {seat}")
+        with self.db_manager.get_cursor() as cursor:
+            cursor.execute("SELECT * FROM player_stats WHERE seat = ?", (seat,))
+            row = cursor.fetchone()
+        return dict(row) if row else None
+
+    def get_by_id(self, hand_id: str) -> Optional[PokerHand]:
+        """Get a specific poker hand by ID"""
+        logger.info(f"Retrieving poker hand with ID: {hand_id}")
+        try:
+            with self.db_manager.get_cursor() as cursor:
+                cursor.execute(f"""
+                    SELECT {HAND_COLUMNS}
+                    FROM hands
+                    WHERE id = ?
+                """, (hand_id,))
+                row = cursor.fetchone()
+            if not row:
+                logger.warning(f"No hand found with ID: {hand_id}")
+                return None
+            logger.info(f"Successfully retrieved hand with ID: {hand_id}")
+            return self._row_to_hand(row)
+        except Exception as e:
+            logger.error(f"Failed to get hand {hand_id}: {e}")
+            logger.exception("Get hand by ID error details:")
+            raise e
+
+
+class AsyncEmbeddedHandRepository:
+    """``async`` face of an EmbeddedHandRepository for the API routes.
+
+    The embedded engines have no async drivers, so each call runs on the
+    default thread pool; every worker thread keeps its own connection.
+    """
+
+    def __init__(self, repository: EmbeddedHandRepository):
+        self.repository = repository
+
+    async def save(self, hand: PokerHand) -> PokerHand:
+        return await asyncio.to_thread(self.repository.save, hand)
+
+    async def save_many(self, hands: List[PokerHand]) -> List[PokerHand]:
+        return await asyncio.to_thread(self.repository.save_many, hands)
+
+    async def get_page(self, limit: int, **filters) -> Tuple[List[PokerHand], Optional[str]]:
+        return await asyncio.to_thread(self.repository.get_page, limit, **filters)
+
+    async def iter_batches(
+        self,
+        batch_size: int,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None
+    ) -> AsyncIterator[List[PokerHand]]:
+        batches = self.repository.iter_batches(batch_size, created_after, created_before)
+        while True:
+            batch = await asyncio.to_thread(next, batches, None)
+            if batch is None:
+                break
+            yield batch
+
+    async def get_all(self) -> List[PokerHand]:
+        return await asyncio.to_thread(self.repository.get_all)
+
+    async def get_player_stats(self, seat: int) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.repository.get_player_stats, seat)
+
+    async def get_by_id(self, hand_id: str) -> Optional[PokerHand]:
+        return await asyncio.to_thread(self.repository.get_by_id, hand_id)
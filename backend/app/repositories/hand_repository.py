@@ -1,11 +1,131 @@
-from typing import List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from datetime import datetime
 from app.models.hand import PokerHand
 from app.core.db import DatabaseManager
+from app.core.config import settings
+from app.services.hand_codec import decode_hand, encode_hand
+from app.services.player_stats import STAT_COLUMNS, hand_player_stats, stat_deltas
+from psycopg2.extras import Json, execute_values
+import base64
 import logging
+import uuid
 
 # Configure logging for this module
 logger = logging.getLogger(__name__)
 
+# Rows saved before hand_data existed still carry their hand in the array columns
+HAND_COLUMNS = """
+    id, hand_data, dealer_index, small_blind_index, big_blind_index,
+    CASE WHEN hand_data IS NULL THEN stacks END AS stacks,
+    CASE WHEN hand_data IS NULL THEN actions END AS actions,
+    CASE WHEN hand_data IS NULL THEN hole_cards END AS hole_cards,
+    CASE WHEN hand_data IS NULL THEN board END AS board,
+    CASE WHEN hand_data IS NULL THEN winnings END AS winnings,
+    created_at
+"""
+
+UPSERT_SET = """
+    stacks = EXCLUDED.stacks,
+    dealer_index = EXCLUDED.dealer_index,
+    small_blind_index = EXCLUDED.small_blind_index,
+    big_blind_index = EXCLUDED.big_blind_index,
+    actions = EXCLUDED.actions,
+    hole_cards = EXCLUDED.hole_cards,
+    board = EXCLUDED.board,
+    winnings = EXCLUDED.winnings,
+    hand_data = EXCLUDED.hand_data
+"""
+
+
+PLAYER_COLUMNS = "hand_id, seat, hole_cards, cards, starting_stack, winnings, " + ", ".join(STAT_COLUMNS)
+
+# Increments from stat_deltas: (seat, hands, *STAT_COLUMNS, net_winnings)
+PLAYER_STATS_COLUMNS = ("seat", "hands", *STAT_COLUMNS, "net_winnings")
+PLAYER_STATS_UPSERT_SET = ", ".join(
+    f"{column} = player_stats.{column} + EXCLUDED.{column}" for column in PLAYER_STATS_COLUMNS[1:]
+) + ", updated_at = CURRENT_TIMESTAMP"
+
+# A seat's totals, summed over its player_stats shards
+PLAYER_STATS_TOTALS = "seat, " + ", ".join(f"SUM({column}) AS {column}" for column in PLAYER_STATS_COLUMNS[1:])
+
+# hand_players columns returned when rows are replaced, in stat_deltas order
+REMOVED_PLAYER_COLUMNS = "seat, winnings, " + ", ".join(STAT_COLUMNS)
+
+
+def hand_values(hand: PokerHand) -> tuple:
+    """Column values for a hands row, in INSERT column order.
+
+    The array columns are left NULL unless HAND_STORAGE is "both";
+    dealer and blind indexes are always stored for filtering.
+    """
+    hand_data = encode_hand(hand)
+    if settings.HAND_STORAGE == "both":
+        return (
+            hand.id, hand.stacks, hand.dealer_index, hand.small_blind_index, hand.big_blind_index,
+            hand.actions, hand.hole_cards, hand.board, hand.winnings, hand_data
+        )
+    return (
+        hand.id, None, hand.dealer_index, hand.small_blind_index, hand.big_blind_index,
+        None, None, None, None, hand_data
+    )
+
+
+def split_cards(cards: str) -> List[str]:
+    """Split a run of cards such as "AsKd" into ["As", "Kd"]"""
+    text = ''.join(cards.split())
+    return [text[i:i + 2] for i in range(0, len(text) - 1, 2)]
+
+
+def action_kind(action: str) -> str:
+    """One-letter kind of an action token: f, x, c, b, r, a (all-in) or d (board deal)"""
+    if action == 'allin':
+        return 'a'
+    if action[:1] in ('f', 'x', 'c', 'b', 'r'):
+        return action[0]
+    return 'd'
+
+
+def player_rows(hand: PokerHand) -> List[tuple]:
+    """Rows for hand_players in PLAYER_COLUMNS order.
+
+    Uses the stats worked out during settlement when the hand carries
+    them, otherwise replays the hand here.
+    """
+    stats = hand.player_stats or hand_player_stats(hand)
+    rows = []
+    for seat, stack in enumerate(hand.stacks):
+        hole_cards = hand.hole_cards[seat] if seat < len(hand.hole_cards) else ""
+        winnings = hand.winnings[seat] if seat < len(hand.winnings) else 0
+        rows.append((hand.id, seat, hole_cards, split_cards(hole_cards), stack, winnings, *stats[seat]))
+    return rows
+
+
+def action_rows(hand: PokerHand) -> List[tuple]:
+    """Rows for hand_actions: (hand_id, seq, action, kind)"""
+    return [(hand.id, seq, action, action_kind(action)) for seq, action in enumerate(hand.actions)]
+
+
+def player_stats_shard() -> str:
+    """SQL for the player_stats shard the current connection adds to"""
+    return f"mod(pg_backend_pid(), {settings.PLAYER_STATS_SHARDS})"
+
+
+def encode_cursor(created_at: datetime, hand_id: str) -> str:
+    """Encode a (created_at, id) keyset position as an opaque cursor string"""
+    raw = f"{created_at.isoformat()}|{hand_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Decode a cursor produced by encode_cursor, raising ValueError if malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, hand_id = base64.urlsafe_b64decode(padded).decode().split("|", 1)
+        return datetime.fromisoformat(created_at), hand_id
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
 class HandRepository:
     def __init__(self, db_manager: DatabaseManager):
         self.db_manager = db_manager
@@ -17,32 +137,14 @@ class HandRepository:
         try:
             with self.db_manager.get_cursor() as cursor:
                 logger.debug("Executing INSERT/UPDATE query for hand")
-                cursor.execute("""
+                cursor.execute(f"""
                     INSERT INTO hands (
                         id, stacks, dealer_index, small_blind_index, big_blind_index,
-                        actions, hole_cards, board, winnings
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (id) DO UPDATE SET
-                        stacks = EXCLUDED.stacks,
-                        dealer_index = EXCLUDED.dealer_index,
-                        small_blind_index = EXCLUDED.small_blind_index,
-                        big_blind_index = EXCLUDED.big_blind_index,
-                        actions = EXCLUDED.actions,
-                        hole_cards = EXCLUDED.hole_cards,
-                        board = EXCLUDED.board,
-                        winnings = EXCLUDED.winnings
+                        actions, hole_cards, board, winnings, hand_data
+                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    ON CONFLICT (id) DO UPDATE SET {UPSERT_SET}
                     RETURNING created_at
-                """, (
-                    hand.id,
-                    hand.stacks,
-                    hand.dealer_index,
-                    hand.small_blind_index,
-                    hand.big_blind_index,
-                    hand.actions,
-                    hand.hole_cards,
-                    hand.board,
-                    hand.winnings
-                ))
+                """, hand_values(hand))
                 
                 result = cursor.fetchone()
                 if result:
@@ -50,22 +152,370 @@ class HandRepository:
                     logger.info(f"Hand saved successfully with created_at: {hand.created_at}")
                 else:
                     logger.warning("No result returned from INSERT/UPDATE query")
-                
+
+                self._write_normalized(cursor, [hand])
                 return hand
         except Exception as e:
             logger.error(f"Failed to save hand {hand.id}: {e}")
             logger.exception("Hand save error details:")
             raise e
     
+    def save_many(self, hands: List[PokerHand]) -> List[PokerHand]:
+        """Save several poker hands with a single multi-row INSERT in one transaction"""
+        if not hands:
+            return []
+        logger.info(f"Saving batch of {len(hands)} poker hands")
+        try:
+            with self.db_manager.get_cursor() as cursor:
+                logger.debug("Executing multi-row INSERT/UPDATE query for hands")
+                rows = execute_values(cursor, f"""
+                    INSERT INTO hands (
+                        id, stacks, dealer_index, small_blind_index, big_blind_index,
+                        actions, hole_cards, board, winnings, hand_data
+                    ) VALUES %s
+                    ON CONFLICT (id) DO UPDATE SET {UPSERT_SET}
+                    RETURNING id, created_at
+                """, [hand_values(hand) for hand in hands], page_size=len(hands), fetch=True)
+
+                created = {row['id']: row['created_at'] for row in rows}
+                for hand in hands:
+                    hand.created_at = created.get(hand.id)
+
+                self._write_normalized(cursor, hands)
+                logger.info(f"Batch of {len(hands)} hands saved successfully")
+                return hands
+        except Exception as e:
+            logger.error(f"Failed to save batch of {len(hands)} hands: {e}")
+            logger.exception("Hand batch save error details:")
+            raise e
+    
+    @staticmethod
+    def _write_normalized(cursor, hands: List[PokerHand]) -> None:
+        """Replace the hand_players and hand_actions rows of these hands.
+
+        player_stats is adjusted by the difference between the removed and
+        the new rows, so saving a hand again does not count it twice. The
+        adjustment is one row per seat for the whole batch, written last so
+        its row locks are held only until the commit. Each connection adds
+        to its own shard of a seat's totals, so concurrent saves (and group
+        commits) rarely wait on one another; reads sum the shards, which
+        costs up to PLAYER_STATS_SHARDS rows per seat.
+        """
+        hand_ids = [hand.id for hand in hands]
+        cursor.execute(
+            f"DELETE FROM hand_players WHERE hand_id = ANY(%s) RETURNING {REMOVED_PLAYER_COLUMNS}",
+            (hand_ids,)
+        )
+        removed = [tuple(row.values()) for row in cursor.fetchall()]
+        cursor.execute("DELETE FROM hand_actions WHERE hand_id = ANY(%s)", (hand_ids,))
+
+        players = [row for hand in hands for row in player_rows(hand)]
+        if players:
+            execute_values(cursor, f"""
+                INSERT INTO hand_players ({PLAYER_COLUMNS})
+                VALUES %s
+            """, players, page_size=len(players))
+        actions = [row for hand in hands for row in action_rows(hand)]
+        if actions:
+            execute_values(cursor, """
+                INSERT INTO hand_actions (hand_id, seq, action, kind)
+                VALUES %s
+            """, actions, page_size=len(actions))
+        deltas = stat_deltas(removed, [(row[1], *row[5:]) for row in players])
+        if deltas:
+            execute_values(cursor, f"""
+                INSERT INTO player_stats ({", ".join(PLAYER_STATS_COLUMNS)}, shard)
+                VALUES %s
+                ON CONFLICT (seat, shard) DO UPDATE SET {PLAYER_STATS_UPSERT_SET}
+            """, deltas, template=f"({', '.join('%s' for _ in PLAYER_STATS_COLUMNS)}, {player_stats_shard()})",
+                page_size=len(deltas))
+
+    def backfill_normalized(self, batch_size: int = 1000) -> int:
+        """Populate hand_players/hand_actions for hands saved before they existed.
+
+        Works through the table in id order, one committed transaction per
+        batch, so it can be stopped and rerun at any point. Returns the
+        number of hands backfilled.
+        """
+        logger.info(f"Backfilling normalized hand tables in batches of {batch_size}")
+        total = 0
+        last_id = ""
+        while True:
+            with self.db_manager.get_cursor() as cursor:
+                cursor.execute(f"""
+                    SELECT {HAND_COLUMNS}
+                    FROM hands h
+                    WHERE h.id > %s
+                      AND NOT EXISTS (SELECT 1 FROM hand_players p WHERE p.hand_id = h.id)
+                    ORDER BY h.id
+                    LIMIT %s
+                """, (last_id, batch_size))
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+                hands = [self._row_to_hand(row) for row in rows]
+                self._write_normalized(cursor, hands)
+            last_id = hands[-1].id
+            total += len(hands)
+            logger.info(f"Backfilled {total} hands so far")
+        logger.info(f"Backfill finished: {total} hands")
+        return total
+
+    def get_batch_after(self, last_id: str, batch_size: int) -> List[PokerHand]:
+        """Next ``batch_size`` hands in id order after ``last_id`` (keyset paging for batch jobs)"""
+        with self.db_manager.get_cursor() as cursor:
+            cursor.execute(f"""
+                SELECT {HAND_COLUMNS}
+                FROM hands
+                WHERE id > %s
+                ORDER BY id
+                LIMIT %s
+            """, (last_id, batch_size))
+            return [self._row_to_hand(row) for row in cursor.fetchall()]
+
+    def get_checkpoint(self, name: str) -> Optional[Dict[str, Any]]:
+        """Saved progress of a batch job: {"last_id": ..., "state": {...}} or None"""
+        with self.db_manager.get_cursor() as cursor:
+            cursor.execute("SELECT last_id, state FROM job_checkpoints WHERE name = %s", (name,))
+            row = cursor.fetchone()
+        return dict(row) if row else None
+
+    def delete_checkpoint(self, name: str) -> None:
+        with self.db_manager.get_cursor() as cursor:
+            cursor.execute("DELETE FROM job_checkpoints WHERE name = %s", (name,))
+
+    def update_winnings(
+        self,
+        hands: List[PokerHand],
+        checkpoint: str,
+        last_id: str,
+        state: Dict[str, Any]
+    ) -> None:
+        """Write corrected winnings and advance a job checkpoint in one transaction.
+
+        The hands rows are updated with a single UPDATE ... FROM (VALUES ...);
+        the legacy winnings column is only touched on rows that still use it.
+        Their hand_players rows (and so player_stats) are rewritten too.
+        Committing the checkpoint with the corrections means a job resumed
+        after a crash neither skips nor double-applies a batch.
+        """
+        with self.db_manager.get_cursor() as cursor:
+            if hands:
+                execute_values(cursor, """
+                    UPDATE hands h
+                    SET hand_data = v.hand_data,
+                        winnings = CASE WHEN h.winnings IS NULL THEN NULL ELSE v.winnings END
+                    FROM (VALUES %s) AS v (id, winnings, hand_data)
+                    WHERE h.id = v.id
+                """, [
+                    (hand.id, hand.winnings, encode_hand(hand)) for hand in hands
+                ], template="(%s, %s::integer[], %s::bytea)", page_size=len(hands))
+                self._write_normalized(cursor, hands)
+            cursor.execute("""
+                INSERT INTO job_checkpoints (name, last_id, state, updated_at)
+                VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
+                ON CONFLICT (name) DO UPDATE SET
+                    last_id = EXCLUDED.last_id,
+                    state = EXCLUDED.state,
+                    updated_at = EXCLUDED.updated_at
+            """, (checkpoint, last_id, Json(state)))
+
+    def rebuild_player_stats(self, batch_size: int = 1000, missing_only: bool = False) -> int:
+        """Recompute the per-seat stats of every hand, then player_stats from them.
+
+        Hands are read in id order a batch at a time and their hand_players
+        stat columns rewritten, one committed transaction per batch. The
+        aggregate table is then rebuilt in a single statement while locked,
+        so saves that run concurrently are counted exactly once. With
+        ``missing_only`` only hands whose stats were never computed are
+        replayed. Returns the number of hands replayed.
+        """
+        logger.info(f"Rebuilding player stats in batches of {batch_size}")
+        missing = "AND EXISTS (SELECT 1 FROM hand_players p WHERE p.hand_id = h.id AND p.vpip IS NULL)" \
+            if missing_only else ""
+        total = 0
+        last_id = ""
+        while True:
+            with self.db_manager.get_cursor() as cursor:
+                cursor.execute(f"""
+                    SELECT {HAND_COLUMNS}
+                    FROM hands h
+                    WHERE h.id > %s {missing}
+                    ORDER BY h.id
+                    LIMIT %s
+                """, (last_id, batch_size))
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+                hands = [self._row_to_hand(row) for row in rows]
+                values = [
+                    (hand.id, seat, *stats)
+                    for hand in hands
+                    for seat, stats in enumerate(hand_player_stats(hand))
+                ]
+                execute_values(cursor, f"""
+                    UPDATE hand_players p
+                    SET {", ".join(f"{column} = v.{column}" for column in STAT_COLUMNS)}
+                    FROM (VALUES %s) AS v (hand_id, seat, {", ".join(STAT_COLUMNS)})
+                    WHERE p.hand_id = v.hand_id AND p.seat = v.seat
+                """, values, page_size=len(values))
+            last_id = hands[-1].id
+            total += len(hands)
+            logger.info(f"Replayed {total} hands so far")
+
+        with self.db_manager.get_cursor() as cursor:
+            cursor.execute("LOCK TABLE player_stats IN EXCLUSIVE MODE")
+            cursor.execute("DELETE FROM player_stats")
+            cursor.execute(f"""
+                INSERT INTO player_stats ({", ".join(PLAYER_STATS_COLUMNS)})
+                SELECT seat, COUNT(*), {", ".join(f"SUM({column})" for column in STAT_COLUMNS)}, SUM(winnings)
+                FROM hand_players
+                WHERE vpip IS NOT NULL
+                GROUP BY seat
+            """)
+        logger.info(f"Player stats rebuilt from {total} replayed hands")
+        return total
+
+    @staticmethod
+    def _row_to_hand(row) -> PokerHand:
+        if row['hand_data'] is not None:
+            # psycopg2 returns BYTEA as memoryview, asyncpg as bytes
+            return decode_hand(bytes(row['hand_data']), row['id'], row['created_at'])
+        return PokerHand(
+            id=row['id'],
+            stacks=list(row['stacks']) if row['stacks'] else [],
+            dealer_index=row['dealer_index'],
+            small_blind_index=row['small_blind_index'],
+            big_blind_index=row['big_blind_index'],
+            actions=list(row['actions']) if row['actions'] else [],
+            hole_cards=list(row['hole_cards']) if row['hole_cards'] else [],
+            board=row['board'] or "",
+            winnings=list(row['winnings']) if row['winnings'] else [],
+            created_at=row['created_at']
+        )
+    
+    def get_page(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        seat: Optional[int] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        min_winnings: Optional[int] = None,
+        cards: Optional[str] = None
+    ) -> Tuple[List[PokerHand], Optional[str]]:
+        """Get one page of hands, newest first, using keyset pagination on (created_at, id).
+
+        Returns the hands and the cursor for the next page (None on the last page).
+        ``seat`` limits results to hands that seat took part in; combined with
+        ``min_winnings`` it requires that seat to have won at least that amount,
+        otherwise ``min_winnings`` applies to the biggest winner of the hand.
+        ``cards`` (e.g. "AsKd" or "As") keeps hands where one player held all of them.
+        """
+        logger.info(f"Retrieving page of up to {limit} hands (cursor={cursor})")
+        conditions = []
+        params = []
+        if cursor:
+            cursor_created_at, cursor_id = decode_cursor(cursor)
+            conditions.append("(created_at, id) < (%s, %s)")
+            params.extend([cursor_created_at, cursor_id])
+        if created_after is not None:
+            conditions.append("created_at >= %s")
+            params.append(created_after)
+        if created_before is not None:
+            conditions.append("created_at < %s")
+            params.append(created_before)
+        # Seat, winnings and card filters go through the indexed hand_players table
+        if seat is not None or min_winnings is not None:
+            player_conditions = []
+            if seat is not None:
+                player_conditions.append("p.seat = %s")
+                params.append(seat)
+            if min_winnings is not None:
+                player_conditions.append("p.winnings >= %s")
+                params.append(min_winnings)
+            conditions.append(f"""EXISTS (
+                SELECT 1 FROM hand_players p
+                WHERE p.hand_id = hands.id AND {' AND '.join(player_conditions)}
+            )""")
+        if cards:
+            conditions.append("""EXISTS (
+                SELECT 1 FROM hand_players p
+                WHERE p.hand_id = hands.id AND p.cards @> %s
+            )""")
+            params.append(split_cards(cards))
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        try:
+            with self.db_manager.get_cursor() as db_cursor:
+                logger.debug("Executing keyset SELECT query for hands page")
+                db_cursor.execute(f"""
+                    SELECT {HAND_COLUMNS}
+                    FROM hands
+                    {where}
+                    ORDER BY created_at DESC, id DESC
+                    LIMIT %s
+                """, (*params, limit + 1))
+                rows = db_cursor.fetchall()
+
+            hands = [self._row_to_hand(row) for row in rows[:limit]]
+            next_cursor = None
+            if len(rows) > limit and hands:
+                last = hands[-1]
+                next_cursor = encode_cursor(last.created_at, last.id)
+            logger.info(f"Retrieved page of {len(hands)} hands (has_more={next_cursor is not None})")
+            return hands, next_cursor
+        except Exception as e:
+            logger.error(f"Failed to get hands page: {e}")
+            logger.exception("Get hands page error details:")
+            raise e
+    
+    def iter_batches(
+        self,
+        batch_size: int,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None
+    ) -> Iterator[List[PokerHand]]:
+        """Stream hands oldest first in batches through a server-side cursor.
+
+        Memory use is bounded by ``batch_size`` regardless of table size.
+        """
+        logger.info(f"Streaming hands in batches of {batch_size}")
+        conditions = []
+        params = []
+        if created_after is not None:
+            conditions.append("created_at >= %s")
+            params.append(created_after)
+        if created_before is not None:
+            conditions.append("created_at < %s")
+            params.append(created_before)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        cursor_name = f"hands_export_{uuid.uuid4().hex}"
+        total = 0
+        with self.db_manager.get_server_cursor(cursor_name, itersize=batch_size) as cursor:
+            cursor.execute(f"""
+                SELECT {HAND_COLUMNS}
+                FROM hands
+                {where}
+                ORDER BY created_at, id
+            """, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                total += len(rows)
+                yield [self._row_to_hand(row) for row in rows]
+        logger.info(f"Finished streaming {total} hands")
+    
     def get_all(self) -> List[PokerHand]:
         """Get all poker hands from database"""
         logger.info("Retrieving all poker hands from database")
         try:
             with self.db_manager.get_cursor() as cursor:
                 logger.debug("Executing SELECT query for all hands")
-                cursor.execute("""
-                    SELECT id, stacks, dealer_index, small_blind_index, big_blind_index,
-                           actions, hole_cards, board, winnings, created_at
+                cursor.execute(f"""
+                    SELECT {HAND_COLUMNS}
                     FROM hands 
                     ORDER BY created_at DESC
                 """)
@@ -76,19 +526,7 @@ class HandRepository:
                 hands = []
                 for i, row in enumerate(rows):
                     try:
-                        hand = PokerHand(
-                            id=row['id'],
-                            stacks=list(row['stacks']) if row['stacks'] else [],
-                            dealer_index=row['dealer_index'],
-                            small_blind_index=row['small_blind_index'],
-                            big_blind_index=row['big_blind_index'],
-                            actions=list(row['actions']) if row['actions'] else [],
-                            hole_cards=list(row['hole_cards']) if row['hole_cards'] else [],
-                            board=row['board'] or "",
-                            winnings=list(row['winnings']) if row['winnings'] else [],
-                            created_at=row['created_at']
-                        )
-                        hands.append(hand)
+                        hands.append(self._row_to_hand(row))
                     except Exception as row_error:
                         logger.error(f"Error processing row {i}: {row_error}")
                         logger.exception(f"Row processing error details for row {i}:")
@@ -109,9 +547,8 @@ class HandRepository:
         try:
             with self.db_manager.get_cursor() as cursor:
                 logger.debug(f"Executing SELECT query for hand ID: {hand_id}")
-                cursor.execute("""
-                    SELECT id, stacks, dealer_index, small_blind_index, big_blind_index,
-                           actions, hole_cards, board, winnings, created_at
+                cursor.execute(f"""
+                    SELECT {HAND_COLUMNS}
                     FROM hands 
                     WHERE id = %s
                 """, (hand_id,))
@@ -122,18 +559,7 @@ class HandRepository:
                     return None
                 
                 logger.info(f"Successfully retrieved hand with ID: {hand_id}")
-                return PokerHand(
-                    id=row['id'],
-                    stacks=list(row['stacks']) if row['stacks'] else [],
-                    dealer_index=row['dealer_index'],
-                    small_blind_index=row['small_blind_index'],
-                    big_blind_index=row['big_blind_index'],
-                    actions=list(row['actions']) if row['actions'] else [],
-                    hole_cards=list(row['hole_cards']) if row['hole_cards'] else [],
-                    board=row['board'] or "",
-                    winnings=list(row['winnings']) if row['winnings'] else [],
-                    created_at=row['created_at']
-                )
+                return self._row_to_hand(row)
                 
         except Exception as e:
             logger.error(f"Failed to get hand {hand_id}: {e}")
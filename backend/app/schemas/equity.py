@@ -0,0 +1,44 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+class EquityRequest(BaseModel):
+    hole_cards: List[str] = Field(..., min_length=2, max_length=10, description="Hole cards for each player, e.g. \"AsKd\"")
+    board: str = Field("", description="Known board cards (0-5)")
+    iterations: Optional[int] = Field(None, gt=0, description="Maximum Monte Carlo samples")
+    time_budget_ms: Optional[int] = Field(None, gt=0, description="Stop sampling after this many milliseconds")
+    seed: Optional[int] = Field(None, description="Random seed for reproducible sampling")
+
+
+class PlayerEquity(BaseModel):
+    win: float
+    tie: float
+    equity: float
+
+
+class EquityResponse(BaseModel):
+    players: List[PlayerEquity]
+    method: str
+    samples: int
+    elapsed_seconds: float
+
+
+class RangeEquityRequest(BaseModel):
+    hero_range: str = Field(..., min_length=1, description="Hero's range, e.g. \"QQ+,AKs\"")
+    villain_range: str = Field(..., min_length=1, description="Villain's range, e.g. \"22+,A2s+\"")
+    board: str = Field("", description="Known board cards (0-5)")
+    iterations: Optional[int] = Field(None, gt=0, description="Maximum sampled runouts when not enumerating")
+    time_budget_ms: Optional[int] = Field(None, gt=0, description="Latency budget; stop evaluating runouts after this many milliseconds")
+    seed: Optional[int] = Field(None, description="Random seed for reproducible sampling")
+
+
+class RangeEquityResponse(BaseModel):
+    hero: PlayerEquity
+    villain: PlayerEquity
+    hero_combos: int
+    villain_combos: int
+    matchups: int
+    method: str
+    samples: int
+    elapsed_seconds: float
+    cached: bool
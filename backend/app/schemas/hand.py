@@ -1,16 +1,68 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import List, Optional
 from datetime import datetime
+from app.models.game import GameStructure
+
+
+class GameStructureSchema(BaseModel):
+    small_blind: int = Field(20, ge=0, description="Small blind")
+    big_blind: int = Field(40, gt=0, description="Big blind")
+    ante: int = Field(0, ge=0, description="Ante posted by every player")
+    straddles: List[int] = Field(
+        default_factory=list,
+        max_length=7,
+        description="Straddles posted after the big blind, in seat order"
+    )
+    min_bet: int = Field(0, ge=0, description="Minimum bet; 0 means the big blind")
+
+    @model_validator(mode="after")
+    def check_amounts(self) -> 'GameStructureSchema':
+        if self.small_blind > self.big_blind:
+            raise ValueError("The small blind cannot be larger than the big blind")
+        if any(straddle <= 0 for straddle in self.straddles):
+            raise ValueError("Straddles must be positive")
+        return self
+
+    def to_structure(self) -> GameStructure:
+        return GameStructure(**self.model_dump())
 
 
 class PokerHandCreate(BaseModel):
     stacks: List[int] = Field(..., description="Starting stacks for 6 players")
     dealer_index: int = Field(0, description="Dealer position (0-5)")
-    small_blind_index: int = Field(1, description="Small blind position (0-5)")
-    big_blind_index: int = Field(2, description="Big blind position (0-5)")
+    small_blind_index: Optional[int] = Field(None, description="Small blind position (0-5); defaults to the seat after the dealer")
+    big_blind_index: Optional[int] = Field(None, description="Big blind position (0-5); defaults to the seat after the small blind")
     actions: List[str] = Field(default_factory=list, description="Action sequence")
     hole_cards: List[str] = Field(default_factory=list, description="Hole cards for each player")
     board: str = Field("", description="Board cards")
+    structure: GameStructureSchema = Field(
+        default_factory=GameStructureSchema,
+        description="Blinds, antes and straddles (20/40 by default)"
+    )
+
+    @model_validator(mode="after")
+    def check_positions(self) -> 'PokerHandCreate':
+        """Fill in the blind positions and check the engine can seat them.
+
+        The big blind sits right after the small blind; heads-up the small
+        blind acts first pre-flop. Straddles are posted by the seats after
+        the big blind.
+        """
+        players = len(self.stacks)
+        if players < 2:
+            return self
+        if self.small_blind_index is None:
+            self.small_blind_index = (self.dealer_index + 1) % players
+        if self.big_blind_index is None:
+            self.big_blind_index = (self.small_blind_index + 1) % players
+        positions = (self.dealer_index, self.small_blind_index, self.big_blind_index)
+        if any(not 0 <= index < players for index in positions):
+            raise ValueError(f"Position indices must be between 0 and {players - 1}")
+        if self.big_blind_index != (self.small_blind_index + 1) % players:
+            raise ValueError("The big blind must sit right after the small blind")
+        if len(self.structure.straddles) > players - 2:
+            raise ValueError("More straddles than players after the big blind")
+        return self
 
 
 class PokerHandResponse(BaseModel):
@@ -23,6 +75,7 @@ class PokerHandResponse(BaseModel):
     hole_cards: List[str]
     board: str
     winnings: List[int]
+    structure: Optional[GameStructureSchema] = None
     created_at: Optional[datetime] = None
     
     class Config:
@@ -32,4 +85,57 @@ class PokerHandResponse(BaseModel):
 class PokerHandUpdate(BaseModel):
     actions: Optional[List[str]] = None
     hole_cards: Optional[List[str]] = None
-    board: Optional[str] = None
\ No newline at end of file
+    board: Optional[str] = None
+
+
+class LiveHandCreate(PokerHandCreate):
+    table_id: Optional[str] = Field(
+        None,
+        pattern="^[A-Za-z0-9_-]{1,64}$",
+        description="Table whose push channel receives this hand's updates"
+    )
+
+
+class LiveHandResponse(BaseModel):
+    id: str
+    table_id: Optional[str] = None
+    starting_stacks: List[int]
+    stacks: List[int]
+    bets: List[int]
+    pot: int
+    actor_index: Optional[int] = None
+    actions: List[str]
+    board: str
+    finished: bool
+    winnings: Optional[List[int]] = None
+    created_at: Optional[datetime] = None
+
+
+class PokerHandBatchResult(BaseModel):
+    index: int
+    id: Optional[str] = None
+    winnings: Optional[List[int]] = None
+    structure: Optional[GameStructureSchema] = None
+    created_at: Optional[datetime] = None
+    error: Optional[str] = None
+
+
+class PokerHandBatchResponse(BaseModel):
+    results: List[PokerHandBatchResult]
+    saved: int
+    failed: int
+    elapsed_seconds: float
+    hands_per_second: float
+
+
+class HandImportFailure(BaseModel):
+    index: int
+    error: str
+
+
+class HandImportResponse(BaseModel):
+    imported: int
+    failed: int
+    errors: List[HandImportFailure]
+    elapsed_seconds: float
+    hands_per_second: float
@@ -0,0 +1,25 @@
+from pydantic import BaseModel
+from typing import Optional
+
+
+class PlayerStatCounts(BaseModel):
+    vpip: int
+    pfr: int
+    three_bet_chances: int
+    three_bets: int
+    aggressive_actions: int
+    calls: int
+    showdowns: int
+    showdowns_won: int
+
+
+class PlayerStatsResponse(BaseModel):
+    seat: int
+    hands: int
+    vpip: Optional[float] = None
+    pfr: Optional[float] = None
+    three_bet: Optional[float] = None
+    aggression_factor: Optional[float] = None
+    showdown_win_rate: Optional[float] = None
+    net_winnings: int
+    counts: PlayerStatCounts
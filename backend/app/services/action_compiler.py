@@ -0,0 +1,165 @@
+"""Single-pass compiler from action tokens to integer instructions.
+
+A hand's actions are strings such as ``"c"``, ``"r120"``, ``"allin"`` or a
+board token (``"AhKd2c"``, then ``"AhKd2c7s"`` and ``"AhKd2c7s9h"``: each
+board token repeats the cards dealt before it). ``compile_actions`` reads
+every token once and returns an ActionProgram whose ``code`` is a flat
+``array('q')`` of ``(opcode, operand)`` pairs, so replaying a hand never
+parses text again:
+
+    OP_FOLD, OP_CHECK, OP_CALL, OP_ALLIN    operand 0
+    OP_BET, OP_RAISE                        operand is the amount to bet or raise to
+    OP_DEAL                                 operand packs the board size after the deal
+                                            (low three bits) and the new cards as 6-bit
+                                            codes (rank * 4 + suit), first card lowest
+    OP_RAW                                  operand is the index of a token kept as text
+
+Tokens are matched on their first character like settlement always has
+("fold" folds, "bet 100" bets 100). Blank tokens are skipped. Anything else
+raises ActionSyntaxError naming the token, unless ``strict`` is off, in
+which case it compiles to OP_RAW so the text can still be shown.
+"""
+from array import array
+from typing import Iterator, List, Optional, Sequence, Tuple
+from app.services.hand_evaluator import RANKS, SUITS
+import re
+
+OP_FOLD = 0
+OP_CHECK = 1
+OP_CALL = 2
+OP_BET = 3
+OP_RAISE = 4
+OP_ALLIN = 5
+OP_DEAL = 6
+OP_RAW = 7
+
+CARD_TEXT = [rank + suit for rank in RANKS for suit in SUITS]
+_CARD_CODES = {text: code for code, text in enumerate(CARD_TEXT)}
+_SIMPLE_OPS = {'f': OP_FOLD, 'x': OP_CHECK, 'c': OP_CALL}
+_AMOUNT_OPS = {'b': OP_BET, 'r': OP_RAISE}
+_OP_TOKENS = {OP_FOLD: 'f', OP_CHECK: 'x', OP_CALL: 'c', OP_ALLIN: 'allin'}
+# Most tokens are already canonical: one dict lookup compiles them
+_CANONICAL = {token: (op, 0) for op, token in _OP_TOKENS.items()}
+_AMOUNT = re.compile(r'\d+')
+# Board token length (characters) -> board size after the deal
+_BOARD_SIZES = {6: 3, 8: 4, 10: 5}
+
+
+class ActionSyntaxError(ValueError):
+    """Raised for an action token that is neither an action nor a board"""
+
+    def __init__(self, index: int, token: str, reason: str):
+        super().__init__(f"Action {index} ({token!r}): {reason}")
+        self.index = index
+        self.token = token
+
+
+class ActionProgram:
+    """Compiled actions of a hand"""
+
+    __slots__ = ('code', 'board', 'tokens')
+
+    def __init__(self, code: array, board: str, tokens: Sequence[str]):
+        self.code = code
+        # Last board token: every card the actions deal
+        self.board = board
+        # Source tokens, for OP_RAW operands
+        self.tokens = tokens
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        code = iter(self.code)
+        return zip(code, code)
+
+    def __len__(self) -> int:
+        return len(self.code) // 2
+
+
+def deal_cards(operand: int) -> str:
+    """New board cards of an OP_DEAL operand, as text"""
+    codes = operand >> 3
+    if operand & 7 == 3:
+        return CARD_TEXT[codes & 63] + CARD_TEXT[codes >> 6 & 63] + CARD_TEXT[codes >> 12]
+    return CARD_TEXT[codes]
+
+
+def compile_action(token: str, index: int = 0, strict: bool = True) -> Optional[Tuple[int, int]]:
+    """Instruction for one token, or None for a blank token"""
+    token = token.strip()
+    if not token:
+        return (OP_RAW, index) if not strict else None
+    first = token[0]
+    op = _SIMPLE_OPS.get(first)
+    if op is not None:
+        return op, 0
+    op = _AMOUNT_OPS.get(first)
+    if op is not None:
+        amount = token[1:]
+        if amount.isdecimal():
+            return op, int(amount)
+        match = _AMOUNT.search(token)
+        if match:
+            return op, int(match.group())
+        reason = 'has no amount'
+    elif token == 'allin':
+        return OP_ALLIN, 0
+    else:
+        size = _BOARD_SIZES.get(len(token))
+        codes = [_CARD_CODES.get(token[i:i + 2]) for i in range(0, len(token), 2)] if size else None
+        if codes and None not in codes:
+            if size == 3:
+                return OP_DEAL, (codes[0] | codes[1] << 6 | codes[2] << 12) << 3 | 3
+            return OP_DEAL, codes[-1] << 3 | size
+        reason = 'is not an action or a board of 3 to 5 cards'
+    if strict:
+        raise ActionSyntaxError(index, token, reason)
+    return OP_RAW, index
+
+
+def compile_actions(actions: Sequence[str], strict: bool = True) -> ActionProgram:
+    """Compile a hand's action tokens in one pass"""
+    code = []
+    board = ''
+    canonical = _CANONICAL.get
+    amount_op = _AMOUNT_OPS.get
+    for index, token in enumerate(actions):
+        instruction = canonical(token)
+        if instruction is None:
+            op = amount_op(token[:1])
+            if op is not None and token[1:].isdecimal():
+                code += (op, int(token[1:]))
+                continue
+            if len(token) in (8, 10) and token[:-2] == board:
+                # A turn or river repeating the board already read: only its last card is new
+                card = _CARD_CODES.get(token[-2:])
+                if card is not None:
+                    code += (OP_DEAL, card << 3 | len(token) >> 1)
+                    board = token
+                    continue
+            instruction = compile_action(token, index, strict)
+            if instruction is None:
+                continue
+            if instruction[0] == OP_DEAL:
+                board = token.strip()
+        code += instruction
+    return ActionProgram(array('q', code), board, actions)
+
+
+def format_program(program: ActionProgram) -> List[str]:
+    """Canonical token of each instruction (board tokens repeat the earlier cards)"""
+    tokens = []
+    board = ''
+    simple = _OP_TOKENS.get
+    for op, operand in program:
+        token = simple(op)
+        if token is not None:
+            tokens.append(token)
+        elif op == OP_BET:
+            tokens.append(f'b{operand}')
+        elif op == OP_RAISE:
+            tokens.append(f'r{operand}')
+        elif op == OP_DEAL:
+            board = deal_cards(operand) if operand & 7 == 3 else board + deal_cards(operand)
+            tokens.append(board)
+        else:
+            tokens.append(program.tokens[operand])
+    return tokens
@@ -0,0 +1,356 @@
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from itertools import combinations
+from math import comb
+from typing import List, Optional, Sequence, Tuple
+from app.services.hand_evaluator import RANK_KEYS, get_rank_tables, parse_cards
+from app.services.hand_range import parse_range
+import numpy as np
+import threading
+import time
+import logging
+
+# Configure logging for this module
+logger = logging.getLogger(__name__)
+
+# Runouts evaluated per NumPy batch when sampling
+SAMPLE_BATCH_SIZE = 10000
+
+
+@dataclass
+class EquityResult:
+    """Per-player win/tie percentages and equity share (all in 0..100)"""
+    win: List[float]
+    tie: List[float]
+    equity: List[float]
+    method: str
+    samples: int
+    elapsed_seconds: float
+
+
+@lru_cache(maxsize=None)
+def _array_tables() -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """NumPy views of the rank tables: sorted keys/values, flush table and rank keys.
+
+    Keys and values are int32 views of the table buffers (no copy, so a
+    mapped table file stays shared between processes).
+    """
+    tables = get_rank_tables()
+    keys = np.frombuffer(tables.sorted_keys, dtype=np.int32)
+    values = np.frombuffer(tables.sorted_values, dtype=np.int32)
+    flush_values = np.asarray(tables.flush_values, dtype=np.int32)
+    return keys, values, flush_values, np.asarray(RANK_KEYS, dtype=np.int32)
+
+
+def evaluate_array(cards: np.ndarray) -> np.ndarray:
+    """Vectorized ``evaluate``: one hand value per row of an (n, 5..7) card array"""
+    keys, values, flush_values, rank_keys = _array_tables()
+    ranks = cards >> 2
+    suits = cards & 3
+
+    # Rank keys fit in 31 bits, so summing in int32 matches the key dtype
+    result = values[np.searchsorted(keys, rank_keys[ranks].sum(axis=1, dtype=np.int32))]
+    rank_bits = np.left_shift(1, ranks)
+    for suit in range(4):
+        in_suit = suits == suit
+        counts = in_suit.sum(axis=1)
+        if not (counts >= 5).any():
+            continue
+        # Cards are distinct, so summing the rank bits is the same as OR-ing them
+        masks = np.where(in_suit, rank_bits, 0).sum(axis=1)
+        result = np.maximum(result, np.where(counts >= 5, flush_values[masks], 0))
+    return result
+
+
+def _parse_players(hole_cards: Sequence[str], board: str) -> Tuple[List[List[int]], List[int]]:
+    if len(hole_cards) < 2:
+        raise ValueError("At least two players are required")
+    players = [parse_cards(cards) for cards in hole_cards]
+    for index, cards in enumerate(players):
+        if len(cards) != 2:
+            raise ValueError(f"Player {index} must have exactly two hole cards")
+    board_cards = parse_cards(board)
+    if len(board_cards) > 5:
+        raise ValueError("Board cannot have more than five cards")
+
+    known = [card for cards in players for card in cards] + board_cards
+    if len(set(known)) != len(known):
+        raise ValueError("Duplicate cards in hole cards and board")
+    return players, board_cards
+
+
+class EquityCalculator:
+    """All-in equity for known hole cards on a partial board.
+
+    Runouts are enumerated exactly when there are at most
+    ``exhaustive_limit`` of them; otherwise they are sampled in NumPy
+    batches until the iteration or time budget runs out.
+    """
+
+    def __init__(self, exhaustive_limit: int = 200000):
+        self.exhaustive_limit = exhaustive_limit
+
+    def calculate(
+        self,
+        hole_cards: Sequence[str],
+        board: str = "",
+        iterations: int = 100000,
+        time_budget_ms: Optional[int] = None,
+        seed: Optional[int] = None
+    ) -> EquityResult:
+        started = time.perf_counter()
+        players, board_cards = _parse_players(hole_cards, board)
+        known = {card for cards in players for card in cards} | set(board_cards)
+        deck = np.array([card for card in range(52) if card not in known], dtype=np.int64)
+        missing = 5 - len(board_cards)
+
+        deadline = None
+        if time_budget_ms is not None:
+            deadline = started + time_budget_ms / 1000
+
+        runout_count = comb(len(deck), missing)
+        if runout_count <= self.exhaustive_limit:
+            method = "exhaustive"
+            runouts = np.array(list(combinations(range(len(deck)), missing)), dtype=np.int64)
+            wins, ties, shares = self._score(players, board_cards, deck[runouts.reshape(runout_count, missing)])
+            samples = runout_count
+        else:
+            method = "monte_carlo"
+            rng = np.random.default_rng(seed)
+            wins = np.zeros(len(players))
+            ties = np.zeros(len(players))
+            shares = np.zeros(len(players))
+            samples = 0
+            while samples < iterations:
+                size = min(SAMPLE_BATCH_SIZE, iterations - samples)
+                # The first `missing` columns of a random partition are a uniform draw without replacement
+                picks = np.argpartition(rng.random((size, len(deck))), missing, axis=1)[:, :missing]
+                batch_wins, batch_ties, batch_shares = self._score(players, board_cards, deck[picks])
+                wins += batch_wins
+                ties += batch_ties
+                shares += batch_shares
+                samples += size
+                if deadline is not None and time.perf_counter() >= deadline:
+                    logger.debug(f"Equity time budget reached after {samples} samples")
+                    break
+
+        elapsed = time.perf_counter() - started
+        return EquityResult(
+            win=[float(value) for value in wins * 100 / samples],
+            tie=[float(value) for value in ties * 100 / samples],
+            equity=[float(value) for value in shares * 100 / samples],
+            method=method,
+            samples=samples,
+            elapsed_seconds=elapsed
+        )
+
+    @staticmethod
+    def _score(
+        players: List[List[int]],
+        board_cards: List[int],
+        runouts: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Count wins, ties and pot shares per player over a batch of runouts"""
+        size = len(runouts)
+        board = np.broadcast_to(np.array(board_cards, dtype=np.int64), (size, len(board_cards)))
+        values = np.stack([
+            evaluate_array(np.hstack([
+                np.broadcast_to(np.array(cards, dtype=np.int64), (size, 2)),
+                board,
+                runouts
+            ]))
+            for cards in players
+        ])
+        best = values == values.max(axis=0)
+        winners = best.sum(axis=0)
+        wins = (best & (winners == 1)).sum(axis=1)
+        ties = (best & (winners > 1)).sum(axis=1)
+        shares = (best / winners).sum(axis=1)
+        return wins, ties, shares
+
+
+@dataclass
+class RangeEquityResult:
+    """Win/tie percentages and equity share (0..100) of each range, plus counts"""
+    win: List[float]
+    tie: List[float]
+    equity: List[float]
+    combos: List[int]
+    matchups: int
+    method: str
+    samples: int
+    elapsed_seconds: float
+    cached: bool = False
+
+
+def _card_masks(combos: np.ndarray) -> np.ndarray:
+    """52-bit card set of each combo row"""
+    return np.bitwise_or.reduce(np.left_shift(np.int64(1), combos), axis=1)
+
+
+class RangeEquityCalculator:
+    """Equity of one hand range against another on a partial board.
+
+    Every compatible pair of combos (no shared card) counts equally. For each
+    runout the hand value of every combo in both ranges is computed in one
+    NumPy batch, then all combo pairs are compared at once. Runouts are
+    enumerated (in random order, so a time budget cut still leaves an
+    unbiased sample) when there are at most ``exhaustive_limit`` of them,
+    otherwise sampled.
+
+    Results are cached per (range, range, board) on the expanded combo sets,
+    so differently written but equal ranges share an entry. Exact results
+    are always reused; sampled ones only when they have enough samples and
+    no ``seed`` is given, so a seeded call always reproduces its own sample.
+    """
+
+    # Combo pair comparisons per NumPy batch (bounds memory per batch)
+    PAIR_BATCH_SIZE = 4_000_000
+
+    def __init__(self, exhaustive_limit: int = 200000, cache_size: int = 1024):
+        self.exhaustive_limit = exhaustive_limit
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[tuple, RangeEquityResult]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def calculate(
+        self,
+        hero_range: str,
+        villain_range: str,
+        board: str = "",
+        iterations: int = 10000,
+        time_budget_ms: Optional[int] = None,
+        seed: Optional[int] = None
+    ) -> RangeEquityResult:
+        started = time.perf_counter()
+        board_cards = parse_cards(board)
+        if len(board_cards) > 5:
+            raise ValueError("Board cannot have more than five cards")
+        if len(set(board_cards)) != len(board_cards):
+            raise ValueError("Duplicate cards on the board")
+
+        # Drop combos that use a board card
+        board_mask = sum(1 << card for card in board_cards)
+        ranges = []
+        for name, text in (("Hero", hero_range), ("Villain", villain_range)):
+            combos = np.array(parse_range(text), dtype=np.int64)
+            combos = combos[(_card_masks(combos) & board_mask) == 0]
+            if not len(combos):
+                raise ValueError(f"{name} range has no combos left on this board")
+            ranges.append(combos)
+        hero, villain = ranges
+
+        key = (hero.tobytes(), villain.tobytes(), tuple(sorted(board_cards)))
+        cached = self._cache_get(key, iterations, exact_only=seed is not None)
+        if cached is not None:
+            return cached
+
+        hero_masks, villain_masks = _card_masks(hero), _card_masks(villain)
+        compatible = (hero_masks[:, None] & villain_masks[None, :]) == 0
+        matchups = int(compatible.sum())
+        if not matchups:
+            raise ValueError("Every hero combo shares a card with every villain combo")
+
+        deck = np.array([card for card in range(52) if not board_mask >> card & 1], dtype=np.int64)
+        missing = 5 - len(board_cards)
+        runout_count = comb(len(deck), missing)
+        deadline = started + time_budget_ms / 1000 if time_budget_ms is not None else None
+        rng = np.random.default_rng(seed)
+        batch_size = max(1, self.PAIR_BATCH_SIZE // (len(hero) * len(villain)))
+
+        totals = np.zeros(3, dtype=np.int64)  # hero wins, ties, compared pairs
+        samples = 0
+        if runout_count <= self.exhaustive_limit:
+            runouts = np.array(list(combinations(range(len(deck)), missing)), dtype=np.int64)
+            runouts = deck[runouts.reshape(runout_count, missing)][rng.permutation(runout_count)]
+            limit = runout_count
+        else:
+            runouts = None
+            limit = iterations
+
+        while samples < limit:
+            size = min(batch_size, limit - samples)
+            if runouts is not None:
+                batch = runouts[samples:samples + size]
+            else:
+                picks = np.argpartition(rng.random((size, len(deck))), missing, axis=1)[:, :missing]
+                batch = deck[picks]
+            totals += self._score(hero, hero_masks, villain, villain_masks, compatible, board_cards, batch)
+            samples += size
+            if deadline is not None and time.perf_counter() >= deadline:
+                logger.debug(f"Range equity time budget reached after {samples} runouts")
+                break
+
+        wins, ties, compared = (int(value) for value in totals)
+        win = wins * 100 / compared
+        tie = ties * 100 / compared
+        result = RangeEquityResult(
+            win=[win, 100 - win - tie],
+            tie=[tie, tie],
+            equity=[win + tie / 2, 100 - win - tie / 2],
+            combos=[len(hero), len(villain)],
+            matchups=matchups,
+            method="exhaustive" if samples == runout_count and runouts is not None else "monte_carlo",
+            samples=samples,
+            elapsed_seconds=time.perf_counter() - started
+        )
+        self._cache_put(key, result)
+        return result
+
+    @staticmethod
+    def _score(
+        hero: np.ndarray,
+        hero_masks: np.ndarray,
+        villain: np.ndarray,
+        villain_masks: np.ndarray,
+        compatible: np.ndarray,
+        board_cards: List[int],
+        runouts: np.ndarray
+    ) -> np.ndarray:
+        """Hero wins, ties and compared pairs over a batch of runouts"""
+        size = len(runouts)
+        boards = np.hstack([np.broadcast_to(np.array(board_cards, dtype=np.int64), (size, len(board_cards))), runouts])
+        runout_masks = _card_masks(runouts) if runouts.shape[1] else np.zeros(size, dtype=np.int64)
+
+        def values(combos: np.ndarray, masks: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+            # Only combos that do not hold a runout card are evaluated
+            dealt = (masks[None, :] & runout_masks[:, None]) == 0
+            cards = np.concatenate([
+                np.broadcast_to(combos[None, :, :], (size, len(combos), 2)),
+                np.broadcast_to(boards[:, None, :], (size, len(combos), 5)),
+            ], axis=2)
+            result = np.zeros((size, len(combos)), dtype=np.int32)
+            result[dealt] = evaluate_array(cards[dealt])
+            return result, dealt
+
+        hero_values, hero_dealt = values(hero, hero_masks)
+        villain_values, villain_dealt = values(villain, villain_masks)
+        valid = compatible[None, :, :] & hero_dealt[:, :, None] & villain_dealt[:, None, :]
+        hero_values = hero_values[:, :, None]
+        villain_values = villain_values[:, None, :]
+        return np.array([
+            np.count_nonzero(valid & (hero_values > villain_values)),
+            np.count_nonzero(valid & (hero_values == villain_values)),
+            np.count_nonzero(valid),
+        ])
+
+    def _cache_get(self, key: tuple, iterations: int, exact_only: bool = False) -> Optional[RangeEquityResult]:
+        with self._lock:
+            result = self._cache.get(key)
+            if result is None:
+                return None
+            if result.method != "exhaustive" and (exact_only or result.samples < iterations):
+                return None
+            self._cache.move_to_end(key)
+        return replace(result, cached=True, elapsed_seconds=0.0)
+
+    def _cache_put(self, key: tuple, result: RangeEquityResult) -> None:
+        with self._lock:
+            current = self._cache.get(key)
+            if current is not None and current.samples > result.samples:
+                return
+            self._cache[key] = result
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
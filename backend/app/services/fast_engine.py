@@ -0,0 +1,412 @@
+from collections import deque
+from typing import Deque, List, Optional, Sequence, Set, Tuple
+from app.services.hand_evaluator import evaluate, parse_cards
+
+
+class UnsupportedHandError(Exception):
+    """Raised when a hand falls outside what the fast engine handles.
+
+    Callers should settle such hands with pokerkit instead.
+    """
+
+
+# Street layout for Texas Hold'em: (burn before dealing, board cards dealt)
+_STREETS = (
+    (False, 0),  # pre-flop (hole cards only)
+    (True, 3),   # flop
+    (True, 1),   # turn
+    (True, 1),   # river
+)
+_HOLE_CARD_COUNT = 2
+
+_DEALING = 'dealing'
+_BETTING = 'betting'
+_TERMINAL = 'terminal'
+
+
+class FastHoldemState:
+    """Integer-only no-limit hold'em state for settling recorded hands.
+
+    Implements the subset of ``pokerkit.State`` that ``PokerEngine`` drives
+    (``deal_hole``, ``fold``, ``check_or_call``, ``complete_bet_or_raise_to``,
+    ``burn_card``, ``deal_board``, ``stacks`` and ``actor_index``) with the
+    same rules and the same tournament-mode automations, so the final stacks
+    match pokerkit for every hand it accepts. Illegal actions raise
+    ``ValueError`` exactly where pokerkit would; inputs it does not model
+    (unknown or duplicate cards, players all-in from the ante) raise
+    ``UnsupportedHandError``.
+    """
+
+    def __init__(
+        self,
+        starting_stacks: Sequence[int],
+        blinds: Sequence[int] = (20, 40),
+        min_bet: int = 40,
+        ante: int = 0
+    ):
+        if len(starting_stacks) < 2:
+            raise ValueError('At least two players are required.')
+        if any(stack <= 0 for stack in starting_stacks):
+            raise ValueError('Non-positive starting stacks was supplied.')
+
+        self.player_count = len(starting_stacks)
+        self.min_bet = min_bet
+        self.stacks: List[int] = list(starting_stacks)
+        self.bets: List[int] = [0] * self.player_count
+        self.contributions: List[int] = [0] * self.player_count
+        self.statuses: List[bool] = [True] * self.player_count
+        self.hole_cards: List[List[int]] = [[] for _ in range(self.player_count)]
+        self.shown: List[bool] = [False] * self.player_count
+        self.board: List[int] = []
+        self._used_cards = 0
+
+        self.phase = _DEALING
+        self.street_index = 0
+        self.burn_pending = False
+        self.board_pending = 0
+        self.hole_pending = self.player_count * _HOLE_CARD_COUNT
+
+        self.actor_indices: Deque[int] = deque()
+        self.opener_index: Optional[int] = None
+        self.raise_amount = 0
+        self.acted_player_indices: Set[int] = set()
+        self.short_all_in_amounts: List[int] = []
+        self.all_in_status = False
+
+        # Uniform antes go straight into the pot before the blinds
+        if ante:
+            if any(stack <= ante for stack in self.stacks):
+                raise UnsupportedHandError('A player is all-in from the ante')
+            for i in range(self.player_count):
+                self._commit(i, ante)
+            self._collect_bets()
+
+        # Blind and straddle posting; heads-up the button (player 1) posts
+        # the small blind and straddles do not apply
+        self.blinds = list(blinds[:self.player_count]) + [0] * (self.player_count - len(blinds))
+        if self.player_count == 2:
+            self.blinds = self.blinds[::-1]
+        for i, blind in enumerate(self.blinds):
+            amount = min(self.stacks[i], blind)
+            self._commit(i, amount)
+
+    # Properties mirroring pokerkit
+
+    @property
+    def actor_index(self) -> Optional[int]:
+        return self.actor_indices[0] if self.actor_indices else None
+
+    @property
+    def status(self) -> bool:
+        return self.phase != _TERMINAL
+
+    # Dealing
+
+    def deal_hole(self, cards: str) -> None:
+        if not cards:
+            raise ValueError('The number of cards dealt must be non-zero.')
+        if self.phase != _DEALING or self.street_index != 0 or not self.hole_pending:
+            raise ValueError('No hole dealing is pending.')
+        parsed = self._parse_new_cards(cards)
+        if len(parsed) != _HOLE_CARD_COUNT:
+            raise UnsupportedHandError(f'Expected two hole cards, got {cards!r}')
+
+        player_index = self.player_count - self.hole_pending // _HOLE_CARD_COUNT
+        self.hole_cards[player_index].extend(parsed)
+        self.hole_pending -= _HOLE_CARD_COUNT
+        if not self.hole_pending:
+            self._begin_betting()
+
+    def burn_card(self) -> None:
+        if self.phase != _DEALING or not self.burn_pending:
+            raise ValueError('No card burning is pending.')
+        self.burn_pending = False
+
+    def deal_board(self, cards: str) -> None:
+        if self.phase != _DEALING or not self.board_pending:
+            raise ValueError('No board dealing is pending.')
+        if self.burn_pending:
+            raise ValueError('A card must be burnt before board dealing.')
+        parsed = self._parse_new_cards(cards)
+        if not 0 < len(parsed) <= self.board_pending:
+            raise ValueError(
+                f'The number of dealt cards must be non-zero and less than'
+                f' or equal to {self.board_pending}, not {len(parsed)}.'
+            )
+        self.board.extend(parsed)
+        self.board_pending -= len(parsed)
+        if not self.board_pending:
+            self._begin_betting()
+
+    def _parse_new_cards(self, cards: str) -> List[int]:
+        try:
+            parsed = parse_cards(cards)
+        except ValueError as e:
+            raise UnsupportedHandError(str(e))
+        for card in parsed:
+            bit = 1 << card
+            if self._used_cards & bit:
+                raise UnsupportedHandError(f'Card dealt twice in {cards!r}')
+            self._used_cards |= bit
+        return parsed
+
+    def _begin_dealing(self) -> None:
+        self.street_index += 1
+        self.phase = _DEALING
+        self.burn_pending, self.board_pending = _STREETS[self.street_index]
+
+    # Betting
+
+    def _commit(self, player_index: int, amount: int) -> None:
+        self.bets[player_index] += amount
+        self.stacks[player_index] -= amount
+        self.contributions[player_index] += amount
+
+    def _effective_stack(self, player_index: int) -> int:
+        totals = sorted(
+            self.bets[i] + self.stacks[i]
+            for i in range(self.player_count) if self.statuses[i]
+        )
+        return min(self.stacks[player_index], max(0, totals[-2] - self.bets[player_index]))
+
+    def _begin_betting(self) -> None:
+        self.phase = _BETTING
+        blinds = self.blinds if self.street_index == 0 else [0] * self.player_count
+        max_bet_index = max(
+            range(self.player_count),
+            key=lambda i: (self.bets[i] * (1 if blinds[i] > 0 else 0), i)
+        )
+        self.opener_index = (max_bet_index + 1) % self.player_count
+
+        self.actor_indices = deque(
+            (self.opener_index + offset) % self.player_count
+            for offset in range(self.player_count)
+        )
+        for i in range(self.player_count):
+            if not self.statuses[i] or not self.stacks[i] or not self._effective_stack(i):
+                self.actor_indices.remove(i)
+
+        self.raise_amount = 0
+        self.acted_player_indices.clear()
+        self.short_all_in_amounts.clear()
+        self._update_betting(
+            status=(
+                len(self.actor_indices) == 1
+                and self.bets[self.actor_indices[0]] >= max(self.bets)
+            )
+        )
+
+    def _update_betting(self, status: bool = False) -> None:
+        if not self.actor_indices or sum(self.statuses) <= 1 or status:
+            self._end_betting()
+
+    def _end_betting(self) -> None:
+        self.actor_indices.clear()
+        active = sum(self.statuses)
+        if active > 1:
+            if sum(1 for i in range(self.player_count) if self.statuses[i] and self.stacks[i]) <= 1:
+                self.all_in_status = True
+        if not all(self.stacks) and self.street_index == len(_STREETS) - 1:
+            self.all_in_status = True
+
+        self._collect_bets()
+
+        if active == 1:
+            self._push_chips()
+        elif self.street_index == len(_STREETS) - 1 or self.all_in_status:
+            self._showdown()
+        else:
+            self._begin_dealing()
+
+    def _collect_bets(self) -> None:
+        """Collect bets into the pot, returning any uncalled overbet.
+
+        When the hand was folded to one player, that player's bet is left
+        out of the pot and handed back with the winnings.
+        """
+        if not any(self.bets):
+            return
+        player_indices = list(range(self.player_count))
+        if sum(self.statuses) == 1:
+            player_indices.remove(self.statuses.index(True))
+
+        bet_cutoff = sorted(self.bets)[-2]
+        for i in player_indices:
+            if self.bets[i] > bet_cutoff:
+                overbet = self.bets[i] - bet_cutoff
+                self.stacks[i] += overbet
+                self.contributions[i] -= overbet
+                self.bets[i] = bet_cutoff
+        for i in player_indices:
+            self.bets[i] = 0
+
+    def _pop_actor_index(self) -> int:
+        if not self.actor_indices:
+            raise ValueError('There is no player to act.')
+        player_index = self.actor_indices.popleft()
+        self.acted_player_indices.add(player_index)
+        return player_index
+
+    def fold(self) -> None:
+        if not self.actor_indices:
+            raise ValueError('There is no player to act.')
+        if self.bets[self.actor_indices[0]] >= max(self.bets):
+            raise ValueError('There is no reason for this player to fold.')
+        player_index = self._pop_actor_index()
+        self.statuses[player_index] = False
+        self._update_betting()
+
+    def check_or_call(self) -> None:
+        if not self.actor_indices:
+            raise ValueError('There is no player to act.')
+        player_index = self._pop_actor_index()
+        amount = min(self.stacks[player_index], max(self.bets) - self.bets[player_index])
+        self._commit(player_index, amount)
+        self._update_betting()
+
+    def complete_bet_or_raise_to(self, amount: int) -> None:
+        if not self.actor_indices:
+            raise ValueError('There is no player to act.')
+        player_index = self.actor_indices[0]
+        max_bet = max(self.bets)
+        call_amount = min(self.stacks[player_index], max_bet - self.bets[player_index])
+
+        if call_amount < self.raise_amount:
+            raise ValueError('Short all-in cannot be raised.')
+        if (
+            self.short_all_in_amounts
+            and sum(self.short_all_in_amounts) < self.raise_amount
+            and player_index in self.acted_player_indices
+        ):
+            raise ValueError('The player already acted and cannot raise a non-full all-in wager.')
+        if self.stacks[player_index] <= max_bet - self.bets[player_index]:
+            raise ValueError('The player is already covered by a previous bet/raise.')
+        if not any(
+            i != player_index and self.statuses[i] and self.stacks[i] + self.bets[i] > max_bet
+            for i in range(self.player_count)
+        ):
+            raise ValueError('There is no reason to complete, bet, or raise.')
+
+        max_amount = self.stacks[player_index] + self.bets[player_index]
+        min_amount = min(max_amount, max(self.raise_amount, self.min_bet) + max_bet)
+        if amount < min_amount:
+            raise ValueError(f'The amount {amount} is below the minimum allowed {min_amount}.')
+        if amount > max_amount:
+            raise ValueError(f'The amount {amount} is above the maximum allowed {max_amount}.')
+
+        self._pop_actor_index()
+        raise_by = amount - max_bet
+        self._commit(player_index, amount - self.bets[player_index])
+
+        self.actor_indices = deque(
+            (player_index + offset) % self.player_count
+            for offset in range(1, self.player_count)
+        )
+        for i in range(self.player_count):
+            if (not self.statuses[i] or not self.stacks[i]) and i in self.actor_indices:
+                self.actor_indices.remove(i)
+        self.opener_index = player_index
+
+        if raise_by >= self.raise_amount:
+            self.acted_player_indices = {player_index}
+        self.raise_amount = max(self.raise_amount, raise_by)
+
+        if self.stacks[player_index]:
+            self.short_all_in_amounts.clear()
+        else:
+            self.short_all_in_amounts.append(raise_by)
+        if sum(self.short_all_in_amounts) >= self.raise_amount:
+            self.short_all_in_amounts.clear()
+
+        self._update_betting()
+
+    # Showdown and settlement
+
+    def _pots(self) -> List[Tuple[int, Tuple[int, ...]]]:
+        """Main and side pots as (amount, eligible players), merging equal eligibility"""
+        pots: List[Tuple[int, Tuple[int, ...]]] = []
+        collected = [
+            contribution - bet for contribution, bet in zip(self.contributions, self.bets)
+        ]
+        previous = 0
+        for level in sorted(set(collected)):
+            amount = sum(
+                level - previous
+                for contribution in collected if contribution >= level
+            )
+            eligible = tuple(
+                i for i in range(self.player_count)
+                if self.contributions[i] >= level and self.statuses[i]
+            )
+            while pots and pots[-1][1] == eligible:
+                amount += pots.pop()[0]
+            if amount:
+                pots.append((amount, eligible))
+            previous = level
+        return pots
+
+    def _can_win_now(self, player_index: int, values: List[Optional[int]]) -> bool:
+        value = values[player_index]
+        if value is None:
+            return False
+        for _, eligible in self._pots():
+            if player_index not in eligible:
+                continue
+            shown = [values[i] for i in eligible if self.shown[i]]
+            if not shown or max(shown) <= value:
+                return True
+        return False
+
+    def _hand_values(self) -> List[Optional[int]]:
+        if len(self.board) < 5:
+            return [None] * self.player_count
+        return [evaluate(cards + self.board) for cards in self.hole_cards]
+
+    def _showdown(self) -> None:
+        values = self._hand_values()
+        order = [
+            (self.opener_index + offset) % self.player_count
+            for offset in range(self.player_count)
+        ]
+        for i in order:
+            if not self.statuses[i] or self.shown[i]:
+                continue
+            if self.all_in_status or self._can_win_now(i, values):
+                self.shown[i] = True
+            else:
+                self.statuses[i] = False
+
+        if self.all_in_status and self.street_index != len(_STREETS) - 1:
+            self._begin_dealing()
+            return
+
+        # Hand killing
+        killed = [
+            i for i in range(self.player_count)
+            if self.statuses[i] and not self._can_win_now(i, values)
+        ]
+        for i in killed:
+            self.statuses[i] = False
+        self._push_chips(values)
+
+    def _push_chips(self, values: Optional[List[Optional[int]]] = None) -> None:
+        won = [0] * self.player_count
+        if sum(self.statuses) == 1:
+            for amount, eligible in self._pots():
+                if len(eligible) != 1:
+                    raise UnsupportedHandError('Uncontested pot without a single owner')
+                won[eligible[0]] += amount
+        else:
+            for amount, eligible in self._pots():
+                best = max(values[i] for i in eligible)
+                winners = [i for i in eligible if values[i] == best]
+                share, remainder = divmod(amount, len(winners))
+                for i in winners:
+                    won[i] += share
+                won[winners[0]] += remainder
+
+        # Chips pulling, including any bet left uncollected
+        for i in range(self.player_count):
+            self.stacks[i] += won[i] + self.bets[i]
+            self.bets[i] = 0
+        self.phase = _TERMINAL
@@ -0,0 +1,254 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from app.models.hand import PokerHand
+from app.core.config import settings
+from app.services.hand_codec import CompactHand
+import threading
+import time
+import logging
+
+# Configure logging for this module
+logger = logging.getLogger(__name__)
+
+# Key prefix of hands cached in Redis, shared with jobs that invalidate them
+REDIS_KEY_PREFIX = "hand:"
+
+
+class CacheBackend(ABC):
+    """Storage for cached hands. Implementations must be safe to share between requests."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[PokerHand]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, hand: PokerHand) -> None:
+        ...
+
+    @abstractmethod
+    async def delete(self, keys: Iterable[str]) -> None:
+        ...
+
+    @abstractmethod
+    async def clear(self) -> None:
+        ...
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process LRU dictionary with a per-entry time to live.
+
+    Entries are held as CompactHand (one bytes object per hand) and decoded
+    on each hit, so a full cache costs a fraction of the equivalent
+    PokerHand objects.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, CompactHand]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    async def get(self, key: str) -> Optional[PokerHand]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, hand = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+        return hand.to_hand()
+
+    async def set(self, key: str, hand: PokerHand) -> None:
+        compact = CompactHand.from_hand(hand)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, compact)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    async def delete(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    async def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class RedisCacheBackend(CacheBackend):
+    """Cache in Redis (or any server speaking its protocol) through ``redis.asyncio``.
+
+    Size is bounded by the server's ``maxmemory`` policy; entries expire after
+    ``ttl_seconds`` via SET EX. Values are the binary hand encoding.
+    """
+
+    def __init__(self, client, ttl_seconds: float, prefix: str = REDIS_KEY_PREFIX):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, ttl_seconds: float) -> 'RedisCacheBackend':
+        # Optional dependency: only needed when this backend is configured
+        import redis.asyncio
+
+        return cls(redis.asyncio.Redis.from_url(url), ttl_seconds)
+
+    async def get(self, key: str) -> Optional[PokerHand]:
+        raw = await self.client.get(self.prefix + key)
+        if raw is None:
+            return None
+        return CompactHand.from_bytes(key, raw).to_hand()
+
+    async def set(self, key: str, hand: PokerHand) -> None:
+        value = CompactHand.from_hand(hand).to_bytes()
+        await self.client.set(self.prefix + key, value, ex=max(1, int(self.ttl_seconds)))
+
+    async def delete(self, keys: Iterable[str]) -> None:
+        names = [self.prefix + key for key in keys]
+        if names:
+            await self.client.delete(*names)
+
+    async def clear(self) -> None:
+        async for name in self.client.scan_iter(match=self.prefix + "*"):
+            await self.client.delete(name)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "redis", "ttl_seconds": self.ttl_seconds}
+
+
+class HandCache:
+    """Read-through cache for hands by ID with hit/miss accounting.
+
+    Backend failures are logged and treated as misses so the cache can never
+    take the read path down with it.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend]):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    async def get(self, hand_id: str) -> Optional[PokerHand]:
+        if self.backend is None:
+            return None
+        try:
+            hand = await self.backend.get(hand_id)
+        except Exception as e:
+            logger.warning(f"Hand cache read failed for {hand_id}: {e}")
+            self.errors += 1
+            hand = None
+        if hand is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return hand
+
+    async def put(self, hand: PokerHand) -> None:
+        if self.backend is None:
+            return
+        try:
+            await self.backend.set(hand.id, hand)
+        except Exception as e:
+            logger.warning(f"Hand cache write failed for {hand.id}: {e}")
+            self.errors += 1
+
+    async def invalidate(self, hand_ids: Iterable[str]) -> None:
+        if self.backend is None:
+            return
+        try:
+            await self.backend.delete(list(hand_ids))
+        except Exception as e:
+            logger.warning(f"Hand cache invalidation failed: {e}")
+            self.errors += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        stats = {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+        if self.backend is not None:
+            stats.update(self.backend.stats())
+        return stats
+
+
+class CachedHandRepository:
+    """Wraps an AsyncHandRepository so ``get_by_id`` reads through the cache.
+
+    Saving a hand drops its cached copy; every other method goes straight
+    to the wrapped repository.
+    """
+
+    def __init__(self, repository, cache: HandCache):
+        self.repository = repository
+        self.cache = cache
+
+    async def get_by_id(self, hand_id: str) -> Optional[PokerHand]:
+        hand = await self.cache.get(hand_id)
+        if hand is not None:
+            logger.debug(f"Hand cache hit for {hand_id}")
+            return hand
+        hand = await self.repository.get_by_id(hand_id)
+        if hand is not None:
+            await self.cache.put(hand)
+        return hand
+
+    async def save(self, hand: PokerHand) -> PokerHand:
+        saved = await self.repository.save(hand)
+        await self.cache.invalidate([hand.id])
+        return saved
+
+    async def save_many(self, hands: List[PokerHand]) -> List[PokerHand]:
+        saved = await self.repository.save_many(hands)
+        await self.cache.invalidate(hand.id for hand in hands)
+        return saved
+
+    def __getattr__(self, name: str):
+        return getattr(self.repository, name)
+
+
+def create_hand_cache() -> HandCache:
+    """Build the cache configured by HAND_CACHE_BACKEND ("memory", "redis" or "none")"""
+    backend_name = settings.HAND_CACHE_BACKEND
+    if backend_name == "none":
+        logger.info("Hand cache disabled")
+        return HandCache(None)
+    if backend_name == "redis":
+        logger.info(f"Using Redis hand cache at {settings.HAND_CACHE_REDIS_URL}")
+        return HandCache(RedisCacheBackend.from_url(settings.HAND_CACHE_REDIS_URL, settings.HAND_CACHE_TTL_SECONDS))
+    if backend_name != "memory":
+        logger.warning(f"Unknown HAND_CACHE_BACKEND {backend_name!r}, using the in-process cache")
+    return HandCache(MemoryCacheBackend(settings.HAND_CACHE_MAX_SIZE, settings.HAND_CACHE_TTL_SECONDS))
+
+
+hand_cache = create_hand_cache()
@@ -0,0 +1,358 @@
+"""Compact binary encoding of a PokerHand.
+
+Layout (version 2)::
+
+    header        struct "<BiiiBBB": version, dealer_index, small_blind_index,
+                  big_blind_index, len(stacks), len(winnings), len(hole_cards)
+    stacks        int32 each
+    winnings      int32 each
+    structure     varint 0 for none, else len(straddles) + 1 followed by
+                  varints small_blind, big_blind, ante, min_bet, *straddles
+    hole entries  one per seat, then one for the board
+    actions       varint count, then one tagged varint per action
+    card stream
+
+Integers use the same 32-bit range as the INTEGER columns they replace.
+A hole or board entry is the varint ``count << 1`` when it is a run of
+``count`` well-formed cards (the cards themselves go to the card stream),
+or ``len << 1 | 1`` followed by that many UTF-8 bytes for anything else
+(folded seats, unknown cards, free text).
+
+An action is a LEB128 varint with a tag in the low three bits: fold, check,
+call, bet or raise with the amount in the high bits, all-in, a board deal
+with the card count in the high bits (cards in the card stream), or a raw
+UTF-8 token. Only tokens that re-encode to exactly the same text use the
+compact tags, so decoding is always lossless.
+
+The card stream packs every card, in encounter order, as a 6-bit integer
+(rank * 4 + suit), four cards to three bytes.
+
+Version 1 is the same without the structure field; it still decodes, with
+no structure.
+"""
+from typing import List, Optional, Tuple
+from datetime import datetime
+from app.models.game import GameStructure
+from app.models.hand import PokerHand
+from app.services.hand_evaluator import RANKS, SUITS
+import struct
+
+CODEC_VERSION = 2
+_READABLE_VERSIONS = (1, 2)
+
+TAG_FOLD = 0
+TAG_CHECK = 1
+TAG_CALL = 2
+TAG_BET = 3
+TAG_RAISE = 4
+TAG_ALLIN = 5
+TAG_DEAL = 6
+TAG_RAW = 7
+
+_HEADER = struct.Struct("<BiiiBBB")
+
+_SIMPLE_TAGS = {'f': TAG_FOLD, 'x': TAG_CHECK, 'c': TAG_CALL, 'allin': TAG_ALLIN}
+_AMOUNT_TAGS = {'b': TAG_BET, 'r': TAG_RAISE}
+
+_CARD_CODES = {rank + suit: r * 4 + s for r, rank in enumerate(RANKS) for s, suit in enumerate(SUITS)}
+_CARD_TEXT = [''] * 64
+for _text, _code in _CARD_CODES.items():
+    _CARD_TEXT[_code] = _text
+
+
+def _single_byte_actions() -> list:
+    """Decoded form of every one-byte action: token text, deal card count (int) or None for raw"""
+    simple = {tag: token for token, tag in _SIMPLE_TAGS.items()}
+    table = []
+    for value in range(0x80):
+        tag, payload = value & 7, value >> 3
+        if tag == TAG_DEAL:
+            table.append(payload)
+        elif tag == TAG_RAW:
+            table.append(None)
+        elif tag == TAG_BET:
+            table.append(f"b{payload}")
+        elif tag == TAG_RAISE:
+            table.append(f"r{payload}")
+        else:
+            table.append(simple[tag])
+    return table
+
+
+_ONE_BYTE_ACTIONS = _single_byte_actions()
+
+
+class HandCodecError(ValueError):
+    pass
+
+
+def _card_codes(text: str) -> Optional[List[int]]:
+    """Card codes for a run of cards, or None unless it is exactly that run"""
+    if len(text) % 2:
+        return None
+    codes = []
+    for i in range(0, len(text), 2):
+        code = _CARD_CODES.get(text[i:i + 2])
+        if code is None:
+            return None
+        codes.append(code)
+    return codes
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _write_raw(out: bytearray, text: str, tag_bits: int, tag: int) -> None:
+    data = text.encode()
+    _write_varint(out, (len(data) << tag_bits) | tag)
+    out += data
+
+
+def _write_cards_or_raw(out: bytearray, cards: List[int], text: str) -> None:
+    codes = _card_codes(text)
+    if codes is None:
+        _write_raw(out, text, 1, 1)
+    else:
+        _write_varint(out, len(codes) << 1)
+        cards.extend(codes)
+
+
+def encode_hand(hand: PokerHand) -> bytes:
+    """Encode everything but the id and created_at of a hand.
+
+    Raises HandCodecError for hands outside the format's limits (more than
+    255 seats, or amounts that do not fit the 32-bit INTEGER columns).
+    """
+    try:
+        out = bytearray(_HEADER.pack(
+            CODEC_VERSION,
+            hand.dealer_index,
+            hand.small_blind_index,
+            hand.big_blind_index,
+            len(hand.stacks),
+            len(hand.winnings),
+            len(hand.hole_cards)
+        ))
+        out += struct.pack(f"<{len(hand.stacks)}i{len(hand.winnings)}i", *hand.stacks, *hand.winnings)
+    except struct.error as e:
+        raise HandCodecError(f"Hand cannot be encoded: {e}") from e
+
+    structure = hand.structure
+    if structure is None:
+        out.append(0)
+    else:
+        amounts = (
+            structure.small_blind, structure.big_blind, structure.ante, structure.min_bet, *structure.straddles
+        )
+        if min(amounts) < 0:
+            raise HandCodecError(f"Hand cannot be encoded: negative amount in {structure}")
+        _write_varint(out, len(structure.straddles) + 1)
+        for amount in amounts:
+            _write_varint(out, amount)
+
+    cards: List[int] = []
+    for hole in hand.hole_cards:
+        _write_cards_or_raw(out, cards, hole)
+    _write_cards_or_raw(out, cards, hand.board)
+
+    _write_varint(out, len(hand.actions))
+    for action in hand.actions:
+        tag = _SIMPLE_TAGS.get(action)
+        if tag is not None:
+            out.append(tag)
+            continue
+        tag = _AMOUNT_TAGS.get(action[:1])
+        amount = action[1:]
+        if tag is not None and amount.isascii() and amount.isdigit() and str(int(amount)) == amount:
+            _write_varint(out, (int(amount) << 3) | tag)
+            continue
+        codes = _card_codes(action) if action else None
+        if codes:
+            _write_varint(out, (len(codes) << 3) | TAG_DEAL)
+            cards.extend(codes)
+            continue
+        _write_raw(out, action, 3, TAG_RAW)
+
+    # Pack the card stream 6 bits per card, most significant bits first
+    cards += [0] * (-len(cards) % 4)
+    for i in range(0, len(cards), 4):
+        word = cards[i] << 18 | cards[i + 1] << 12 | cards[i + 2] << 6 | cards[i + 3]
+        out += word.to_bytes(3, 'big')
+    return bytes(out)
+
+
+def _read_varint(data: bytes, pos: int, result: int = 0, shift: int = 0) -> Tuple[int, int]:
+    """Read a varint at ``pos`` (or finish one whose low bits are already in ``result``)"""
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def decode_hand(data: bytes, hand_id: str = "", created_at: Optional[datetime] = None) -> PokerHand:
+    """Rebuild the PokerHand that ``encode_hand`` encoded.
+
+    Card runs are first recorded as their card count (an int) in place of
+    the text, then filled in from the card stream once its offset is known.
+    """
+    if not data or data[0] not in _READABLE_VERSIONS:
+        raise HandCodecError(f"Unsupported hand data version: {data[:1].hex() or 'empty'}")
+    try:
+        return _decode(data, hand_id, created_at)
+    except (IndexError, struct.error, UnicodeDecodeError) as e:
+        raise HandCodecError(f"Corrupt hand data: {e}") from e
+
+
+def _decode(data: bytes, hand_id: str, created_at: Optional[datetime]) -> PokerHand:
+    version, dealer, small_blind, big_blind, stack_count, winning_count, hole_count = _HEADER.unpack_from(data)
+    numbers = struct.unpack_from(f"<{stack_count + winning_count}i", data, _HEADER.size)
+    pos = _HEADER.size + 4 * (stack_count + winning_count)
+
+    structure = None
+    if version >= 2:
+        count, pos = _read_varint(data, pos)
+        if count:
+            amounts = []
+            for _ in range(count + 3):
+                amount, pos = _read_varint(data, pos)
+                amounts.append(amount)
+            structure = GameStructure(
+                small_blind=amounts[0],
+                big_blind=amounts[1],
+                ante=amounts[2],
+                min_bet=amounts[3],
+                straddles=tuple(amounts[4:])
+            )
+
+    # Varints are read inline (indexing past the end raises IndexError):
+    # nearly all of them fit in one or two bytes
+    slots: list = []
+    card_total = 0
+    for _ in range(hole_count + 1):  # hole cards, then the board
+        header = data[pos]
+        pos += 1
+        if header >= 0x80:
+            header, pos = _read_varint(data, pos, header & 0x7F, 7)
+        if header & 1:
+            end = pos + (header >> 1)
+            if end > len(data):
+                raise IndexError("text runs past the end")
+            slots.append(data[pos:end].decode())
+            pos = end
+        else:
+            slots.append(header >> 1)
+            card_total += header >> 1
+
+    count = data[pos]
+    pos += 1
+    if count >= 0x80:
+        count, pos = _read_varint(data, pos, count & 0x7F, 7)
+    actions: list = [None] * count
+    one_byte = _ONE_BYTE_ACTIONS
+    for i in range(count):
+        value = data[pos]
+        pos += 1
+        if value < 0x80:
+            action = one_byte[value]
+            if action is not None:
+                actions[i] = action
+                if action.__class__ is int:
+                    card_total += action
+                continue
+        else:
+            second = data[pos]
+            pos += 1
+            if second < 0x80:
+                value = (value & 0x7F) | second << 7
+            else:
+                value, pos = _read_varint(data, pos, (value & 0x7F) | (second & 0x7F) << 7, 14)
+        tag = value & 7
+        if tag == TAG_RAW:
+            end = pos + (value >> 3)
+            if end > len(data):
+                raise IndexError("text runs past the end")
+            actions[i] = data[pos:end].decode()
+            pos = end
+        elif tag == TAG_DEAL:
+            actions[i] = value >> 3
+            card_total += value >> 3
+        elif tag == TAG_BET:
+            actions[i] = f"b{value >> 3}"
+        elif tag == TAG_RAISE:
+            actions[i] = f"r{value >> 3}"
+        else:
+            raise HandCodecError(f"Invalid action encoding {value}")
+
+    stream = data[pos:]
+    if len(stream) != (card_total + 3) // 4 * 3:
+        raise HandCodecError("Card stream length does not match the hand")
+    text = _CARD_TEXT
+    cards = []
+    for i in range(0, len(stream), 3):
+        word = stream[i] << 16 | stream[i + 1] << 8 | stream[i + 2]
+        cards += (text[word >> 18], text[word >> 12 & 0x3F], text[word >> 6 & 0x3F], text[word & 0x3F])
+    del cards[card_total:]
+    if '' in cards:
+        raise HandCodecError("Invalid card in hand data")
+    # Runs even without cards: empty hole cards and board are slots of length 0
+    position = 0
+    for values in (slots, actions):
+        for i, slot in enumerate(values):
+            if slot.__class__ is int:
+                values[i] = ''.join(cards[position:position + slot])
+                position += slot
+
+    return PokerHand(
+        id=hand_id,
+        stacks=list(numbers[:stack_count]),
+        dealer_index=dealer,
+        small_blind_index=small_blind,
+        big_blind_index=big_blind,
+        actions=actions,
+        hole_cards=slots[:-1],
+        board=slots[-1],
+        winnings=list(numbers[stack_count:]),
+        created_at=created_at,
+        structure=structure
+    )
+
+
+class CompactHand:
+    """Memory-light form of a hand: the encoded payload plus id and timestamp.
+
+    Used where many hands are held at once (e.g. the hand cache); call
+    ``to_hand`` to get the regular PokerHand back.
+    """
+    __slots__ = ("id", "created_at", "payload")
+
+    def __init__(self, id: str, payload: bytes, created_at: Optional[datetime] = None):
+        self.id = id
+        self.payload = payload
+        self.created_at = created_at
+
+    @classmethod
+    def from_hand(cls, hand: PokerHand) -> 'CompactHand':
+        return cls(hand.id, encode_hand(hand), hand.created_at)
+
+    def to_hand(self) -> PokerHand:
+        return decode_hand(self.payload, self.id, self.created_at)
+
+    def to_bytes(self) -> bytes:
+        """Payload prefixed with created_at, for stores keyed by hand id"""
+        created_at = self.created_at.isoformat().encode() if self.created_at else b""
+        return bytes((len(created_at),)) + created_at + self.payload
+
+    @classmethod
+    def from_bytes(cls, id: str, data: bytes) -> 'CompactHand':
+        if not data:
+            raise HandCodecError("Empty hand data")
+        end = 1 + data[0]
+        created_at = datetime.fromisoformat(data[1:end].decode()) if end > 1 else None
+        return cls(id, data[end:], created_at)
@@ -0,0 +1,359 @@
+from array import array
+from functools import lru_cache
+from itertools import combinations
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import logging
+
+# Configure logging for this module
+logger = logging.getLogger(__name__)
+
+RANKS = '23456789TJQKA'
+SUITS = 'cdhs'
+
+# Hand categories, weakest to strongest
+HIGH_CARD = 0
+ONE_PAIR = 1
+TWO_PAIR = 2
+THREE_OF_A_KIND = 3
+STRAIGHT = 4
+FLUSH = 5
+FULL_HOUSE = 6
+FOUR_OF_A_KIND = 7
+STRAIGHT_FLUSH = 8
+
+# Every card contributes 5**rank to a hand's rank key. Since no rank can
+# appear more than four times, the sum is a base-5 number that identifies
+# the rank multiset exactly (a collision-free hash that fits in 31 bits).
+RANK_KEYS = tuple(5 ** rank for rank in range(13))
+
+# Bump whenever hand values or the table layout change, so table files
+# written by an older build are rejected instead of silently misranking
+RANK_TABLE_VERSION = 1
+RANK_TABLE_MAGIC = b"PKRANKS\0"
+DEFAULT_RANK_TABLE_PATH = Path(__file__).resolve().parent.parent / "data" / "rank_tables.bin"
+
+# magic, version, rank entries, flush entries, SHA-256 of everything after the header
+_TABLE_HEADER = struct.Struct("<8sIII32s")
+
+_RANK_INDEX = {rank: i for i, rank in enumerate(RANKS)}
+_SUIT_INDEX = {suit: i for i, suit in enumerate(SUITS)}
+
+
+def encode_card(card: str) -> int:
+    """Encode a card such as "As" as an integer in 0..51 (rank * 4 + suit)"""
+    if len(card) != 2 or card[0] not in _RANK_INDEX or card[1] not in _SUIT_INDEX:
+        raise ValueError(f"Invalid card: {card!r}")
+    return _RANK_INDEX[card[0]] * 4 + _SUIT_INDEX[card[1]]
+
+
+def decode_card(card: int) -> str:
+    return RANKS[card >> 2] + SUITS[card & 3]
+
+
+def parse_cards(cards: str) -> List[int]:
+    """Parse a run of cards such as "AsKd" (whitespace is ignored) into integers"""
+    text = ''.join(cards.split())
+    if len(text) % 2:
+        raise ValueError(f"Invalid card string: {cards!r}")
+    return [encode_card(text[i:i + 2]) for i in range(0, len(text), 2)]
+
+
+def _hand_value(category: int, ranks: Sequence[int]) -> int:
+    value = category
+    for rank in ranks:
+        value = (value << 4) | rank
+    # Pad so every value carries five kicker nibbles
+    return value << (4 * (5 - len(ranks)))
+
+
+def _straight_high(rank_mask: int) -> int:
+    """Return the top rank of the best straight in the mask, or -1"""
+    for high in range(12, 3, -1):
+        window = 0b11111 << (high - 4)
+        if rank_mask & window == window:
+            return high
+    # Wheel: A-2-3-4-5
+    if rank_mask & 0b1000000001111 == 0b1000000001111:
+        return 3
+    return -1
+
+
+def _best_rank_value(counts: Sequence[int]) -> int:
+    """Value of the best non-flush five-card hand from a rank multiset"""
+    rank_mask = 0
+    for rank, count in enumerate(counts):
+        if count:
+            rank_mask |= 1 << rank
+
+    by_count = sorted(
+        ((count, rank) for rank, count in enumerate(counts) if count),
+        reverse=True
+    )
+    top_count, top_rank = by_count[0]
+
+    if top_count == 4:
+        kicker = max(rank for rank, count in enumerate(counts) if count and rank != top_rank)
+        return _hand_value(FOUR_OF_A_KIND, (top_rank, kicker))
+
+    if top_count == 3:
+        pair = max(
+            (rank for rank, count in enumerate(counts) if count >= 2 and rank != top_rank),
+            default=-1
+        )
+        if pair >= 0:
+            return _hand_value(FULL_HOUSE, (top_rank, pair))
+
+    straight = _straight_high(rank_mask)
+    if straight >= 0:
+        return _hand_value(STRAIGHT, (straight,))
+
+    singles = sorted((rank for rank, count in enumerate(counts) if count), reverse=True)
+    if top_count == 3:
+        kickers = [rank for rank in singles if rank != top_rank][:2]
+        return _hand_value(THREE_OF_A_KIND, (top_rank, *kickers))
+
+    pairs = sorted((rank for rank, count in enumerate(counts) if count == 2), reverse=True)
+    if len(pairs) >= 2:
+        kicker = max(rank for rank in singles if rank not in pairs[:2])
+        return _hand_value(TWO_PAIR, (pairs[0], pairs[1], kicker))
+    if pairs:
+        kickers = [rank for rank in singles if rank != pairs[0]][:3]
+        return _hand_value(ONE_PAIR, (pairs[0], *kickers))
+    return _hand_value(HIGH_CARD, singles[:5])
+
+
+def _best_flush_value(suit_mask: int) -> int:
+    """Value of the best flush or straight flush within one suit's rank mask"""
+    straight = _straight_high(suit_mask)
+    if straight >= 0:
+        return _hand_value(STRAIGHT_FLUSH, (straight,))
+    ranks = [rank for rank in range(12, -1, -1) if suit_mask >> rank & 1][:5]
+    return _hand_value(FLUSH, ranks)
+
+
+def _rank_multisets(card_count: int) -> List[Tuple[int, ...]]:
+    """All rank count vectors with ``card_count`` cards and at most four per rank"""
+    results = []
+
+    def walk(rank: int, remaining: int, counts: List[int]) -> None:
+        if rank == 13:
+            if remaining == 0:
+                results.append(tuple(counts))
+            return
+        for count in range(min(4, remaining) + 1):
+            counts.append(count)
+            walk(rank + 1, remaining - count, counts)
+            counts.pop()
+
+    walk(0, card_count, [])
+    return results
+
+
+class RankTableError(Exception):
+    pass
+
+
+class RankTables:
+    """Precomputed lookup tables for 5-, 6- and 7-card hand evaluation.
+
+    ``rank_values`` maps the base-5 rank key of a hand to its best
+    non-flush value; ``flush_values`` is indexed by a suit's 13-bit rank
+    mask and is only consulted when that suit holds five or more cards.
+    ``sorted_keys``/``sorted_values`` hold the same mapping as parallel
+    int32 buffers ordered by key, for vectorized lookups.
+
+    Table file layout (little-endian)::
+
+        header  struct "<8sIII32s": magic, RANK_TABLE_VERSION, len(sorted_keys),
+                len(flush_values), SHA-256 of the payload
+        payload int32 sorted_keys, int32 sorted_values, int32 flush_values
+    """
+
+    def __init__(
+        self,
+        rank_values: Dict[int, int],
+        flush_values: Sequence[int],
+        sorted_keys: Optional[Sequence[int]] = None,
+        sorted_values: Optional[Sequence[int]] = None
+    ):
+        self.rank_values = rank_values
+        self.flush_values = flush_values
+        if sorted_keys is None:
+            sorted_keys = array('i', sorted(rank_values))
+            sorted_values = array('i', (rank_values[key] for key in sorted_keys))
+        self.sorted_keys = sorted_keys
+        self.sorted_values = sorted_values
+
+    @classmethod
+    def build(cls) -> 'RankTables':
+        rank_values: Dict[int, int] = {}
+        for card_count in (5, 6, 7):
+            for counts in _rank_multisets(card_count):
+                key = sum(RANK_KEYS[rank] * count for rank, count in enumerate(counts))
+                rank_values[key] = _best_rank_value(counts)
+
+        flush_values = [0] * (1 << 13)
+        for mask in range(1 << 13):
+            if bin(mask).count('1') >= 5:
+                flush_values[mask] = _best_flush_value(mask)
+        return cls(rank_values, flush_values)
+
+    def to_bytes(self) -> bytes:
+        payload = array('i', self.sorted_keys) + array('i', self.sorted_values) + array('i', self.flush_values)
+        if sys.byteorder != 'little':
+            payload.byteswap()
+        data = payload.tobytes()
+        header = _TABLE_HEADER.pack(
+            RANK_TABLE_MAGIC,
+            RANK_TABLE_VERSION,
+            len(self.sorted_keys),
+            len(self.flush_values),
+            hashlib.sha256(data).digest()
+        )
+        return header + data
+
+    def write(self, path: Union[str, Path]) -> None:
+        """Write the table file atomically (readers never see a partial file)"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(self.to_bytes())
+            os.chmod(temp_path, 0o644)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'RankTables':
+        """Memory-map a table file written by ``write``.
+
+        ``sorted_keys`` and ``sorted_values`` are views of the mapping, so
+        processes that load the same file share those pages. The scalar
+        lookups (``rank_values``, ``flush_values``) are copied into a dict
+        and a list in each process (about 7.6MB), because those index far
+        faster than the mapped buffers. Loading still skips the second it
+        takes to build the tables. Raises RankTableError if the file is
+        from another table version or fails its checksum.
+        """
+        if sys.byteorder != 'little':
+            raise RankTableError("Table files can only be mapped on little-endian hosts")
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if len(mapped) < _TABLE_HEADER.size:
+                raise RankTableError(f"{path} is too short to be a rank table file")
+            magic, version, rank_count, flush_count, checksum = _TABLE_HEADER.unpack_from(mapped)
+            if magic != RANK_TABLE_MAGIC:
+                raise RankTableError(f"{path} is not a rank table file")
+            if version != RANK_TABLE_VERSION:
+                raise RankTableError(f"{path} holds version {version} tables, expected {RANK_TABLE_VERSION}")
+            with memoryview(mapped) as view:
+                valid = (
+                    len(view) == _TABLE_HEADER.size + 4 * (2 * rank_count + flush_count)
+                    and hashlib.sha256(view[_TABLE_HEADER.size:]).digest() == checksum
+                )
+            if not valid:
+                raise RankTableError(f"{path} failed its checksum")
+        except RankTableError:
+            mapped.close()
+            raise
+
+        ints = memoryview(mapped)[_TABLE_HEADER.size:].cast('i')
+        sorted_keys = ints[:rank_count]
+        sorted_values = ints[rank_count:2 * rank_count]
+        rank_values = dict(zip(sorted_keys.tolist(), sorted_values.tolist()))
+        flush_values = ints[2 * rank_count:].tolist()
+        return cls(rank_values, flush_values, sorted_keys, sorted_values)
+
+
+def rank_table_path() -> Path:
+    from app.core.config import settings
+
+    return Path(settings.RANK_TABLE_PATH) if settings.RANK_TABLE_PATH else DEFAULT_RANK_TABLE_PATH
+
+
+def ensure_rank_table_file(path: Optional[Union[str, Path]] = None) -> Path:
+    """Make sure a current table file exists, generating it if missing or stale"""
+    path = Path(path) if path is not None else rank_table_path()
+    try:
+        RankTables.load(path)
+        return path
+    except FileNotFoundError:
+        logger.info(f"No rank table file at {path}, generating it")
+    except RankTableError as e:
+        logger.warning(f"Regenerating rank table file: {e}")
+    RankTables.build().write(path)
+    logger.info(f"Rank tables written to {path}")
+    return path
+
+
+@lru_cache(maxsize=None)
+def get_rank_tables() -> RankTables:
+    """Load the lookup tables once per process, on first use.
+
+    Maps the table file when it is present and current, otherwise builds
+    the tables in memory (about a second).
+    """
+    path = rank_table_path()
+    try:
+        return RankTables.load(path)
+    except FileNotFoundError:
+        logger.info(f"No rank table file at {path}, building rank tables in memory")
+    except (RankTableError, OSError) as e:
+        logger.warning(f"Ignoring rank table file: {e}")
+    return RankTables.build()
+
+
+def evaluate(cards: Sequence[int]) -> int:
+    """Return a comparable value for the best five-card hand among 5-7 cards.
+
+    Higher is better and equal values tie.
+    """
+    tables = get_rank_tables()
+    key = 0
+    suit_masks = [0, 0, 0, 0]
+    suit_counts = [0, 0, 0, 0]
+    for card in cards:
+        rank = card >> 2
+        suit = card & 3
+        key += RANK_KEYS[rank]
+        suit_masks[suit] |= 1 << rank
+        suit_counts[suit] += 1
+
+    value = tables.rank_values[key]
+    for suit in range(4):
+        if suit_counts[suit] >= 5:
+            # At most one suit can hold five of seven cards
+            return max(value, tables.flush_values[suit_masks[suit]])
+    return value
+
+
+def hand_category(value: int) -> int:
+    return value >> 20
+
+
+def evaluate_naive(cards: Sequence[int]) -> int:
+    """Reference evaluator that scores every five-card subset; used to check the tables"""
+    best = -1
+    for five in combinations(cards, 5):
+        counts = [0] * 13
+        for card in five:
+            counts[card >> 2] += 1
+        value = _best_rank_value(counts)
+        if len({card & 3 for card in five}) == 1:
+            mask = 0
+            for card in five:
+                mask |= 1 << (card >> 2)
+            value = max(value, _best_flush_value(mask))
+        best = max(best, value)
+    return best
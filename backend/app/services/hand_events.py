@@ -0,0 +1,143 @@
+from typing import Dict, Iterable, List, Set
+from app.core.config import settings
+from app.core.metrics import registry
+import asyncio
+import json
+import re
+import logging
+
+# Configure logging for this module
+logger = logging.getLogger(__name__)
+
+HANDS_CHANNEL = "hands"
+_TABLE_CHANNEL = re.compile(r"^table:[A-Za-z0-9_-]{1,64}$")
+
+EVENTS_DROPPED = registry.counter(
+    "poker_events_dropped_total",
+    "Push events discarded because a subscriber fell behind"
+)
+
+
+def table_channel(table_id: str) -> str:
+    return f"table:{table_id}"
+
+
+def parse_channels(text: str, max_channels: int) -> List[str]:
+    """Validate a comma-separated channel list ("hands", "table:<id>")"""
+    channels = []
+    for name in text.split(","):
+        name = name.strip()
+        if not name or name in channels:
+            continue
+        if name != HANDS_CHANNEL and not _TABLE_CHANNEL.match(name):
+            raise ValueError(f"Unknown channel {name!r}")
+        channels.append(name)
+    if not channels:
+        raise ValueError("No channels requested")
+    if len(channels) > max_channels:
+        raise ValueError(f"At most {max_channels} channels per connection")
+    return channels
+
+
+class Subscriber:
+    """One connection's bounded queue of serialized events.
+
+    When the queue is full the oldest event is discarded, so a slow client
+    never holds up publishers or grows memory. The next message it receives
+    is then a ``dropped`` notice carrying the number of lost events, telling
+    it to re-sync that state over REST.
+    """
+
+    def __init__(self, channels: Iterable[str], max_queue: int):
+        self.channels: Set[str] = set(channels)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0
+
+    def deliver(self, message: str) -> None:
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+            EVENTS_DROPPED.inc()
+        self.queue.put_nowait(message)
+
+    async def next_message(self) -> str:
+        if self.dropped:
+            # Everything still queued arrived after the gap
+            dropped, self.dropped = self.dropped, 0
+            return json.dumps({"type": "dropped", "count": dropped})
+        return await self.queue.get()
+
+
+class HandEventBroker:
+    """In-process publish/subscribe for saved hands and live hand updates.
+
+    Events are serialized once per publish and the same string is queued
+    for every subscriber of the channel. Publishing never waits: it runs on
+    the event loop right after the database write it reports. Subscribers
+    are per process, like live hands.
+    """
+
+    def __init__(self, max_queue: int):
+        self.max_queue = max_queue
+        self._channels: Dict[str, Set[Subscriber]] = {}
+        self._subscribers: Set[Subscriber] = set()
+        self.published = 0
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, channels: Iterable[str]) -> Subscriber:
+        subscriber = Subscriber((), self.max_queue)
+        self._subscribers.add(subscriber)
+        self.add_channels(subscriber, channels)
+        logger.debug(f"Subscriber added for {sorted(subscriber.channels)} ({len(self)} open)")
+        return subscriber
+
+    def add_channels(self, subscriber: Subscriber, channels: Iterable[str]) -> None:
+        for channel in channels:
+            subscriber.channels.add(channel)
+            self._channels.setdefault(channel, set()).add(subscriber)
+
+    def remove_channels(self, subscriber: Subscriber, channels: Iterable[str]) -> None:
+        for channel in list(channels):
+            subscriber.channels.discard(channel)
+            subscribers = self._channels.get(channel)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._channels[channel]
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        self.remove_channels(subscriber, subscriber.channels)
+        self._subscribers.discard(subscriber)
+        logger.debug(f"Subscriber removed ({len(self)} open)")
+
+    def has_subscribers(self, channel: str) -> bool:
+        """Lets publishers skip building events nobody will receive"""
+        return channel in self._channels
+
+    def publish(self, channel: str, event_type: str, data_json: str) -> int:
+        """Queue an event whose ``data`` is already JSON; returns the number of recipients"""
+        subscribers = self._channels.get(channel)
+        if not subscribers:
+            return 0
+        message = f'{{"type":{json.dumps(event_type)},"channel":{json.dumps(channel)},"data":{data_json}}}'
+        for subscriber in subscribers:
+            subscriber.deliver(message)
+        self.published += 1
+        return len(subscribers)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "subscribers": len(self),
+            "channels": len(self._channels),
+            "published": self.published,
+            "dropped": int(EVENTS_DROPPED.values().get((), 0)),
+        }
+
+
+hand_events = HandEventBroker(settings.EVENTS_QUEUE_SIZE)
+
+registry.gauge("poker_event_subscribers", "Open push connections").set_function(
+    lambda: len(hand_events)
+)
@@ -0,0 +1,202 @@
+from typing import Any, AsyncIterable, AsyncIterator, BinaryIO, Dict, Iterable, Iterator, List, Sequence, Tuple
+from app.core.metrics import counter_deltas, counter_snapshot
+from app.models.hand import PokerHand
+from app.services.settlement_executor import SettlementExecutor, settlement_executor
+import asyncio
+import csv
+import functools
+import io
+import json
+import tarfile
+import tempfile
+import time
+import logging
+
+# Configure logging for this module
+logger = logging.getLogger(__name__)
+
+
+CSV_COLUMNS = [
+    "id", "stacks", "dealer_index", "small_blind_index", "big_blind_index",
+    "actions", "hole_cards", "board", "winnings", "created_at", "structure"
+]
+
+
+def export_phh_batch(hands: Sequence[PokerHand], verify: bool = False) -> Tuple[List[Dict[str, Any]], dict]:
+    """Convert hands to PHH documents inside a settlement worker.
+
+    With ``verify`` each document is parsed back and settled, and the hand
+    is flagged when the result differs from its stored winnings.
+    """
+    from app.services.hand_history import HandHistoryError, parse_phh, to_phh
+    from app.services.poker_engine import PokerEngine
+
+    before = counter_snapshot()
+    results = []
+    for hand in hands:
+        try:
+            result = {"id": hand.id, "phh": to_phh(hand)}
+        except HandHistoryError as e:
+            results.append({"id": hand.id, "error": str(e)})
+            continue
+        if verify:
+            result["winnings"] = hand.winnings
+            try:
+                result["settled_winnings"] = PokerEngine.settle(parse_phh(result["phh"]))[1]
+            except HandHistoryError as e:
+                result["settled_winnings"] = None
+                result["error"] = f"Exported hand cannot be settled: {e}"
+            result["mismatch"] = result["settled_winnings"] != hand.winnings
+        results.append(result)
+    return results, counter_deltas(before)
+
+
+class PhhExport:
+    """Stored hands converted to PHH documents on the settlement workers.
+
+    Iterating yields one list of results per batch of hands: ``id`` with
+    either ``phh`` or ``error``, plus ``winnings``, ``settled_winnings`` and
+    ``mismatch`` when verifying. The next batch is read from the database
+    while the workers convert the current one.
+    """
+
+    def __init__(
+        self,
+        batches: AsyncIterable[List[PokerHand]],
+        verify: bool = False,
+        executor: SettlementExecutor = settlement_executor
+    ):
+        self.batches = batches
+        self.verify = verify
+        self.executor = executor
+        self.exported = 0
+        self.failed = 0
+        self.mismatched = 0
+        self.elapsed_seconds = 0.0
+
+    async def __aiter__(self) -> AsyncIterator[List[Dict[str, Any]]]:
+        started = time.perf_counter()
+        convert = functools.partial(export_phh_batch, verify=self.verify)
+        pending = None
+        try:
+            async for batch in self.batches:
+                converting = asyncio.ensure_future(self.executor.map_groups(convert, batch))
+                if pending is not None:
+                    yield self._count(await pending)
+                pending = converting
+            if pending is not None:
+                yield self._count(await pending)
+        finally:
+            # The consumer went away (e.g. the client disconnected) mid-export
+            if pending is not None and not pending.done():
+                pending.cancel()
+        self.elapsed_seconds = time.perf_counter() - started
+        logger.info(
+            f"PHH export finished: {self.exported} hands exported, {self.failed} failed, "
+            f"{self.mismatched} with mismatched winnings in {self.elapsed_seconds:.1f}s"
+        )
+
+    def _count(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        for result in results:
+            if "phh" in result:
+                self.exported += 1
+            else:
+                self.failed += 1
+            if result.get("mismatch"):
+                self.mismatched += 1
+                logger.warning(
+                    f"Hand {result['id']} has stored winnings {result['winnings']} "
+                    f"but settles to {result['settled_winnings']}"
+                )
+        return results
+
+
+class _ChunkWriter:
+    """File object collecting what tarfile writes so it can be streamed out"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def take(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+class HandExporter:
+    @staticmethod
+    def iter_ndjson(batches: Iterable[List[PokerHand]]) -> Iterator[str]:
+        """Serialize batches of hands as newline-delimited JSON, one chunk per batch"""
+        for batch in batches:
+            yield "".join(json.dumps(hand.to_dict()) + "\n" for hand in batch)
+
+    @staticmethod
+    def iter_csv(batches: Iterable[List[PokerHand]]) -> Iterator[str]:
+        """Serialize batches of hands as CSV; list columns are JSON-encoded to stay lossless"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(CSV_COLUMNS)
+        yield buffer.getvalue()
+
+        for batch in batches:
+            buffer.seek(0)
+            buffer.truncate()
+            for hand in batch:
+                writer.writerow([
+                    hand.id,
+                    json.dumps(hand.stacks),
+                    hand.dealer_index,
+                    hand.small_blind_index,
+                    hand.big_blind_index,
+                    json.dumps(hand.actions),
+                    json.dumps(hand.hole_cards),
+                    hand.board,
+                    json.dumps(hand.winnings),
+                    hand.created_at.isoformat() if hand.created_at else "",
+                    json.dumps(hand.structure.to_dict()) if hand.structure else ""
+                ])
+            yield buffer.getvalue()
+
+    @staticmethod
+    async def aiter_phh_ndjson(export: PhhExport) -> AsyncIterator[str]:
+        """One JSON object per hand holding its PHH document, or the reason it was not exported"""
+        async for results in export:
+            yield "".join(json.dumps(result) + "\n" for result in results)
+
+    @staticmethod
+    async def aiter_phh_tar(export: PhhExport) -> AsyncIterator[bytes]:
+        """Gzipped tarball with one ``hands/<id>.phh`` file per hand.
+
+        A final ``report.ndjson`` lists the hands that could not be exported
+        and, when verifying, those whose stored winnings disagree. It is
+        spooled to disk past a megabyte so a bad archive cannot exhaust memory.
+        """
+        writer = _ChunkWriter()
+        report = tempfile.SpooledTemporaryFile(max_size=1 << 20)
+        try:
+            with tarfile.open(fileobj=writer, mode="w|gz") as archive:
+                async for results in export:
+                    for result in results:
+                        if "phh" in result:
+                            data = result["phh"].encode()
+                            HandExporter._add_member(archive, f"hands/{result['id']}.phh", io.BytesIO(data), len(data))
+                        if "error" in result or result.get("mismatch"):
+                            report.write((json.dumps({k: v for k, v in result.items() if k != "phh"}) + "\n").encode())
+                    yield writer.take()
+                size = report.tell()
+                report.seek(0)
+                HandExporter._add_member(archive, "report.ndjson", report, size)
+            yield writer.take()
+        finally:
+            report.close()
+
+    @staticmethod
+    def _add_member(archive: tarfile.TarFile, name: str, data: BinaryIO, size: int) -> None:
+        info = tarfile.TarInfo(name)
+        info.size = size
+        info.mtime = int(time.time())
+        archive.addfile(info, data)
@@ -0,0 +1,547 @@
+from decimal import Decimal, InvalidOperation
+from typing import AsyncIterable, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from app.models.game import DEFAULT_STRUCTURE, GameStructure
+from app.models.hand import PokerHand
+from app.services.action_compiler import (
+    OP_ALLIN,
+    OP_BET,
+    OP_CALL,
+    OP_CHECK,
+    OP_FOLD,
+    OP_RAISE,
+    compile_actions,
+    deal_cards,
+)
+from app.services.fast_engine import UnsupportedHandError
+from app.services.poker_engine import PokerEngine
+import json
+import mmap
+import os
+import re
+import tomllib
+import logging
+
+# Configure logging for this module
+logger = logging.getLogger(__name__)
+
+FORMATS = ("pokerstars", "phh")
+
+_POKERSTARS_HEADER = re.compile(r"^PokerStars (?:Zoom )?(?:Hand|Game) #(\d+)")
+_PHH_SECTION = re.compile(r"^\[(\d+)\]\s*$")
+_STAKES = re.compile(r"\(([^()/\s]+)/([^()/\s]+)(?: [A-Z]{3})?\)")
+_BUTTON = re.compile(r"Seat #(\d+) is the button")
+_SEAT = re.compile(r"^Seat (\d+): (.+?) \(([^\s()]+) in chips(?:, [^)]*)?\)(.*)$")
+_STREET = re.compile(r"^\*\*\* (FLOP|TURN|RIVER) \*\*\*")
+_BRACKETS = re.compile(r"\[([^\]]*)\]")
+_ACTION = re.compile(r"^(folds|checks|calls|bets|raises)(?: (\S+))?(?: to (\S+))?")
+_SHOWN = re.compile(r"^Seat \d+: (.+?)(?: \((?:button|small blind|big blind)\))* (?:showed|mucked) \[([^\]]+)\]")
+_CARD = re.compile(r"^[2-9TJQKA][cdhs]$")
+
+
+class HandHistoryError(ValueError):
+    """A hand history record that cannot be turned into a PokerHand"""
+
+
+def detect_format(line: str) -> str:
+    """Format of a hand history from its first non-blank line"""
+    line = line.lstrip("﻿").strip()
+    if _POKERSTARS_HEADER.match(line):
+        return "pokerstars"
+    if _PHH_SECTION.match(line) or "=" in line or line.startswith("#"):
+        return "phh"
+    raise HandHistoryError(f"Unrecognized hand history format: {line[:80]!r}")
+
+
+def iter_file_lines(path: str) -> Iterator[str]:
+    """Lines of a file, read through a memory map so large files are paged in as needed"""
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if hasattr(mapped, "madvise"):
+                # Read once front to back: let the kernel read ahead and drop pages behind
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            for line in iter(mapped.readline, b""):
+                yield line.decode("utf-8", errors="replace")
+
+
+async def aiter_stream_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """Lines of a byte stream that arrives in arbitrary chunks (e.g. an upload)"""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8", errors="replace") + "\n"
+    if buffer:
+        yield buffer.decode("utf-8", errors="replace")
+
+
+class RecordSplitter:
+    """Groups the lines of a hand history stream into one text record per hand.
+
+    PokerStars hands start at their "PokerStars Hand #" header. PHH streams
+    are either a single hand or numbered ``[n]`` sections, one per hand. With
+    no format given it is detected from the first non-blank line.
+    """
+
+    def __init__(self, format: Optional[str] = None):
+        if format is not None and format not in FORMATS:
+            raise HandHistoryError(f"Unknown hand history format {format!r} (expected one of {', '.join(FORMATS)})")
+        self.format = format
+        self._lines: List[str] = []
+
+    def feed(self, line: str) -> Optional[str]:
+        """Add a line; returns the previous record when this line starts a new one"""
+        if self.format is None:
+            if not line.strip():
+                return None
+            self.format = detect_format(line)
+            line = line.lstrip("﻿")
+
+        if self.format == "pokerstars":
+            starts_record = line.startswith("PokerStars") and _POKERSTARS_HEADER.match(line)
+        else:
+            starts_record = line.startswith("[") and _PHH_SECTION.match(line)
+        if not starts_record:
+            self._lines.append(line)
+            return None
+
+        record = self._take()
+        if self.format == "pokerstars":
+            self._lines.append(line)
+        return record
+
+    def finish(self) -> Optional[str]:
+        """The last record, once the stream has ended"""
+        return self._take()
+
+    def _take(self) -> Optional[str]:
+        text = "".join(self._lines)
+        self._lines = []
+        if self.format == "pokerstars" and not text.startswith("PokerStars"):
+            # Anything before the first header is not part of a hand
+            return None
+        return text if text.strip() else None
+
+
+def iter_records(lines: Iterable[str], format: Optional[str] = None) -> Iterator[Tuple[str, str]]:
+    """(format, record text) for each hand in a stream of lines"""
+    splitter = RecordSplitter(format)
+    for line in lines:
+        record = splitter.feed(line)
+        if record is not None:
+            yield splitter.format, record
+    record = splitter.finish()
+    if record is not None:
+        yield splitter.format, record
+
+
+async def aiter_records(lines: AsyncIterable[str], format: Optional[str] = None) -> AsyncIterator[Tuple[str, str]]:
+    """Async counterpart of ``iter_records``"""
+    splitter = RecordSplitter(format)
+    async for line in lines:
+        record = splitter.feed(line)
+        if record is not None:
+            yield splitter.format, record
+    record = splitter.finish()
+    if record is not None:
+        yield splitter.format, record
+
+
+def parse_record(format: str, text: str) -> PokerHand:
+    """PokerHand for one record; raises HandHistoryError when it cannot be mapped"""
+    if format == "pokerstars":
+        return parse_pokerstars(text)
+    return parse_phh(text)
+
+
+def _cards(text: str) -> str:
+    """"Ah Kd" or "AhKd" as "AhKd"; "" when any card is hidden"""
+    cards = text.replace(" ", "")
+    if len(cards) % 2 or not all(_CARD.match(cards[i:i + 2]) for i in range(0, len(cards), 2)):
+        return ""
+    return cards
+
+
+def _check_showdown(hole_cards: List[str], folded: set) -> None:
+    """Refuse hands whose result depends on cards the history does not show"""
+    live = [seat for seat in range(len(hole_cards)) if seat not in folded]
+    if len(live) > 1 and not all(hole_cards[seat] for seat in live):
+        raise HandHistoryError("Hole cards of a player at showdown are unknown")
+
+
+def _positions(order: Sequence[int]) -> Tuple[int, int, int]:
+    """(dealer, small blind, big blind) seats for players seated in posting order"""
+    if len(order) == 2:
+        # Heads-up the big blind is the engine's first player and the button posts the small blind
+        return order[1], order[1], order[0]
+    return order[-1], order[0], order[1]
+
+
+def parse_phh(text: str) -> PokerHand:
+    """Map one PHH document (pokerkit's hand history format) to a PokerHand.
+
+    PHH lists players in posting order, the same order the engine uses, so
+    player ``p<n>`` becomes seat ``n - 1`` unless ``seats`` numbers every
+    seat of the table (as our exports do). Only no-limit hold'em ("NT")
+    with whole-chip amounts and equal antes is supported.
+    """
+    try:
+        document = tomllib.loads(text, parse_float=Decimal)
+    except tomllib.TOMLDecodeError as e:
+        raise HandHistoryError(f"Invalid PHH document: {e}") from e
+
+    if document.get("variant") != "NT":
+        raise HandHistoryError(f"Only no-limit hold'em (variant NT) can be imported, not {document.get('variant')!r}")
+    try:
+        stacks = [_whole(value) for value in document["starting_stacks"]]
+        forced = [_whole(value) for value in document["blinds_or_straddles"]]
+        actions = document["actions"]
+    except KeyError as e:
+        raise HandHistoryError(f"PHH document is missing {e.args[0]}") from e
+    players = len(stacks)
+    if players < 2:
+        raise HandHistoryError("A hand needs at least two players")
+
+    antes = document.get("antes", 0)
+    antes = [_whole(value) for value in antes] if isinstance(antes, list) else [_whole(antes)] * players
+    if len(set(antes)) > 1:
+        raise HandHistoryError("Only hands where every player posts the same ante can be imported")
+    forced += [0] * (players - len(forced))
+    straddles = forced[2:]
+    while straddles and straddles[-1] == 0:
+        straddles.pop()
+    if len(forced) > players or 0 in straddles or forced[0] > forced[1]:
+        raise HandHistoryError(f"Unsupported blinds or straddles {forced}")
+    structure = GameStructure(
+        small_blind=forced[0],
+        big_blind=forced[1],
+        ante=antes[0] if antes else 0,
+        straddles=tuple(straddles),
+        min_bet=_whole(document.get("min_bet", 0))
+    )
+    if structure.min_bet == structure.big_blind:
+        structure = GameStructure(structure.small_blind, structure.big_blind, structure.ante, structure.straddles)
+
+    hole_cards = [""] * players
+    folded = set()
+    tokens: List[str] = []
+    board = ""
+    # Street bets in posting order, to tell checks from calls and bets from raises
+    bets = [0] * players
+    if players == 2:
+        bets[0], bets[1] = forced[1], forced[0]
+    else:
+        bets[:len(forced)] = forced
+
+    for action in actions:
+        parts = action.split("#", 1)[0].split()
+        if len(parts) < 2:
+            raise HandHistoryError(f"Invalid PHH action {action!r}")
+        if parts[0] == "d":
+            if parts[1] == "dh" and len(parts) == 4:
+                hole_cards[_player(parts[2], players)] = _cards(parts[3])
+            elif parts[1] == "db" and len(parts) == 3:
+                board += parts[2]
+                if not _cards(board):
+                    raise HandHistoryError(f"Invalid board cards in {action!r}")
+                tokens.append(board)
+                bets = [0] * players
+            else:
+                raise HandHistoryError(f"Unsupported dealer action {action!r}")
+            continue
+
+        player = _player(parts[0], players)
+        move = parts[1]
+        if move == "f":
+            tokens.append("f")
+            folded.add(player)
+        elif move == "cc":
+            tokens.append("x" if bets[player] >= max(bets) else "c")
+            bets[player] = max(bets)
+        elif move == "cbr" and len(parts) == 3:
+            amount = _whole(_decimal(parts[2]))
+            tokens.append(f"{'r' if max(bets) else 'b'}{amount}")
+            bets[player] = amount
+        elif move == "sm":
+            if len(parts) == 3 and _cards(parts[2]):
+                hole_cards[player] = _cards(parts[2])
+        else:
+            raise HandHistoryError(f"Unsupported player action {action!r}")
+    _check_showdown(hole_cards, folded)
+
+    seats = document.get("seats")
+    order = [seat - 1 for seat in seats] if sorted(seats or []) == list(range(1, players + 1)) else list(range(players))
+    dealer, small_blind, big_blind = _positions(order)
+    return PokerHand(
+        stacks=PokerEngine.to_seats(stacks, order),
+        dealer_index=dealer,
+        small_blind_index=small_blind,
+        big_blind_index=big_blind,
+        actions=tokens,
+        hole_cards=PokerEngine.to_seats(hole_cards, order),
+        board=board,
+        structure=structure
+    )
+
+
+def to_phh(hand: PokerHand) -> str:
+    """PHH document for a stored hand, readable by pokerkit and ``parse_phh``.
+
+    Players are listed in posting order and ``seats`` records the seat of
+    each, so importing the document again restores the same seats. The
+    actions are replayed to learn who made each one; a hand whose actions
+    are not legal raises HandHistoryError.
+    """
+    order = PokerEngine.seat_order(hand)
+    structure = hand.structure or DEFAULT_STRUCTURE
+    stacks = [hand.stacks[seat] for seat in order]
+    try:
+        try:
+            actions = _phh_actions(PokerEngine.create_fast_state(stacks, structure), hand, order)
+        except UnsupportedHandError:
+            actions = _phh_actions(PokerEngine.create_pokerkit_state(stacks, structure), hand, order)
+    except (ValueError, IndexError) as e:
+        raise HandHistoryError(f"Actions of hand {hand.id} cannot be replayed: {e}") from e
+
+    players = len(order)
+    forced = list(structure.blinds_or_straddles[:players])
+    fields = [
+        ("variant", "NT"),
+        ("ante_trimming_status", True),
+        ("antes", [structure.ante] * players),
+        ("blinds_or_straddles", forced + [0] * (players - len(forced))),
+        ("min_bet", structure.min_bet_amount),
+        ("starting_stacks", stacks),
+        ("actions", actions),
+        ("seats", [seat + 1 for seat in order]),
+    ]
+    if len(hand.winnings) == players:
+        fields.append(("winnings", [hand.winnings[seat] for seat in order]))
+    fields.append(("_id", hand.id))
+    if hand.created_at:
+        fields.append(("_created_at", hand.created_at.isoformat()))
+    return "".join(f"{key} = {json.dumps(value)}\n" for key, value in fields)
+
+
+def _phh_actions(state, hand: PokerHand, order: Sequence[int]) -> List[str]:
+    """PHH actions of a hand, driving an engine state the same way settlement does"""
+    hole_cards = PokerEngine.hole_cards_in_order(hand, order)
+    PokerEngine.deal_hole_cards(
+        state, PokerEngine.complete_hole_cards(hole_cards, hand.board + "".join(hand.actions))
+    )
+    hole_cards = [_cards(cards) or "????" for cards in hole_cards]
+    actions = [f"d dh p{player + 1} {cards}" for player, cards in enumerate(hole_cards)]
+    program = compile_actions(hand.actions)
+    board = ""
+    folded = set()
+    shown = False
+    for op, operand in program:
+        actor = f"p{state.actor_index + 1}" if state.actor_index is not None else None
+        if op == OP_FOLD:
+            actions.append(f"{actor} f")
+            folded.add(state.actor_index)
+        elif op == OP_CHECK or op == OP_CALL:
+            actions.append(f"{actor} cc")
+        elif op == OP_BET or op == OP_RAISE:
+            actions.append(f"{actor} cbr {operand}")
+        elif op == OP_ALLIN:
+            # The engine's all-in raises to the player's remaining stack
+            actions.append(f"{actor} cbr {state.stacks[state.actor_index]}")
+        else:
+            cards = deal_cards(operand)
+            actions.append(f"d db {cards}")
+            board += cards
+        PokerEngine.execute(state, op, operand)
+        if not shown and _at_showdown(state, board, folded):
+            actions.extend(_showdown_actions(state, hole_cards, folded))
+            shown = True
+
+    if not shown and _at_showdown(state, board, folded):
+        # All-in from the blinds: nobody acted
+        actions.extend(_showdown_actions(state, hole_cards, folded))
+
+    # Streets left on the board are run out the way settlement deals them
+    remaining = hand.board[len(program.board):]
+    while len(remaining) >= 2 and state.status:
+        cards = remaining[:2 if board else 6]
+        state.burn_card()
+        state.deal_board(cards)
+        actions.append(f"d db {cards}")
+        board += cards
+        remaining = remaining[len(cards):]
+    return actions
+
+
+def _at_showdown(state, board: str, folded: set) -> bool:
+    """Whether betting is over with cards to show: after the river or once no more bets are possible"""
+    if state.actor_index is not None or len(state.stacks) - len(folded) < 2:
+        return False
+    return state.all_in_status or len(board) == 10
+
+
+def _showdown_actions(state, hole_cards: List[str], folded: set) -> List[str]:
+    """Cards shown by the players left in, starting with the last aggressor like pokerkit"""
+    players = len(hole_cards)
+    opener = state.opener_index or 0
+    return [
+        f"p{player + 1} sm {hole_cards[player]}"
+        for player in ((opener + offset) % players for offset in range(players))
+        if player not in folded
+    ]
+
+
+def _player(token: str, players: int) -> int:
+    if not token.startswith("p") or not token[1:].isdigit() or not 1 <= int(token[1:]) <= players:
+        raise HandHistoryError(f"Unknown player {token!r}")
+    return int(token[1:]) - 1
+
+
+def _decimal(text: str) -> Decimal:
+    try:
+        return Decimal(text.strip().lstrip("$€£").replace(",", ""))
+    except InvalidOperation as e:
+        raise HandHistoryError(f"Invalid amount {text!r}") from e
+
+
+def _whole(value, scale: int = 1) -> int:
+    """An amount in whole chips, or HandHistoryError for fractions of a chip"""
+    amount = Decimal(value) * scale
+    if amount != amount.to_integral_value() or amount < 0:
+        raise HandHistoryError(f"Amount {value} is not a whole number of chips")
+    return int(amount)
+
+
+def parse_pokerstars(text: str) -> PokerHand:
+    """Map one PokerStars no-limit hold'em hand history to a PokerHand.
+
+    Seats are the players dealt in, in table order. Cash game amounts are
+    converted to cents. Hole cards that were never shown are left empty,
+    and the hand is settled from its actions, so the reported pot, rake and
+    winnings are ignored.
+    """
+    lines = [line.strip() for line in text.splitlines()]
+    header = lines[0]
+    if "Hold'em No Limit" not in header:
+        raise HandHistoryError(f"Only no-limit hold'em hands can be imported: {header[:80]!r}")
+    stakes = _STAKES.findall(header)
+    if not stakes:
+        raise HandHistoryError(f"No stakes in hand header: {header[:80]!r}")
+    small, big = stakes[-1]
+    # Cash games quote amounts in currency; keep them as whole cents
+    scale = 100 if any(symbol in small + big for symbol in "$€£.") else 1
+
+    button_seat = None
+    seats: List[int] = []
+    names: Dict[str, int] = {}
+    stacks: List[int] = []
+    position = 1
+    for position, line in enumerate(lines[1:], start=1):
+        if line.startswith("*** "):
+            break
+        if line.startswith("Table "):
+            match = _BUTTON.search(line)
+            button_seat = int(match.group(1)) if match else None
+            continue
+        match = _SEAT.match(line)
+        if match and "sitting out" not in match.group(4) and "out of hand" not in match.group(4):
+            names[match.group(2)] = len(seats)
+            seats.append(int(match.group(1)))
+            stacks.append(_whole(_decimal(match.group(3)), scale))
+    players = len(seats)
+    if players < 2:
+        raise HandHistoryError("A hand needs at least two players dealt in")
+
+    small_blind = big_blind = None
+    ante = 0
+    hole_cards = [""] * players
+    folded = set()
+    tokens: List[str] = []
+    board = ""
+    for line in lines[1:]:
+        if line.startswith("*** "):
+            if line.startswith(("*** FIRST", "*** SECOND")):
+                raise HandHistoryError("Hands run more than once cannot be imported")
+            if line.startswith("*** SUMMARY"):
+                break
+            if _STREET.match(line):
+                board = "".join(_cards(cards) for cards in _BRACKETS.findall(line))
+                if not board:
+                    raise HandHistoryError(f"Invalid board in {line!r}")
+                tokens.append(board)
+            continue
+        if line.startswith("Dealt to "):
+            for name, seat in names.items():
+                if line.startswith(f"Dealt to {name} ["):
+                    hole_cards[seat] = _cards(_BRACKETS.findall(line)[-1])
+                    break
+            continue
+
+        name, separator, rest = line.partition(": ")
+        seat = names.get(name)
+        if not separator or seat is None:
+            continue
+        if rest.startswith("posts "):
+            if rest.startswith("posts small blind"):
+                if small_blind is not None:
+                    raise HandHistoryError("More than one small blind posted")
+                small_blind = seat
+            elif rest.startswith("posts big blind"):
+                if big_blind is not None:
+                    raise HandHistoryError("More than one big blind posted (missed or dead blinds)")
+                big_blind = seat
+            elif rest.startswith("posts the ante"):
+                ante = max(ante, _whole(_decimal(rest.rsplit(" ", 1)[-1]), scale))
+            else:
+                raise HandHistoryError(f"Unsupported forced bet: {line!r}")
+            continue
+        if rest.startswith("shows ["):
+            hole_cards[seat] = _cards(_BRACKETS.findall(rest)[0])
+            continue
+
+        match = _ACTION.match(rest)
+        if not match:
+            continue
+        verb = match.group(1)
+        if verb == "folds":
+            tokens.append("f")
+            folded.add(seat)
+        elif verb == "checks":
+            tokens.append("x")
+        elif verb == "calls":
+            tokens.append("c")
+        elif verb == "bets":
+            if not match.group(2):
+                raise HandHistoryError(f"Bet without an amount: {line!r}")
+            tokens.append(f"b{_whole(_decimal(match.group(2)), scale)}")
+        elif match.group(3):
+            tokens.append(f"r{_whole(_decimal(match.group(3)), scale)}")
+        else:
+            raise HandHistoryError(f"Raise without a total: {line!r}")
+
+    for line in lines[lines.index("*** SUMMARY ***") + 1 if "*** SUMMARY ***" in lines else len(lines):]:
+        match = _SHOWN.match(line)
+        if match and match.group(1) in names:
+            hole_cards[names[match.group(1)]] = _cards(match.group(2))
+
+    if small_blind is None or big_blind is None:
+        raise HandHistoryError("Hands without both blinds posted cannot be imported")
+    if players > 2 and big_blind != (small_blind + 1) % players:
+        raise HandHistoryError("The big blind does not sit right after the small blind")
+    _check_showdown(hole_cards, folded)
+    dealer = seats.index(button_seat) if button_seat in seats else (small_blind - 1) % players
+    return PokerHand(
+        stacks=stacks,
+        dealer_index=dealer,
+        small_blind_index=small_blind,
+        big_blind_index=big_blind,
+        actions=tokens,
+        hole_cards=hole_cards,
+        board=board,
+        structure=GameStructure(
+            small_blind=_whole(_decimal(small), scale),
+            big_blind=_whole(_decimal(big), scale),
+            ante=ante
+        )
+    )
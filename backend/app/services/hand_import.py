@@ -0,0 +1,136 @@
+from typing import Any, AsyncIterable, Callable, Dict, List, Optional, Sequence, Tuple, Union
+from app.core.config import settings
+from app.core.metrics import registry, stage
+from app.models.hand import PokerHand
+from app.services.hand_history import HandHistoryError, parse_record
+from app.services.settlement_executor import SettlementExecutor, settlement_executor
+import asyncio
+import time
+import logging
+
+# Configure logging for this module
+logger = logging.getLogger(__name__)
+
+IMPORTED = registry.counter("poker_hands_imported_total", "Hand history records imported")
+IMPORT_FAILED = registry.counter("poker_hands_import_failed_total", "Hand history records that could not be imported")
+
+
+def _parse_batch(records: Sequence[Tuple[int, str, str]]) -> List[Tuple[int, Union[PokerHand, str]]]:
+    """Parse (index, format, text) records into hands, or an error message per record"""
+    parsed = []
+    for index, format, text in records:
+        try:
+            parsed.append((index, parse_record(format, text)))
+        except (HandHistoryError, ValueError, IndexError) as e:
+            parsed.append((index, f"Invalid {format} hand: {e}"))
+        except Exception as e:
+            # A parser bug on one record must not stop the rest of the import
+            logger.exception(f"Unexpected error parsing {format} record {index}")
+            parsed.append((index, f"Invalid {format} hand: {type(e).__name__}: {e}"))
+    return parsed
+
+
+class HandImporter:
+    """Parses, settles and saves a stream of hand history records in batches.
+
+    Records are parsed on a worker thread and settled on the settlement
+    executor one batch at a time, while the previous batch is still being
+    saved, so at most two batches are held in memory whatever the size of
+    the source. Stored winnings always come from our own settlement.
+    """
+
+    def __init__(
+        self,
+        repository,
+        batch_size: int = settings.IMPORT_BATCH_SIZE,
+        max_errors: int = settings.IMPORT_MAX_ERRORS,
+        executor: SettlementExecutor = settlement_executor,
+        on_saved: Optional[Callable[[List[PokerHand]], None]] = None
+    ):
+        self.repository = repository
+        self.batch_size = max(1, batch_size)
+        self.max_errors = max_errors
+        self.executor = executor
+        self.on_saved = on_saved
+        self.imported = 0
+        self.failed = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    async def run(self, records: AsyncIterable[Tuple[str, str]]) -> Dict[str, Any]:
+        """Import every (format, text) record; returns the totals and the first errors"""
+        started = time.perf_counter()
+        batch: List[Tuple[int, str, str]] = []
+        saving: Optional[asyncio.Task] = None
+        index = 0
+        try:
+            async for format, text in records:
+                batch.append((index, format, text))
+                index += 1
+                if len(batch) >= self.batch_size:
+                    saving = await self._next_batch(batch, saving)
+                    batch = []
+            if batch:
+                saving = await self._next_batch(batch, saving)
+        finally:
+            if saving is not None:
+                await saving
+
+        elapsed = time.perf_counter() - started
+        return {
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": self.errors,
+            "elapsed_seconds": elapsed,
+            "hands_per_second": self.imported / elapsed if elapsed > 0 else 0.0,
+        }
+
+    async def _next_batch(
+        self,
+        batch: List[Tuple[int, str, str]],
+        saving: Optional[asyncio.Task]
+    ) -> asyncio.Task:
+        """Parse and settle a batch, then hand it to a save task once the previous save is done"""
+        with stage("parse"):
+            parsed = await asyncio.to_thread(_parse_batch, batch)
+        hands = []
+        for index, result in parsed:
+            if isinstance(result, PokerHand):
+                hands.append((index, result))
+            else:
+                self._fail(index, result)
+
+        if hands:
+            try:
+                with stage("settlement"):
+                    await self.executor.settle_hands([hand for _, hand in hands])
+            except Exception as e:
+                logger.error(f"Settlement of {len(hands)} imported hands failed: {e}")
+                for index, _ in hands:
+                    self._fail(index, f"Failed to settle hand: {e}")
+                hands = []
+
+        if saving is not None:
+            await saving
+        return asyncio.create_task(self._save(hands))
+
+    async def _save(self, hands: List[Tuple[int, PokerHand]]) -> None:
+        if not hands:
+            return
+        try:
+            await self.repository.save_many([hand for _, hand in hands])
+        except Exception as e:
+            logger.error(f"Failed to save {len(hands)} imported hands: {e}")
+            for index, _ in hands:
+                self._fail(index, f"Failed to save hand: {e}")
+            return
+        self.imported += len(hands)
+        IMPORTED.inc(len(hands))
+        if self.on_saved:
+            self.on_saved([hand for _, hand in hands])
+
+    def _fail(self, index: int, error: str) -> None:
+        self.failed += 1
+        IMPORT_FAILED.inc()
+        if len(self.errors) < self.max_errors:
+            logger.warning(f"Hand history record {index} was not imported: {error}")
+            self.errors.append({"index": index, "error": error})
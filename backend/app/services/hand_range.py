@@ -0,0 +1,90 @@
+from itertools import combinations
+from typing import List, Tuple
+from app.services.hand_evaluator import RANKS, SUITS, encode_card
+
+# A two-card combo as (lower card, higher card) in the 0..51 encoding
+Combo = Tuple[int, int]
+
+_RANK_INDEX = {rank: i for i, rank in enumerate(RANKS)}
+
+
+def _pair_combos(rank: int) -> List[Combo]:
+    cards = [rank * 4 + suit for suit in range(4)]
+    return list(combinations(cards, 2))
+
+
+def _non_pair_combos(high: int, low: int, suited: str) -> List[Combo]:
+    """Combos of two different ranks; ``suited`` is "s", "o" or "" for both"""
+    combos = []
+    for high_suit in range(4):
+        for low_suit in range(4):
+            if (suited == "s" and high_suit != low_suit) or (suited == "o" and high_suit == low_suit):
+                continue
+            combos.append((low * 4 + low_suit, high * 4 + high_suit))
+    return combos
+
+
+def _parse_hand_class(token: str) -> Tuple[int, int, str]:
+    """Split "AKs" / "T9o" / "QQ" / "AK" into (high rank, low rank, suitedness)"""
+    if len(token) not in (2, 3) or token[0] not in _RANK_INDEX or token[1] not in _RANK_INDEX:
+        raise ValueError(f"Invalid hand class: {token!r}")
+    first, second = _RANK_INDEX[token[0]], _RANK_INDEX[token[1]]
+    suited = token[2:]
+    if suited not in ("", "s", "o"):
+        raise ValueError(f"Invalid hand class: {token!r}")
+    if first == second and suited:
+        raise ValueError(f"Pairs cannot be suited or offsuit: {token!r}")
+    return max(first, second), min(first, second), suited
+
+
+def _class_combos(high: int, low: int, suited: str) -> List[Combo]:
+    return _pair_combos(high) if high == low else _non_pair_combos(high, low, suited)
+
+
+def _parse_token(token: str) -> List[Combo]:
+    # Specific cards, e.g. "AsKd"
+    if len(token) == 4 and token[1] in SUITS and token[3] in SUITS:
+        first, second = encode_card(token[:2]), encode_card(token[2:])
+        if first == second:
+            raise ValueError(f"Duplicate card in combo: {token!r}")
+        return [(min(first, second), max(first, second))]
+
+    # Spans, e.g. "22-55" or "AKs-ATs"
+    if "-" in token:
+        start, _, end = token.partition("-")
+        high, low, suited = _parse_hand_class(start)
+        end_high, end_low, end_suited = _parse_hand_class(end)
+        if suited != end_suited or (high == low) != (end_high == end_low) or (high != low and high != end_high):
+            raise ValueError(f"Invalid range span: {token!r}")
+        if high == low:
+            ranks = range(min(low, end_low), max(low, end_low) + 1)
+            return [combo for rank in ranks for combo in _pair_combos(rank)]
+        ranks = range(min(low, end_low), max(low, end_low) + 1)
+        return [combo for rank in ranks for combo in _non_pair_combos(high, rank, suited)]
+
+    # "QQ+" means QQ and better pairs; "A2s+" means A2s up to AKs
+    if token.endswith("+"):
+        high, low, suited = _parse_hand_class(token[:-1])
+        if high == low:
+            return [combo for rank in range(low, 13) for combo in _pair_combos(rank)]
+        return [combo for rank in range(low, high) for combo in _non_pair_combos(high, rank, suited)]
+
+    return _class_combos(*_parse_hand_class(token))
+
+
+def parse_range(text: str) -> List[Combo]:
+    """Expand a comma-separated hand range into its distinct two-card combos.
+
+    Supports hand classes ("AKs", "AKo", "AK", "QQ"), "+" for everything
+    stronger with the same top card ("QQ+", "A2s+"), spans ("22-55",
+    "KQo-KTo") and specific combos ("AsKd"). Raises ValueError on anything
+    else, naming the offending token.
+    """
+    combos = set()
+    for token in text.replace(" ", "").split(","):
+        if not token:
+            continue
+        combos.update(_parse_token(token))
+    if not combos:
+        raise ValueError(f"Range {text!r} contains no hands")
+    return sorted(combos)
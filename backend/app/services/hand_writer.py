@@ -0,0 +1,204 @@
+from contextlib import suppress
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.core.metrics import registry, stage
+from app.models.hand import PokerHand
+import asyncio
+import time
+import logging
+
+# Configure logging for this module
+logger = logging.getLogger(__name__)
+
+# "direct" saves in the request; "flush" and "enqueue" go through the write-behind queue
+WRITE_MODES = ("direct", "flush", "enqueue")
+
+WRITER_COMMITS = registry.counter(
+    "poker_hand_writer_commits_total",
+    "Group commits made by the write-behind hand writer"
+)
+WRITER_FAILED = registry.counter(
+    "poker_hand_writer_failed_hands_total",
+    "Queued hands the write-behind hand writer could not save"
+)
+
+# The queue holds these, plus a None that stop() sends to wake the writer
+QueuedHand = Tuple[PokerHand, Optional[asyncio.Future]]
+
+
+class HandWriter:
+    """Saves hands in group commits from a bounded in-memory queue.
+
+    With ``mode == "flush"`` a save returns once the commit holding the hand
+    has finished, so an acknowledged hand is durable. With ``"enqueue"`` it
+    returns as soon as the hand is queued: faster, but hands still queued
+    are lost if the process dies. A full queue makes callers wait, which
+    pushes back on clients instead of growing memory.
+
+    The queue is drained every ``max_batch`` hands or ``max_delay_ms``
+    milliseconds, whichever comes first. In ``"direct"`` mode, or while the
+    writer is not running, saves go straight to the repository.
+    """
+
+    def __init__(self, mode: str, max_batch: int, max_delay_ms: float, queue_size: int):
+        if mode not in WRITE_MODES:
+            raise ValueError(f"Unknown HAND_WRITE_MODE {mode!r} (expected one of {', '.join(WRITE_MODES)})")
+        self.mode = mode
+        self.max_batch = max(1, max_batch)
+        self.max_delay = max_delay_ms / 1000
+        self.queue_size = queue_size
+        self._repository = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        # Queued hands by id, so they can be read back before they are committed
+        self._pending: Dict[str, PokerHand] = {}
+
+        # Metrics
+        self.commits = 0
+        self.hands_written = 0
+        self.failed = 0
+        self.largest_commit = 0
+        self.total_seconds = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._closing
+
+    def start(self, repository) -> None:
+        """Start the background writer on the running event loop, saving through ``repository``"""
+        if self.mode == "direct" or self._task is not None:
+            return
+        logger.info(
+            f"Starting write-behind hand writer ({self.mode}, up to {self.max_batch} hands "
+            f"or {self.max_delay * 1000:g}ms per commit)"
+        )
+        self._repository = repository
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop taking new hands and wait until every queued hand is written"""
+        if self._task is None:
+            return
+        self._closing = True
+        logger.info(f"Draining {self._queue.qsize()} queued hands")
+        await self._queue.put(None)
+        await self._queue.join()
+        self._task.cancel()
+        with suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+        self._queue = None
+        self._closing = False
+        logger.info("Hand writer stopped")
+
+    async def save(self, hand: PokerHand, repository) -> PokerHand:
+        """Save a hand through the queue, or directly with ``repository`` when the writer is not running"""
+        if not self.running:
+            return await repository.save(hand)
+
+        future = asyncio.get_running_loop().create_future() if self.mode == "flush" else None
+        with stage("write_queue"):
+            await self._queue.put((hand, future))
+            self._pending[hand.id] = hand
+            if future is None:
+                return hand
+            return await future
+
+    def pending(self, hand_id: str) -> Optional[PokerHand]:
+        """A hand that is queued but not committed yet"""
+        return self._pending.get(hand_id)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch: List[QueuedHand] = []
+            item = await self._queue.get()
+            deadline = loop.time() + self.max_delay
+            while True:
+                if item is None:
+                    # Wake-up from stop(): commit what is queued without waiting for more
+                    self._queue.task_done()
+                else:
+                    batch.append(item)
+                if len(batch) >= self.max_batch:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                remaining = deadline - loop.time()
+                if remaining <= 0 or self._closing:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            if batch:
+                await self._commit(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    async def _commit(self, batch: List[QueuedHand]) -> None:
+        hands = [hand for hand, _ in batch]
+        started = time.perf_counter()
+        try:
+            await self._repository.save_many(hands)
+        except Exception as e:
+            logger.error(f"Group commit of {len(hands)} hands failed: {e}")
+            logger.exception("Group commit error details:")
+            if len(batch) > 1:
+                # Retry one by one so a single bad hand does not fail the rest
+                for item in batch:
+                    await self._commit([item])
+                return
+            self.failed += 1
+            WRITER_FAILED.inc()
+            self._resolve(batch, e)
+        else:
+            self.commits += 1
+            self.hands_written += len(hands)
+            self.largest_commit = max(self.largest_commit, len(hands))
+            WRITER_COMMITS.inc()
+            self._resolve(batch)
+        finally:
+            self.total_seconds += time.perf_counter() - started
+
+    def _resolve(self, batch: List[QueuedHand], error: Optional[Exception] = None) -> None:
+        for hand, future in batch:
+            self._pending.pop(hand.id, None)
+            # A request that was cancelled while waiting has nobody to tell
+            if future is None or future.done():
+                continue
+            if error is None:
+                future.set_result(hand)
+            else:
+                future.set_exception(error)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "running": self.running,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "commits": self.commits,
+            "hands_written": self.hands_written,
+            "failed": self.failed,
+            "avg_commit_size": self.hands_written / self.commits if self.commits else 0.0,
+            "largest_commit": self.largest_commit,
+            "avg_commit_seconds": self.total_seconds / self.commits if self.commits else 0.0,
+        }
+
+
+hand_writer = HandWriter(
+    mode=settings.HAND_WRITE_MODE,
+    max_batch=settings.HAND_WRITE_MAX_BATCH,
+    max_delay_ms=settings.HAND_WRITE_MAX_DELAY_MS,
+    queue_size=settings.HAND_WRITE_QUEUE_SIZE
+)
+
+registry.gauge(
+    "poker_hand_writer_queue_depth",
+    "Hands waiting in the write-behind queue"
+).set_function(lambda: hand_writer.stats()["queue_depth"])
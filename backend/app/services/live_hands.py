@@ -0,0 +1,203 @@
+from typing import Any, Dict, List, Optional
+from app.models.hand import PokerHand
+from app.core.config import settings
+from app.core.metrics import ENGINE_FALLBACKS, registry
+from app.services.fast_engine import UnsupportedHandError
+from app.services.poker_engine import PokerEngine
+import asyncio
+import re
+import time
+import logging
+
+# Configure logging for this module
+logger = logging.getLogger(__name__)
+
+_ACTION_PATTERN = re.compile(r"^(f|x|c|allin|[br]\d+)$")
+# Flop, turn and river tokens carry the whole board so far
+_BOARD_PATTERN = re.compile(r"^([2-9TJQKA][cdhs]){3,5}$")
+
+
+class LiveHandError(ValueError):
+    """Raised for actions that are not legal in the hand's current state"""
+
+
+class LiveHand:
+    """A hand in progress whose engine state lives in memory between requests.
+
+    Each action is applied to the existing state, so its cost does not grow
+    with the length of the hand. The state is the fast engine's, or a
+    pokerkit state for hands the fast engine does not model. An action that
+    fails leaves the hand exactly as it was before the request.
+    """
+
+    def __init__(self, hand: PokerHand, table_id: Optional[str] = None):
+        """Deal the hand and apply any actions it already carries"""
+        actions = hand.actions
+        self.hand = hand
+        self.table_id = table_id
+        self.hand.actions = []
+        self.lock = asyncio.Lock()
+        self.last_activity = time.monotonic()
+        self.engine = "fast"
+        # The engine's players in posting order; stacks and bets are reported by seat
+        self.order = PokerEngine.seat_order(hand)
+        try:
+            self.state = self._new_state()
+        except (ValueError, UnsupportedHandError) as e:
+            raise LiveHandError(f"Cannot open hand: {e}") from e
+        if actions:
+            self.apply(actions)
+
+    def _new_state(self):
+        """Engine state with hole cards dealt and the recorded actions applied"""
+        stacks = [self.hand.stacks[seat] for seat in self.order]
+        hole_cards = PokerEngine.hole_cards_in_order(self.hand, self.order)
+        if self.engine == "fast":
+            try:
+                state = PokerEngine.create_fast_state(stacks, self.hand.structure)
+                PokerEngine.deal_hole_cards(state, hole_cards)
+                for action in self.hand.actions:
+                    PokerEngine.apply_action(state, action)
+                return state
+            except UnsupportedHandError as e:
+                logger.debug(f"Fast engine cannot run live hand {self.hand.id}, using pokerkit: {e}")
+                ENGINE_FALLBACKS.labels("unsupported").inc()
+                self.engine = "pokerkit"
+        state = PokerEngine.create_pokerkit_state(stacks, self.hand.structure)
+        PokerEngine.deal_hole_cards(state, hole_cards)
+        for action in self.hand.actions:
+            PokerEngine.apply_action(state, action)
+        return state
+
+    @property
+    def finished(self) -> bool:
+        return not self.state.status
+
+    def apply(self, actions: List[str]) -> None:
+        """Apply new actions in order; on any error none of them take effect"""
+        applied = 0
+        board = self.hand.board
+        try:
+            for action in actions:
+                self._apply_one(action.strip())
+                applied += 1
+        except Exception as e:
+            # Engine states are not transactional: rebuild from the accepted actions
+            del self.hand.actions[len(self.hand.actions) - applied:]
+            self.hand.board = board
+            if isinstance(e, UnsupportedHandError) and self.engine == "fast":
+                # A card the fast engine cannot handle: retry the request on pokerkit
+                logger.debug(f"Fast engine cannot continue live hand {self.hand.id}, using pokerkit: {e}")
+                ENGINE_FALLBACKS.labels("unsupported").inc()
+                self.engine = "pokerkit"
+                self.state = self._new_state()
+                return self.apply(actions)
+            self.state = self._new_state()
+            raise LiveHandError(f"Action {applied} ({actions[applied]!r}) rejected: {e}") from e
+        finally:
+            self.last_activity = time.monotonic()
+
+    def _apply_one(self, action: str) -> None:
+        if self.finished:
+            raise LiveHandError("The hand is already finished")
+        if _BOARD_PATTERN.match(action):
+            street_length = 6 if not self.hand.board else 2
+            if not action.startswith(self.hand.board) or len(action) != len(self.hand.board) + street_length:
+                raise LiveHandError(f"Board {action!r} does not continue {self.hand.board!r}")
+            PokerEngine.apply_action(self.state, action)
+            self.hand.board = action
+        elif _ACTION_PATTERN.match(action):
+            PokerEngine.apply_action(self.state, action)
+        else:
+            raise LiveHandError(f"Unrecognized action {action!r}")
+        self.hand.actions.append(action)
+
+    def finish(self) -> None:
+        """Record the result on the hand once the engine has settled it"""
+        stacks = PokerEngine.to_seats(self.state.stacks, self.order)
+        self.hand.winnings = [final - start for final, start in zip(stacks, self.hand.stacks)]
+
+    def snapshot(self) -> Dict[str, Any]:
+        stacks = [int(stack) for stack in PokerEngine.to_seats(self.state.stacks, self.order)]
+        bets = [int(bet) for bet in PokerEngine.to_seats(self.state.bets, self.order)]
+        return {
+            "id": self.hand.id,
+            "table_id": self.table_id,
+            "starting_stacks": self.hand.stacks,
+            "stacks": stacks,
+            "bets": bets,
+            "pot": sum(self.hand.stacks) - sum(stacks) - sum(bets),
+            "actor_index": None if self.finished else self.order[self.state.actor_index],
+            "actions": list(self.hand.actions),
+            "board": self.hand.board,
+            "finished": self.finished,
+            "winnings": self.hand.winnings if self.finished else None,
+            "created_at": self.hand.created_at,
+        }
+
+
+class LiveHandRegistry:
+    """In-process table of open live hands.
+
+    Hands left without an action for ``ttl_seconds`` are dropped, and at most
+    ``max_hands`` can be open at once. State is per process, so with several
+    API workers the hands of one table must be routed to the same worker.
+    """
+
+    def __init__(self, max_hands: int, ttl_seconds: float):
+        self.max_hands = max_hands
+        self.ttl_seconds = ttl_seconds
+        self._hands: Dict[str, LiveHand] = {}
+        self.opened = 0
+        self.finished = 0
+        self.expired = 0
+
+    def __len__(self) -> int:
+        return len(self._hands)
+
+    def open(self, hand: PokerHand, table_id: Optional[str] = None) -> LiveHand:
+        """Start tracking a new hand; raises LiveHandError if it cannot be dealt"""
+        self._expire()
+        if len(self._hands) >= self.max_hands:
+            raise LiveHandError(f"Too many live hands open (maximum {self.max_hands})")
+        live = LiveHand(hand, table_id)
+        self._hands[hand.id] = live
+        self.opened += 1
+        return live
+
+    def get(self, hand_id: str) -> Optional[LiveHand]:
+        live = self._hands.get(hand_id)
+        if live is not None and time.monotonic() - live.last_activity > self.ttl_seconds:
+            self._drop(hand_id)
+            self.expired += 1
+            return None
+        return live
+
+    def close(self, hand_id: str) -> None:
+        if self._drop(hand_id):
+            self.finished += 1
+
+    def _drop(self, hand_id: str) -> bool:
+        return self._hands.pop(hand_id, None) is not None
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self.ttl_seconds
+        for hand_id in [hand_id for hand_id, live in self._hands.items() if live.last_activity < cutoff]:
+            logger.info(f"Dropping live hand {hand_id} after {self.ttl_seconds}s without actions")
+            self._drop(hand_id)
+            self.expired += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "open": len(self),
+            "opened": self.opened,
+            "finished": self.finished,
+            "expired": self.expired,
+        }
+
+
+live_hands = LiveHandRegistry(settings.LIVE_HAND_MAX_OPEN, settings.LIVE_HAND_TTL_SECONDS)
+
+registry.gauge("poker_live_hands_open", "Live hands currently held in memory").set_function(
+    lambda: len(live_hands)
+)
@@ -0,0 +1,157 @@
+from typing import Any, Dict, List, Optional, Sequence
+from app.models.hand import PokerHand
+from app.services.fast_engine import UnsupportedHandError
+from app.services.poker_engine import PokerEngine
+import re
+import logging
+
+# Configure logging for this module
+logger = logging.getLogger(__name__)
+
+# Per-seat counters stored on hand_players and summed into player_stats
+STAT_COLUMNS = (
+    "vpip",                # put money in voluntarily pre-flop
+    "pfr",                 # raised pre-flop
+    "three_bet_chances",   # acted pre-flop facing exactly one raise
+    "three_bets",          # re-raised in that spot
+    "aggressive_actions",  # post-flop bets and raises
+    "calls",               # post-flop calls
+    "showdowns",           # still in the hand at showdown
+    "showdowns_won",       # won chips at showdown
+)
+
+_ACTION_PATTERN = re.compile(r"^(f|x|c|allin|[br]\d+)$")
+_BOARD_PATTERN = re.compile(r"^([2-9TJQKA][cdhs]){3,5}$")
+
+
+def _complete_hole_cards(hand: PokerHand) -> List[str]:
+    """Hole cards for every seat, filling unknown ones with unused cards.
+
+    Only the order of play matters for the stats, and the engine needs two
+    cards per seat to drive it.
+    """
+    hole_cards = [hand.hole_cards[seat] if seat < len(hand.hole_cards) else "" for seat in range(len(hand.stacks))]
+    return PokerEngine.complete_hole_cards(hole_cards, hand.board + "".join(hand.actions))
+
+
+def hand_player_stats(hand: PokerHand) -> List[tuple]:
+    """Counters for each seat of a settled hand, in STAT_COLUMNS order.
+
+    The actions are replayed through the settlement engine to learn who
+    made each one and whether it was a call or a raise. A hand whose
+    actions stop being legal is counted up to that point.
+    """
+    seats = len(hand.stacks)
+    counts = [[0] * len(STAT_COLUMNS) for _ in range(seats)]
+    if seats < 2:
+        return [tuple(row) for row in counts]
+    # Counters are kept per engine player and rearranged by seat at the end
+    order = PokerEngine.seat_order(hand)
+    hole_cards = _complete_hole_cards(hand)
+    try:
+        state = PokerEngine.create_fast_state([hand.stacks[seat] for seat in order], hand.structure)
+        PokerEngine.deal_hole_cards(state, [hole_cards[seat] for seat in order])
+    except (ValueError, UnsupportedHandError) as e:
+        logger.debug(f"Cannot replay hand {hand.id} for stats: {e}")
+        return [tuple(row) for row in counts]
+
+    vpip, pfr, three_bet_chances, three_bets, aggressive, calls, showdowns, won = range(len(STAT_COLUMNS))
+    folded = [False] * seats
+    preflop = True
+    preflop_raises = 0
+    for action in hand.actions:
+        action = action.strip()
+        actor = state.actor_index
+        betting = actor is not None and _ACTION_PATTERN.match(action)
+        if betting:
+            to_call = max(state.bets) - state.bets[actor]
+            if action == "allin":
+                is_raise = state.stacks[actor] > to_call
+                is_call = not is_raise
+            else:
+                is_raise = action[0] in "br"
+                is_call = action in ("x", "c") and to_call > 0
+        try:
+            PokerEngine.apply_action(state, action)
+        except Exception as e:
+            # Malformed tokens (e.g. "r" without an amount) end the replay, as they end settlement
+            logger.debug(f"Stats replay of hand {hand.id} stopped at {action!r}: {e}")
+            break
+        if not betting:
+            if _BOARD_PATTERN.match(action):
+                preflop = False
+            continue
+
+        row = counts[actor]
+        if action == "f":
+            folded[actor] = True
+        elif preflop:
+            if is_raise or is_call:
+                row[vpip] = 1
+            if preflop_raises == 1:
+                row[three_bet_chances] = 1
+                if is_raise:
+                    row[three_bets] = 1
+            if is_raise:
+                row[pfr] = 1
+                preflop_raises += 1
+        elif is_raise:
+            row[aggressive] += 1
+        elif is_call:
+            row[calls] += 1
+
+    if not state.status and folded.count(False) > 1:
+        for player, seat in enumerate(order):
+            if not folded[player]:
+                counts[player][showdowns] = 1
+                if seat < len(hand.winnings) and hand.winnings[seat] > 0:
+                    counts[player][won] = 1
+    by_seat = [()] * seats
+    for player, seat in enumerate(order):
+        by_seat[seat] = tuple(counts[player])
+    return by_seat
+
+
+def _percent(count: int, total: int) -> Optional[float]:
+    return round(100.0 * count / total, 2) if total else None
+
+
+def summarize(seat: int, totals: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Rates for a player_stats row (or an empty player)"""
+    totals = totals or {}
+    hands = int(totals.get("hands") or 0)
+    counts = {column: int(totals.get(column) or 0) for column in STAT_COLUMNS}
+    return {
+        "seat": seat,
+        "hands": hands,
+        "vpip": _percent(counts["vpip"], hands),
+        "pfr": _percent(counts["pfr"], hands),
+        "three_bet": _percent(counts["three_bets"], counts["three_bet_chances"]),
+        "aggression_factor": (
+            round(counts["aggressive_actions"] / counts["calls"], 2) if counts["calls"] else None
+        ),
+        "showdown_win_rate": _percent(counts["showdowns_won"], counts["showdowns"]),
+        "net_winnings": int(totals.get("net_winnings") or 0),
+        "counts": counts,
+    }
+
+
+def stat_deltas(removed: Sequence, added: Sequence) -> List[tuple]:
+    """Per-seat increments for player_stats when hand_players rows are replaced.
+
+    Rows are (seat, winnings, *STAT_COLUMNS); removed rows whose stats are
+    NULL were never counted. Returns (seat, hands, *stats, net_winnings)
+    sorted by seat, so concurrent writers lock the aggregate rows in the
+    same order.
+    """
+    totals: Dict[int, List[int]] = {}
+    for sign, rows in ((-1, removed), (1, added)):
+        for seat, winnings, *stats in rows:
+            if stats[0] is None:
+                continue
+            total = totals.setdefault(seat, [0] * (len(STAT_COLUMNS) + 2))
+            total[0] += sign
+            for i, value in enumerate(stats, 1):
+                total[i] += sign * value
+            total[-1] += sign * (winnings or 0)
+    return [(seat, *total) for seat, total in sorted(totals.items()) if any(total)]
@@ -1,6 +1,59 @@
-from typing import List, Dict, Tuple
-from pokerkit import Automation, NoLimitTexasHoldem
+from typing import List, Dict, Optional, Sequence, Tuple, Union
+from functools import lru_cache
+from app.core.config import settings
+from app.core.metrics import ENGINE_ERRORS, ENGINE_FALLBACKS, ENGINE_MISMATCHES
+from app.models.game import DEFAULT_STRUCTURE, GameStructure
+from app.models.hand import PokerHand
+from app.services.action_compiler import (
+    OP_ALLIN,
+    OP_BET,
+    OP_CALL,
+    OP_CHECK,
+    OP_DEAL,
+    OP_FOLD,
+    OP_RAISE,
+    ActionProgram,
+    compile_action,
+    compile_actions,
+    deal_cards,
+    format_program,
+)
+from app.services.fast_engine import FastHoldemState, UnsupportedHandError
+from app.services.hand_evaluator import RANKS, SUITS
 import re
+import logging
+
+# Configure logging for this module
+logger = logging.getLogger(__name__)
+
+SETTLEMENT_ENGINES = ("fast", "pokerkit", "verify")
+
+_DECK = [rank + suit for rank in RANKS for suit in SUITS]
+_CARD = re.compile(r"[2-9TJQKA][cdhs]")
+
+
+@lru_cache(maxsize=256)
+def _pokerkit_game(structure: GameStructure):
+    """pokerkit game definition for a structure, built once and shared by its hands"""
+    # pokerkit takes a few hundred milliseconds to import, so processes that
+    # only settle on the fast engine never load it
+    from pokerkit import Automation, NoLimitTexasHoldem
+
+    return NoLimitTexasHoldem(
+        (
+            Automation.ANTE_POSTING,
+            Automation.BET_COLLECTION,
+            Automation.BLIND_OR_STRADDLE_POSTING,
+            Automation.HOLE_CARDS_SHOWING_OR_MUCKING,
+            Automation.HAND_KILLING,
+            Automation.CHIPS_PUSHING,
+            Automation.CHIPS_PULLING,
+        ),
+        True,  # Uniform antes?
+        structure.ante,
+        structure.blinds_or_straddles,
+        structure.min_bet_amount,
+    )
 
 
 class PokerEngine:
@@ -9,139 +62,243 @@ class PokerEngine:
         hole_cards: List[str],  # List of hole cards for each player (empty string if folded)
         board_cards: str,  # Board cards as string "AsKdQc2h5s"
         actions: List[str],  # Action sequence
-        starting_stacks: List[int]  # Starting stacks for each player
+        starting_stacks: List[int],  # Starting stacks for each player
+        structure: Optional[GameStructure] = None  # Blinds, antes and straddles (20/40 if None)
     ) -> Tuple[List[int], List[int]]:  # Returns (final_stacks, winnings)
         """
-        Calculate final stacks and winnings using pokerkit
+        Calculate final stacks and winnings.
+
+        Players are in posting order: player 0 posts the small blind
+        (heads-up, the big blind). ``settle`` maps a hand's seats to that
+        order from its position indices.
+
+        The engine is selected by ``settings.SETTLEMENT_ENGINE``:
+        ``fast`` uses the integer lookup-table engine and falls back to
+        pokerkit for hands it does not support, ``pokerkit`` always replays
+        through pokerkit, and ``verify`` runs both and logs any mismatch
+        (returning the pokerkit result).
+
+        The actions are compiled once (see ``action_compiler``); a token
+        that cannot be read fails the replay like an illegal action.
         """
+        engine = settings.SETTLEMENT_ENGINE
+        if engine == "pokerkit":
+            return PokerEngine.calculate_winnings_pokerkit(
+                hole_cards, board_cards, actions, starting_stacks, structure
+            )
+
+        program = actions
         try:
-            # Convert our format to pokerkit format
-            num_players = len(starting_stacks)
-            
-            # Create the game state
-            state = NoLimitTexasHoldem.create_state(
-                # Automations
-                (
-                    Automation.ANTE_POSTING,
-                    Automation.BET_COLLECTION,
-                    Automation.BLIND_OR_STRADDLE_POSTING,
-                    Automation.HOLE_CARDS_SHOWING_OR_MUCKING,
-                    Automation.HAND_KILLING,
-                    Automation.CHIPS_PUSHING,
-                    Automation.CHIPS_PULLING,
-                ),
-                True,  # Uniform antes?
-                0,  # Antes (we don't use antes)
-                (20, 40),  # Blinds (small blind, big blind)
-                40,  # Min-bet (big blind size)
-                tuple(starting_stacks),  # Starting stacks
-                num_players,  # Number of players
+            program = compile_actions(actions)
+            result = PokerEngine._replay(
+                PokerEngine.create_fast_state(starting_stacks, structure),
+                hole_cards, board_cards, program, starting_stacks
             )
-            
-            # Deal hole cards
-            for i, cards in enumerate(hole_cards):
-                if cards and len(cards) >= 4:  # If player has cards (didn't fold pre)
-                    state.deal_hole(cards)
-                else:
-                    state.deal_hole('')  # Empty for folded players
-            
-            # Process actions
-            for action in actions:
-                if not action:
-                    continue
-                    
-                action = action.strip()
-                if action.startswith('f'):  # fold
-                    state.fold()
-                elif action.startswith('x'):  # check
-                    state.check_or_call()
-                elif action.startswith('c'):  # call
-                    state.check_or_call()
-                elif action.startswith('b'):  # bet
-                    amount = int(re.findall(r'\d+', action)[0])
-                    state.complete_bet_or_raise_to(amount)
-                elif action.startswith('r'):  # raise
-                    amount = int(re.findall(r'\d+', action)[0])
-                    state.complete_bet_or_raise_to(amount)
-                elif action == 'allin':
-                    # Get current stack and go all-in
-                    current_stack = state.stacks[state.actor_index]
-                    state.complete_bet_or_raise_to(current_stack)
-                elif len(action) >= 6 and PokerEngine._is_board_cards(action):
-                    # Board cards (flop/turn/river)
-                    if len(action) == 6:  # Flop (3 cards)
-                        state.burn_card()
-                        state.deal_board(action)
-                    elif len(action) == 8:  # Turn (1 card)
-                        state.burn_card()
-                        state.deal_board(action[-2:])
-                    elif len(action) == 10:  # River (1 card)
-                        state.burn_card()
-                        state.deal_board(action[-2:])
-            
-            # If we have board cards left, deal them
-            if board_cards and len(board_cards) > len(''.join(re.findall(r'[A-Z][a-z]', ''.join(actions)))):
-                remaining_board = board_cards
-                for action in actions:
-                    if PokerEngine._is_board_cards(action):
-                        remaining_board = remaining_board[len(action):]
-                
-                while remaining_board and len(remaining_board) >= 2:
-                    state.burn_card()
-                    state.deal_board(remaining_board[:2])
-                    remaining_board = remaining_board[2:]
-            
-            final_stacks = list(state.stacks)
-            winnings = [final - start for final, start in zip(final_stacks, starting_stacks)]
-            
-            return final_stacks, winnings
+        except UnsupportedHandError as e:
+            logger.debug(f"Fast engine cannot settle hand, using pokerkit: {e}")
+            ENGINE_FALLBACKS.labels("unsupported").inc()
+            return PokerEngine.calculate_winnings_pokerkit(
+                hole_cards, board_cards, program, starting_stacks, structure
+            )
+        except Exception as e:
+            # Same outcome as a pokerkit replay error
+            logger.warning(f"Poker engine error: {e}")
+            ENGINE_ERRORS.labels("fast").inc()
+            result = (starting_stacks, [0] * len(starting_stacks))
+
+        if engine == "verify":
+            expected = PokerEngine.calculate_winnings_pokerkit(
+                hole_cards, board_cards, program, starting_stacks, structure
+            )
+            if list(expected[1]) != list(result[1]):
+                ENGINE_MISMATCHES.inc()
+                logger.warning(
+                    f"Settlement mismatch: fast engine {result[1]} != pokerkit {expected[1]} "
+                    f"(stacks={starting_stacks}, actions={actions}, "
+                    f"hole_cards={hole_cards}, board={board_cards}, structure={structure})"
+                )
+            return expected
+
+        return result
+
+    @staticmethod
+    def calculate_winnings_pokerkit(
+        hole_cards: List[str],
+        board_cards: str,
+        actions: Union[List[str], ActionProgram],
+        starting_stacks: List[int],
+        structure: Optional[GameStructure] = None
+    ) -> Tuple[List[int], List[int]]:
+        """
+        Calculate final stacks and winnings using pokerkit
+        """
+        try:
+            state = PokerEngine.create_pokerkit_state(starting_stacks, structure)
+            return PokerEngine._replay(state, hole_cards, board_cards, actions, starting_stacks)
             
         except Exception as e:
             # If pokerkit fails, return original stacks
-            print(f"Poker engine error: {e}")
+            logger.warning(f"Poker engine error: {e}")
+            ENGINE_ERRORS.labels("pokerkit").inc()
             winnings = [0] * len(starting_stacks)
             return starting_stacks, winnings
-    
+
     @staticmethod
-    def _is_board_cards(action: str) -> bool:
-        """Check if action represents board cards"""
-        # Board cards should be even length and contain valid card representations
-        if len(action) % 2 != 0:
-            return False
-        
-        # Check if it looks like cards (alternating ranks and suits)
-        for i in range(0, len(action), 2):
-            if i + 1 >= len(action):
-                return False
-            rank = action[i]
-            suit = action[i + 1]
-            if rank not in '23456789TJQKA' or suit not in 'cdhs':
-                return False
-        
-        return True
-    
+    def settle(hand: PokerHand) -> Tuple[List[int], List[int]]:
+        """Final stacks and winnings of a hand, by seat, under its own game structure"""
+        if hand.structure is None:
+            # Saved before structures were stored: seats are already in posting order
+            return PokerEngine.calculate_winnings(hand.hole_cards, hand.board, hand.actions, hand.stacks)
+        order = PokerEngine.seat_order(hand)
+        final_stacks, winnings = PokerEngine.calculate_winnings(
+            PokerEngine.hole_cards_in_order(hand, order),
+            hand.board,
+            hand.actions,
+            [hand.stacks[seat] for seat in order],
+            hand.structure
+        )
+        return PokerEngine.to_seats(final_stacks, order), PokerEngine.to_seats(winnings, order)
+
+    @staticmethod
+    def seat_order(hand: PokerHand) -> Tuple[int, ...]:
+        """Seat of each engine player, starting with the small blind.
+
+        Heads-up the big blind comes first, since the button posts the small
+        blind and the engine puts the button last. Hands without a structure
+        keep their seat order.
+        """
+        player_count = len(hand.stacks)
+        if hand.structure is None:
+            return tuple(range(player_count))
+        if player_count == 2:
+            return (hand.big_blind_index, hand.small_blind_index)
+        return tuple((hand.small_blind_index + offset) % player_count for offset in range(player_count))
+
+    @staticmethod
+    def hole_cards_in_order(hand: PokerHand, order: Sequence[int]) -> List[str]:
+        return [hand.hole_cards[seat] if seat < len(hand.hole_cards) else "" for seat in order]
+
+    @staticmethod
+    def to_seats(values: Sequence[int], order: Sequence[int]) -> List[int]:
+        """Per-player engine values (stacks, bets, winnings) rearranged by seat"""
+        by_seat = [0] * len(order)
+        for player, seat in enumerate(order):
+            by_seat[seat] = values[player]
+        return by_seat
+
+    @staticmethod
+    def create_fast_state(starting_stacks: Sequence[int], structure: Optional[GameStructure] = None) -> FastHoldemState:
+        """New fast engine state for a structure (20/40 if None)"""
+        structure = structure or DEFAULT_STRUCTURE
+        return FastHoldemState(
+            tuple(starting_stacks), structure.blinds_or_straddles, structure.min_bet_amount, structure.ante
+        )
+
+    @staticmethod
+    def create_pokerkit_state(starting_stacks: Sequence[int], structure: Optional[GameStructure] = None):
+        """New pokerkit no-limit hold'em state for a structure (20/40 if None) with our automations"""
+        game = _pokerkit_game(structure or DEFAULT_STRUCTURE)
+        return game(tuple(starting_stacks), len(starting_stacks))
+
+    @staticmethod
+    def _replay(
+        state,
+        hole_cards: List[str],
+        board_cards: str,
+        actions: Union[Sequence[str], ActionProgram],
+        starting_stacks: List[int]
+    ) -> Tuple[List[int], List[int]]:
+        """Drive a pokerkit state (or a FastHoldemState) through a recorded hand"""
+        program = actions if isinstance(actions, ActionProgram) else compile_actions(actions)
+        PokerEngine.deal_hole_cards(
+            state, PokerEngine.complete_hole_cards(hole_cards, board_cards + program.board)
+        )
+        folded = set()
+        execute = PokerEngine.execute
+        for op, operand in program:
+            if op == OP_FOLD:
+                folded.add(state.actor_index)
+            execute(state, op, operand)
+
+        # Stand-in cards may only fill in for players who fold: a contested
+        # showdown with an unknown hand cannot be settled
+        contenders = [player for player in range(len(starting_stacks)) if player not in folded]
+        if len(contenders) > 1 and any(
+            player >= len(hole_cards) or len(_CARD.findall(hole_cards[player])) != 2 for player in contenders
+        ):
+            raise ValueError("Hole cards of a player at showdown are unknown")
+
+        # Board cards the actions did not deal are run out street by street
+        # until the hand is over; a hand still waiting on bets fails here
+        dealt = len(program.board)
+        remaining = board_cards[dealt:]
+        while len(remaining) >= 2 and state.status:
+            cards = remaining[:2 if dealt else 6]
+            state.burn_card()
+            state.deal_board(cards)
+            dealt += len(cards)
+            remaining = remaining[len(cards):]
+
+        final_stacks = list(state.stacks)
+        winnings = [final - start for final, start in zip(final_stacks, starting_stacks)]
+
+        return final_stacks, winnings
+
+    @staticmethod
+    def complete_hole_cards(hole_cards: Sequence[str], known_cards: str = "") -> List[str]:
+        """Hole cards with unknown ones replaced by cards nobody else holds.
+
+        Both engines need two cards dealt to every player, but imported hands
+        rarely show the cards of players who folded. Settlement rejects a
+        hand whose stand-ins reach a contested showdown, so they never decide
+        a pot.
+        """
+        used = set(_CARD.findall("".join(hole_cards) + known_cards))
+        spare = (card for card in _DECK if card not in used)
+        return [
+            cards if len(_CARD.findall(cards)) == 2 else next(spare) + next(spare)
+            for cards in hole_cards
+        ]
+
+    @staticmethod
+    def deal_hole_cards(state, hole_cards: List[str]) -> None:
+        """Deal every player's hole cards (empty for players without known cards)"""
+        for i, cards in enumerate(hole_cards):
+            if cards and len(cards) >= 4:  # If player has cards (didn't fold pre)
+                state.deal_hole(cards)
+            else:
+                state.deal_hole('')  # Empty for folded players
+
+    @staticmethod
+    def apply_action(state, action: str) -> None:
+        """Apply one action token to a pokerkit state (or a FastHoldemState)"""
+        instruction = compile_action(action)
+        if instruction is not None:
+            PokerEngine.execute(state, *instruction)
+
+    @staticmethod
+    def run_program(state, program: ActionProgram) -> None:
+        """Apply compiled actions to a pokerkit state (or a FastHoldemState)"""
+        execute = PokerEngine.execute
+        for op, operand in program:
+            execute(state, op, operand)
+
+    @staticmethod
+    def execute(state, op: int, operand: int) -> None:
+        """Apply one compiled instruction"""
+        if op == OP_CHECK or op == OP_CALL:
+            state.check_or_call()
+        elif op == OP_BET or op == OP_RAISE:
+            state.complete_bet_or_raise_to(operand)
+        elif op == OP_FOLD:
+            state.fold()
+        elif op == OP_DEAL:
+            state.burn_card()
+            state.deal_board(deal_cards(operand))
+        elif op == OP_ALLIN:
+            state.complete_bet_or_raise_to(state.stacks[state.actor_index])
+
     @staticmethod
     def format_action_sequence(actions: List[str]) -> str:
         """Format actions into short format for display"""
-        formatted = []
-        for action in actions:
-            if action.startswith('f'):
-                formatted.append('f')
-            elif action.startswith('x'):
-                formatted.append('x')
-            elif action.startswith('c'):
-                formatted.append('c')
-            elif action.startswith('b'):
-                amount = re.findall(r'\d+', action)
-                formatted.append(f"b{amount[0]}" if amount else 'b')
-            elif action.startswith('r'):
-                amount = re.findall(r'\d+', action)
-                formatted.append(f"r{amount[0]}" if amount else 'r')
-            elif action == 'allin':
-                formatted.append('allin')
-            elif PokerEngine._is_board_cards(action):
-                formatted.append(action)
-            else:
-                formatted.append(action)
-        
-        return ' '.join(formatted)
\ No newline at end of file
+        return ' '.join(format_program(compile_actions(actions, strict=False)))
@@ -0,0 +1,203 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from app.core.config import settings
+from app.models.hand import PokerHand
+from app.core.metrics import apply_counter_deltas, counter_deltas, counter_snapshot, registry
+from app.services.hand_evaluator import ensure_rank_table_file
+import asyncio
+import multiprocessing
+import threading
+import time
+import logging
+
+# Configure logging for this module
+logger = logging.getLogger(__name__)
+
+
+class SettlementUnavailableError(RuntimeError):
+    """Raised when the worker pool cannot settle hands, even after a restart"""
+
+
+def _warm_worker() -> None:
+    """Process initializer: import the engines and load rank tables before the first job"""
+    import pokerkit  # noqa: F401
+    from app.services.hand_evaluator import get_rank_tables
+
+    get_rank_tables()
+
+
+def _ping() -> int:
+    return 0
+
+
+def _settle_hands(hands: Sequence[PokerHand]) -> Tuple[List[Tuple[List[int], List[tuple]]], dict]:
+    """Settle hands and derive their per-seat stats in the same worker call"""
+    from app.services.poker_engine import PokerEngine
+    from app.services.player_stats import hand_player_stats
+
+    before = counter_snapshot()
+    results = []
+    for hand in hands:
+        _, hand.winnings = PokerEngine.settle(hand)
+        results.append((hand.winnings, hand_player_stats(hand)))
+    return results, counter_deltas(before)
+
+
+class SettlementExecutor:
+    """Runs CPU-bound hand settlement on a pool of warm worker processes.
+
+    With ``workers == 0`` settlement runs on the default thread pool instead,
+    which is useful for tests and single-core deployments. A pool broken by
+    a dead worker is replaced and the job retried once; if that fails too,
+    SettlementUnavailableError is raised.
+    """
+
+    def __init__(self, workers: int, start_method: str = "spawn"):
+        self.workers = workers
+        self.start_method = start_method
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+        # Metrics; pending counts submitted jobs that have not finished yet
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.restarts = 0
+        self.hands_settled = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def start(self) -> None:
+        """Start the worker processes and wait until each has warmed up"""
+        with self._lock:
+            if self._pool is not None or self.workers <= 0:
+                return
+            logger.info(f"Starting settlement pool with {self.workers} workers ({self.start_method})")
+            # Generate the rank table file once here so every worker maps it
+            # instead of building its own copy of the tables
+            try:
+                ensure_rank_table_file()
+            except OSError as e:
+                logger.warning(f"Could not write rank table file, workers will build tables in memory: {e}")
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(self.start_method),
+                initializer=_warm_worker
+            )
+        try:
+            futures = [self._pool.submit(_ping) for _ in range(self.workers)]
+            for future in futures:
+                future.result()
+            logger.info("Settlement pool workers are warm")
+        except Exception as e:
+            logger.error(f"Failed to warm settlement pool: {e}")
+            logger.exception("Settlement pool startup error details:")
+            self.shutdown()
+            raise e
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                logger.info("Shutting down settlement pool")
+                self._pool.shutdown(wait=True, cancel_futures=True)
+                self._pool = None
+
+    def _restart(self, broken: Optional[ProcessPoolExecutor]) -> None:
+        """Replace a broken pool (once, however many jobs saw it break) with a fresh one"""
+        with self._lock:
+            if self._pool is broken and broken is not None:
+                logger.warning("Replacing broken settlement pool")
+                self._pool = None
+                self.restarts += 1
+                broken.shutdown(wait=False, cancel_futures=True)
+        try:
+            self.start()
+        except Exception as e:
+            raise SettlementUnavailableError(f"Settlement pool could not be restarted: {e}") from e
+
+    async def settle_hands(self, hands: Sequence[PokerHand]) -> None:
+        """Fill in the winnings and per-seat stats of hands, spread across the workers"""
+        for hand, (winnings, stats) in zip(hands, await self.map_groups(_settle_hands, hands)):
+            hand.winnings = winnings
+            hand.player_stats = stats
+
+    async def map_groups(self, function: Callable, items: Sequence) -> List:
+        """Run a worker function over items split into one group per worker.
+
+        ``function`` takes a list of items and returns its per-item results
+        with the counter increments made while computing them, like
+        ``_settle_hands``. It must be picklable.
+        """
+        if not items:
+            return []
+        grouped = await asyncio.gather(*(self._run(group, function) for group in self._groups(items)))
+        return [result for group in grouped for result in group]
+
+    def _groups(self, jobs: Sequence) -> List[Sequence]:
+        group_count = max(1, self.workers)
+        group_size = -(-len(jobs) // group_count)
+        return [jobs[i:i + group_size] for i in range(0, len(jobs), group_size)]
+
+    async def _run(self, jobs: Sequence, function: Callable) -> List:
+        loop = asyncio.get_running_loop()
+        if self.workers > 0 and self._pool is None:
+            await loop.run_in_executor(None, self.start)
+
+        self.pending += 1
+        started = time.perf_counter()
+        try:
+            pool = self._pool
+            try:
+                results = await self._call(loop, pool, function, jobs)
+            except BrokenProcessPool as e:
+                # A worker died (killed, out of memory): start a new pool and retry once
+                logger.error(f"Settlement pool is broken, restarting it: {e}")
+                await loop.run_in_executor(None, self._restart, pool)
+                try:
+                    results = await self._call(loop, self._pool, function, jobs)
+                except BrokenProcessPool as e:
+                    raise SettlementUnavailableError(f"Settlement pool broke again after a restart: {e}") from e
+            self.completed += 1
+            self.hands_settled += len(jobs)
+            return results
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Settlement of {len(jobs)} hands failed: {e}")
+            raise e
+        finally:
+            self.pending -= 1
+            elapsed = time.perf_counter() - started
+            self.total_seconds += elapsed
+            self.max_seconds = max(self.max_seconds, elapsed)
+
+    @staticmethod
+    async def _call(loop, pool: Optional[ProcessPoolExecutor], function: Callable, jobs: Sequence) -> List:
+        results, deltas = await loop.run_in_executor(pool, function, list(jobs))
+        if pool is not None:
+            apply_counter_deltas(deltas)
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        finished = self.completed + self.failed
+        return {
+            "workers": self.workers,
+            "queue_depth": self.pending,
+            "completed": self.completed,
+            "failed": self.failed,
+            "restarts": self.restarts,
+            "hands_settled": self.hands_settled,
+            "avg_latency_seconds": self.total_seconds / finished if finished else 0.0,
+            "max_latency_seconds": self.max_seconds,
+        }
+
+
+settlement_executor = SettlementExecutor(
+    workers=settings.SETTLEMENT_WORKERS,
+    start_method=settings.SETTLEMENT_START_METHOD
+)
+
+registry.gauge(
+    "poker_settlement_queue_depth",
+    "Settlement jobs submitted to the worker pool and not yet finished"
+).set_function(lambda: settlement_executor.pending)
@@ -0,0 +1,496 @@
+"""Benchmark the settlement engine, hand codec, repository and API, writing JSON results.
+
+Usage: python -m app.tools.benchmark [engine] [codec] [repository] [load] [startup]
+       [--hands N] [--repeat N] [--seed N] [--storage sqlite|duckdb|postgres]
+       [--requests N] [--concurrency N] [--settlement-workers N]
+       [--write-mode direct|flush|enqueue]
+       [--startup-budget-ms N]
+       [--output FILE] [--baseline FILE] [--tolerance F]
+
+With no suite names every suite runs. Hands come from the seeded generator
+in app.tools.hand_generator, so two runs with the same options measure the
+same work. Each result has a ``per_second`` rate; with --baseline, results
+more than --tolerance slower than the same result in an earlier output
+file are listed and the exit status is 1. The exit status is also 1 when
+a fresh API process takes longer than --startup-budget-ms to import the
+app and answer its first request.
+
+The repository and load suites use a fresh embedded database in a
+temporary directory unless --storage postgres is given, in which case they
+write benchmark hands into the configured Postgres database.
+"""
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from app.core.config import settings
+from app.models.hand import PokerHand
+from app.services.hand_codec import decode_hand, encode_hand
+from app.services.player_stats import hand_player_stats
+from app.services.poker_engine import PokerEngine
+from app.tools.hand_generator import generate_hands, hand_request
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+SUITES = ("engine", "codec", "repository", "load", "startup")
+
+# Run in a fresh interpreter: import the app, then start it and answer one request
+_STARTUP_SCRIPT = """
+import time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter() - started
+import asyncio, json, sys
+import httpx
+from app.tools.benchmark import _lifespan
+
+async def first_request():
+    transport = httpx.ASGITransport(app=app.main.app)
+    async with _lifespan(app.main.app), httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        response = await client.get("/")
+        return time.perf_counter() - started, response.status_code
+
+ready, status = asyncio.run(first_request())
+print(json.dumps({
+    "import_seconds": imported,
+    "ready_seconds": ready,
+    "status": status,
+    "modules": {name: name in sys.modules for name in ("pokerkit", "numpy", "duckdb")},
+}))
+"""
+
+
+def _best_of(function: Callable[[], Any], repeat: int) -> float:
+    """Fastest of ``repeat`` timed runs, in seconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def _result(name: str, params: Dict[str, Any], count: int, seconds: float, unit: str = "hands", **extra) -> dict:
+    result = {
+        "name": name,
+        "params": params,
+        "count": count,
+        "unit": unit,
+        "seconds": round(seconds, 6),
+        "per_second": round(count / seconds, 1) if seconds else None,
+        "us_per_item": round(seconds / count * 1e6, 2) if count else None,
+    }
+    result.update(extra)
+    logger.info(f"{name} {params}: {result['per_second']} {unit}/s")
+    return result
+
+
+def _latency_summary(latencies: Sequence[float]) -> Dict[str, float]:
+    ordered = sorted(latencies)
+    if not ordered:
+        return {}
+
+    def percentile(fraction: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000, 3)
+
+    return {
+        "mean": round(sum(ordered) / len(ordered) * 1000, 3),
+        "p50": percentile(0.50),
+        "p95": percentile(0.95),
+        "p99": percentile(0.99),
+        "max": round(ordered[-1] * 1000, 3),
+    }
+
+
+def _mean_actions(hands: Sequence[PokerHand]) -> float:
+    return round(sum(len(hand.actions) for hand in hands) / len(hands), 2)
+
+
+def _settle_all(hands: Sequence[PokerHand], engine: str) -> None:
+    previous = settings.SETTLEMENT_ENGINE
+    settings.SETTLEMENT_ENGINE = engine
+    try:
+        for hand in hands:
+            PokerEngine.settle(hand)
+    finally:
+        settings.SETTLEMENT_ENGINE = previous
+
+
+def bench_engine(hands: int, repeat: int, seed: int) -> List[dict]:
+    """Settlement cost by player count and by action length, fast engine vs pokerkit"""
+    results = []
+    # pokerkit is one to two orders of magnitude slower; a smaller sample keeps runs short
+    pokerkit_hands = max(10, hands // 10)
+    for players in range(2, 10):
+        sample = list(generate_hands(hands, seed=seed + players, min_players=players, max_players=players))
+        mean_actions = _mean_actions(sample)
+        results.append(_result(
+            "engine.settle", {"players": players, "engine": "fast"}, len(sample),
+            _best_of(lambda: _settle_all(sample, "fast"), repeat), mean_actions=mean_actions
+        ))
+        with warnings.catch_warnings():
+            # pokerkit warns about every card it is told to deal from a hand history
+            warnings.simplefilter("ignore")
+            subset = sample[:pokerkit_hands]
+            results.append(_result(
+                "engine.settle", {"players": players, "engine": "pokerkit"}, len(subset),
+                _best_of(lambda: _settle_all(subset, "pokerkit"), repeat), mean_actions=_mean_actions(subset)
+            ))
+        results.append(_result(
+            "engine.player_stats", {"players": players}, len(sample),
+            _best_of(lambda: [hand_player_stats(hand) for hand in sample], repeat), mean_actions=mean_actions
+        ))
+
+    for aggression in (0.1, 0.3, 0.6):
+        sample = list(generate_hands(hands, seed=seed, min_players=6, max_players=6, aggression=aggression))
+        results.append(_result(
+            "engine.settle_by_aggression", {"players": 6, "aggression": aggression, "engine": "fast"}, len(sample),
+            _best_of(lambda: _settle_all(sample, "fast"), repeat), mean_actions=_mean_actions(sample)
+        ))
+    return results
+
+
+def bench_codec(hands: int, repeat: int, seed: int) -> List[dict]:
+    """Binary hand encoding and decoding"""
+    sample = list(generate_hands(hands, seed=seed))
+    encoded = [encode_hand(hand) for hand in sample]
+    extra = {
+        "mean_actions": _mean_actions(sample),
+        "bytes_per_hand": round(sum(map(len, encoded)) / len(encoded), 1),
+    }
+    return [
+        _result("codec.encode", {}, len(sample),
+                _best_of(lambda: [encode_hand(hand) for hand in sample], repeat), **extra),
+        _result("codec.decode", {}, len(encoded),
+                _best_of(lambda: [decode_hand(data, hand.id) for data, hand in zip(encoded, sample)], repeat),
+                **extra),
+    ]
+
+
+def _use_storage(storage: str, directory: str, suite: str) -> None:
+    """Point the storage settings at ``storage``, with a fresh file per suite for embedded backends"""
+    settings.STORAGE_BACKEND = storage
+    settings.SQLITE_PATH = os.path.join(directory, f"{suite}.sqlite3")
+    settings.DUCKDB_PATH = os.path.join(directory, f"{suite}.duckdb")
+
+
+def bench_repository(hands: int, seed: int, storage: str, directory: str) -> List[dict]:
+    """Saving, reading and scanning hands through the configured repository"""
+    from app.core.storage import create_hand_repository, get_db_manager
+
+    _use_storage(storage, directory, "repository")
+    get_db_manager().init_db()
+    repository = create_hand_repository()
+    sample = list(generate_hands(hands, seed=seed))
+    for hand in sample:
+        hand.player_stats = hand_player_stats(hand)
+    params = {"storage": storage}
+    results = []
+
+    single = sample[:min(200, len(sample))]
+    started = time.perf_counter()
+    for hand in single:
+        repository.save(hand)
+    results.append(_result("repository.save", params, len(single), time.perf_counter() - started))
+
+    batch_size = 500
+    rest = sample[len(single):]
+    started = time.perf_counter()
+    for start in range(0, len(rest), batch_size):
+        repository.save_many(rest[start:start + batch_size])
+    results.append(_result(
+        "repository.save_many", {**params, "batch_size": batch_size}, len(rest), time.perf_counter() - started
+    ))
+
+    rng = random.Random(seed)
+    lookups = [rng.choice(sample).id for _ in range(min(1000, len(sample)))]
+    started = time.perf_counter()
+    for hand_id in lookups:
+        repository.get_by_id(hand_id)
+    results.append(_result("repository.get_by_id", params, len(lookups), time.perf_counter() - started))
+
+    for name, filters in (("repository.get_page", {}), ("repository.get_page_by_seat", {"seat": 3, "min_winnings": 1})):
+        pages = 0
+        started = time.perf_counter()
+        cursor = None
+        while pages < 20:
+            _, cursor = repository.get_page(limit=100, cursor=cursor, **filters)
+            pages += 1
+            if cursor is None:
+                break
+        results.append(_result(name, {**params, "limit": 100}, pages, time.perf_counter() - started, unit="pages"))
+
+    scanned = 0
+    started = time.perf_counter()
+    for batch in repository.iter_batches(batch_size=settings.EXPORT_FETCH_SIZE):
+        scanned += len(batch)
+    results.append(_result("repository.iter_batches", params, scanned, time.perf_counter() - started))
+    get_db_manager().close_pool()
+    return results
+
+
+@asynccontextmanager
+async def _lifespan(app):
+    """Run the app's startup and shutdown handlers around the block, as a server would"""
+    received: asyncio.Queue = asyncio.Queue()
+    sent: asyncio.Queue = asyncio.Queue()
+    task = asyncio.create_task(app({"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}}, received.get, sent.put))
+    await received.put({"type": "lifespan.startup"})
+    message = await sent.get()
+    if message["type"] != "lifespan.startup.complete":
+        raise RuntimeError(f"Application startup failed: {message.get('message')}")
+    try:
+        yield
+    finally:
+        await received.put({"type": "lifespan.shutdown"})
+        await sent.get()
+        await task
+
+
+async def _drive(client, requests: Sequence[tuple], concurrency: int) -> tuple:
+    """Send (method, url, body) requests from ``concurrency`` workers; return latencies, errors, wall time, responses"""
+    queue = iter(enumerate(requests))
+    latencies: List[float] = []
+    responses: List[Optional[dict]] = [None] * len(requests)
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        for index, (method, url, body) in queue:
+            started = time.perf_counter()
+            response = await client.request(method, url, json=body)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                errors += 1
+            elif method == "POST":
+                responses[index] = response.json()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started, responses
+
+
+async def _load(requests: int, concurrency: int, seed: int, storage: str, write_mode: str) -> List[dict]:
+    import httpx
+    from app.main import create_app
+
+    app = create_app()
+    params = {
+        "storage": storage,
+        "concurrency": concurrency,
+        "engine": settings.SETTLEMENT_ENGINE,
+        "write_mode": write_mode,
+    }
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with _lifespan(app), httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        bodies = [("POST", "/api/v1/hands/", hand_request(hand)) for hand in generate_hands(requests, seed=seed)]
+        latencies, errors, seconds, responses = await _drive(client, bodies, concurrency)
+        results.append(_result(
+            "load.create_hand", params, len(bodies), seconds, unit="requests",
+            errors=errors, latency_ms=_latency_summary(latencies)
+        ))
+
+        rng = random.Random(seed)
+        ids = [response["id"] for response in responses if response]
+        phases = (
+            ("load.get_hand", [("GET", f"/api/v1/hands/{rng.choice(ids)}", None) for _ in range(requests)] if ids else []),
+            ("load.list_hands", [("GET", "/api/v1/hands/?limit=50", None) for _ in range(max(1, requests // 10))]),
+        )
+        for name, batch in phases:
+            latencies, errors, seconds, _ = await _drive(client, batch, concurrency)
+            results.append(_result(
+                name, params, len(batch), seconds, unit="requests",
+                errors=errors, latency_ms=_latency_summary(latencies)
+            ))
+    return results
+
+
+def bench_load(
+    requests: int,
+    concurrency: int,
+    seed: int,
+    storage: str,
+    directory: str,
+    settlement_workers: Optional[int] = None,
+    write_mode: Optional[str] = None
+) -> List[dict]:
+    """End-to-end requests against an in-process app: create, fetch and list hands"""
+    from app.services.hand_writer import hand_writer
+    from app.services.settlement_executor import settlement_executor
+
+    _use_storage(storage, directory, "load")
+    if settlement_workers is not None:
+        settlement_executor.workers = settlement_workers
+    if write_mode is not None:
+        hand_writer.mode = write_mode
+    return asyncio.run(_load(requests, concurrency, seed, storage, hand_writer.mode))
+
+
+def bench_startup(repeat: int, directory: str, settlement_workers: Optional[int] = None) -> List[dict]:
+    """Cold start of an API process: importing app.main, and until its first response"""
+    backend = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(filter(None, [backend, os.environ.get("PYTHONPATH")])),
+        "STORAGE_BACKEND": settings.STORAGE_BACKEND,
+        "SQLITE_PATH": os.path.join(directory, "startup.sqlite3"),
+        "DUCKDB_PATH": os.path.join(directory, "startup.duckdb"),
+        "EAGER_STARTUP": "false",
+    }
+    if settlement_workers is not None:
+        env["SETTLEMENT_WORKERS"] = str(settlement_workers)
+
+    runs = []
+    for _ in range(repeat):
+        completed = subprocess.run(
+            [sys.executable, "-c", _STARTUP_SCRIPT], env=env, cwd=backend,
+            capture_output=True, text=True, check=True, timeout=120
+        )
+        runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    imported = min(runs, key=lambda run: run["import_seconds"])
+    ready = min(runs, key=lambda run: run["ready_seconds"])
+    return [
+        _result("startup.import", {}, 1, imported["import_seconds"], unit="starts", modules=imported["modules"]),
+        _result("startup.ready", {}, 1, ready["ready_seconds"], unit="starts", status=ready["status"]),
+    ]
+
+
+def over_budget(document: dict, budget_ms: float) -> List[str]:
+    """Startup results slower than the budget"""
+    return [
+        f"{result['name']}: {result['seconds'] * 1000:.0f}ms (budget {budget_ms:g}ms)"
+        for result in document["results"]
+        if result["name"] == "startup.ready" and result["seconds"] * 1000 > budget_ms
+    ]
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True, timeout=10
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run(suites: Sequence[str], args: argparse.Namespace) -> dict:
+    """Run the named suites and return the JSON document"""
+    results: List[dict] = []
+    with tempfile.TemporaryDirectory(prefix="poker-benchmark-") as directory:
+        for suite in suites:
+            logger.info(f"Running {suite} benchmarks")
+            if suite == "engine":
+                results += bench_engine(args.hands, args.repeat, args.seed)
+            elif suite == "codec":
+                results += bench_codec(args.hands * 10, args.repeat, args.seed)
+            elif suite == "repository":
+                results += bench_repository(args.hands * 5, args.seed, args.storage, directory)
+            elif suite == "load":
+                results += bench_load(
+                    args.requests, args.concurrency, args.seed, args.storage, directory,
+                    args.settlement_workers, args.write_mode
+                )
+            elif suite == "startup":
+                results += bench_startup(args.repeat, directory, args.settlement_workers)
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "suites": list(suites),
+            "hands": args.hands,
+            "seed": args.seed,
+            "settlement_engine": settings.SETTLEMENT_ENGINE,
+        },
+        "results": results,
+    }
+
+
+def regressions(current: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Results whose rate fell more than ``tolerance`` (a fraction) below the baseline's"""
+    def key(result: dict) -> str:
+        return result["name"] + json.dumps(result["params"], sort_keys=True)
+
+    previous = {key(result): result for result in baseline.get("results", [])}
+    slower = []
+    for result in current["results"]:
+        before = previous.get(key(result))
+        if not before or not before.get("per_second") or not result.get("per_second"):
+            continue
+        change = result["per_second"] / before["per_second"] - 1
+        if change < -tolerance:
+            slower.append(
+                f"{result['name']} {result['params']}: {before['per_second']} -> "
+                f"{result['per_second']} {result['unit']}/s ({change:+.1%})"
+            )
+    return slower
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("suites", nargs="*", help=f"Suites to run: {', '.join(SUITES)} (default: all)")
+    parser.add_argument("--hands", type=int, default=1000, help="Hands per engine measurement")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per micro-benchmark (fastest is kept)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the hand generator")
+    parser.add_argument("--storage", choices=("sqlite", "duckdb", "postgres"), default="sqlite")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per load phase")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent clients in the load phases")
+    parser.add_argument("--settlement-workers", type=int, help="Override SETTLEMENT_WORKERS for the load suite")
+    parser.add_argument("--write-mode", choices=("direct", "flush", "enqueue"),
+                        help="Override HAND_WRITE_MODE for the load suite")
+    parser.add_argument("--startup-budget-ms", type=float, default=1000,
+                        help="Longest allowed time for a new API process to answer its first request")
+    parser.add_argument("--output", help="Write the JSON results here instead of stdout")
+    parser.add_argument("--baseline", help="Earlier JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed slowdown against the baseline")
+    args = parser.parse_args()
+    unknown = sorted(set(args.suites) - set(SUITES))
+    if unknown:
+        parser.error(f"unknown suite(s): {', '.join(unknown)}")
+
+    # Per-request INFO logs would dominate the timings
+    logging.getLogger().setLevel(logging.WARNING)
+    logger.setLevel(logging.INFO)
+    document = run(args.suites or SUITES, args)
+
+    text = json.dumps(document, indent=2)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(text + "\n")
+        logger.info(f"Wrote {len(document['results'])} results to {args.output}")
+    else:
+        print(text)
+
+    failures = over_budget(document, args.startup_budget_ms)
+    for line in failures:
+        logger.warning(f"Over startup budget: {line}")
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            slower = regressions(document, json.load(baseline_file), args.tolerance)
+        for line in slower:
+            logger.warning(f"Regression: {line}")
+        failures += slower
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
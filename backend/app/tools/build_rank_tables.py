@@ -0,0 +1,53 @@
+"""Generate the hand rank table file that the evaluator memory-maps at startup.
+
+Usage: python -m app.tools.build_rank_tables [--output PATH] [--check]
+
+Without --output the file goes to RANK_TABLE_PATH (default
+app/data/rank_tables.bin). --check only verifies an existing file's
+version and checksum, exiting non-zero if it is missing or stale.
+"""
+from app.services.hand_evaluator import (
+    RANK_TABLE_VERSION,
+    RankTableError,
+    RankTables,
+    rank_table_path,
+)
+import argparse
+import logging
+import sys
+import time
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="Table file to write (default: RANK_TABLE_PATH)")
+    parser.add_argument("--check", action="store_true", help="Verify the existing file instead of writing one")
+    args = parser.parse_args()
+    path = args.output or rank_table_path()
+
+    if args.check:
+        try:
+            tables = RankTables.load(path)
+        except (OSError, RankTableError) as e:
+            logger.error(f"Rank table file is not usable: {e}")
+            sys.exit(1)
+        logger.info(f"{path} is current (version {RANK_TABLE_VERSION}, {len(tables.rank_values)} rank entries)")
+        return
+
+    started = time.perf_counter()
+    tables = RankTables.build()
+    tables.write(path)
+    logger.info(
+        f"Wrote version {RANK_TABLE_VERSION} rank tables ({len(tables.rank_values)} rank entries) "
+        f"to {path} in {time.perf_counter() - started:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Export stored hands as PHH hand histories, optionally verifying their winnings.
+
+Usage: python -m app.tools.export_phh OUTPUT [--format tar|ndjson] [--verify]
+       [--workers N] [--batch-size N] [--created-after TIME] [--created-before TIME]
+
+Hands are read in batches and converted to PHH documents (the format
+pokerkit reads) on a pool of worker processes while the next batch is read.
+The tarball holds one hands/<id>.phh file per hand and a report.ndjson of
+hands that could not be exported. With --verify every exported document is
+replayed and hands whose stored winnings disagree are added to the report;
+the exit status is then 1 when any were found.
+"""
+from datetime import datetime
+from typing import Optional
+from app.core.config import settings
+from app.core.storage import create_async_hand_repository, ensure_database, get_db_manager, is_embedded
+from app.services.hand_export import HandExporter, PhhExport
+from app.services.settlement_executor import SettlementExecutor
+import argparse
+import asyncio
+import sys
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+async def export_phh(
+    output: str,
+    format: str,
+    verify: bool,
+    workers: int,
+    batch_size: int,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None
+) -> PhhExport:
+    """Write the export to ``output`` and return it with its totals"""
+    ensure_database()
+    repository = create_async_hand_repository()
+    executor = SettlementExecutor(workers, settings.SETTLEMENT_START_METHOD)
+    export = PhhExport(
+        repository.iter_batches(batch_size, created_after, created_before),
+        verify=verify,
+        executor=executor
+    )
+    try:
+        with open(output, "wb") as file:
+            if format == "ndjson":
+                async for chunk in HandExporter.aiter_phh_ndjson(export):
+                    file.write(chunk.encode())
+            else:
+                async for chunk in HandExporter.aiter_phh_tar(export):
+                    file.write(chunk)
+    finally:
+        executor.shutdown()
+        get_db_manager().close_pool()
+        if not is_embedded():
+            from app.core.async_db import async_db_manager
+
+            await async_db_manager.close()
+    return export
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output", help="File to write (a .tar.gz or .ndjson)")
+    parser.add_argument("--format", choices=("tar", "ndjson"), default="tar")
+    parser.add_argument("--verify", action="store_true", help="Replay every hand and report stored winnings that disagree")
+    parser.add_argument("--workers", type=int, default=max(1, settings.SETTLEMENT_WORKERS), help="Conversion processes (0 converts in this process)")
+    parser.add_argument("--batch-size", type=int, default=settings.EXPORT_FETCH_SIZE, help="Hands read at a time")
+    parser.add_argument("--created-after", type=datetime.fromisoformat, help="Only hands created at or after this ISO time")
+    parser.add_argument("--created-before", type=datetime.fromisoformat, help="Only hands created before this ISO time")
+    args = parser.parse_args()
+
+    export = asyncio.run(export_phh(
+        args.output,
+        args.format,
+        verify=args.verify,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        created_after=args.created_after,
+        created_before=args.created_before
+    ))
+    elapsed = export.elapsed_seconds
+    logger.info(
+        f"Exported {export.exported} hands to {args.output}, {export.failed} failed, {elapsed:.1f}s "
+        f"({export.exported / elapsed if elapsed else 0:.0f} hands/s)"
+    )
+    if args.verify:
+        logger.info(f"Verification found {export.mismatched} hands with mismatched winnings")
+        if export.mismatched:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
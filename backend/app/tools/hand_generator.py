@@ -0,0 +1,142 @@
+"""Random but legal no-limit hold'em hands for benchmarks and load tests.
+
+Each hand is played out on the fast engine: every betting decision is
+drawn at random from the moves that are legal at that point, so the
+result always settles without errors and the same seed always gives the
+same hands.
+"""
+from typing import Iterator, Optional, Sequence
+from app.models.game import GameStructure
+from app.models.hand import PokerHand
+from app.services.poker_engine import PokerEngine
+import random
+
+RANKS = "23456789TJQKA"
+SUITS = "cdhs"
+DECK = [rank + suit for rank in RANKS for suit in SUITS]
+
+# Stakes drawn for each hand; straddles only apply with four or more players
+STRUCTURES = (
+    GameStructure(small_blind=20, big_blind=40),
+    GameStructure(small_blind=50, big_blind=100, ante=10),
+    GameStructure(small_blind=25, big_blind=50, straddles=(100,)),
+)
+
+# Raises allowed per street before players only call or fold
+MAX_RAISES_PER_STREET = 4
+
+
+def _structure_for(rng: random.Random, players: int, structures: Sequence[GameStructure]) -> GameStructure:
+    choices = [structure for structure in structures if len(structure.straddles) <= players - 2]
+    return rng.choice(choices or [STRUCTURES[0]])
+
+
+def _bet_amount(rng: random.Random, state) -> Optional[int]:
+    """A legal raise-to amount for the player to act, or None if they cannot raise"""
+    actor = state.actor_index
+    max_bet = max(state.bets)
+    max_amount = state.stacks[actor] + state.bets[actor]
+    min_amount = min(max_amount, max(state.raise_amount, state.min_bet) + max_bet)
+    if max_amount <= max_bet:
+        return None
+    roll = rng.random()
+    if roll < 0.1:
+        return max_amount
+    pot = sum(state.contributions)
+    # Mostly small raises: between the minimum and roughly a pot-sized one
+    return min(max_amount, rng.randint(min_amount, max(min_amount, max_bet + pot)))
+
+
+def generate_hand(
+    rng: random.Random,
+    players: Optional[int] = None,
+    structures: Sequence[GameStructure] = STRUCTURES,
+    aggression: float = 0.3
+) -> PokerHand:
+    """Deal and play out one hand with 2-9 players (``players`` fixes the count).
+
+    ``aggression`` is the chance of betting or raising when allowed; higher
+    values give longer action sequences.
+    """
+    players = players or rng.randint(2, 9)
+    structure = _structure_for(rng, players, structures)
+    stacks = [rng.randint(20, 200) * structure.big_blind for _ in range(players)]
+    dealer = rng.randrange(players)
+    small_blind = (dealer + 1) % players
+    hand = PokerHand(
+        stacks=stacks,
+        dealer_index=dealer,
+        small_blind_index=small_blind,
+        big_blind_index=(small_blind + 1) % players,
+        structure=structure
+    )
+    deck = rng.sample(DECK, 2 * players + 5)
+    hand.hole_cards = ["".join(deck[2 * seat:2 * seat + 2]) for seat in range(players)]
+    board = "".join(deck[2 * players:])
+
+    order = PokerEngine.seat_order(hand)
+    state = PokerEngine.create_fast_state([stacks[seat] for seat in order], structure)
+    PokerEngine.deal_hole_cards(state, PokerEngine.hole_cards_in_order(hand, order))
+
+    dealt = 0
+    raises = 0
+    while state.status:
+        actor = state.actor_index
+        if actor is None:
+            # Betting is closed: deal the next street (3 cards, then 1 and 1)
+            dealt = 6 if not dealt else dealt + 2
+            action = board[:dealt]
+            raises = 0
+        else:
+            to_call = max(state.bets) - state.bets[actor]
+            amount = _bet_amount(rng, state) if raises < MAX_RAISES_PER_STREET else None
+            if amount is not None and rng.random() < aggression:
+                action = f"{'r' if max(state.bets) else 'b'}{amount}"
+            elif to_call and rng.random() < 0.35:
+                action = "f"
+            else:
+                action = "c" if to_call else "x"
+        try:
+            PokerEngine.apply_action(state, action)
+        except ValueError:
+            # A raise the rules do not allow here (e.g. after a short all-in)
+            action = "c" if max(state.bets) > state.bets[actor] else "x"
+            PokerEngine.apply_action(state, action)
+        if action[0] in "br":
+            raises += 1
+        hand.actions.append(action)
+
+    hand.board = board[:dealt]
+    hand.winnings = PokerEngine.to_seats(
+        [final - start for final, start in zip(state.stacks, (stacks[seat] for seat in order))], order
+    )
+    return hand
+
+
+def generate_hands(
+    count: int,
+    seed: int = 0,
+    min_players: int = 2,
+    max_players: int = 9,
+    **options
+) -> Iterator[PokerHand]:
+    """``count`` reproducible hands with a player count drawn from the range"""
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield generate_hand(rng, rng.randint(min_players, max_players), **options)
+
+
+def hand_request(hand: PokerHand) -> dict:
+    """JSON body for POST /api/v1/hands/ that replays the hand"""
+    body = {
+        "stacks": hand.stacks,
+        "dealer_index": hand.dealer_index,
+        "small_blind_index": hand.small_blind_index,
+        "big_blind_index": hand.big_blind_index,
+        "actions": hand.actions,
+        "hole_cards": hand.hole_cards,
+        "board": hand.board,
+    }
+    if hand.structure is not None:
+        body["structure"] = hand.structure.to_dict()
+    return body
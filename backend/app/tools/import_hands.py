@@ -0,0 +1,85 @@
+"""Import PokerStars or PHH hand history files into the configured database.
+
+Usage: python -m app.tools.import_hands FILE [FILE ...] [--format auto|pokerstars|phh]
+       [--batch-size N] [--workers N] [--max-errors N]
+
+Files are memory-mapped and split into one record per hand as they are
+read, so their size does not matter. Hands are settled with our own engine
+on a pool of worker processes and saved in batches; records that cannot be
+mapped (other games, missed blinds, fractional chips) are counted and
+logged rather than stopping the import.
+"""
+from typing import Any, AsyncIterator, Dict, Iterable, Tuple
+from app.core.config import settings
+from app.core.storage import create_async_hand_repository, ensure_database, get_db_manager, is_embedded
+from app.services.hand_history import FORMATS, iter_file_lines, iter_records
+from app.services.hand_import import HandImporter
+from app.services.settlement_executor import SettlementExecutor
+import argparse
+import asyncio
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+async def _records(records: Iterable[Tuple[str, str]]) -> AsyncIterator[Tuple[str, str]]:
+    for record in records:
+        yield record
+
+
+async def import_files(
+    paths: Iterable[str],
+    format: str,
+    batch_size: int,
+    workers: int,
+    max_errors: int
+) -> Dict[str, Any]:
+    """Import each file in turn and return the combined totals"""
+    ensure_database()
+    repository = create_async_hand_repository()
+    executor = SettlementExecutor(workers, settings.SETTLEMENT_START_METHOD)
+    totals = {"imported": 0, "failed": 0, "elapsed_seconds": 0.0}
+    try:
+        for path in paths:
+            records = iter_records(iter_file_lines(path), None if format == "auto" else format)
+            importer = HandImporter(repository, batch_size=batch_size, max_errors=max_errors, executor=executor)
+            result = await importer.run(_records(records))
+            logger.info(
+                f"{path}: {result['imported']} hands imported, {result['failed']} failed "
+                f"in {result['elapsed_seconds']:.1f}s ({result['hands_per_second']:.0f} hands/s)"
+            )
+            for key in totals:
+                totals[key] += result[key]
+    finally:
+        executor.shutdown()
+        get_db_manager().close_pool()
+        if not is_embedded():
+            from app.core.async_db import async_db_manager
+
+            await async_db_manager.close()
+    return totals
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+", metavar="FILE", help="Hand history files")
+    parser.add_argument("--format", choices=("auto", *FORMATS), default="auto")
+    parser.add_argument("--batch-size", type=int, default=settings.IMPORT_BATCH_SIZE, help="Hands settled and saved at a time")
+    parser.add_argument("--workers", type=int, default=max(1, settings.SETTLEMENT_WORKERS), help="Settlement processes (0 settles in this process)")
+    parser.add_argument("--max-errors", type=int, default=settings.IMPORT_MAX_ERRORS, help="Failed records logged per file")
+    args = parser.parse_args()
+
+    totals = asyncio.run(import_files(args.paths, args.format, args.batch_size, args.workers, args.max_errors))
+    elapsed = totals["elapsed_seconds"]
+    logger.info(
+        f"Import finished: {totals['imported']} hands imported, {totals['failed']} failed, {elapsed:.1f}s "
+        f"({totals['imported'] / elapsed if elapsed else 0:.0f} hands/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
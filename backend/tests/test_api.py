@@ -1,33 +1,38 @@
 import pytest
 from fastapi.testclient import TestClient
 from app.main import create_app
-from app.core.db import db_manager
+from app.core.config import settings
+from app.core.storage import get_db_manager
+import json
 import os
 
 
 @pytest.fixture(scope="module")
-def client():
-    # Use test database
-    os.environ["DB_NAME"] = "poker_test"
-    
-    app = create_app()
-    
-    # Initialize test database
-    db_manager.init_db()
-    
-    with TestClient(app) as test_client:
-        yield test_client
-    
-    # Cleanup test data
-    # with db_manager.get_cursor() as cursor:
-    #     cursor.execute("DELETE FROM hands")
+def client(tmp_path_factory):
+    # Runs against a fresh embedded SQLite file unless STORAGE_BACKEND is set
+    # (STORAGE_BACKEND=postgres uses the configured Postgres database)
+    database_dir = tmp_path_factory.mktemp("storage")
+    with pytest.MonkeyPatch.context() as patch:
+        if "STORAGE_BACKEND" not in os.environ:
+            patch.setattr(settings, "STORAGE_BACKEND", "sqlite")
+        patch.setattr(settings, "SQLITE_PATH", str(database_dir / "poker.sqlite3"))
+        patch.setattr(settings, "DUCKDB_PATH", str(database_dir / "poker.duckdb"))
+        patch.setenv("DB_NAME", "poker_test")
+
+        app = create_app()
+
+        # Initialize test database
+        get_db_manager().init_db()
+
+        with TestClient(app) as test_client:
+            yield test_client
 
 
 def test_health_check(client):
     """Test health check endpoint"""
     response = client.get("/health")
     assert response.status_code == 200
-    assert response.json() == {"status": "healthy"}
+    assert response.json() == {"status": "healthy", "database": "connected"}
 
 
 def test_create_hand(client):
@@ -189,3 +194,361 @@ def test_simulate_multiple_hands(client):
         assert "winnings" in result
         assert len(result["winnings"]) == 6
         assert abs(sum(result["winnings"])) <= 1
+
+
+def test_unavailable_settlement_is_not_saved(client, monkeypatch):
+    """A broken settlement pool answers 503 instead of storing zeroed winnings"""
+    from app.services.settlement_executor import SettlementUnavailableError, settlement_executor
+
+    async def unavailable(hands):
+        raise SettlementUnavailableError("Settlement pool broke again after a restart")
+
+    monkeypatch.setattr(settlement_executor, "settle_hands", unavailable)
+    before = len(client.get("/api/v1/hands/", params={"limit": 1000}).json())
+    hand_data = {
+        "stacks": [1000, 1000],
+        "actions": ["c", "x"],
+        "hole_cards": ["AsKd", "2h3c"],
+        "board": ""
+    }
+
+    response = client.post("/api/v1/hands/", json=hand_data)
+    assert response.status_code == 503
+    batch = client.post("/api/v1/hands/batch", json=[hand_data]).json()
+    assert batch["saved"] == 0 and "unavailable" in batch["results"][0]["error"]
+    assert len(client.get("/api/v1/hands/", params={"limit": 1000}).json()) == before
+
+
+def test_create_hands_batch(client):
+    """Test creating several hands in one batch request"""
+    hand_data = {
+        "stacks": [1000, 1000, 1000, 1000, 1000, 1000],
+        "dealer_index": 0,
+        "small_blind_index": 1,
+        "big_blind_index": 2,
+        "actions": ["c", "c", "f", "f", "f", "f"],
+        "hole_cards": ["AsKd", "2h3c", "", "", "", ""],
+        "board": "Ah2s3d4c5h"
+    }
+
+    response = client.post("/api/v1/hands/batch", json=[hand_data, {"stacks": "bad"}, hand_data])
+    assert response.status_code == 200, response.text
+
+    result = response.json()
+    assert result["saved"] == 2
+    assert result["failed"] == 1
+    assert [item["index"] for item in result["results"]] == [0, 1, 2]
+    assert result["results"][1]["error"]
+    for item in (result["results"][0], result["results"][2]):
+        assert item["id"]
+        assert len(item["winnings"]) == 6
+        # Settled under the default structure, reported with the result
+        assert item["structure"] == {"small_blind": 20, "big_blind": 40, "ante": 0, "straddles": [], "min_bet": 0}
+    assert result["results"][1]["structure"] is None
+
+
+def test_unknown_hand_at_showdown_is_not_settled(client):
+    """Stand-in cards fill in for folded players but never decide a showdown"""
+    hand_data = {
+        "stacks": [1000, 1000],
+        "hole_cards": ["AsKd", ""],
+        "actions": ["c", "x", "7h8h9c", "x", "x", "7h8h9cJd", "x", "x", "7h8h9cJdQs", "x", "x"]
+    }
+
+    response = client.post("/api/v1/hands/", json=hand_data)
+    assert response.status_code == 200, response.text
+    assert response.json()["winnings"] == [0, 0]
+    response = client.post("/api/v1/hands/batch", json=[hand_data])
+    assert response.status_code == 200, response.text
+    assert response.json()["results"][0]["winnings"] == [0, 0]
+
+    # The same hand settles when the unknown hand folds
+    response = client.post("/api/v1/hands/", json={**hand_data, "actions": ["c", "x", "7h8h9c", "b80", "f"]})
+    assert response.status_code == 200, response.text
+    assert response.json()["winnings"] == [40, -40]
+
+
+def test_create_hands_batch_ndjson(client):
+    """Test streaming a batch of hands as NDJSON"""
+    hand_data = {
+        "stacks": [1000] * 6,
+        "actions": ["f", "f", "f", "f", "f", "f"],
+        "hole_cards": ["", "", "", "", "", ""],
+        "board": ""
+    }
+    body = "\n".join([json.dumps(hand_data)] * 3)
+
+    response = client.post(
+        "/api/v1/hands/batch",
+        content=body,
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["saved"] == 3
+
+
+def test_create_hands_batch_stops_at_the_limit(client, monkeypatch):
+    """Hands past BATCH_MAX_HANDS are reported once and not read"""
+    monkeypatch.setattr(settings, "BATCH_MAX_HANDS", 2)
+    hand_data = {"stacks": [1000, 1000], "actions": ["c", "x"], "hole_cards": ["", ""], "board": ""}
+    body = "\n".join([json.dumps(hand_data)] * 2 + ["not json"] * 50)
+
+    response = client.post(
+        "/api/v1/hands/batch",
+        content=body,
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert (result["saved"], result["failed"]) == (2, 1)
+    assert result["results"][2]["index"] == 2
+    assert "maximum of 2 hands" in result["results"][2]["error"]
+
+
+def test_import_hand_histories(client):
+    """Test importing a PokerStars hand history file"""
+    hand = (
+        "PokerStars Hand #1:  Hold'em No Limit (10/20) - 2021/09/01 12:00:00 ET\n"
+        "Table 'T 1' 9-max Seat #1 is the button\n"
+        "Seat 1: Alice (1500 in chips)\nSeat 2: Bob (1500 in chips)\nSeat 3: Carol (1500 in chips)\n"
+        "Bob: posts small blind 10\nCarol: posts big blind 20\n*** HOLE CARDS ***\n"
+        "Alice: raises 40 to 60\nBob: folds\nCarol: folds\n*** SUMMARY ***\n\n"
+    )
+    body = hand * 2 + hand.replace("Hold'em No Limit", "Hold'em Limit")
+
+    response = client.post("/api/v1/hands/import", content=body.encode("utf-8"))
+    assert response.status_code == 200, response.text
+
+    result = response.json()
+    assert result["imported"] == 2
+    assert result["failed"] == 1
+    assert result["errors"][0]["index"] == 2
+    assert "no-limit hold'em" in result["errors"][0]["error"]
+
+    response = client.post("/api/v1/hands/import?format=phh", content=body.encode("utf-8"))
+    assert response.status_code == 200
+    assert response.json()["imported"] == 0
+
+    response = client.post("/api/v1/hands/import", content=b"not a hand history")
+    assert response.status_code == 400
+
+
+def test_get_hands_pagination(client):
+    """Test walking the hand listing with keyset cursors"""
+    hand_data = {
+        "stacks": [1000] * 6,
+        "actions": ["f", "f", "f", "f", "f", "f"],
+        "hole_cards": ["", "", "", "", "", ""],
+        "board": ""
+    }
+    for _ in range(3):
+        assert client.post("/api/v1/hands/", json=hand_data).status_code == 200
+
+    first = client.get("/api/v1/hands/", params={"limit": 2})
+    assert first.status_code == 200
+    assert len(first.json()) == 2
+    cursor = first.headers.get("X-Next-Cursor")
+    assert cursor
+
+    second = client.get("/api/v1/hands/", params={"limit": 2, "cursor": cursor})
+    assert second.status_code == 200
+    first_ids = {hand["id"] for hand in first.json()}
+    assert first_ids.isdisjoint(hand["id"] for hand in second.json())
+
+
+def test_get_hands_invalid_cursor(client):
+    """Test that a malformed cursor is rejected"""
+    response = client.get("/api/v1/hands/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+def test_export_hands_ndjson(client):
+    """Test streaming the hand history as NDJSON"""
+    hand_data = {
+        "stacks": [1000] * 6,
+        "actions": ["f", "f", "f", "f", "f", "f"],
+        "hole_cards": ["", "", "", "", "", ""],
+        "board": ""
+    }
+    hand_id = client.post("/api/v1/hands/", json=hand_data).json()["id"]
+
+    response = client.get("/api/v1/hands/export", params={"format": "ndjson"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    exported = [json.loads(line) for line in response.text.splitlines() if line]
+    assert hand_id in {hand["id"] for hand in exported}
+
+
+def test_export_hands_csv(client):
+    """Test streaming the hand history as CSV"""
+    response = client.get("/api/v1/hands/export", params={"format": "csv"})
+    assert response.status_code == 200
+    assert response.text.splitlines()[0].startswith("id,stacks,")
+
+
+def test_export_hands_phh(client):
+    """Test streaming the hand history as PHH with winnings verification"""
+    hand_data = {
+        "stacks": [1000] * 3,
+        "actions": ["c", "c", "x", "Ah2s3d", "x", "x", "x", "Ah2s3d4c", "x", "x", "x", "Ah2s3d4c5h", "x", "x", "x"],
+        "hole_cards": ["AsKd", "2h3c", "QhQd"],
+        "board": "Ah2s3d4c5h"
+    }
+    hand_id = client.post("/api/v1/hands/", json=hand_data).json()["id"]
+
+    response = client.get("/api/v1/hands/export/phh", params={"format": "ndjson", "verify": "true"})
+    assert response.status_code == 200, response.text
+
+    exported = {row["id"]: row for row in map(json.loads, response.text.splitlines())}
+    assert exported[hand_id]["mismatch"] is False
+    assert exported[hand_id]["phh"].startswith('variant = "NT"')
+    assert "d db 5h" in exported[hand_id]["phh"]
+
+    response = client.get("/api/v1/hands/export/phh")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/gzip"
+
+
+def test_settlement_stats(client):
+    """Settled hands are counted by the settlement pool"""
+    before = client.get("/api/v1/settlement/stats").json()
+
+    hand_data = {
+        "stacks": [1000, 1000],
+        "dealer_index": 0,
+        "small_blind_index": 1,
+        "big_blind_index": 0,
+        "actions": ["r200", "f"],
+        "hole_cards": ["AsKd", "2h3c"],
+        "board": ""
+    }
+    response = client.post("/api/v1/hands/", json=hand_data)
+    assert response.status_code == 200
+
+    after = client.get("/api/v1/settlement/stats").json()
+    assert after["hands_settled"] == before["hands_settled"] + 1
+    assert after["queue_depth"] == 0
+
+
+def test_live_hand(client):
+    """A live hand takes actions incrementally and is saved when it finishes"""
+    response = client.post("/api/v1/hands/live", json={
+        "stacks": [1000, 1000],
+        "hole_cards": ["AsAd", "KsKd"],
+        "actions": ["c"]
+    })
+    assert response.status_code == 200
+    live = response.json()
+    assert live["finished"] is False
+    hand_id = live["id"]
+
+    response = client.post(f"/api/v1/hands/live/{hand_id}/actions", json={"actions": ["f"]})
+    assert response.status_code == 400
+
+    response = client.post(f"/api/v1/hands/live/{hand_id}/actions", json={"actions": ["r200", "f"]})
+    assert response.status_code == 200
+    assert response.json()["finished"] is True
+
+    saved = client.get(f"/api/v1/hands/{hand_id}").json()
+    assert saved["actions"] == ["c", "r200", "f"]
+    assert saved["winnings"] == response.json()["winnings"]
+    assert client.get(f"/api/v1/hands/live/{hand_id}").status_code == 404
+
+
+def test_player_stats(client):
+    """Saving a hand updates the seat's running stats"""
+    before = client.get("/api/v1/players/4/stats").json()
+    # Seat 0 posts the small blind, so seat 2 acts first and seat 4 opens
+    response = client.post("/api/v1/hands/", json={
+        "stacks": [1000] * 6,
+        "dealer_index": 5,
+        "actions": ["f", "f", "r100", "r300", "f", "f", "c", "Ah7d2c", "b200", "c",
+                    "Ah7d2cKs", "x", "x", "Ah7d2cKs9h", "b400", "c"],
+        "hole_cards": ["AsKd", "QhQc", "JcJd", "2s3s", "9c9d", "TcTd"],
+        "board": "Ah7d2cKs9h"
+    })
+    assert response.status_code == 200
+
+    after = client.get("/api/v1/players/4/stats").json()
+    assert after["hands"] == before["hands"] + 1
+    assert after["counts"]["pfr"] == before["counts"]["pfr"] + 1
+    assert after["counts"]["showdowns_won"] == before["counts"]["showdowns_won"] + 1
+    assert after["net_winnings"] == before["net_winnings"] + response.json()["winnings"][4]
+    assert client.get("/api/v1/players/-1/stats").status_code == 422
+
+
+def test_calculate_equity(client):
+    """Equity endpoint returns win/tie percentages per player"""
+    response = client.post("/api/v1/equity/", json={
+        "hole_cards": ["AsAd", "KsKd"],
+        "board": "2c7h9d"
+    })
+    assert response.status_code == 200
+    data = response.json()
+    assert data["method"] == "exhaustive"
+    assert len(data["players"]) == 2
+    assert data["players"][0]["win"] > data["players"][1]["win"]
+
+    response = client.post("/api/v1/equity/", json={"hole_cards": ["AsAd", "AsKd"]})
+    assert response.status_code == 400
+
+
+def test_calculate_range_equity(client):
+    """Range vs range equity is computed once per board and then served from the cache"""
+    request = {"hero_range": "QQ+,AKs", "villain_range": "22+,A2s+", "board": "2c7h9dTs"}
+    response = client.post("/api/v1/equity/ranges", json=request)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["method"] == "exhaustive"
+    assert data["hero_combos"] == 22
+    assert data["hero"]["equity"] + data["villain"]["equity"] == pytest.approx(100)
+
+    assert client.post("/api/v1/equity/ranges", json=request).json()["cached"] is True
+
+    response = client.post("/api/v1/equity/ranges", json={"hero_range": "QQ+,AX", "villain_range": "22+"})
+    assert response.status_code == 400
+
+
+def test_get_hands_by_hole_cards(client):
+    """Hands can be filtered by the hole cards one player held"""
+    hand_data = {
+        "stacks": [1000, 1000],
+        "dealer_index": 0,
+        "small_blind_index": 1,
+        "big_blind_index": 0,
+        "actions": ["r200", "f"],
+        "hole_cards": ["7h2d", "9c8c"],
+        "board": ""
+    }
+    created = client.post("/api/v1/hands/", json=hand_data).json()
+
+    response = client.get("/api/v1/hands/", params={"cards": "2d7h"})
+    assert response.status_code == 200
+    assert created["id"] in [hand["id"] for hand in response.json()]
+
+    response = client.get("/api/v1/hands/", params={"cards": "9c", "seat": 1})
+    assert created["id"] in [hand["id"] for hand in response.json()]
+
+    response = client.get("/api/v1/hands/", params={"cards": "7h9c"})
+    assert created["id"] not in [hand["id"] for hand in response.json()]
+
+
+def test_metrics(client):
+    """Stage histograms are exported after a hand is created"""
+    hand_data = {
+        "stacks": [1000, 1000],
+        "dealer_index": 0,
+        "small_blind_index": 1,
+        "big_blind_index": 0,
+        "actions": ["r200", "f"],
+        "hole_cards": ["AsKd", "2h3c"],
+        "board": ""
+    }
+    assert client.post("/api/v1/hands/", json=hand_data).status_code == 200
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    for stage in ("validation", "settlement", "pool_wait", "query", "serialization"):
+        assert f'poker_stage_duration_seconds_count{{stage="{stage}"}}' in response.text
+    assert 'poker_db_pool_connections{pool="async",state="idle"}' in response.text
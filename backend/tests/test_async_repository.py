@@ -0,0 +1,89 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+
+from app.core.async_db import AsyncDatabaseManager
+from app.models.hand import PokerHand
+from app.repositories.async_hand_repository import AsyncHandRepository
+from app.repositories.hand_repository import encode_cursor
+
+
+class RecordingConnection:
+    """Stands in for an asyncpg connection and keeps the parameters of each query"""
+
+    def __init__(self):
+        self.params = []
+        self.queries = []
+
+    async def fetch(self, query, *params):
+        self.params.append(params)
+        self.queries.append(query)
+        return []
+
+    async def fetchrow(self, query, *params):
+        self.queries.append(query)
+        return None
+
+    async def execute(self, query, *params):
+        self.queries.append(query)
+
+    async def executemany(self, query, rows):
+        self.queries.append(query)
+
+    async def cursor(self, query, *params):
+        self.params.append(params)
+        return self
+
+    def transaction(self):
+        return self._block()
+
+    @asynccontextmanager
+    async def _block(self):
+        yield
+
+
+class RecordingDatabaseManager(AsyncDatabaseManager):
+    def __init__(self):
+        super().__init__("localhost", 5432, "poker", "", "poker")
+        self.connection = RecordingConnection()
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self.connection
+
+
+def test_aware_timestamps_are_sent_as_naive_utc():
+    """asyncpg cannot encode aware values for the TIMESTAMP column"""
+    manager = RecordingDatabaseManager()
+    repository = AsyncHandRepository(manager)
+    after = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+    before = datetime(2024, 5, 2, 14, 0, tzinfo=timezone(timedelta(hours=2)))
+    cursor = encode_cursor(datetime(2024, 5, 1, 18, 0, tzinfo=timezone.utc), "hand-1")
+
+    async def run():
+        await repository.get_page(10, cursor=cursor, created_after=after, created_before=before)
+        async for _ in repository.iter_batches(10, created_after=after, created_before=before):
+            pass
+
+    asyncio.run(run())
+    page_params, batch_params = manager.connection.params[:2]
+    assert page_params[:4] == (datetime(2024, 5, 1, 18, 0), "hand-1", datetime(2024, 5, 1, 12, 0), datetime(2024, 5, 2, 12, 0))
+    assert batch_params == (datetime(2024, 5, 1, 12, 0), datetime(2024, 5, 2, 12, 0))
+
+
+def test_player_stats_are_added_last_to_a_shard():
+    """Concurrent saves add to their own shard and hold its lock only until the commit"""
+    manager = RecordingDatabaseManager()
+    repository = AsyncHandRepository(manager)
+    hand = PokerHand(stacks=[1000, 1000], hole_cards=["AsKd", "2h3c"], actions=["c", "x"], winnings=[0, 0])
+    hand.player_stats = [(0,) * 8, (0,) * 8]
+
+    async def run():
+        await repository._write_normalized(manager.connection, [hand])
+        await repository.get_player_stats(0)
+
+    asyncio.run(run())
+    upsert, read = manager.connection.queries[-2:]
+    assert "INSERT INTO player_stats" in upsert
+    assert "mod(pg_backend_pid()" in upsert and "ON CONFLICT (seat, shard)" in upsert
+    assert "SUM(hands) AS hands" in read and "GROUP BY seat" in read
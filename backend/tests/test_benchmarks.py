@@ -0,0 +1,66 @@
+import warnings
+from app.services.poker_engine import PokerEngine
+from app.tools import benchmark
+from app.tools.hand_generator import generate_hands, hand_request
+
+
+def test_generated_hands_settle_to_their_winnings():
+    hands = list(generate_hands(300, seed=7))
+
+    assert {len(hand.stacks) for hand in hands} == set(range(2, 10))
+    for hand in hands:
+        assert sum(hand.winnings) == 0
+        assert PokerEngine.settle(hand)[1] == hand.winnings
+
+
+def test_generated_hands_match_pokerkit(monkeypatch):
+    monkeypatch.setattr(benchmark.settings, "SETTLEMENT_ENGINE", "pokerkit")
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for hand in generate_hands(40, seed=3):
+            assert PokerEngine.settle(hand)[1] == hand.winnings
+
+
+def test_generator_is_deterministic_by_seed():
+    first = [hand_request(hand) for hand in generate_hands(20, seed=1, min_players=9)]
+    again = [hand_request(hand) for hand in generate_hands(20, seed=1, min_players=9)]
+    other = [hand_request(hand) for hand in generate_hands(20, seed=2, min_players=9)]
+
+    assert first == again
+    assert first != other
+    assert all(len(body["stacks"]) == 9 for body in first)
+
+
+def test_micro_benchmarks_report_rates():
+    results = benchmark.bench_engine(hands=5, repeat=1, seed=0) + benchmark.bench_codec(hands=5, repeat=1, seed=0)
+
+    names = {result["name"] for result in results}
+    assert names == {"engine.settle", "engine.player_stats", "engine.settle_by_aggression",
+                     "codec.encode", "codec.decode"}
+    assert all(result["per_second"] > 0 for result in results)
+
+
+def test_regressions_compare_matching_results():
+    baseline = {"results": [
+        {"name": "codec.encode", "params": {}, "unit": "hands", "per_second": 1000.0},
+        {"name": "engine.settle", "params": {"players": 2}, "unit": "hands", "per_second": 1000.0},
+    ]}
+    current = {"results": [
+        {"name": "codec.encode", "params": {}, "unit": "hands", "per_second": 950.0},
+        {"name": "engine.settle", "params": {"players": 2}, "unit": "hands", "per_second": 700.0},
+        {"name": "engine.settle", "params": {"players": 3}, "unit": "hands", "per_second": 10.0},
+    ]}
+
+    slower = benchmark.regressions(current, baseline, tolerance=0.1)
+    assert len(slower) == 1
+    assert slower[0].startswith("engine.settle {'players': 2}")
+
+
+def test_over_budget_only_flags_slow_startups():
+    document = {"results": [
+        {"name": "startup.import", "seconds": 2.0},
+        {"name": "startup.ready", "seconds": 0.4},
+    ]}
+
+    assert benchmark.over_budget(document, 1000) == []
+    assert benchmark.over_budget(document, 300) == ["startup.ready: 400ms (budget 300ms)"]
@@ -0,0 +1,187 @@
+import asyncio
+import threading
+import pytest
+from app.core.embedded_db import DuckDBDatabaseManager, SQLiteDatabaseManager
+from app.models.game import GameStructure
+from app.models.hand import PokerHand
+from app.repositories.embedded_hand_repository import AsyncEmbeddedHandRepository, EmbeddedHandRepository
+from app.services.poker_engine import PokerEngine
+
+
+@pytest.fixture(params=["sqlite", "duckdb"])
+def repository(request, tmp_path):
+    if request.param == "sqlite":
+        db_manager = SQLiteDatabaseManager(str(tmp_path / "poker.sqlite3"))
+    else:
+        pytest.importorskip("duckdb")
+        db_manager = DuckDBDatabaseManager(str(tmp_path / "poker.duckdb"))
+    db_manager.init_db()
+    yield EmbeddedHandRepository(db_manager)
+    db_manager.close_pool()
+
+
+def settled_hand(**fields) -> PokerHand:
+    hand = PokerHand(**fields)
+    _, hand.winnings = PokerEngine.settle(hand)
+    return hand
+
+
+def showdown_hand() -> PokerHand:
+    return settled_hand(
+        stacks=[1000, 1000, 1000],
+        dealer_index=0,
+        small_blind_index=1,
+        big_blind_index=2,
+        actions=["c", "c", "x", "AhKc2d", "x", "x", "x", "AhKc2d7s", "x", "x", "x",
+                 "AhKc2d7s9h", "x", "x", "x"],
+        hole_cards=["AsKd", "QhQc", "7h7c"],
+        board="AhKc2d7s9h",
+        structure=GameStructure(small_blind=20, big_blind=40)
+    )
+
+
+def folded_hand() -> PokerHand:
+    return settled_hand(
+        stacks=[1000, 1000],
+        dealer_index=0,
+        small_blind_index=0,
+        big_blind_index=1,
+        actions=["f"],
+        hole_cards=["2c3d", "AsAd"],
+        structure=GameStructure(small_blind=10, big_blind=20)
+    )
+
+
+def test_save_and_get_by_id(repository):
+    hand = repository.save(showdown_hand())
+    assert hand.created_at is not None
+
+    loaded = repository.get_by_id(hand.id)
+    assert loaded.to_dict() == hand.to_dict()
+    assert repository.get_by_id("missing") is None
+
+
+def test_save_again_keeps_created_at_and_counts_once(repository):
+    hand = repository.save(showdown_hand())
+    created_at = hand.created_at
+    hand.winnings = list(hand.winnings)
+    repository.save_many([hand])
+
+    assert hand.created_at == created_at
+    assert repository.get_player_stats(2)["hands"] == 1
+    assert repository.get_player_stats(2)["net_winnings"] == hand.winnings[2]
+    assert repository.get_player_stats(7) is None
+
+
+def test_get_page_walks_newest_first_with_filters(repository):
+    showdown = showdown_hand()
+    repository.save(showdown)
+    folded = [folded_hand() for _ in range(3)]
+    repository.save_many(folded)
+
+    seen = []
+    cursor = None
+    while True:
+        page, cursor = repository.get_page(limit=2, cursor=cursor)
+        seen.extend(hand.id for hand in page)
+        if cursor is None:
+            break
+    assert seen[-1] == showdown.id
+    assert sorted(seen[:3]) == sorted(hand.id for hand in folded)
+
+    winner = max(range(3), key=lambda seat: showdown.winnings[seat])
+    page, _ = repository.get_page(limit=10, seat=winner, min_winnings=1)
+    assert [hand.id for hand in page] == [showdown.id]
+    page, _ = repository.get_page(limit=10, cards="KdAs")
+    assert [hand.id for hand in page] == [showdown.id]
+    page, _ = repository.get_page(limit=10, cards="AsQh")
+    assert page == []
+    page, _ = repository.get_page(limit=10, created_after=showdown.created_at)
+    assert len(page) == 4
+
+
+def test_iter_batches_streams_oldest_first(repository):
+    hands = repository.save_many([folded_hand() for _ in range(5)])
+    batches = list(repository.iter_batches(batch_size=2))
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert sorted(hand.id for batch in batches for hand in batch) == sorted(hand.id for hand in hands)
+
+
+def test_update_winnings_and_checkpoint(repository):
+    hand = repository.save(folded_hand())
+    hand.winnings = [0, 0]
+    repository.update_winnings([hand], "job", hand.id, {"processed": 1})
+
+    assert repository.get_by_id(hand.id).winnings == [0, 0]
+    assert repository.get_checkpoint("job") == {"last_id": hand.id, "state": {"processed": 1}}
+    assert repository.get_player_stats(1)["net_winnings"] == 0
+    repository.delete_checkpoint("job")
+    assert repository.get_checkpoint("job") is None
+
+
+def test_resettle_drops_corrected_hands_from_the_cache(repository, monkeypatch):
+    from app.migrations import resettle_hands
+
+    monkeypatch.setattr(resettle_hands.settings, "SETTLEMENT_START_METHOD", "fork")
+    correct = repository.save(showdown_hand())
+    wrong = folded_hand()
+    wrong.winnings = [0, 0]
+    repository.save(wrong)
+    invalidated = []
+
+    totals = resettle_hands.resettle(repository, batch_size=10, workers=1, engine="fast", invalidate=invalidated.extend)
+
+    assert (totals["processed"], totals["corrected"]) == (2, 1)
+    assert invalidated == [wrong.id]
+    assert repository.get_by_id(wrong.id).winnings == folded_hand().winnings
+    assert repository.get_by_id(correct.id).winnings == correct.winnings
+
+
+def test_rebuild_player_stats_matches_incremental_totals(repository):
+    repository.save(showdown_hand())
+    repository.save_many([folded_hand() for _ in range(2)])
+    before = {seat: repository.get_player_stats(seat) for seat in range(3)}
+
+    assert repository.rebuild_player_stats(batch_size=2) == 3
+    for seat in range(3):
+        after = repository.get_player_stats(seat)
+        assert {k: v for k, v in after.items() if k != "updated_at"} == \
+            {k: v for k, v in before[seat].items() if k != "updated_at"}
+
+
+def test_saves_from_several_threads(repository):
+    errors = []
+
+    def save_some():
+        try:
+            for _ in range(5):
+                repository.save(folded_hand())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=save_some) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(repository.get_all()) == 20
+    assert repository.get_player_stats(0)["hands"] == 20
+
+
+def test_async_adapter(repository):
+    async_repository = AsyncEmbeddedHandRepository(repository)
+
+    async def run():
+        hand = await async_repository.save(folded_hand())
+        loaded = await async_repository.get_by_id(hand.id)
+        page, _ = await async_repository.get_page(10, seat=1)
+        batches = [batch async for batch in async_repository.iter_batches(10)]
+        return hand, loaded, page, batches
+
+    hand, loaded, page, batches = asyncio.run(run())
+    assert loaded.id == hand.id
+    assert [h.id for h in page] == [hand.id]
+    assert [[h.id for h in batch] for batch in batches] == [[hand.id]]
@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from app.services.equity import EquityCalculator, RangeEquityCalculator, evaluate_array
+from app.services.hand_range import parse_range
+from app.services.hand_evaluator import evaluate
+
+
+def test_evaluate_array_matches_evaluate():
+    """The vectorized evaluator agrees with the scalar lookup"""
+    rng = np.random.default_rng(3)
+    cards = np.array([rng.choice(52, 7, replace=False) for _ in range(2000)])
+    assert evaluate_array(cards).tolist() == [evaluate(row.tolist()) for row in cards]
+
+
+def test_exhaustive_equity_on_the_flop():
+    """Few remaining cards are enumerated exactly"""
+    result = EquityCalculator().calculate(["AsAd", "KsKd"], "2c7h9d")
+    assert result.method == "exhaustive"
+    assert result.samples == 990
+    assert result.win[0] == pytest.approx(91.62, abs=0.01)
+    assert sum(result.equity) == pytest.approx(100)
+
+
+def test_board_split_is_a_tie():
+    result = EquityCalculator().calculate(["AsKs", "AdKd"], "2c3c4h5h6d")
+    assert result.tie == [100.0, 100.0]
+    assert result.equity == [50.0, 50.0]
+
+
+def test_monte_carlo_equity_preflop():
+    """Pre-flop runouts are sampled within the iteration budget"""
+    result = EquityCalculator().calculate(["AsAd", "KsKd"], iterations=50000, seed=1)
+    assert result.method == "monte_carlo"
+    assert result.samples == 50000
+    assert result.equity[0] == pytest.approx(82.4, abs=1.0)
+
+
+def test_time_budget_stops_sampling():
+    result = EquityCalculator().calculate(["AsAd", "KsKd", "QsQd"], iterations=10 ** 7, time_budget_ms=1, seed=1)
+    assert result.samples < 10 ** 7
+
+
+@pytest.mark.parametrize("hole_cards,board", [
+    (["AsAd"], ""),
+    (["AsAd", "AsKd"], ""),
+    (["AsAd", "KsKd"], "AsQh2c"),
+    (["AsAd", "Ks"], ""),
+    (["AsAd", "KsKd"], "2c3c4c5c6c7c"),
+])
+def test_invalid_equity_input(hole_cards, board):
+    with pytest.raises(ValueError):
+        EquityCalculator().calculate(hole_cards, board)
+
+
+def test_parse_range():
+    assert len(parse_range("QQ+,AKs")) == 22
+    assert len(parse_range("22+,A2s+")) == 78 + 48
+    assert len(parse_range("KQo-KTo")) == 36
+    assert parse_range("AsKd") == parse_range("KdAs")
+    # Overlapping parts are only counted once
+    assert parse_range("AA,AA,AsAd") == parse_range("AA")
+    with pytest.raises(ValueError, match="AX"):
+        parse_range("QQ+,AX")
+
+
+def test_single_combo_ranges_match_hand_equity():
+    """A range of one combo each gives the same numbers as hand vs hand"""
+    expected = EquityCalculator().calculate(["AsAd", "KsKd"], "2c7h9d")
+    result = RangeEquityCalculator().calculate("AsAd", "KsKd", "2c7h9d")
+    assert result.method == "exhaustive"
+    assert result.equity == pytest.approx(expected.equity)
+
+
+def test_range_equity_removes_blocked_combos():
+    result = RangeEquityCalculator().calculate("AA", "KK", "AsKs7d2c3h")
+    assert result.combos == [3, 3]
+    assert result.matchups == 9
+    assert result.equity == [100.0, 0.0]
+
+
+def test_range_equity_is_cached_per_combo_set():
+    calculator = RangeEquityCalculator()
+    first = calculator.calculate("QQ+", "AKs", "2c7h9dTs")
+    second = calculator.calculate("AA,KK,QQ", "AsKs,AdKd,AcKc,AhKh", "Ts9d7h2c")
+    assert not first.cached
+    assert second.cached
+    assert second.equity == first.equity
+
+
+def test_seeded_range_equity_reproduces_its_sample():
+    calculator = RangeEquityCalculator(exhaustive_limit=0)
+    calculator.calculate("QQ+", "AKs", iterations=2000, seed=1)
+    first = calculator.calculate("QQ+", "AKs", iterations=500, seed=2)
+    again = RangeEquityCalculator(exhaustive_limit=0).calculate("QQ+", "AKs", iterations=500, seed=2)
+    assert not first.cached
+    assert first.equity == again.equity
+    assert calculator.calculate("QQ+", "AKs", iterations=500).cached
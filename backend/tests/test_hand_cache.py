@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from app.models.hand import PokerHand
+from app.services.hand_cache import CacheBackend, CachedHandRepository, HandCache, MemoryCacheBackend
+
+
+class FakeRepository:
+    def __init__(self):
+        self.hands = {}
+        self.reads = 0
+
+    async def get_by_id(self, hand_id):
+        self.reads += 1
+        return self.hands.get(hand_id)
+
+    async def save(self, hand):
+        self.hands[hand.id] = hand
+        return hand
+
+
+def test_read_through_and_invalidation():
+    """Repeated reads are served from the cache until the hand is saved again"""
+    async def scenario():
+        repository = FakeRepository()
+        cache = HandCache(MemoryCacheBackend(max_size=10, ttl_seconds=60))
+        cached = CachedHandRepository(repository, cache)
+
+        hand = await cached.save(PokerHand(stacks=[1000, 1000], winnings=[0, 0]))
+        for _ in range(3):
+            assert (await cached.get_by_id(hand.id)).id == hand.id
+        assert repository.reads == 1
+
+        await cached.save(PokerHand(id=hand.id, stacks=[500, 500], winnings=[0, 0]))
+        assert (await cached.get_by_id(hand.id)).stacks == [500, 500]
+        assert repository.reads == 2
+
+        # Missing hands are not cached
+        assert await cached.get_by_id("missing") is None
+        assert await cached.get_by_id("missing") is None
+        assert repository.reads == 4
+
+        stats = cache.stats()
+        assert stats["hits"] == 2
+        assert stats["misses"] == 4
+        assert stats["hit_ratio"] == 2 / 6
+
+    asyncio.run(scenario())
+
+
+def test_memory_backend_evicts_least_recently_used():
+    async def scenario():
+        backend = MemoryCacheBackend(max_size=2, ttl_seconds=60)
+        first, second, third = (PokerHand() for _ in range(3))
+        await backend.set(first.id, first)
+        await backend.set(second.id, second)
+        await backend.get(first.id)
+        await backend.set(third.id, third)
+
+        assert await backend.get(second.id) is None
+        assert (await backend.get(first.id)).id == first.id
+        assert backend.stats()["evictions"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_memory_backend_expires_entries():
+    async def scenario():
+        backend = MemoryCacheBackend(max_size=2, ttl_seconds=-1)
+        hand = PokerHand()
+        await backend.set(hand.id, hand)
+        assert await backend.get(hand.id) is None
+        assert backend.stats()["expirations"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_incomplete_backend_cannot_be_created():
+    class GetOnlyBackend(CacheBackend):
+        async def get(self, key):
+            return None
+
+    with pytest.raises(TypeError, match="abstract"):
+        GetOnlyBackend()
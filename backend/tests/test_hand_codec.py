@@ -0,0 +1,86 @@
+from datetime import datetime
+import json
+
+import pytest
+
+from app.models.game import GameStructure
+from app.models.hand import PokerHand
+from app.services.hand_codec import _HEADER, CompactHand, HandCodecError, decode_hand, encode_hand
+
+
+def sample_hand() -> PokerHand:
+    return PokerHand(
+        stacks=[1000, 2500, 800, 1000, 1000, 1000],
+        dealer_index=0,
+        small_blind_index=1,
+        big_blind_index=2,
+        actions=["f", "f", "f", "r60", "c", "x", "Ah7d2c", "b120", "r400", "c", "Ks", "x", "x", "9h", "allin", "c"],
+        hole_cards=["AsKd", "QhQc", "", "2s3s", "9c9d", "TcJc"],
+        board="Ah7d2cKs9h",
+        winnings=[-1000, 1040, 0, 0, 0, -40],
+        created_at=datetime(2024, 5, 1, 12, 30)
+    )
+
+
+def test_round_trip_is_lossless():
+    hand = sample_hand()
+    assert decode_hand(encode_hand(hand), hand.id, hand.created_at) == hand
+
+
+def test_unusual_tokens_round_trip():
+    """Anything that is not a well-formed card run or action is kept as raw text"""
+    hand = PokerHand(
+        stacks=[0, 2 ** 31 - 1],
+        actions=["b007", "r", "AhAh", "check", "", "bé", "r-5", "b" + "9" * 30],
+        hole_cards=["??", "AsKdQh", "as kd"],
+        board="Ah7",
+        winnings=[-(2 ** 31), 5]
+    )
+    assert decode_hand(encode_hand(hand), hand.id) == hand
+
+
+def test_hand_without_cards_round_trips():
+    hand = PokerHand(stacks=[1000] * 3, actions=["f", "f"], hole_cards=["", "", ""], board="", winnings=[0, -20, 20])
+    assert decode_hand(encode_hand(hand), hand.id) == hand
+
+
+def test_structure_round_trip():
+    hand = sample_hand()
+    hand.structure = GameStructure(small_blind=50, big_blind=100, ante=10, straddles=(200, 400), min_bet=100)
+    assert decode_hand(encode_hand(hand), hand.id, hand.created_at) == hand
+
+
+def test_version_1_data_decodes_without_structure():
+    hand = sample_hand()
+    data = encode_hand(hand)
+    # Version 1 had no structure field (a single 0 byte when there is none)
+    structure_offset = _HEADER.size + 4 * (len(hand.stacks) + len(hand.winnings))
+    assert data[structure_offset] == 0
+    legacy = bytes([1]) + data[1:structure_offset] + data[structure_offset + 1:]
+    assert decode_hand(legacy, hand.id, hand.created_at) == hand
+
+
+def test_encoding_is_smaller_than_json():
+    hand = sample_hand()
+    assert len(encode_hand(hand)) * 3 < len(json.dumps(hand.to_dict()))
+
+
+def test_out_of_range_amounts_are_rejected():
+    with pytest.raises(HandCodecError):
+        encode_hand(PokerHand(stacks=[2 ** 31]))
+
+
+def test_corrupt_data_is_rejected():
+    data = encode_hand(sample_hand())
+    with pytest.raises(HandCodecError):
+        decode_hand(data[:-4])
+    with pytest.raises(HandCodecError):
+        decode_hand(bytes([99]) + data[1:])
+    with pytest.raises(HandCodecError):
+        decode_hand(b"")
+
+
+def test_compact_hand_bytes_round_trip():
+    hand = sample_hand()
+    compact = CompactHand.from_bytes(hand.id, CompactHand.from_hand(hand).to_bytes())
+    assert compact.to_hand() == hand
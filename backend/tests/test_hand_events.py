@@ -0,0 +1,72 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.api.v1.endpoints import events
+from app.services.hand_events import HandEventBroker, hand_events, parse_channels
+
+
+def test_parse_channels():
+    assert parse_channels("hands, table:7,hands", 4) == ["hands", "table:7"]
+    with pytest.raises(ValueError, match="Unknown channel"):
+        parse_channels("table:", 4)
+    with pytest.raises(ValueError, match="At most"):
+        parse_channels("table:1,table:2,table:3", 2)
+
+
+def test_publish_reaches_only_channel_subscribers():
+    async def run():
+        broker = HandEventBroker(max_queue=8)
+        hands = broker.subscribe(["hands"])
+        table = broker.subscribe(["table:7"])
+        assert broker.publish("hands", "hands_saved", '[{"id":"a"}]') == 1
+        assert broker.publish("table:8", "live_hand", "{}") == 0
+
+        message = json.loads(await hands.next_message())
+        assert message == {"type": "hands_saved", "channel": "hands", "data": [{"id": "a"}]}
+        assert table.queue.empty()
+
+        broker.unsubscribe(hands)
+        assert not broker.has_subscribers("hands")
+        assert len(broker) == 1
+
+    asyncio.run(run())
+
+
+def test_slow_subscriber_drops_oldest_events():
+    async def run():
+        broker = HandEventBroker(max_queue=2)
+        subscriber = broker.subscribe(["table:1"])
+        for pot in range(5):
+            broker.publish("table:1", "live_hand", json.dumps({"pot": pot}))
+
+        # Publishing never blocks; the client is told what it missed
+        assert json.loads(await subscriber.next_message()) == {"type": "dropped", "count": 3}
+        remaining = [json.loads(await subscriber.next_message())["data"]["pot"] for _ in range(2)]
+        assert remaining == [3, 4]
+
+    asyncio.run(run())
+
+
+def test_websocket_subscription():
+    app = FastAPI()
+    app.include_router(events.router, prefix="/events")
+    client = TestClient(app)
+
+    with client.websocket_connect("/events/ws?channels=hands") as websocket:
+        assert websocket.receive_json() == {"type": "subscribed", "channels": ["hands"]}
+        websocket.send_json({"subscribe": ["table:3"]})
+        assert websocket.receive_json() == {"type": "subscribed", "channels": ["hands", "table:3"]}
+        websocket.send_json({"subscribe": ["lobby"]})
+        assert websocket.receive_json()["type"] == "error"
+
+        hand_events.publish("table:3", "live_hand", '{"pot":60}')
+        assert websocket.receive_json() == {"type": "live_hand", "channel": "table:3", "data": {"pot": 60}}
+
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect("/events/ws?channels=lobby") as websocket:
+            websocket.receive_json()
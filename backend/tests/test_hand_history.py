@@ -0,0 +1,228 @@
+import asyncio
+import io
+import json
+import pytest
+import tarfile
+import warnings
+from app.models.game import GameStructure
+from app.services.hand_export import HandExporter, PhhExport
+from app.services.hand_history import (
+    HandHistoryError,
+    RecordSplitter,
+    iter_file_lines,
+    iter_records,
+    parse_phh,
+    parse_pokerstars,
+    to_phh,
+)
+from app.services.poker_engine import PokerEngine, _pokerkit_game
+from app.services.settlement_executor import SettlementExecutor
+from app.tools.hand_generator import generate_hands
+
+POKERSTARS_HANDS = """﻿PokerStars Hand #230000000001:  Hold'em No Limit ($0.05/$0.10 USD) - 2021/09/01 12:00:00 ET
+Table 'Alpha' 6-max Seat #2 is the button
+Seat 1: Alice ($10 in chips)
+Seat 2: Bob ($12.50 in chips)
+Seat 3: Carol ($8 in chips)
+Seat 5: Dave ($10 in chips) is sitting out
+Seat 6: Erin ($10 in chips)
+Carol: posts small blind $0.05
+Erin: posts big blind $0.10
+*** HOLE CARDS ***
+Dealt to Alice [Ah Kd]
+Alice: raises $0.20 to $0.30
+Bob: folds
+Carol: calls $0.25
+Erin: folds
+*** FLOP *** [2c 7d Kh]
+Carol: checks
+Alice: bets $0.40
+Carol: calls $0.40
+*** TURN *** [2c 7d Kh] [9s]
+Carol: checks
+Alice: checks
+*** RIVER *** [2c 7d Kh 9s] [3h]
+Carol: bets $1
+Alice: calls $1
+*** SHOW DOWN ***
+Carol: shows [Qc Qd] (a pair of Queens)
+Alice: shows [Ah Kd] (a pair of Kings)
+Alice collected $3.41 from pot
+*** SUMMARY ***
+Total pot $3.50 | Rake $0.09
+Board [2c 7d Kh 9s 3h]
+Seat 1: Alice showed [Ah Kd] and won ($3.41) with a pair of Kings
+
+
+PokerStars Hand #230000000002:  Hold'em No Limit ($0.05/$0.10 USD) - 2021/09/01 12:01:00 ET
+Table 'Alpha' 6-max Seat #3 is the button
+Seat 1: Alice ($11.71 in chips)
+Seat 3: Carol ($6.30 in chips)
+Carol: posts small blind $0.05
+Alice: posts big blind $0.10
+*** HOLE CARDS ***
+Dealt to Alice [7h 7c]
+Carol: raises $0.20 to $0.30
+Alice: folds
+Uncalled bet ($0.20) returned to Carol
+Carol collected $0.20 from pot
+*** SUMMARY ***
+Total pot $0.20 | Rake $0
+
+PokerStars Hand #230000000003:  Omaha Pot Limit ($0.05/$0.10 USD) - 2021/09/01 12:02:00 ET
+Table 'Alpha' 6-max Seat #1 is the button
+"""
+
+
+def test_pokerstars_hands_are_split_and_settled(tmp_path):
+    path = tmp_path / "hands.txt"
+    path.write_text(POKERSTARS_HANDS, encoding="utf-8")
+
+    records = list(iter_records(iter_file_lines(str(path))))
+    assert [format for format, _ in records] == ["pokerstars"] * 3
+
+    hand = parse_pokerstars(records[0][1])
+    # Dave sits out, so Erin (seat 6) is the fourth seat dealt in
+    assert hand.stacks == [1000, 1250, 800, 1000]
+    assert (hand.dealer_index, hand.small_blind_index, hand.big_blind_index) == (1, 2, 3)
+    assert hand.structure == GameStructure(small_blind=5, big_blind=10)
+    assert hand.actions == ["r30", "f", "c", "f", "2c7dKh", "x", "b40", "c", "2c7dKh9s", "x", "x",
+                            "2c7dKh9s3h", "b100", "c"]
+    assert hand.hole_cards == ["AhKd", "", "QcQd", ""]
+    # Settled by our engine: the rake is not taken out
+    assert PokerEngine.settle(hand)[1] == [180, 0, -170, -10]
+
+    heads_up = parse_pokerstars(records[1][1])
+    assert (heads_up.small_blind_index, heads_up.big_blind_index) == (1, 0)
+    assert PokerEngine.settle(heads_up)[1] == [-10, 10]
+
+    with pytest.raises(HandHistoryError, match="no-limit hold'em"):
+        parse_pokerstars(records[2][1])
+
+
+@pytest.mark.parametrize("edit, message", [
+    (lambda text: text.replace("Carol: shows [Qc Qd] (a pair of Queens)\n", ""), "showdown"),
+    (lambda text: text.replace("Erin: posts big blind", "Bob: posts big blind"), "right after"),
+    (lambda text: text.replace("Bob: folds", "Bob: folds\nErin: posts big blind $0.10"), "More than one big blind"),
+    (lambda text: text.replace("$0.40", "$0.405"), "whole number"),
+    (lambda text: text.replace("Carol: bets $1", "Carol: bets"), "without an amount"),
+])
+def test_unsupported_pokerstars_hands_are_rejected(edit, message):
+    text = POKERSTARS_HANDS.lstrip("﻿").split("\n\n\n")[0]
+
+    with pytest.raises(HandHistoryError, match=message):
+        parse_pokerstars(edit(text))
+
+
+def test_phh_hands_settle_like_pokerkit():
+    from pokerkit import HandHistory
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for source in generate_hands(60, seed=11):
+            order = PokerEngine.seat_order(source)
+            game = _pokerkit_game(source.structure)
+            state = game([source.stacks[seat] for seat in order], len(order))
+            PokerEngine._replay(
+                state, PokerEngine.hole_cards_in_order(source, order), source.board,
+                source.actions, [source.stacks[seat] for seat in order]
+            )
+            text = HandHistory.from_game_state(game, state).dumps()
+
+            hand = parse_phh(text)
+            assert hand.structure == source.structure
+            assert PokerEngine.settle(hand)[1] == [source.winnings[seat] for seat in order]
+
+
+def test_phh_sections_are_separate_records():
+    document = (
+        "variant = 'NT'\nantes = [0, 0]\nblinds_or_straddles = [1, 2]\nmin_bet = 2\n"
+        "starting_stacks = [200, 200]\nactions = ['d dh p1 AsAd', 'd dh p2 ????', 'p2 f']\n"
+    )
+    records = list(iter_records(f"[1]\n{document}\n[2]\n{document}".splitlines(keepends=True)))
+
+    assert [format for format, _ in records] == ["phh", "phh"]
+    hand = parse_phh(records[1][1])
+    # Heads-up the first player posts the big blind; the button folds its small blind
+    assert hand.hole_cards == ["AsAd", ""]
+    assert PokerEngine.settle(hand)[1] == [1, -1]
+
+    with pytest.raises(HandHistoryError, match="variant"):
+        parse_phh(document.replace("'NT'", "'FL'"))
+
+
+def test_unexpected_parser_errors_fail_only_their_record(monkeypatch):
+    from app.services import hand_import
+
+    def parse_record(format, text):
+        if "boom" in text:
+            raise AttributeError("'NoneType' object has no attribute 'strip'")
+        return parse_pokerstars(text)
+
+    monkeypatch.setattr(hand_import, "parse_record", parse_record)
+    text = POKERSTARS_HANDS.lstrip("\ufeff").split("\n\n\n")[0]
+    parsed = hand_import._parse_batch([(0, "pokerstars", "boom"), (1, "pokerstars", text)])
+
+    assert "AttributeError" in parsed[0][1]
+    assert parsed[1][1].stacks == [1000, 1250, 800, 1000]
+
+
+def test_unknown_formats_are_rejected():
+    with pytest.raises(HandHistoryError, match="Unrecognized"):
+        RecordSplitter().feed("Full Tilt Poker Game #1\n")
+    with pytest.raises(HandHistoryError, match="Unknown hand history format"):
+        RecordSplitter("ipoker")
+
+
+def test_exported_phh_replays_to_stored_winnings():
+    from pokerkit import HandHistory
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for hand in generate_hands(150, seed=9):
+            document = to_phh(hand)
+
+            # pokerkit replays the document to the same result...
+            *_, state = HandHistory.loads(document)
+            order = PokerEngine.seat_order(hand)
+            assert [final - start for final, start in zip(state.stacks, state.starting_stacks)] == \
+                [hand.winnings[seat] for seat in order]
+
+            # ...and importing it again restores the seats
+            imported = parse_phh(document)
+            assert imported.stacks == hand.stacks
+            assert imported.hole_cards == hand.hole_cards
+            assert (imported.small_blind_index, imported.big_blind_index) == (hand.small_blind_index, hand.big_blind_index)
+            assert PokerEngine.settle(imported)[1] == hand.winnings
+
+
+def test_illegal_actions_cannot_be_exported():
+    hand = next(iter(generate_hands(1, seed=4)))
+    hand.actions = ["r"]
+
+    with pytest.raises(HandHistoryError, match="cannot be replayed"):
+        to_phh(hand)
+
+
+def test_phh_tarball_reports_mismatched_winnings():
+    hands = list(generate_hands(30, seed=2))
+    hands[3].winnings = [-winnings for winnings in hands[3].winnings]
+    hands[5].actions = ["r"]
+
+    async def batches():
+        for i in range(0, len(hands), 8):
+            yield hands[i:i + 8]
+
+    async def export():
+        phh_export = PhhExport(batches(), verify=True, executor=SettlementExecutor(0))
+        return phh_export, b"".join([chunk async for chunk in HandExporter.aiter_phh_tar(phh_export)])
+
+    phh_export, data = asyncio.run(export())
+    assert (phh_export.exported, phh_export.failed, phh_export.mismatched) == (29, 1, 1)
+    with tarfile.open(fileobj=io.BytesIO(data), mode="r:gz") as archive:
+        names = archive.getnames()
+        report = [json.loads(line) for line in archive.extractfile("report.ndjson")]
+        document = archive.extractfile(f"hands/{hands[0].id}.phh").read().decode()
+    assert len(names) == 30
+    assert document == to_phh(hands[0])
+    assert [(row["id"], row.get("mismatch")) for row in report] == [(hands[3].id, True), (hands[5].id, None)]
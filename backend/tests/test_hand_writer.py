@@ -0,0 +1,115 @@
+import asyncio
+import pytest
+from app.core.embedded_db import SQLiteDatabaseManager
+from app.models.hand import PokerHand
+from app.repositories.embedded_hand_repository import AsyncEmbeddedHandRepository, EmbeddedHandRepository
+from app.services.hand_writer import HandWriter
+
+
+@pytest.fixture
+def repository(tmp_path):
+    db_manager = SQLiteDatabaseManager(str(tmp_path / "poker.sqlite3"))
+    db_manager.init_db()
+    yield AsyncEmbeddedHandRepository(EmbeddedHandRepository(db_manager))
+    db_manager.close_pool()
+
+
+def folded_hand() -> PokerHand:
+    return PokerHand(
+        stacks=[1000, 1000],
+        dealer_index=0,
+        small_blind_index=0,
+        big_blind_index=1,
+        actions=["f"],
+        hole_cards=["2c3d", "AsAd"],
+        winnings=[-10, 10]
+    )
+
+
+class FailingRepository:
+    """Rejects saves of the hands in ``bad_ids``"""
+
+    def __init__(self, repository, bad_ids):
+        self.repository = repository
+        self.bad_ids = bad_ids
+
+    async def save(self, hand):
+        return await self.save_many([hand])
+
+    async def save_many(self, hands):
+        if any(hand.id in self.bad_ids for hand in hands):
+            raise RuntimeError("rejected")
+        return await self.repository.save_many(hands)
+
+
+def test_flush_mode_group_commits_concurrent_saves(repository):
+    writer = HandWriter("flush", max_batch=20, max_delay_ms=50, queue_size=100)
+
+    async def run():
+        writer.start(repository)
+        saved = await asyncio.gather(*(writer.save(folded_hand(), repository) for _ in range(50)))
+        await writer.stop()
+        return saved
+
+    saved = asyncio.run(run())
+    assert all(hand.created_at is not None for hand in saved)
+    assert len(asyncio.run(repository.get_all())) == 50
+    stats = writer.stats()
+    assert stats["hands_written"] == 50
+    assert stats["commits"] <= 5
+    assert stats["largest_commit"] == 20
+
+
+def test_enqueue_mode_acknowledges_before_commit_and_drains_on_stop(repository):
+    writer = HandWriter("enqueue", max_batch=500, max_delay_ms=10_000, queue_size=100)
+
+    async def run():
+        writer.start(repository)
+        hands = [await writer.save(folded_hand(), repository) for _ in range(10)]
+        queued = [writer.pending(hand.id) for hand in hands]
+        stored_before = await repository.get_all()
+        await writer.stop()
+        return hands, queued, stored_before
+
+    hands, queued, stored_before = asyncio.run(run())
+    assert queued == hands
+    assert stored_before == []
+    assert sorted(hand.id for hand in asyncio.run(repository.get_all())) == sorted(hand.id for hand in hands)
+    assert writer.pending(hands[0].id) is None
+    assert writer.stats()["commits"] == 1
+
+
+def test_bad_hand_fails_alone(repository):
+    bad = folded_hand()
+    writer = HandWriter("flush", max_batch=10, max_delay_ms=50, queue_size=100)
+
+    async def run():
+        writer.start(FailingRepository(repository, {bad.id}))
+        good = [folded_hand() for _ in range(4)]
+        results = await asyncio.gather(
+            *(writer.save(hand, repository) for hand in [*good, bad]), return_exceptions=True
+        )
+        await writer.stop()
+        return good, results
+
+    good, results = asyncio.run(run())
+    assert isinstance(results[-1], RuntimeError)
+    assert results[:-1] == good
+    assert len(asyncio.run(repository.get_all())) == 4
+    assert writer.stats()["failed"] == 1
+
+
+def test_direct_mode_and_stopped_writer_save_in_the_request(repository):
+    writer = HandWriter("direct", max_batch=10, max_delay_ms=5, queue_size=10)
+
+    async def run():
+        writer.start(repository)
+        return await writer.save(folded_hand(), repository)
+
+    hand = asyncio.run(run())
+    assert hand.created_at is not None
+    assert not writer.running
+    assert writer.stats()["commits"] == 0
+
+    with pytest.raises(ValueError):
+        HandWriter("later", max_batch=10, max_delay_ms=5, queue_size=10)
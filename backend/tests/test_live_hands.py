@@ -0,0 +1,90 @@
+import pytest
+
+from app.models.game import GameStructure
+from app.models.hand import PokerHand
+from app.services.live_hands import LiveHandError, LiveHandRegistry
+from app.services.poker_engine import PokerEngine
+
+
+def open_hand(registry, **fields):
+    hand = PokerHand(stacks=[1000, 1000, 1000], hole_cards=["AsAd", "KhKd", "7c2d"], **fields)
+    return registry.open(hand)
+
+
+def test_live_hand_matches_replay():
+    """Applying actions one request at a time settles like a full replay"""
+    registry = LiveHandRegistry(max_hands=10, ttl_seconds=60)
+    live = open_hand(registry)
+    for actions in (["c", "c", "x"], ["Ah7d2c", "b100", "c", "c"], ["Ah7d2cKs", "x", "x", "x"], ["Ah7d2cKs9h", "b200", "f"]):
+        assert not live.finished
+        live.apply(actions)
+    live.apply(["c"])
+    assert live.finished
+    live.finish()
+
+    hand = live.hand
+    expected = PokerEngine.calculate_winnings(hand.hole_cards, hand.board, hand.actions, hand.stacks)
+    assert hand.winnings == expected[1]
+    assert hand.board == "Ah7d2cKs9h"
+
+
+def test_rejected_actions_leave_the_hand_unchanged():
+    registry = LiveHandRegistry(max_hands=10, ttl_seconds=60)
+    live = open_hand(registry, actions=["c"])
+    before = live.snapshot()
+
+    # The first action is legal, the second is not: neither is applied
+    with pytest.raises(LiveHandError, match="Action 1"):
+        live.apply(["c", "f"])
+    assert live.snapshot() == before
+
+    with pytest.raises(LiveHandError, match="does not continue"):
+        live.apply(["c", "x", "Ah7d2cKs"])
+    with pytest.raises(LiveHandError, match="Unrecognized"):
+        live.apply(["call"])
+    assert live.snapshot() == before
+
+
+def test_rejected_board_is_rolled_back():
+    registry = LiveHandRegistry(max_hands=10, ttl_seconds=60)
+    live = open_hand(registry, actions=["c", "c", "x"])
+
+    with pytest.raises(LiveHandError, match="Action 1"):
+        live.apply(["2c3d4h", "b99999"])
+    assert live.hand.board == ""
+
+    # The flop can be dealt again and the hand played out
+    live.apply(["2c3d4h", "x", "x", "x", "2c3d4h5s", "x", "x", "x", "2c3d4h5s9c", "x", "x", "x"])
+    assert live.finished
+
+
+def test_registry_limits_and_expiry():
+    registry = LiveHandRegistry(max_hands=1, ttl_seconds=60)
+    live = open_hand(registry)
+    with pytest.raises(LiveHandError, match="Too many"):
+        open_hand(registry)
+
+    registry.ttl_seconds = -1
+    assert registry.get(live.hand.id) is None
+    assert registry.stats() == {"open": 0, "opened": 1, "finished": 0, "expired": 1}
+
+
+def test_live_hand_reports_by_seat():
+    """With a structure the blinds follow the position indices, and results are by seat"""
+    registry = LiveHandRegistry(max_hands=10, ttl_seconds=60)
+    hand = PokerHand(
+        stacks=[1000, 1000, 1000],
+        dealer_index=1,
+        small_blind_index=2,
+        big_blind_index=0,
+        hole_cards=["AsAd", "KhKd", "7c2d"],
+        structure=GameStructure(small_blind=10, big_blind=20, ante=5)
+    )
+    live = registry.open(hand)
+    snapshot = live.snapshot()
+    assert snapshot["bets"] == [20, 0, 10]
+    assert snapshot["actor_index"] == 1
+
+    live.apply(["f", "f"])
+    live.finish()
+    assert live.hand.winnings == PokerEngine.settle(live.hand)[1] == [20, -5, -15]
@@ -0,0 +1,48 @@
+from app.core.metrics import (
+    MetricsRegistry,
+    apply_counter_deltas,
+    counter_deltas,
+    counter_snapshot,
+    ENGINE_FALLBACKS,
+)
+
+
+def test_histogram_exposition():
+    """Buckets are cumulative and end with +Inf, followed by sum and count"""
+    registry = MetricsRegistry()
+    histogram = registry.histogram("test_seconds", "Test latency", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.labels("query").observe(value)
+
+    lines = registry.render().splitlines()
+    assert lines[:2] == ["# HELP test_seconds Test latency", "# TYPE test_seconds histogram"]
+    assert 'test_seconds_bucket{stage="query",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{stage="query",le="1"} 2' in lines
+    assert 'test_seconds_bucket{stage="query",le="+Inf"} 3' in lines
+    assert 'test_seconds_sum{stage="query"} 5.55' in lines
+    assert 'test_seconds_count{stage="query"} 3' in lines
+
+
+def test_counter_and_gauge_exposition():
+    registry = MetricsRegistry()
+    counter = registry.counter("test_total", "Test counter", ("reason",))
+    counter.labels("a").inc()
+    counter.labels("a").inc(2)
+    registry.gauge("test_gauge", "Test gauge", ("pool", "state")).set_function(
+        lambda: {("async", "idle"): 4}
+    )
+
+    text = registry.render()
+    assert 'test_total{reason="a"} 3' in text
+    assert 'test_gauge{pool="async",state="idle"} 4' in text
+
+
+def test_counter_deltas_round_trip():
+    """Counter increments made in a worker can be replayed in the parent"""
+    before = counter_snapshot()
+    ENGINE_FALLBACKS.labels("unsupported").inc()
+    deltas = counter_deltas(before)
+    assert deltas == {("poker_engine_fallbacks_total", ("unsupported",)): 1.0}
+
+    apply_counter_deltas(deltas)
+    assert counter_deltas(before) == {("poker_engine_fallbacks_total", ("unsupported",)): 2.0}
@@ -0,0 +1,74 @@
+from app.models.hand import PokerHand
+from app.services.player_stats import STAT_COLUMNS, hand_player_stats, stat_deltas, summarize
+from app.services.poker_engine import PokerEngine
+
+
+def settled_hand(**fields) -> PokerHand:
+    hand = PokerHand(**fields)
+    hand.winnings = PokerEngine.calculate_winnings(hand.hole_cards, hand.board, hand.actions, hand.stacks)[1]
+    return hand
+
+
+def stats_by_name(hand: PokerHand):
+    return [dict(zip(STAT_COLUMNS, row)) for row in hand_player_stats(hand)]
+
+
+def test_three_bet_pot_to_showdown():
+    # Seat 4 opens, seat 5 three-bets and seat 4 calls; they check down the turn
+    # and seat 5 calls a river bet into seat 4's flopped two pair
+    hand = settled_hand(
+        stacks=[1000] * 6,
+        actions=["f", "f", "r100", "r300", "f", "f", "c", "Ah7d2c", "b200", "c",
+                 "Ah7d2cKs", "x", "x", "Ah7d2cKs9h", "b400", "c"],
+        hole_cards=["AsKd", "QhQc", "JcJd", "2s3s", "9c9d", "TcTd"],
+        board="Ah7d2cKs9h"
+    )
+    stats = stats_by_name(hand)
+
+    assert stats[2] == dict.fromkeys(STAT_COLUMNS, 0)
+    assert stats[4] == {
+        "vpip": 1, "pfr": 1, "three_bet_chances": 0, "three_bets": 0,
+        "aggressive_actions": 2, "calls": 0, "showdowns": 1, "showdowns_won": 1,
+    }
+    assert stats[5] == {
+        "vpip": 1, "pfr": 1, "three_bet_chances": 1, "three_bets": 1,
+        "aggressive_actions": 0, "calls": 2, "showdowns": 1, "showdowns_won": 0,
+    }
+    # The blinds fold to a three-bet, which is not a three-bet chance
+    assert stats[0] == dict.fromkeys(STAT_COLUMNS, 0)
+
+
+def test_blind_walk_and_unknown_cards():
+    """Checking the big blind is not voluntary; hole cards are not needed"""
+    # Heads-up seat 1 posts the small blind and acts first pre-flop
+    hand = settled_hand(stacks=[1000, 1000], actions=["f"], hole_cards=["", ""])
+    assert hand_player_stats(hand) == [(0,) * len(STAT_COLUMNS)] * 2
+
+    hand = settled_hand(stacks=[1000, 1000], actions=["c", "x", "2c7h9d", "b40", "f"], hole_cards=["AsAd", ""])
+    big_blind, small_blind = stats_by_name(hand)
+    assert big_blind["vpip"] == 0 and big_blind["aggressive_actions"] == 1
+    assert small_blind["vpip"] == 1 and small_blind["showdowns"] == 0
+
+
+def test_stat_deltas_replace_previous_rows():
+    old = [(0, -40, 0, 0, 0, 0, 0, 0, 0, 0), (1, 40, 1, 1, 0, 0, 0, 0, 0, 0), (2, 0, *[None] * 8)]
+    new = [(0, 100, 1, 0, 0, 0, 1, 0, 1, 1), (1, -100, 1, 1, 0, 0, 0, 1, 1, 0), (2, 0, 0, 0, 0, 0, 0, 0, 0, 0)]
+    # Seat 2 was never counted before, so it gains a hand; seat 0 only changes its counts
+    assert stat_deltas(old, new) == [
+        (0, 0, 1, 0, 0, 0, 1, 0, 1, 1, 140),
+        (1, 0, 0, 0, 0, 0, 0, 1, 1, 0, -140),
+        (2, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0),
+    ]
+    assert stat_deltas(new, new) == []
+
+
+def test_summarize_rates():
+    totals = dict(zip(STAT_COLUMNS, (25, 10, 20, 2, 30, 10, 8, 5)), hands=100, net_winnings=-250)
+    summary = summarize(3, totals)
+    assert (summary["vpip"], summary["pfr"], summary["three_bet"]) == (25.0, 10.0, 10.0)
+    assert summary["aggression_factor"] == 3.0
+    assert summary["showdown_win_rate"] == 62.5
+    assert summary["net_winnings"] == -250
+
+    empty = summarize(7, None)
+    assert empty["hands"] == 0 and empty["vpip"] is None
@@ -0,0 +1,179 @@
+import mmap
+import random
+
+import pytest
+from pokerkit import StandardHighHand
+
+from app.models.game import GameStructure
+from app.models.hand import PokerHand
+from app.services.action_compiler import OP_CALL, OP_DEAL, OP_RAISE, ActionSyntaxError, compile_actions, deal_cards
+from app.services.hand_evaluator import RankTableError, RankTables, decode_card, evaluate, evaluate_naive, get_rank_tables
+from app.services.poker_engine import PokerEngine, _pokerkit_game
+
+
+HANDS = [
+    # Heads-up check down
+    (["AsAd", "KsKd"], "2c7h9dJcQs", ["c", "x", "2c7h9d", "x", "x", "2c7h9dJc", "x", "x", "2c7h9dJcQs", "x", "x"], [1000, 1000]),
+    # Fold to a raise; uncalled raise is returned
+    (["AsKd", "2h3c", "7c7d"], "", ["r200", "f", "f"], [1000, 1000, 1000]),
+    # Pre-flop all-in with a side pot
+    (["AsAd", "KsKd", "QsQd"], "2c3h4d9cTh", ["allin", "c", "c", "2c3h4d", "2c3h4d9c", "2c3h4d9cTh"], [300, 1000, 1000]),
+    # Split pot on the board
+    (["2c3d", "2h3s", "4c5d"], "AhKhQhJhTh", ["c", "c", "x", "AhKhQh", "x", "x", "x", "AhKhQhJh", "x", "x", "x", "AhKhQhJhTh", "x", "x", "x"], [1000, 1000, 1000]),
+    # Unfinished hand: stacks reflect chips still in front
+    (["AsKd", "2h3c", "7c7d", "9s9h"], "", ["c", "r120"], [1000, 1000, 1000, 1000]),
+    # Illegal fold with nothing to call
+    (["AsKd", "2h3c"], "", ["c", "f"], [1000, 1000]),
+    # Missing hole cards
+    (["AsKd", ""], "", ["c", "x"], [1000, 1000]),
+    # Folded out on the flop with the whole board recorded
+    (["AsKd", "2h3c", "7c7d"], "Ah2s3d4c5h", ["c", "c", "x", "Ah2s3d", "b100", "f", "f"], [1000, 1000, 1000]),
+    # All-in on the turn: the river is run out from the board
+    (["AsKd", "2h3c", "7c7d"], "Ah2s3d7s5h", ["c", "c", "x", "Ah2s3d", "x", "x", "x", "Ah2s3d7s", "allin", "c", "f"], [1000, 1000, 1000]),
+]
+
+
+@pytest.mark.parametrize("hole_cards,board,actions,stacks", HANDS)
+def test_fast_engine_matches_pokerkit(hole_cards, board, actions, stacks):
+    """The fast engine settles every hand exactly like the pokerkit replay"""
+    expected = PokerEngine.calculate_winnings_pokerkit(hole_cards, board, actions, stacks)
+    assert PokerEngine.calculate_winnings(hole_cards, board, actions, stacks) == (list(expected[0]), list(expected[1]))
+
+
+STRUCTURED_HANDS = [
+    # Antes and a straddle: the seat after the straddle opens
+    (GameStructure(small_blind=25, big_blind=50, ante=10, straddles=(100,)),
+     ["AsAd", "KsKd", "QsQd", "JsJd"], "2c3h4d9cTh", ["r300", "f", "f", "c", "2c3h4d", "b200", "c", "2c3h4d9c", "x", "x", "2c3h4d9cTh", "x", "x"],
+     [1000, 1000, 1000, 1000]),
+    # Ante puts a short stack all-in: only pokerkit models it
+    (GameStructure(ante=50), ["AsAd", "KsKd", "QsQd"], "2c3h4d9cTh",
+     ["c", "x", "2c3h4d", "x", "x", "2c3h4d9c", "x", "x", "2c3h4d9cTh", "x", "x"], [50, 1000, 1000]),
+    # A minimum bet above the big blind
+    (GameStructure(small_blind=5, big_blind=10, min_bet=40), ["AsKd", "2h3c"], "", ["c", "x", "7c8d9h", "b40", "r80", "f"], [500, 500]),
+]
+
+
+@pytest.mark.parametrize("structure,hole_cards,board,actions,stacks", STRUCTURED_HANDS)
+def test_fast_engine_matches_pokerkit_with_structure(structure, hole_cards, board, actions, stacks):
+    expected = PokerEngine.calculate_winnings_pokerkit(hole_cards, board, actions, stacks, structure)
+    assert any(expected[1])
+    assert PokerEngine.calculate_winnings(hole_cards, board, actions, stacks, structure) == (list(expected[0]), list(expected[1]))
+
+
+def test_settle_honors_positions():
+    """Seats are handed to the engine starting from the small blind"""
+    hand = PokerHand(
+        stacks=[1000, 1000, 1000],
+        dealer_index=1,
+        small_blind_index=2,
+        big_blind_index=0,
+        actions=["f", "f"],
+        hole_cards=["AsAd", "KsKd", "2c3d"],
+        structure=GameStructure(small_blind=10, big_blind=20)
+    )
+    # The button (seat 1) and then the small blind (seat 2) fold to the big blind
+    assert PokerEngine.settle(hand) == ([1010, 1000, 990], [10, 0, -10])
+
+    # Without a structure the hand keeps the old seat-0-posts-first settlement
+    hand.structure = None
+    assert PokerEngine.settle(hand)[1] == [-20, 20, 0]
+
+
+def test_game_definitions_are_cached_per_structure():
+    structure = GameStructure(small_blind=50, big_blind=100, ante=25)
+    PokerEngine.create_pokerkit_state([1000, 1000], structure)
+    misses = _pokerkit_game.cache_info().misses
+    PokerEngine.create_pokerkit_state([2000, 500, 700], GameStructure(small_blind=50, big_blind=100, ante=25))
+    assert _pokerkit_game.cache_info().misses == misses
+
+
+def test_fast_engine_falls_back_for_unknown_cards():
+    """Hands the fast engine does not model are settled by pokerkit"""
+    hand = (["AsKd", "????"], "", ["r200", "f"], [1000, 1000])
+    assert PokerEngine.calculate_winnings(*hand) == PokerEngine.calculate_winnings_pokerkit(*hand)
+
+
+def test_actions_compile_to_instructions():
+    program = compile_actions(["c", " raise to 300", "", "Ah2s3d", "Ah2s3d4c"])
+
+    assert list(program) == [(OP_CALL, 0), (OP_RAISE, 300), (OP_DEAL, program.code[5]), (OP_DEAL, program.code[7])]
+    assert [deal_cards(operand) for op, operand in program if op == OP_DEAL] == ["Ah2s3d", "4c"]
+    assert program.board == "Ah2s3d4c"
+    assert PokerEngine.format_action_sequence(["c", "bet 40", "b", "Ah2s3d", "Ah2s3d4c"]) == "c b40 b Ah2s3d Ah2s3d4c"
+
+
+@pytest.mark.parametrize("actions,index,message", [
+    (["c", "r"], 1, "has no amount"),
+    (["c", "x", "Ah2s"], 2, "not an action"),
+    (["c", "x", "Ah2s3x"], 2, "not an action"),
+    # A sixth card repeating the river is not a deal
+    (["c", "2c3d4h", "2c3d4h5s", "2c3d4h5s6s", "2c3d4h5s6s7s"], 4, "not an action"),
+])
+def test_unreadable_actions_are_reported_by_token(actions, index, message):
+    with pytest.raises(ActionSyntaxError, match=message) as error:
+        compile_actions(actions)
+    assert (error.value.index, error.value.token) == (index, actions[index])
+    # Settlement fails the same way on either engine
+    hand = (["AsKd", "2h3c"], "", actions, [1000, 1000])
+    assert PokerEngine.calculate_winnings(*hand) == ([1000, 1000], [0, 0])
+    assert PokerEngine.calculate_winnings_pokerkit(*hand) == ([1000, 1000], [0, 0])
+
+
+def test_recorded_board_is_dealt_only_while_the_hand_runs():
+    stacks = [1000, 1000, 1000]
+    folded_on_flop = (["AsKd", "2h3c", "7c7d"], "Ah2s3d4c5h", ["c", "c", "x", "Ah2s3d", "b100", "f", "f"], stacks)
+    assert PokerEngine.calculate_winnings(*folded_on_flop)[1] == [80, -40, -40]
+
+    all_in_on_turn = (["AsKd", "2h3c", "7c7d"], "Ah2s3d7s5h",
+                      ["c", "c", "x", "Ah2s3d", "x", "x", "x", "Ah2s3d7s", "allin", "c", "f"], stacks)
+    assert PokerEngine.calculate_winnings(*all_in_on_turn)[1] == [-1000, 1040, -40]
+
+
+def test_evaluator_matches_reference():
+    """Lookup-table evaluation agrees with the naive evaluator and pokerkit"""
+    rng = random.Random(7)
+    for _ in range(500):
+        cards = rng.sample(range(52), 9)
+        board, first, second = cards[:5], cards[5:7], cards[7:]
+        assert evaluate(first + board) == evaluate_naive(first + board)
+
+        text = lambda cs: ''.join(decode_card(c) for c in cs)
+        first_hand = StandardHighHand.from_game(text(first), text(board))
+        second_hand = StandardHighHand.from_game(text(second), text(board))
+        first_value, second_value = evaluate(first + board), evaluate(second + board)
+        assert (first_value > second_value) == (first_hand > second_hand)
+        assert (first_value == second_value) == (first_hand == second_hand)
+
+
+def test_rank_table_file_round_trip(tmp_path):
+    """Mapped tables hold exactly what was written"""
+    path = tmp_path / "rank_tables.bin"
+    built = get_rank_tables()
+    RankTables(built.rank_values, built.flush_values).write(path)
+
+    loaded = RankTables.load(path)
+    assert loaded.rank_values == built.rank_values
+    assert list(loaded.flush_values) == list(built.flush_values)
+    assert loaded.sorted_keys.tolist() == sorted(built.rank_values)
+
+
+@pytest.mark.parametrize("offset,message", [(-1, "checksum"), (0, "not a rank table"), (8, "version")])
+def test_rank_table_file_rejects_corruption(tmp_path, monkeypatch, offset, message):
+    path = tmp_path / "rank_tables.bin"
+    get_rank_tables().write(path)
+    data = bytearray(path.read_bytes())
+    data[offset] ^= 1
+    path.write_bytes(bytes(data))
+    mappings = []
+    real_mmap = mmap.mmap
+
+    def recording_mmap(*args, **kwargs):
+        mappings.append(real_mmap(*args, **kwargs))
+        return mappings[-1]
+
+    monkeypatch.setattr(mmap, "mmap", recording_mmap)
+
+    with pytest.raises(RankTableError, match=message):
+        RankTables.load(path)
+    # A rejected file is not left mapped
+    assert [mapping.closed for mapping in mappings] == [True]
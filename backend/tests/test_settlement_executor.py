@@ -0,0 +1,41 @@
+import asyncio
+import os
+import signal
+
+import pytest
+
+from app.services.settlement_executor import SettlementExecutor, SettlementUnavailableError
+from app.tools.hand_generator import generate_hands
+
+# Workers are killed to break the pool
+pytestmark = pytest.mark.skipif(not hasattr(signal, "SIGKILL"), reason="needs SIGKILL")
+
+
+def test_broken_pool_is_replaced():
+    executor = SettlementExecutor(1, "fork")
+    hands = list(generate_hands(4, seed=5))
+    expected = [list(hand.winnings) for hand in hands]
+    try:
+        executor.start()
+        for pid in list(executor._pool._processes):
+            os.kill(pid, signal.SIGKILL)
+
+        asyncio.run(executor.settle_hands(hands))
+        assert [hand.winnings for hand in hands] == expected
+        assert executor.stats()["restarts"] == 1
+    finally:
+        executor.shutdown()
+
+
+def test_pool_that_cannot_restart_is_unavailable(monkeypatch):
+    executor = SettlementExecutor(1, "fork")
+    try:
+        executor.start()
+        for pid in list(executor._pool._processes):
+            os.kill(pid, signal.SIGKILL)
+        monkeypatch.setattr(executor, "start", lambda: (_ for _ in ()).throw(OSError("no processes left")))
+
+        with pytest.raises(SettlementUnavailableError, match="could not be restarted"):
+            asyncio.run(executor.settle_hands(list(generate_hands(2, seed=5))))
+    finally:
+        executor.shutdown()
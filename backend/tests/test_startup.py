@@ -0,0 +1,30 @@
+import json
+import os
+import subprocess
+import sys
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SCRIPT = """
+import json, sys
+import app.main
+from app.core.db import db_manager
+print(json.dumps({
+    "modules": sorted(name for name in ("pokerkit", "numpy", "duckdb") if name in sys.modules),
+    "pool_open": db_manager._pool is not None,
+}))
+"""
+
+
+def test_importing_the_app_is_quiet_and_lazy():
+    env = {key: value for key, value in os.environ.items() if key != "DB_PORT"}
+    env["PYTHONPATH"] = BACKEND
+    completed = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT], env=env, cwd=BACKEND,
+        capture_output=True, text=True, check=True, timeout=60
+    )
+
+    # Only the script's own line: config no longer prints the environment
+    lines = completed.stdout.strip().splitlines()
+    assert len(lines) == 1
+    assert json.loads(lines[0]) == {"modules": [], "pool_open": False}
@@ -5,7 +5,7 @@ import { useState, useEffect } from 'react';
 import { Card, CardContent, CardHeader, CardTitle } from './ui/card';
 import { Button } from './ui/button';
 import { HandHistory as HandHistoryType } from '../types/game';
-import { getHands } from '../utils/api';
+import { getHands, subscribeToHands } from '../utils/api';
 import { formatCards } from '../utils/cardUtils';
 import { RefreshCw } from 'lucide-react';
 
@@ -39,6 +39,16 @@ export function HandHistory() {
 
   useEffect(() => {
     loadHands();
+    // New hands arrive as pushes instead of re-fetching the whole history
+    return subscribeToHands({
+      onHandsSaved: (saved) => {
+        setHands((current) => {
+          const known = new Set(current.map((hand) => hand.id));
+          return [...saved.filter((hand) => !known.has(hand.id)).reverse(), ...current];
+        });
+      },
+      onResync: loadHands,
+    });
   }, []);
 
   const formatHandHistory = (hand: HandHistoryType) => {
@@ -112,4 +112,48 @@ export async function getHand(handId: string): Promise<HandHistory> {
     console.error('Fetch error in getHand:', error);
     throw error;
   }
-}
\ No newline at end of file
+}
+
+// WebSocket pushes go straight to the backend: Next.js API routes cannot proxy them
+const EVENTS_URL = process.env.NEXT_PUBLIC_EVENTS_URL || 'ws://localhost:8000/api/v1/events/ws';
+
+export interface HandEventHandlers {
+  onHandsSaved: (hands: HandHistory[]) => void;
+  // Events were dropped because this client fell behind: reload over REST
+  onResync: () => void;
+}
+
+export function subscribeToHands(handlers: HandEventHandlers): () => void {
+  let socket: WebSocket | null = null;
+  let retryTimer: ReturnType<typeof setTimeout> | undefined;
+  let closed = false;
+
+  const connect = () => {
+    socket = new WebSocket(`${EVENTS_URL}?channels=hands`);
+    socket.onmessage = (event) => {
+      const message = JSON.parse(event.data);
+      if (message.type === 'hands_saved') {
+        handlers.onHandsSaved(message.data);
+      } else if (message.type === 'dropped') {
+        console.warn('Hand events dropped, reloading history:', message.count);
+        handlers.onResync();
+      }
+    };
+    socket.onclose = () => {
+      if (!closed) {
+        // Hands saved while disconnected are picked up by the resync
+        retryTimer = setTimeout(() => {
+          connect();
+          handlers.onResync();
+        }, 2000);
+      }
+    };
+  };
+
+  connect();
+  return () => {
+    closed = true;
+    clearTimeout(retryTimer);
+    socket?.close();
+  };
+}